@@ -6,16 +6,283 @@ Provides all database operations for agents with proper error handling and loggi
 
 import os
 import json
+import time
+import sqlite3
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterable, Set
 from azure.cosmos import CosmosClient, PartitionKey
-from azure.cosmos.exceptions import CosmosResourceNotFoundError, CosmosResourceExistsError
+from azure.cosmos.aio import CosmosClient as AsyncCosmosClient
+from azure.cosmos.exceptions import CosmosResourceNotFoundError, CosmosResourceExistsError, CosmosHttpResponseError
+from azure.core import MatchConditions
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Materialized statistics document (kept in its own container so message queries never see it)
+STATS_DOC_ID = 'message-statistics'
+STATS_PARTITION_KEY = 'stats'
+# Messages sync_statistics has counted, one marker per message id, next to the statistics document
+COUNTED_PARTITION_PREFIX = 'counted:'
+
+# Dimensions counted by get_message_statistics: name -> (message field, default for missing values)
+STATS_DIMENSIONS = {
+    'by_type': ('type', 'UNKNOWN'),
+    'by_agent': ('from', 'UNKNOWN'),
+    'by_month': ('partitionKey', 'UNKNOWN'),
+    'by_priority': ('priority', 'medium'),
+}
+
+
+def _stats_key(value: Any, default: str) -> str:
+    """Statistics bucket for a field value (missing values count under the dimension's default)"""
+    return value if isinstance(value, str) else default if value is None else json.dumps(value)
+
+
+class RequestUnitThrottle:
+    """Shared RU budget and 429 back-off for concurrent async writers"""
+    
+    def __init__(self, ru_per_second: Optional[float] = None):
+        self.ru_per_second = ru_per_second
+        self.allowance = ru_per_second or 0.0
+        self.last_check = time.monotonic()
+        self.paused_until = 0.0
+        self.total_charge = 0.0
+        self.throttled = 0
+    
+    async def wait(self):
+        """Wait until a retry-after window has passed and the RU budget allows a request"""
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            if self.ru_per_second:
+                self.allowance = min(self.ru_per_second, self.allowance + (now - self.last_check) * self.ru_per_second)
+                self.last_check = now
+                if self.allowance < 0:
+                    await asyncio.sleep(-self.allowance / self.ru_per_second)
+                    continue
+            return
+    
+    def charge(self, headers: Dict[str, str]):
+        """Record the RU charge from a response's headers"""
+        charge = float(headers.get('x-ms-request-charge', 0) or 0)
+        self.total_charge += charge
+        self.allowance -= charge
+    
+    def back_off(self, error: CosmosHttpResponseError) -> float:
+        """Pause every writer for the 429's retry-after; returns the delay in seconds"""
+        retry_after_ms = float(error.headers.get('x-ms-retry-after-ms', 1000) or 1000)
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after_ms / 1000)
+        self.throttled += 1
+        return retry_after_ms / 1000
+
+# === INBOX PROJECTION ===
+#
+# One entry per (recipient, message), partitioned by recipient, so inbox,
+# stale-message and requires-response lookups are single-partition range reads
+# instead of cross-partition `to = @agent OR ARRAY_CONTAINS(to, @agent)` scans.
+# CosmosDBManager.sync_inbox keeps it current from the messages change feed.
+
+INBOX_CHECKPOINT_ID = '_checkpoint'
+
+# Seconds without a sync after which inbox lookups go back to the messages container
+INBOX_MAX_STALENESS = float(os.getenv('COSMOS_INBOX_MAX_STALENESS', 300))
+
+# Seconds between re-reads of the projection's checkpoint
+INBOX_CHECK_INTERVAL = 30.0
+COSMOS_SYSTEM_FIELDS = ('_rid', '_self', '_etag', '_attachments', '_ts', '_lsn')
+
+
+def inbox_entries(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Projection entries for a message, one per recipient in its 'to' field (string or array)"""
+    recipients = message.get('to')
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    if not recipients or message.get('type') == 'HEALTH_CHECK':
+        return []
+    
+    body = {key: value for key, value in message.items() if key not in COSMOS_SYSTEM_FIELDS}
+    entries = []
+    for recipient in dict.fromkeys(r for r in recipients if isinstance(r, str) and r):
+        entries.append({
+            **body,
+            'id': f"{recipient}|{message['id']}",
+            'recipient': recipient,
+            'messageId': message['id'],
+        })
+    return entries
+
+
+def _entry_to_message(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a projection entry back into the message shape callers expect"""
+    message = {key: value for key, value in entry.items() if key not in COSMOS_SYSTEM_FIELDS}
+    message['id'] = message.pop('messageId')
+    message.pop('recipient', None)
+    return message
+
+
+class CosmosInboxStore:
+    """Inbox projection in a Cosmos DB container partitioned by /recipient"""
+    
+    def __init__(self, container):
+        self.container = container
+        self.last_query_charge = 0.0
+    
+    @classmethod
+    def create(cls, database, container_name: str) -> 'CosmosInboxStore':
+        return cls(database.create_container_if_not_exists(
+            id=container_name,
+            partition_key=PartitionKey(path='/recipient')
+        ))
+    
+    def upsert_entries(self, entries: List[Dict[str, Any]]):
+        for entry in entries:
+            self.container.upsert_item(entry)
+    
+    def delete_entries(self, message_id: str, recipients: List[str]):
+        for recipient in recipients:
+            try:
+                self.container.delete_item(f"{recipient}|{message_id}", recipient)
+            except CosmosResourceNotFoundError:
+                pass
+    
+    def _read_checkpoint(self) -> Optional[Dict[str, Any]]:
+        try:
+            return self.container.read_item(INBOX_CHECKPOINT_ID, INBOX_CHECKPOINT_ID)
+        except CosmosResourceNotFoundError:
+            return None
+    
+    def get_checkpoint(self) -> Optional[str]:
+        checkpoint = self._read_checkpoint()
+        return checkpoint.get('continuation') if checkpoint else None
+    
+    def checkpoint_age(self) -> Optional[float]:
+        """Seconds since the last sync (None if the projection was never synced)"""
+        checkpoint = self._read_checkpoint()
+        if not checkpoint or 'syncedAt' not in checkpoint:
+            return None
+        return time.time() - checkpoint['syncedAt']
+    
+    def set_checkpoint(self, continuation: str):
+        self.container.upsert_item({
+            'id': INBOX_CHECKPOINT_ID,
+            'recipient': INBOX_CHECKPOINT_ID,
+            'continuation': continuation,
+            'syncedAt': time.time(),
+            'lastUpdated': datetime.now().isoformat() + 'Z'
+        })
+    
+    def query(self, recipient: str, statuses: Optional[List[str]] = None, before: Optional[str] = None,
+              requires_response: Optional[bool] = None, ascending: bool = False,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Messages for one recipient, newest first unless ascending"""
+        query = "SELECT * FROM inbox WHERE inbox.recipient = @recipient"
+        parameters = [{"name": "@recipient", "value": recipient}]
+        if statuses:
+            query += " AND ARRAY_CONTAINS(@statuses, inbox.status)"
+            parameters.append({"name": "@statuses", "value": statuses})
+        if before:
+            query += " AND inbox.timestamp < @before"
+            parameters.append({"name": "@before", "value": before})
+        if requires_response is not None:
+            query += " AND inbox.requiresResponse = @requires_response"
+            parameters.append({"name": "@requires_response", "value": requires_response})
+        query += f" ORDER BY inbox.timestamp {'ASC' if ascending else 'DESC'}"
+        if limit:
+            query += f" OFFSET 0 LIMIT {int(limit)}"
+        
+        charge = {'total': 0.0}
+        
+        def record_charge(headers, _):
+            charge['total'] += float(headers.get('x-ms-request-charge', 0) or 0)
+        
+        entries = self.container.query_items(
+            query, parameters=parameters, partition_key=recipient, response_hook=record_charge
+        )
+        results = [_entry_to_message(entry) for entry in entries]
+        self.last_query_charge = round(charge['total'], 2)
+        return results
+
+
+class SQLiteInboxStore:
+    """Local stand-in for CosmosInboxStore (tests, offline runs); same interface"""
+    
+    def __init__(self, path: str = ':memory:'):
+        self.conn = sqlite3.connect(path)
+        self.last_query_charge = 0.0
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS inbox (
+                recipient TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                timestamp TEXT,
+                status TEXT,
+                requires_response INTEGER,
+                body TEXT NOT NULL,
+                PRIMARY KEY (recipient, message_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_inbox_recipient_timestamp ON inbox (recipient, timestamp);
+            CREATE TABLE IF NOT EXISTS inbox_checkpoint (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                continuation TEXT,
+                synced_at REAL
+            );
+        """)
+    
+    def upsert_entries(self, entries: List[Dict[str, Any]]):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO inbox VALUES (?, ?, ?, ?, ?, ?)",
+            [(entry['recipient'], entry['messageId'], entry.get('timestamp'), entry.get('status'),
+              None if entry.get('requiresResponse') is None else int(bool(entry['requiresResponse'])),
+              json.dumps(entry)) for entry in entries]
+        )
+        self.conn.commit()
+    
+    def delete_entries(self, message_id: str, recipients: List[str]):
+        self.conn.executemany(
+            "DELETE FROM inbox WHERE recipient = ? AND message_id = ?",
+            [(recipient, message_id) for recipient in recipients]
+        )
+        self.conn.commit()
+    
+    def get_checkpoint(self) -> Optional[str]:
+        row = self.conn.execute("SELECT continuation FROM inbox_checkpoint WHERE id = 1").fetchone()
+        return row[0] if row else None
+    
+    def checkpoint_age(self) -> Optional[float]:
+        row = self.conn.execute("SELECT synced_at FROM inbox_checkpoint WHERE id = 1").fetchone()
+        return time.time() - row[0] if row and row[0] is not None else None
+    
+    def set_checkpoint(self, continuation: str):
+        self.conn.execute("INSERT OR REPLACE INTO inbox_checkpoint VALUES (1, ?, ?)", (continuation, time.time()))
+        self.conn.commit()
+    
+    def query(self, recipient: str, statuses: Optional[List[str]] = None, before: Optional[str] = None,
+              requires_response: Optional[bool] = None, ascending: bool = False,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Messages for one recipient, newest first unless ascending"""
+        query = "SELECT body FROM inbox WHERE recipient = ?"
+        parameters: List[Any] = [recipient]
+        if statuses:
+            query += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            parameters.extend(statuses)
+        if before:
+            query += " AND timestamp < ?"
+            parameters.append(before)
+        if requires_response is not None:
+            query += " AND requires_response = ?"
+            parameters.append(int(requires_response))
+        query += f" ORDER BY timestamp {'ASC' if ascending else 'DESC'}"
+        if limit:
+            query += " LIMIT ?"
+            parameters.append(int(limit))
+        return [_entry_to_message(json.loads(row[0])) for row in self.conn.execute(query, parameters)]
+
+
 class CosmosDBManager:
     """Complete database operations manager for Research & Analytics Services"""
     
@@ -25,6 +292,8 @@ class CosmosDBManager:
         self.key = os.getenv('COSMOS_KEY')
         self.database_name = os.getenv('COSMOS_DATABASE', 'research-analytics-db')
         self.container_name = os.getenv('COSMOS_CONTAINER', 'messages')
+        self.stats_container_name = os.getenv('COSMOS_STATS_CONTAINER', 'message-stats')
+        self.inbox_container_name = os.getenv('COSMOS_INBOX_CONTAINER', 'message-inbox')
         
         if not self.endpoint or not self.key:
             raise ValueError("COSMOS_ENDPOINT and COSMOS_KEY must be set in .env file")
@@ -33,6 +302,14 @@ class CosmosDBManager:
         self.client = CosmosClient(self.endpoint, self.key)
         self.database = self.client.get_database_client(self.database_name)
         self.container = self.database.get_container_client(self.container_name)
+        self._stats_container = None
+        self._inbox_store = None
+        self._inbox_fresh = False
+        self._inbox_checked_at = None
+        self.inbox_max_staleness = INBOX_MAX_STALENESS
+        
+        # RU charge of the most recent query_messages call (all pages)
+        self.last_query_charge = 0.0
         
         # Setup logging
         self.logger = logger or self._setup_logger()
@@ -54,24 +331,30 @@ class CosmosDBManager:
     
     # === MESSAGE OPERATIONS ===
     
+    def _prepare_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in id, partitionKey and metadata before a write"""
+        # Ensure required fields
+        if 'id' not in message_data:
+            message_data['id'] = f"msg_{datetime.now().isoformat()}_{hash(str(message_data)) % 10000:04d}"
+        
+        if 'partitionKey' not in message_data:
+            timestamp = message_data.get('timestamp', datetime.now().isoformat() + 'Z')
+            try:
+                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                message_data['partitionKey'] = dt.strftime('%Y-%m')
+            except:
+                message_data['partitionKey'] = datetime.now().strftime('%Y-%m')
+        
+        # Add metadata (createdDate is kept once set; update_message moves modifiedDate)
+        now = datetime.now().isoformat() + 'Z'
+        message_data.setdefault('createdDate', now)
+        message_data['modifiedDate'] = now
+        return message_data
+    
     def store_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """Store a message in Cosmos DB with proper formatting"""
         try:
-            # Ensure required fields
-            if 'id' not in message_data:
-                message_data['id'] = f"msg_{datetime.now().isoformat()}_{hash(str(message_data)) % 10000:04d}"
-            
-            if 'partitionKey' not in message_data:
-                timestamp = message_data.get('timestamp', datetime.now().isoformat() + 'Z')
-                try:
-                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    message_data['partitionKey'] = dt.strftime('%Y-%m')
-                except:
-                    message_data['partitionKey'] = datetime.now().strftime('%Y-%m')
-            
-            # Add metadata
-            message_data['createdDate'] = datetime.now().isoformat() + 'Z'
-            message_data['modifiedDate'] = datetime.now().isoformat() + 'Z'
+            message_data = self._prepare_message(message_data)
             
             # Store in database
             result = self.container.create_item(message_data)
@@ -117,10 +400,16 @@ class CosmosDBManager:
             raise
     
     def delete_message(self, message_id: str, partition_key: str) -> bool:
-        """Delete a message"""
+        """Delete a message (and its inbox projection entries, which the change feed cannot remove)"""
         try:
+            message = self.container.read_item(message_id, partition_key)
             self.container.delete_item(message_id, partition_key)
             self.logger.info(f"Message deleted: {message_id}")
+            
+            self.get_inbox_store()
+            if self._inbox_store:
+                recipients = [entry['recipient'] for entry in inbox_entries(message)]
+                self._inbox_store.delete_entries(message_id, recipients)
             return True
         except CosmosResourceNotFoundError:
             self.logger.warning(f"Message not found for deletion: {message_id}")
@@ -132,22 +421,35 @@ class CosmosDBManager:
     # === QUERY OPERATIONS ===
     
     def query_messages(self, query: str, parameters: Optional[List[Dict]] = None, 
-                      cross_partition: bool = True) -> List[Dict[str, Any]]:
-        """Execute a SQL query against messages"""
+                      cross_partition: bool = True, partition_key: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Execute a SQL query against messages (within one partition if partition_key is given)"""
+        charge = {'total': 0.0}
+        
+        def record_charge(headers, _):
+            charge['total'] += float(headers.get('x-ms-request-charge', 0) or 0)
+        
         try:
+            if partition_key is not None:
+                scope = {'partition_key': partition_key}
+            else:
+                scope = {'enable_cross_partition_query': cross_partition}
+            
             if parameters:
                 results = list(self.container.query_items(
                     query, 
                     parameters=parameters,
-                    enable_cross_partition_query=cross_partition
+                    response_hook=record_charge,
+                    **scope
                 ))
             else:
                 results = list(self.container.query_items(
                     query, 
-                    enable_cross_partition_query=cross_partition
+                    response_hook=record_charge,
+                    **scope
                 ))
             
-            self.logger.info(f"Query executed: {len(results)} results")
+            self.last_query_charge = round(charge['total'], 2)
+            self.logger.info(f"Query executed: {len(results)} results, {self.last_query_charge} RU")
             return results
             
         except Exception as e:
@@ -166,6 +468,11 @@ class CosmosDBManager:
     def get_messages_by_agent(self, agent_name: str, direction: str = "both", 
                              limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get messages from/to a specific agent using unified query pattern"""
+        if direction == "to":
+            inbox = self.get_inbox_store()
+            if inbox:
+                return inbox.query(agent_name, limit=limit)
+        
         if direction == "from":
             query = "SELECT * FROM messages WHERE messages['from'] = @agent"
         elif direction == "to":
@@ -216,76 +523,323 @@ class CosmosDBManager:
         parameters = [{"name": "@thread_id", "value": thread_id}]
         return self.query_messages(query, parameters)
     
-    def get_messages_requiring_response(self) -> List[Dict[str, Any]]:
-        """Get messages that require a response"""
+    def get_messages_requiring_response(self, agent_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get messages that require a response, optionally only those sent to one agent"""
+        if agent_name:
+            inbox = self.get_inbox_store()
+            if inbox:
+                return inbox.query(agent_name, requires_response=True, ascending=True)
+            query = """
+            SELECT * FROM messages WHERE messages.requiresResponse = true
+            AND (messages['to'] = @agent OR ARRAY_CONTAINS(messages['to'], @agent))
+            ORDER BY messages.timestamp ASC
+            """
+            return self.query_messages(query, [{"name": "@agent", "value": agent_name}])
+        
         query = "SELECT * FROM messages WHERE messages.requiresResponse = true ORDER BY messages.timestamp ASC"
         return self.query_messages(query)
     
+    # === INBOX PROJECTION ===
+    
+    def get_inbox_store(self):
+        """
+        The inbox projection, once sync_inbox has built it and as long as it was
+        synced within inbox_max_staleness seconds (None otherwise, so lookups
+        fall back to cross-partition queries)
+        """
+        now = time.monotonic()
+        if self._inbox_checked_at is None or now - self._inbox_checked_at > INBOX_CHECK_INTERVAL:
+            self._inbox_checked_at = now
+            try:
+                store = self._inbox_store or CosmosInboxStore(self.database.get_container_client(self.inbox_container_name))
+                age = store.checkpoint_age()
+                if age is not None:
+                    self._inbox_store = store
+                self._inbox_fresh = age is not None and age <= self.inbox_max_staleness
+                if age is not None and not self._inbox_fresh:
+                    self.logger.warning(f"Inbox projection not synced for {age:.0f}s; querying messages directly")
+            except CosmosHttpResponseError:
+                self._inbox_fresh = False
+        return self._inbox_store if self._inbox_fresh else None
+    
+    def use_inbox_store(self, store):
+        """Use a specific inbox store (e.g. SQLiteInboxStore in tests)"""
+        self._inbox_store = store
+        self._inbox_fresh = True
+        self._inbox_checked_at = time.monotonic()
+    
+    def sync_inbox(self, store=None, max_item_count: int = 1000) -> int:
+        """
+        Apply messages from the change feed to the inbox projection
+        The first run starts from the beginning of the feed, which backfills
+        every message. Recipients are assumed fixed once a message is sent. The
+        feed does not report deletes, so delete_message removes the entries
+        itself. Returns the number of entries written.
+        """
+        store = store or self._inbox_store or CosmosInboxStore.create(self.database, self.inbox_container_name)
+        continuation = store.get_checkpoint()
+        if continuation:
+            feed = self.container.query_items_change_feed(continuation=continuation, max_item_count=max_item_count)
+        else:
+            feed = self.container.query_items_change_feed(start_time="Beginning", max_item_count=max_item_count)
+        
+        written = 0
+        for message in feed:
+            entries = inbox_entries(message)
+            store.upsert_entries(entries)
+            written += len(entries)
+        
+        continuation = self.container.client_connection.last_response_headers.get('etag')
+        if continuation:
+            store.set_checkpoint(continuation)
+        self.use_inbox_store(store)
+        
+        if written:
+            self.logger.info(f"Inbox projection updated: {written} entries")
+        return written
+    
     # === ANALYTICS AND REPORTING ===
     
-    def get_message_statistics(self) -> Dict[str, Any]:
-        """Get comprehensive message statistics"""
-        stats = {}
+    def _partition_key_values(self, through_ts: Optional[int] = None) -> List[Any]:
+        """Distinct partition key values of the messages container"""
+        path = self.container.read()['partitionKey']['paths'][0]
+        field = ''.join(f"['{segment}']" for segment in path.split('/') if segment)
+        query = f"SELECT DISTINCT VALUE messages{field} FROM messages"
+        parameters = None
+        if through_ts is not None:
+            query += " WHERE messages._ts <= @through"
+            parameters = [{"name": "@through", "value": through_ts}]
+        return self.query_messages(query, parameters)
+    
+    def _grouped_statistics(self, through_ts: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Dimension counts with one GROUP BY per partition, merged here
+        The Python SDK only runs GROUP BY within a single partition.
+        """
+        where = " WHERE messages._ts <= @through" if through_ts is not None else ""
+        parameters = [{"name": "@through", "value": through_ts}] if through_ts is not None else None
+        stats = {name: {} for name in STATS_DIMENSIONS}
+        charges = {name: 0.0 for name in STATS_DIMENSIONS}
+        partition_keys = self._partition_key_values(through_ts)
+        charges['partition_keys'] = self.last_query_charge
         
-        # Total count
-        total_query = "SELECT VALUE COUNT(1) FROM messages"
-        stats['total_messages'] = self.query_messages(total_query)[0]
+        for partition_key in partition_keys:
+            for name, (field, default) in STATS_DIMENSIONS.items():
+                query = (f"SELECT messages['{field}'] AS value, COUNT(1) AS count FROM messages{where} "
+                         f"GROUP BY messages['{field}']")
+                for row in self.query_messages(query, parameters, partition_key=partition_key):
+                    # Messages without the field come back as a group with no value
+                    key = _stats_key(row.get('value'), default)
+                    stats[name][key] = stats[name].get(key, 0) + row['count']
+                charges[name] += self.last_query_charge
         
-        # Count by type - simplified approach
-        try:
-            type_query = "SELECT messages.type FROM messages"
-            type_results = self.query_messages(type_query)
-            type_counts = {}
-            for item in type_results:
-                msg_type = item.get('type', 'UNKNOWN')
-                type_counts[msg_type] = type_counts.get(msg_type, 0) + 1
-            stats['by_type'] = type_counts
-        except:
-            stats['by_type'] = {}
+        stats['request_charges'] = {name: round(charge, 2) for name, charge in charges.items()}
+        return stats
+    
+    def _scanned_statistics(self, through_ts: Optional[int] = None, page_size: int = 1000) -> Dict[str, Any]:
+        """Dimension counts from one projected, paged scan, counted here"""
+        fields = {name: field for name, (field, _) in STATS_DIMENSIONS.items()}
+        projection = ', '.join(f"messages['{field}'] AS {name}" for name, field in fields.items())
+        query = f"SELECT {projection} FROM messages"
+        parameters = []
+        if through_ts is not None:
+            query += " WHERE messages._ts <= @through"
+            parameters = [{"name": "@through", "value": through_ts}]
+        
+        charge = {'total': 0.0}
+        
+        def record_charge(headers, _):
+            charge['total'] += float(headers.get('x-ms-request-charge', 0) or 0)
+        
+        stats = {name: {} for name in STATS_DIMENSIONS}
+        rows = self.container.query_items(
+            query, parameters=parameters, enable_cross_partition_query=True,
+            max_item_count=page_size, response_hook=record_charge
+        )
+        for row in rows:
+            for name, (_, default) in STATS_DIMENSIONS.items():
+                key = _stats_key(row.get(name), default)
+                stats[name][key] = stats[name].get(key, 0) + 1
+        
+        stats['request_charges'] = {'scan': round(charge['total'], 2)}
+        return stats
+    
+    def compute_message_statistics(self, through_ts: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Aggregate statistics with per-partition GROUP BY queries, with the RU charge of each
+        Messages outside every partition value (no partition key) or written
+        while the queries run make the dimension totals disagree with the
+        overall count; the statistics are then counted from a projected scan.
+        through_ts limits the aggregation to messages with _ts at or below it.
+        """
+        where = " WHERE messages._ts <= @through" if through_ts is not None else ""
+        parameters = [{"name": "@through", "value": through_ts}] if through_ts is not None else None
+        total_query = f"SELECT VALUE COUNT(1) FROM messages{where}"
+        total_messages = self.query_messages(total_query, parameters)[0]
+        total_charge = self.last_query_charge
+        
+        stats = self._grouped_statistics(through_ts)
+        if any(sum(stats[name].values()) != total_messages for name in STATS_DIMENSIONS):
+            self.logger.warning("Grouped statistics do not add up to the message count; counting from a scan")
+            stats = self._scanned_statistics(through_ts)
+            total_messages = sum(stats['by_type'].values())
         
-        # Count by agent (from) - simplified approach
+        stats['total_messages'] = total_messages
+        stats['request_charges']['total_messages'] = total_charge
+        stats['request_charge'] = round(sum(stats['request_charges'].values()), 2)
+        return stats
+    
+    def get_stats_container(self):
+        """Container holding the materialized statistics document"""
+        if self._stats_container is None:
+            self._stats_container = self.database.create_container_if_not_exists(
+                id=self.stats_container_name,
+                partition_key=PartitionKey(path='/partitionKey')
+            )
+        return self._stats_container
+    
+    def rebuild_statistics(self) -> Dict[str, Any]:
+        """
+        Recompute the statistics document from scratch and restart the change feed at now
+        Also the reconciliation path for deletes, which the change feed does not report.
+        """
+        # Take the feed position first so nothing written during the aggregation is missed,
+        # and aggregate only up to the newest _ts at that point; sync_statistics skips feed
+        # messages at or below it, so messages written meanwhile are counted exactly once
+        for _ in self.container.query_items_change_feed(start_time="Now"):
+            pass
+        continuation = self.container.client_connection.last_response_headers.get('etag')
+        # Messages created before this point are in the aggregation even if they change later
+        rebuilt_date = datetime.now().isoformat() + 'Z'
+        aggregated_through = self.query_messages("SELECT VALUE MAX(messages._ts) FROM messages")[0] or 0
+        
+        stats = self.compute_message_statistics(through_ts=aggregated_through)
+        document = {
+            'id': STATS_DOC_ID,
+            'partitionKey': STATS_PARTITION_KEY,
+            'total_messages': stats['total_messages'],
+            **{name: stats[name] for name in STATS_DIMENSIONS},
+            'continuation': continuation,
+            'aggregatedThrough': aggregated_through,
+            'rebuiltDate': rebuilt_date,
+            'lastUpdated': datetime.now().isoformat() + 'Z',
+        }
+        self.get_stats_container().upsert_item(document)
+        self.logger.info(f"Statistics rebuilt: {stats['total_messages']} messages, {stats['request_charge']} RU")
+        return document
+    
+    @staticmethod
+    def _counted_marker(message: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': message['id'],
+            'partitionKey': f"{COUNTED_PARTITION_PREFIX}{message.get('partitionKey') or ''}",
+        }
+    
+    def _already_counted(self, message: Dict[str, Any], document: Dict[str, Any]) -> bool:
+        """Whether the rebuild's aggregation or an earlier sync has counted this message"""
+        # The change feed carries only a message's latest version, so whether it
+        # is new is decided by its id, never by comparing its dates
+        if message.get('_ts', 0) <= document.get('aggregatedThrough', 0):
+            return True
+        created, rebuilt = message.get('createdDate'), document.get('rebuiltDate')
+        if isinstance(created, str) and rebuilt and created < rebuilt:
+            return True
+        marker = self._counted_marker(message)
         try:
-            agent_query = "SELECT messages['from'] as from_agent FROM messages"
-            agent_results = self.query_messages(agent_query)
-            agent_counts = {}
-            for item in agent_results:
-                agent = item.get('from_agent', 'UNKNOWN')
-                agent_counts[agent] = agent_counts.get(agent, 0) + 1
-            stats['by_agent'] = agent_counts
-        except:
-            stats['by_agent'] = {}
+            self.get_stats_container().read_item(marker['id'], marker['partitionKey'])
+            return True
+        except CosmosResourceNotFoundError:
+            return False
+    
+    def sync_statistics(self, max_item_count: int = 1000) -> int:
+        """
+        Fold new messages from the change feed into the statistics document
+        Run it periodically (one instance at a time; concurrent writers lose the
+        etag check and retry on the next run). Returns the number of messages counted.
         
-        # Messages by month - simplified approach
+        A message counts once, the first time its id is seen: each one counted
+        leaves a marker document, and messages created before the last rebuild
+        (by their createdDate, which writes preserve) were counted by it.
+        Messages without a createdDate that existed at the rebuild and change
+        afterwards are counted again once; the rebuild reconciles that.
+        """
+        stats_container = self.get_stats_container()
         try:
-            month_query = "SELECT messages.partitionKey FROM messages"
-            month_results = self.query_messages(month_query)
-            month_counts = {}
-            for item in month_results:
-                month = item.get('partitionKey', 'UNKNOWN')
-                month_counts[month] = month_counts.get(month, 0) + 1
-            stats['by_month'] = month_counts
-        except:
-            stats['by_month'] = {}
+            document = stats_container.read_item(STATS_DOC_ID, STATS_PARTITION_KEY)
+        except CosmosResourceNotFoundError:
+            self.rebuild_statistics()
+            return 0
+        
+        counted = {}
+        feed = self.container.query_items_change_feed(
+            continuation=document['continuation'],
+            max_item_count=max_item_count
+        )
+        for message in feed:
+            if message.get('type') == 'HEALTH_CHECK' or message['id'] in counted:
+                continue
+            if self._already_counted(message, document):
+                continue
+            document['total_messages'] += 1
+            for name, (field, default) in STATS_DIMENSIONS.items():
+                key = _stats_key(message.get(field), default)
+                document[name][key] = document[name].get(key, 0) + 1
+            counted[message['id']] = self._counted_marker(message)
+        
+        continuation = self.container.client_connection.last_response_headers.get('etag')
+        if continuation and continuation != document['continuation']:
+            document['continuation'] = continuation
+            document['lastUpdated'] = datetime.now().isoformat() + 'Z'
+            try:
+                stats_container.replace_item(
+                    STATS_DOC_ID, document,
+                    etag=document['_etag'], match_condition=MatchConditions.IfNotModified
+                )
+            except CosmosHttpResponseError as e:
+                if e.status_code != 412:
+                    raise
+                self.logger.warning("Statistics document changed concurrently; skipping this sync")
+                return 0
+        
+        # Marked only once the counts are stored, so a skipped sync counts them next time
+        for marker in counted.values():
+            stats_container.upsert_item(marker)
+        
+        if counted:
+            self.logger.info(f"Statistics updated from change feed: {len(counted)} new messages")
+        return len(counted)
+    
+    def get_message_statistics(self, materialized: bool = True) -> Dict[str, Any]:
+        """
+        Get comprehensive message statistics
+        Reads the materialized statistics document (a single point read), building
+        it on first use; materialized=False aggregates in Cosmos DB instead.
+        """
+        if not materialized:
+            return self.compute_message_statistics()
+        
+        charge = {'total': 0.0}
+        
+        def record_charge(headers, _):
+            charge['total'] += float(headers.get('x-ms-request-charge', 0) or 0)
         
-        # Priority distribution - simplified approach
         try:
-            priority_query = "SELECT messages.priority FROM messages"
-            priority_results = self.query_messages(priority_query)
-            priority_counts = {}
-            for item in priority_results:
-                priority = item.get('priority', 'medium')
-                priority_counts[priority] = priority_counts.get(priority, 0) + 1
-            stats['by_priority'] = priority_counts
-        except:
-            stats['by_priority'] = {}
+            document = self.get_stats_container().read_item(
+                STATS_DOC_ID, STATS_PARTITION_KEY, response_hook=record_charge
+            )
+        except CosmosResourceNotFoundError:
+            document = self.rebuild_statistics()
         
+        stats = {name: document[name] for name in ('total_messages', *STATS_DIMENSIONS)}
+        stats['last_updated'] = document.get('lastUpdated')
+        stats['request_charge'] = round(charge['total'], 2)
         return stats
     
     def get_agent_activity_report(self, days: int = 7) -> Dict[str, Any]:
         """Get agent activity report for recent days"""
         cutoff_date = (datetime.now() - timedelta(days=days)).isoformat() + 'Z'
         
-        # Simple approach: get all recent messages and count locally
+        # Count communication pairs here: the SDK cannot GROUP BY across partitions
         try:
             query = """
             SELECT messages['from'] as from_agent, messages['to'] as to_agent
@@ -294,9 +848,16 @@ class CosmosDBManager:
             """
             parameters = [{"name": "@cutoff_date", "value": cutoff_date}]
             
-            messages = self.query_messages(query, parameters)
+            charge = {'total': 0.0}
+            
+            def record_charge(headers, _):
+                charge['total'] += float(headers.get('x-ms-request-charge', 0) or 0)
+            
+            messages = self.container.query_items(
+                query, parameters=parameters, enable_cross_partition_query=True,
+                max_item_count=1000, response_hook=record_charge
+            )
             
-            # Count communication pairs locally
             activity_counts = {}
             for msg in messages:
                 from_agent = msg.get('from_agent', 'UNKNOWN')
@@ -321,7 +882,8 @@ class CosmosDBManager:
             return {
                 'period_days': days,
                 'cutoff_date': cutoff_date,
-                'activity': activity_list
+                'activity': activity_list,
+                'request_charge': round(charge['total'], 2)
             }
             
         except Exception as e:
@@ -373,6 +935,189 @@ class CosmosDBManager:
         self.logger.info(f"Migration complete: {stats['succeeded']}/{stats['processed']} successful")
         return stats
     
+    def _iter_file_messages(self, messages_dir: str, stats: Dict[str, Any]):
+        """Yield transformed messages one file at a time, recording read failures in stats"""
+        for filename in sorted(os.listdir(messages_dir)):
+            if not filename.endswith('.json'):
+                continue
+            
+            stats['processed'] += 1
+            try:
+                with open(os.path.join(messages_dir, filename), 'r', encoding='utf-8') as f:
+                    yield self._transform_file_message(filename, json.load(f))
+            except Exception as e:
+                stats['failed'] += 1
+                error_msg = f"Failed to migrate {filename}: {str(e)}"
+                stats['errors'].append(error_msg)
+                self.logger.error(error_msg)
+    
+    # === BULK ASYNC OPERATIONS ===
+    
+    @asynccontextmanager
+    async def _async_container(self):
+        """Async container client for bulk operations (closed on exit)"""
+        async with AsyncCosmosClient(self.endpoint, self.key) as client:
+            yield client.get_database_client(self.database_name).get_container_client(self.container_name)
+    
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: Optional[str]) -> Set[str]:
+        """Document ids already written by a previous run"""
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return set()
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+    
+    async def bulk_store_messages(self, messages: Iterable[Dict[str, Any]], concurrency: int = 16,
+                                  ru_per_second: Optional[float] = None,
+                                  checkpoint_path: Optional[str] = None,
+                                  max_retries: int = 10,
+                                  stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Upsert many messages through the async client
+        At most `concurrency` writes are in flight; a 429 pauses all writers for
+        its retry-after, and ru_per_second optionally caps RU consumption.
+        A message whose id already exists keeps the stored createdDate.
+        Written ids are appended to checkpoint_path so a rerun skips them.
+        Messages are consumed lazily, so a generator is never materialized.
+        """
+        stats = stats if stats is not None else {'processed': 0, 'succeeded': 0, 'failed': 0, 'errors': []}
+        stats.setdefault('skipped', 0)
+        done = self._load_checkpoint(checkpoint_path)
+        throttle = RequestUnitThrottle(ru_per_second)
+        semaphore = asyncio.Semaphore(concurrency)
+        checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+        started = time.monotonic()
+        
+        async def store(container, message):
+            record_charge = lambda headers, _: throttle.charge(headers)
+            try:
+                await container.create_item(message, response_hook=record_charge)
+            except CosmosResourceExistsError:
+                existing = await container.read_item(message['id'], message['partitionKey'],
+                                                     response_hook=record_charge)
+                message['createdDate'] = existing.get('createdDate', message['createdDate'])
+                await container.upsert_item(message, response_hook=record_charge)
+        
+        async def write(container, message):
+            try:
+                for attempt in range(max_retries + 1):
+                    await throttle.wait()
+                    try:
+                        await store(container, message)
+                        break
+                    except CosmosHttpResponseError as e:
+                        if e.status_code != 429 or attempt == max_retries:
+                            raise
+                        delay = throttle.back_off(e)
+                        self.logger.warning(f"Throttled on {message['id']}, retrying in {delay:.2f}s")
+                stats['succeeded'] += 1
+                if checkpoint:
+                    checkpoint.write(message['id'] + '\n')
+                    checkpoint.flush()
+            except Exception as e:
+                stats['failed'] += 1
+                error_msg = f"Failed to store {message.get('id')}: {str(e)}"
+                stats['errors'].append(error_msg)
+                self.logger.error(error_msg)
+            finally:
+                semaphore.release()
+            
+            if stats['succeeded'] and stats['succeeded'] % 500 == 0:
+                self.logger.info(f"Bulk progress: {stats['succeeded']} stored, {throttle.total_charge:.0f} RU")
+        
+        try:
+            async with self._async_container() as container:
+                pending = set()
+                for message in messages:
+                    message = self._prepare_message(message)
+                    if message['id'] in done:
+                        stats['skipped'] += 1
+                        continue
+                    await semaphore.acquire()
+                    task = asyncio.create_task(write(container, message))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                if pending:
+                    await asyncio.gather(*pending)
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        
+        stats['request_charge'] = round(throttle.total_charge, 2)
+        stats['throttled'] = throttle.throttled
+        stats['elapsed_seconds'] = round(time.monotonic() - started, 2)
+        self.logger.info(f"Bulk store complete: {stats['succeeded']} stored, {stats['skipped']} skipped, "
+                         f"{stats['failed']} failed, {stats['request_charge']} RU, {throttle.throttled} throttled")
+        return stats
+    
+    async def migrate_from_json_files_async(self, inbox_path: str, concurrency: int = 16,
+                                            ru_per_second: Optional[float] = None,
+                                            checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Bulk version of migrate_from_json_files
+        Resumable: the checkpoint defaults to .cosmos_migration_checkpoint in the inbox.
+        """
+        messages_dir = os.path.join(inbox_path, 'messages')
+        if not os.path.exists(messages_dir):
+            raise FileNotFoundError(f"Messages directory not found: {messages_dir}")
+        
+        checkpoint_path = checkpoint_path or os.path.join(inbox_path, '.cosmos_migration_checkpoint')
+        self.logger.info(f"Starting bulk migration from: {messages_dir} (checkpoint: {checkpoint_path})")
+        
+        stats = {'processed': 0, 'succeeded': 0, 'failed': 0, 'errors': []}
+        return await self.bulk_store_messages(
+            self._iter_file_messages(messages_dir, stats),
+            concurrency=concurrency,
+            ru_per_second=ru_per_second,
+            checkpoint_path=checkpoint_path,
+            stats=stats
+        )
+    
+    async def backup_to_ndjson(self, output_file: str, partition_key: Optional[str] = None,
+                               page_size: int = 500, resume: bool = True) -> Dict[str, Any]:
+        """
+        Stream the container to one NDJSON file, a page at a time
+        The continuation token is saved next to the file after every page, so an
+        interrupted backup resumes where it stopped instead of starting over.
+        """
+        token_path = output_file + '.continuation'
+        continuation = None
+        if resume and os.path.exists(token_path) and os.path.exists(output_file):
+            with open(token_path, 'r', encoding='utf-8') as f:
+                continuation = f.read().strip() or None
+        
+        query = "SELECT * FROM messages"
+        kwargs = {'max_item_count': page_size}
+        if partition_key:
+            kwargs['partition_key'] = partition_key
+        
+        result = {'messages': 0, 'pages': 0, 'request_charge': 0.0, 'resumed': continuation is not None}
+        
+        def record_charge(headers, _):
+            result['request_charge'] += float(headers.get('x-ms-request-charge', 0) or 0)
+        
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        async with self._async_container() as container:
+            pages = container.query_items(query, response_hook=record_charge, **kwargs).by_page(continuation)
+            with open(output_file, 'a' if continuation else 'w', encoding='utf-8') as out:
+                async for page in pages:
+                    async for message in page:
+                        out.write(json.dumps(message, ensure_ascii=False) + '\n')
+                        result['messages'] += 1
+                    out.flush()
+                    result['pages'] += 1
+                    with open(token_path, 'w', encoding='utf-8') as f:
+                        f.write(pages.continuation_token or '')
+        
+        # Finished: a leftover token would make the next run append to a complete file
+        if os.path.exists(token_path):
+            os.remove(token_path)
+        
+        result['request_charge'] = round(result['request_charge'], 2)
+        self.logger.info(f"Backed up {result['messages']} messages in {result['pages']} pages "
+                         f"to {output_file} ({result['request_charge']} RU)")
+        return result
+    
     def _transform_file_message(self, filename: str, message_data: Dict) -> Dict:
         """Transform file-based message to Cosmos DB format"""
         import re
@@ -509,21 +1254,24 @@ class CosmosDBManager:
         if partition_key:
             query = "SELECT * FROM messages WHERE messages.partitionKey = @partition_key"
             parameters = [{"name": "@partition_key", "value": partition_key}]
-            messages = self.query_messages(query, parameters)
+            messages = self.container.query_items(query, parameters=parameters, partition_key=partition_key)
         else:
-            messages = self.query_messages("SELECT * FROM messages")
+            messages = self.container.query_items("SELECT * FROM messages", enable_cross_partition_query=True)
         
         os.makedirs(output_path, exist_ok=True)
         
+        # Iterate the pager instead of materializing the whole container
+        count = 0
         for message in messages:
             filename = f"{message['id']}.json"
             filepath = os.path.join(output_path, filename)
             
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(message, f, indent=2, ensure_ascii=False)
+            count += 1
         
-        self.logger.info(f"Backed up {len(messages)} messages to {output_path}")
-        return len(messages)
+        self.logger.info(f"Backed up {count} messages to {output_path}")
+        return count
 
 # === AGENT HELPER FUNCTIONS ===
 
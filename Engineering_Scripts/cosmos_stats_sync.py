@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Keep the materialized message statistics document current
+Polls the messages container's change feed and folds new messages into the
+statistics document read by CosmosDBManager.get_message_statistics.
+
+Usage:
+    python cosmos_stats_sync.py                  # sync every 30 seconds
+    python cosmos_stats_sync.py --once           # single sync (cron)
+    python cosmos_stats_sync.py --rebuild        # recompute from scratch, then sync
+"""
+
+import argparse
+import time
+
+from cosmos_db_manager import get_db_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interval', type=float, default=30.0, help='Seconds between syncs')
+    parser.add_argument('--rebuild-every', type=float, default=24 * 3600,
+                        help='Seconds between full rebuilds (picks up deletes)')
+    parser.add_argument('--once', action='store_true', help='Run one sync and exit')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the statistics document first')
+    args = parser.parse_args()
+
+    db = get_db_manager()
+    last_rebuild = time.monotonic()
+    if args.rebuild:
+        db.rebuild_statistics()
+
+    while True:
+        try:
+            if time.monotonic() - last_rebuild > args.rebuild_every:
+                db.rebuild_statistics()
+                last_rebuild = time.monotonic()
+            db.sync_statistics()
+        except Exception as e:
+            db.logger.error(f"Statistics sync failed: {str(e)}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
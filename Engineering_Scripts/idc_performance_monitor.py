@@ -14,6 +14,7 @@ from typing import Dict, List, Optional, Any
 from azure.cosmos import CosmosClient
 from dotenv import load_dotenv
 from cosmos_db_manager import store_agent_message
+from idc_query_benchmark import SCENARIOS_FILE, BenchmarkRunner, CosmosBenchmarkBackend, load_scenarios
 
 # Load environment variables
 load_dotenv()
@@ -45,140 +46,59 @@ class IDCPerformanceMonitor:
         
         logger.info("IDC Performance Monitor initialized")
     
-    def run_performance_tests(self) -> Dict[str, Any]:
-        """Run comprehensive performance tests"""
+    def run_performance_tests(self, warmup: int = 2, iterations: int = 20,
+                              scenarios_path: str = SCENARIOS_FILE) -> Dict[str, Any]:
+        """Run the declarative IDC query suite (see idc_query_benchmark.py)"""
         logger.info("Starting performance tests...")
         
-        # Get current timestamp for relative queries
         now = datetime.now(timezone.utc)
-        yesterday = now - timedelta(days=1)
-        epoch_now = int(now.timestamp())
-        epoch_yesterday = int(yesterday.timestamp())
-        
-        performance_tests = [
-            {
-                "name": "Query by category (research)",
-                "query": "SELECT * FROM c WHERE c.category = @category",
-                "parameters": [{"name": "@category", "value": "research"}],
-                "partition_optimized": False,
-                "expected_performance": "good"
-            },
-            {
-                "name": "Query by partition key (research_finding)",
-                "query": "SELECT * FROM c WHERE c.partitionKey = @partitionKey",
-                "parameters": [{"name": "@partitionKey", "value": "research_finding"}],
-                "partition_optimized": True,
-                "expected_performance": "excellent"
-            },
-            {
-                "name": "Query by partition key (engineering_specification)",
-                "query": "SELECT * FROM c WHERE c.partitionKey = @partitionKey",
-                "parameters": [{"name": "@partitionKey", "value": "engineering_specification"}],
-                "partition_optimized": True,
-                "expected_performance": "excellent"
-            },
-            {
-                "name": "Range query by epoch timestamp",
-                "query": "SELECT * FROM c WHERE c.epochTimestamp >= @start AND c.epochTimestamp <= @end",
-                "parameters": [
-                    {"name": "@start", "value": epoch_yesterday},
-                    {"name": "@end", "value": epoch_now}
-                ],
-                "partition_optimized": False,
-                "expected_performance": "good"
-            },
-            {
-                "name": "Full-text search (contains cosmos)",
-                "query": "SELECT * FROM c WHERE CONTAINS(c.searchText, @searchTerm)",
-                "parameters": [{"name": "@searchTerm", "value": "cosmos"}],
-                "partition_optimized": False,
-                "expected_performance": "good"
-            },
-            {
-                "name": "Knowledge base domain query",
-                "query": "SELECT * FROM c WHERE c.knowledgeBase.domain = @domain",
-                "parameters": [{"name": "@domain", "value": "research"}],
-                "partition_optimized": False,
-                "expected_performance": "good"
-            },
-            {
-                "name": "Multi-field composite query",
-                "query": "SELECT * FROM c WHERE c.category = @category AND c.type = @type ORDER BY c.epochTimestamp DESC",
-                "parameters": [
-                    {"name": "@category", "value": "research"},
-                    {"name": "@type", "value": "research_finding"}
-                ],
-                "partition_optimized": False,
-                "expected_performance": "good"
-            },
-            {
-                "name": "Count documents by schema version",
-                "query": "SELECT VALUE COUNT(1) FROM c WHERE c.metadata.schemaVersion = @version",
-                "parameters": [{"name": "@version", "value": "2.0"}],
-                "partition_optimized": False,
-                "expected_performance": "good"
-            }
-        ]
+        scenarios, target_ms = load_scenarios(scenarios_path)
+        runner = BenchmarkRunner(CosmosBenchmarkBackend(self.container), warmup, iterations, target_ms)
         
         results = []
         
-        for test in performance_tests:
-            logger.info(f"Running test: {test['name']}")
-            
-            # Warm-up query
-            list(self.container.query_items(
-                query=test["query"],
-                parameters=test["parameters"],
-                enable_cross_partition_query=not test["partition_optimized"]
-            ))
-            
-            # Actual performance test (run 3 times and take average)
-            times = []
-            for run in range(3):
-                start_time = time.time()
-                
-                query_results = list(self.container.query_items(
-                    query=test["query"],
-                    parameters=test["parameters"],
-                    enable_cross_partition_query=not test["partition_optimized"]
-                ))
-                
-                execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-                times.append(execution_time)
-            
-            avg_time = sum(times) / len(times)
-            min_time = min(times)
-            max_time = max(times)
+        for scenario in scenarios:
+            logger.info(f"Running test: {scenario.name}")
+            measured = runner.run_scenario(scenario)
+            p95_time = measured['p95_ms']
             
-            # Performance rating
-            if avg_time < 25:
+            # Performance rating (on p95, so one lucky run cannot pass a slow query)
+            if p95_time < 25:
                 performance_rating = "excellent"
-            elif avg_time < 50:
+            elif p95_time < 50:
                 performance_rating = "good"
-            elif avg_time < 100:
+            elif p95_time < 100:
                 performance_rating = "acceptable"
             else:
                 performance_rating = "needs_improvement"
             
             result = {
-                "test_name": test["name"],
-                "avg_execution_time_ms": round(avg_time, 2),
-                "min_time_ms": round(min_time, 2),
-                "max_time_ms": round(max_time, 2),
-                "result_count": len(query_results),
-                "meets_target": avg_time < 50,
+                "test_name": scenario.name,
+                "avg_execution_time_ms": measured['mean_ms'],
+                "min_time_ms": measured['min_ms'],
+                "max_time_ms": measured['max_ms'],
+                "p50_ms": measured['p50_ms'],
+                "p95_ms": measured['p95_ms'],
+                "p99_ms": measured['p99_ms'],
+                "request_charge": measured['request_charge'],
+                "pages": measured['pages'],
+                "result_count": measured['result_count'],
+                "meets_target": measured['meets_target'],
                 "performance_rating": performance_rating,
-                "expected_performance": test["expected_performance"],
-                "partition_optimized": test["partition_optimized"]
+                "expected_performance": scenario.expected_performance,
+                "partition_optimized": scenario.partition_key is not None
             }
             
             results.append(result)
             
             status = "✓" if result["meets_target"] else "✗"
-            logger.info(f"{status} {test['name']}: {avg_time:.2f}ms ({len(query_results)} results)")
+            logger.info(f"{status} {scenario.name}: p50 {measured['p50_ms']:.2f}ms, p95 {p95_time:.2f}ms, "
+                        f"{measured['request_charge']} RU ({measured['result_count']} results)")
         
         return {
             "timestamp": now.isoformat(),
+            "warmup": warmup,
+            "iterations": iterations,
             "total_tests": len(results),
             "tests_passed": len([r for r in results if r["meets_target"]]),
             "tests_failed": len([r for r in results if not r["meets_target"]]),
@@ -364,13 +284,13 @@ Tests passed: {performance_results['tests_passed']}
 Tests failed: {performance_results['tests_failed']}
 Overall success rate: {performance_results['overall_success_rate']}%
 
-Query Performance Details:
+Query Performance Details ({performance_results['iterations']} iterations after {performance_results['warmup']} warmup, target p95 < 50ms):
 """
         
         for test in performance_results['test_results']:
             status = "✓" if test['meets_target'] else "✗"
-            report += f"  {status} {test['test_name']}: {test['avg_execution_time_ms']}ms ({test['result_count']} results)\n"
-            report += f"    Range: {test['min_time_ms']}ms - {test['max_time_ms']}ms, Rating: {test['performance_rating']}\n"
+            report += f"  {status} {test['test_name']}: p50 {test['p50_ms']}ms, p95 {test['p95_ms']}ms, p99 {test['p99_ms']}ms ({test['result_count']} results)\n"
+            report += f"    {test['request_charge']} RU over {test['pages']} page(s), Range: {test['min_time_ms']}ms - {test['max_time_ms']}ms, Rating: {test['performance_rating']}\n"
         
         report += f"""
 
@@ -411,9 +331,9 @@ Health Check Details:
             report += "\nPERFORMANCE RECOMMENDATIONS:\n"
             report += "----------------------------\n"
             for test in failed_tests:
-                if test['avg_execution_time_ms'] > 100:
+                if test['p95_ms'] > 100:
                     report += f"  ⚠ {test['test_name']}: Consider adding composite index\n"
-                elif test['avg_execution_time_ms'] > 50:
+                elif test['p95_ms'] > 50:
                     report += f"  ⚠ {test['test_name']}: Monitor RU consumption and optimize query\n"
         
         report += f"""
@@ -482,7 +402,7 @@ PERFORMANCE SUMMARY:
 - Failed tests: {performance_results['tests_failed']}
 
 IMMEDIATE ACTIONS REQUIRED:
-{chr(10).join(f'- {test["test_name"]}: {test["avg_execution_time_ms"]}ms (exceeds 50ms target)' 
+{chr(10).join(f'- {test["test_name"]}: p95 {test["p95_ms"]}ms (exceeds 50ms target)' 
               for test in performance_results['test_results'] if not test['meets_target'])}
 
 Detailed report: {report_filename}
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+IDC Query Benchmark Harness
+Runs a declarative suite of Cosmos DB queries with warmup and repeated
+iterations, and reports p50/p95/p99 latency, RU charge and page count per
+query. Results can be saved as a JSON baseline and compared against one with
+regression thresholds (non-zero exit on regression, for CI).
+
+Backends:
+    cosmos    - COSMOS_ENDPOINT / COSMOS_KEY from .env
+    emulator  - local Cosmos DB emulator (well-known key, self-signed cert)
+    memory    - in-process fake over synthetic or fixture documents
+
+Usage:
+    python idc_query_benchmark.py --backend memory --iterations 50
+    python idc_query_benchmark.py --save-baseline idc_benchmark_baseline.json
+    python idc_query_benchmark.py --baseline idc_benchmark_baseline.json --p95-threshold 0.25
+"""
+
+import os
+import re
+import json
+import math
+import time
+import random
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Tuple
+
+SCENARIOS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'idc_benchmark_scenarios.json')
+EMULATOR_ENDPOINT = 'https://localhost:8081/'
+EMULATOR_KEY = 'C2y6yDjf5/R+ob0N8A7Cgv30VRDJIWEHLM+4QDU5DE2nQ9nDuVTqobD4b8mGGyPMbIZnqyMsEcaGQy67XIw/Jw=='
+
+
+@dataclass
+class QueryScenario:
+    """One benchmarked query; partition_key=None means a cross-partition query"""
+    name: str
+    query: str
+    parameters: List[Dict[str, Any]] = field(default_factory=list)
+    partition_key: Optional[str] = None
+    expected_performance: str = "good"
+
+    def resolved_parameters(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Resolve {"$epoch_offset": seconds} values against the current time"""
+        now = time.time() if now is None else now
+        resolved = []
+        for parameter in self.parameters:
+            value = parameter['value']
+            if isinstance(value, dict) and '$epoch_offset' in value:
+                value = int(now) + int(value['$epoch_offset'])
+            resolved.append({'name': parameter['name'], 'value': value})
+        return resolved
+
+
+@dataclass
+class QueryRun:
+    """What a backend reports for one execution of a query"""
+    result_count: int
+    pages: int
+    request_charge: float
+
+
+def load_scenarios(path: str = SCENARIOS_FILE) -> Tuple[List[QueryScenario], float]:
+    """Read a scenario suite; returns (scenarios, target_ms)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        suite = json.load(f)
+    scenarios = [QueryScenario(**scenario) for scenario in suite['scenarios']]
+    return scenarios, float(suite.get('target_ms', 50))
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# === BACKENDS ===
+
+class CosmosBenchmarkBackend:
+    """Runs scenarios against a Cosmos DB container (cloud or emulator)"""
+
+    def __init__(self, container, page_size: Optional[int] = None):
+        self.container = container
+        self.page_size = page_size
+
+    @classmethod
+    def connect(cls, endpoint: str, key: str, database_name: str, container_name: str,
+                verify_ssl: bool = True, page_size: Optional[int] = None) -> 'CosmosBenchmarkBackend':
+        from azure.cosmos import CosmosClient
+        client = CosmosClient(endpoint, key, connection_verify=verify_ssl)
+        container = client.get_database_client(database_name).get_container_client(container_name)
+        return cls(container, page_size)
+
+    def execute(self, scenario: QueryScenario, parameters: List[Dict[str, Any]]) -> QueryRun:
+        charge = {'total': 0.0}
+
+        def record_charge(headers, _):
+            charge['total'] += float(headers.get('x-ms-request-charge', 0) or 0)
+
+        kwargs = {'parameters': parameters, 'response_hook': record_charge}
+        if scenario.partition_key is not None:
+            kwargs['partition_key'] = scenario.partition_key
+        else:
+            kwargs['enable_cross_partition_query'] = True
+        if self.page_size:
+            kwargs['max_item_count'] = self.page_size
+
+        result_count = pages = 0
+        for page in self.container.query_items(scenario.query, **kwargs).by_page():
+            result_count += sum(1 for _ in page)
+            pages += 1
+        return QueryRun(result_count, pages, charge['total'])
+
+
+class InMemoryBenchmarkBackend:
+    """
+    In-process fake for exercising the harness without Cosmos DB
+    Understands the subset of Cosmos SQL the IDC suite uses: SELECT [TOP n]
+    * / VALUE COUNT(1) / c.field projections, AND-ed comparisons and CONTAINS,
+    ORDER BY and OFFSET/LIMIT. RU charge is synthetic: 2.3 RU per request
+    plus 0.05 RU per document scanned.
+    """
+
+    QUERY_PATTERN = re.compile(
+        r"^SELECT\s+(?:TOP\s+(?P<top>\d+)\s+)?(?P<select>.+?)\s+FROM\s+c"
+        r"(?:\s+WHERE\s+(?P<where>.+?))?"
+        r"(?:\s+ORDER\s+BY\s+c\.(?P<order>[\w.]+)(?:\s+(?P<direction>ASC|DESC))?)?"
+        r"(?:\s+OFFSET\s+(?P<offset>\d+)\s+LIMIT\s+(?P<limit>\d+))?$",
+        re.IGNORECASE | re.DOTALL
+    )
+    COMPARISON = re.compile(r"^c\.([\w.]+)\s*(=|!=|>=|<=|>|<)\s*(.+)$")
+    CONTAINS = re.compile(r"^CONTAINS\(\s*c\.([\w.]+)\s*,\s*(.+)\)$", re.IGNORECASE)
+
+    def __init__(self, documents: List[Dict[str, Any]], page_size: int = 100):
+        self.documents = documents
+        self.page_size = page_size
+
+    @staticmethod
+    def _field(document: Dict[str, Any], path: str):
+        value = document
+        for part in path.split('.'):
+            if not isinstance(value, dict) or part not in value:
+                return None
+            value = value[part]
+        return value
+
+    @staticmethod
+    def _literal(token: str, parameters: Dict[str, Any]):
+        token = token.strip()
+        if token.startswith('@'):
+            return parameters[token]
+        if token.startswith("'") and token.endswith("'"):
+            return token[1:-1]
+        if token.lower() in ('true', 'false'):
+            return token.lower() == 'true'
+        return float(token) if '.' in token else int(token)
+
+    def _predicate(self, where: Optional[str], parameters: Dict[str, Any]):
+        if not where:
+            return lambda document: True
+        checks = []
+        for clause in re.split(r"\s+AND\s+", where.strip(), flags=re.IGNORECASE):
+            clause = clause.strip()
+            contains = self.CONTAINS.match(clause)
+            comparison = self.COMPARISON.match(clause)
+            if contains:
+                path, needle = contains.group(1), self._literal(contains.group(2), parameters)
+                checks.append(lambda d, p=path, n=needle: isinstance(self._field(d, p), str) and n in self._field(d, p))
+            elif comparison:
+                path, op, value = comparison.group(1), comparison.group(2), self._literal(comparison.group(3), parameters)
+                checks.append(lambda d, p=path, o=op, v=value: self._compare(self._field(d, p), o, v))
+            else:
+                raise ValueError(f"Unsupported by the in-memory backend: {clause}")
+        return lambda document: all(check(document) for check in checks)
+
+    @staticmethod
+    def _compare(left, op: str, right) -> bool:
+        if left is None:
+            return False
+        try:
+            return {'=': left == right, '!=': left != right, '>=': left >= right,
+                    '<=': left <= right, '>': left > right, '<': left < right}[op]
+        except TypeError:
+            return False
+
+    def execute(self, scenario: QueryScenario, parameters: List[Dict[str, Any]]) -> QueryRun:
+        match = self.QUERY_PATTERN.match(' '.join(scenario.query.split()))
+        if not match:
+            raise ValueError(f"Unsupported by the in-memory backend: {scenario.query}")
+        values = {parameter['name']: parameter['value'] for parameter in parameters}
+
+        documents = self.documents
+        if scenario.partition_key is not None:
+            documents = [d for d in documents if d.get('partitionKey') == scenario.partition_key]
+        predicate = self._predicate(match.group('where'), values)
+        results = [d for d in documents if predicate(d)]
+
+        if match.group('order'):
+            path = match.group('order')
+            results.sort(key=lambda d: (self._field(d, path) is not None, self._field(d, path) or 0),
+                         reverse=(match.group('direction') or 'ASC').upper() == 'DESC')
+        if match.group('limit'):
+            offset = int(match.group('offset'))
+            results = results[offset:offset + int(match.group('limit'))]
+        if match.group('top'):
+            results = results[:int(match.group('top'))]
+
+        select = match.group('select').strip()
+        if select.upper() == 'VALUE COUNT(1)':
+            results = [len(results)]
+        elif select != '*':
+            paths = [column.strip()[2:] for column in select.split(',')]
+            results = [{path.split('.')[-1]: self._field(d, path) for path in paths} for d in results]
+
+        pages = max(1, math.ceil(len(results) / self.page_size))
+        return QueryRun(len(results), pages, round(2.3 * pages + 0.05 * len(documents), 2))
+
+
+def synthetic_idc_documents(count: int = 5000, seed: int = 7) -> List[Dict[str, Any]]:
+    """Reproducible IDC-shaped documents for the in-memory backend"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    kinds = [('research', 'research_finding'), ('engineering', 'engineering_specification'),
+             ('operations', 'operational_report'), ('research', 'market_analysis')]
+    terms = ['cosmos', 'azure', 'volatility', 'governance', 'pipeline', 'latency', 'graph']
+    documents = []
+    for i in range(count):
+        category, doc_type = rng.choice(kinds)
+        documents.append({
+            'id': f"doc_{i:06d}",
+            'partitionKey': doc_type,
+            'category': category,
+            'type': doc_type,
+            'epochTimestamp': now - rng.randint(0, 30 * 86400),
+            'searchText': ' '.join(rng.sample(terms, 3)),
+            'knowledgeBase': {'domain': category},
+            'metadata': {'schemaVersion': '2.0' if rng.random() < 0.9 else '1.0'},
+        })
+    return documents
+
+
+# === RUNNER ===
+
+class BenchmarkRunner:
+    """Warmup + timed iterations per scenario against any backend with execute()"""
+
+    def __init__(self, backend, warmup: int = 2, iterations: int = 20, target_ms: float = 50):
+        self.backend = backend
+        self.warmup = warmup
+        self.iterations = iterations
+        self.target_ms = target_ms
+
+    def run_scenario(self, scenario: QueryScenario) -> Dict[str, Any]:
+        parameters = scenario.resolved_parameters()
+        for _ in range(self.warmup):
+            self.backend.execute(scenario, parameters)
+
+        latencies, charges = [], []
+        run = None
+        for _ in range(self.iterations):
+            start = time.perf_counter()
+            run = self.backend.execute(scenario, parameters)
+            latencies.append((time.perf_counter() - start) * 1000)
+            charges.append(run.request_charge)
+
+        p95 = percentile(latencies, 95)
+        return {
+            'name': scenario.name,
+            'iterations': self.iterations,
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(p95, 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'min_ms': round(min(latencies), 2),
+            'max_ms': round(max(latencies), 2),
+            'request_charge': round(sum(charges) / len(charges), 2),
+            'pages': run.pages,
+            'result_count': run.result_count,
+            'partition_key': scenario.partition_key,
+            'expected_performance': scenario.expected_performance,
+            'meets_target': p95 < self.target_ms,
+        }
+
+    def run(self, scenarios: List[QueryScenario]) -> Dict[str, Any]:
+        results = [self.run_scenario(scenario) for scenario in scenarios]
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'backend': type(self.backend).__name__,
+            'warmup': self.warmup,
+            'iterations': self.iterations,
+            'target_ms': self.target_ms,
+            'results': results,
+        }
+
+
+def save_baseline(report: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                        p95_threshold: float = 0.20, ru_threshold: float = 0.10,
+                        min_delta_ms: float = 2.0) -> List[Dict[str, Any]]:
+    """
+    Regressions against a saved baseline: p95 latency up by more than
+    p95_threshold (and at least min_delta_ms, to ignore noise on fast queries)
+    or RU charge up by more than ru_threshold
+    """
+    previous = {result['name']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = previous.get(result['name'])
+        if not before:
+            continue
+        p95_delta = result['p95_ms'] - before['p95_ms']
+        if p95_delta > min_delta_ms and p95_delta > before['p95_ms'] * p95_threshold:
+            regressions.append({'name': result['name'], 'metric': 'p95_ms',
+                                'baseline': before['p95_ms'], 'current': result['p95_ms']})
+        if result['request_charge'] > before['request_charge'] * (1 + ru_threshold):
+            regressions.append({'name': result['name'], 'metric': 'request_charge',
+                                'baseline': before['request_charge'], 'current': result['request_charge']})
+    return regressions
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{report['backend']}: {report['warmup']} warmup + {report['iterations']} iterations per query\n",
+             f"{'query':<52}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RU':>9}{'pages':>7}{'rows':>7}"]
+    for result in report['results']:
+        status = "✓" if result['meets_target'] else "✗"
+        lines.append(f"{status} {result['name'][:50]:<50}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                     f"{result['p99_ms']:>9.2f}{result['request_charge']:>9.2f}{result['pages']:>7}"
+                     f"{result['result_count']:>7}")
+    return '\n'.join(lines)
+
+
+def make_backend(name: str, fixture: Optional[str] = None, documents: int = 5000,
+                 container_name: str = 'institutional-data-center', page_size: Optional[int] = None):
+    if name == 'memory':
+        if fixture:
+            with open(fixture, 'r', encoding='utf-8') as f:
+                docs = json.load(f)
+        else:
+            docs = synthetic_idc_documents(documents)
+        return InMemoryBenchmarkBackend(docs, page_size or 100)
+
+    database_name = os.getenv('COSMOS_DATABASE', 'research-analytics-db')
+    if name == 'emulator':
+        return CosmosBenchmarkBackend.connect(
+            os.getenv('COSMOS_EMULATOR_ENDPOINT', EMULATOR_ENDPOINT), EMULATOR_KEY,
+            database_name, container_name, verify_ssl=False, page_size=page_size
+        )
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    endpoint, key = os.getenv('COSMOS_ENDPOINT'), os.getenv('COSMOS_KEY')
+    if not endpoint or not key:
+        raise ValueError("COSMOS_ENDPOINT and COSMOS_KEY must be set in .env file")
+    return CosmosBenchmarkBackend.connect(endpoint, key, database_name, container_name, page_size=page_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=['cosmos', 'emulator', 'memory'], default='cosmos')
+    parser.add_argument('--scenarios', default=SCENARIOS_FILE)
+    parser.add_argument('--container', default='institutional-data-center')
+    parser.add_argument('--fixture', help='JSON list of documents for the memory backend')
+    parser.add_argument('--documents', type=int, default=5000, help='Synthetic documents for the memory backend')
+    parser.add_argument('--page-size', type=int, help='max_item_count per page')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare against a saved baseline')
+    parser.add_argument('--p95-threshold', type=float, default=0.20, help='Allowed relative p95 increase')
+    parser.add_argument('--ru-threshold', type=float, default=0.10, help='Allowed relative RU increase')
+    parser.add_argument('--output', metavar='PATH', help='Write the full JSON report')
+    args = parser.parse_args()
+
+    scenarios, target_ms = load_scenarios(args.scenarios)
+    backend = make_backend(args.backend, args.fixture, args.documents, args.container, args.page_size)
+    report = BenchmarkRunner(backend, args.warmup, args.iterations, target_ms).run(scenarios)
+    print(format_report(report))
+
+    if args.output:
+        save_baseline(report, args.output)
+    if args.save_baseline:
+        save_baseline(report, args.save_baseline)
+        print(f"\nBaseline saved: {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(report, json.load(f), args.p95_threshold, args.ru_threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"   {regression['name']}: {regression['metric']} "
+                      f"{regression['baseline']} -> {regression['current']}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -10,6 +10,7 @@ import json
 from datetime import datetime
 from azure.cosmos import CosmosClient, PartitionKey
 from dotenv import load_dotenv
+from idc_query_benchmark import BenchmarkRunner, CosmosBenchmarkBackend, QueryScenario
 
 # Load environment
 load_dotenv()
@@ -91,8 +92,8 @@ class IDCQueryOptimizer:
             print(f"❌ Error creating indexes: {e}")
             return None
     
-    def implement_query_optimization(self):
-        """Implement query-level optimizations"""
+    def implement_query_optimization(self, warmup: int = 2, iterations: int = 10):
+        """Implement query-level optimizations, measuring each before/after pair"""
         print("\n⚡ IMPLEMENTING QUERY OPTIMIZATIONS")
         print("="*50)
         
@@ -100,6 +101,7 @@ class IDCQueryOptimizer:
             "partition_key_usage": {
                 "before": "SELECT * FROM c WHERE c.document_type = 'research'",
                 "after": "SELECT * FROM c WHERE c.partitionKey = 'research-docs' AND c.document_type = 'research'",
+                "after_partition_key": "research-docs",
                 "improvement": "Uses partition key to limit search scope"
             },
             "projection_optimization": {
@@ -119,11 +121,29 @@ class IDCQueryOptimizer:
             }
         }
         
+        # Fragments like "WHERE ..." are measured as full queries over the container
+        def full_query(text):
+            return text if text.upper().startswith('SELECT') else f"SELECT * FROM c {text}"
+        
+        runner = BenchmarkRunner(CosmosBenchmarkBackend(self.container), warmup=warmup, iterations=iterations)
         for opt_name, opt_details in optimizations.items():
             print(f"\n✓ {opt_name.replace('_', ' ').title()}:")
             print(f"  Before: {opt_details['before']}")
             print(f"  After:  {opt_details['after']}")
             print(f"  Impact: {opt_details['improvement']}")
+            
+            try:
+                before = runner.run_scenario(QueryScenario(f"{opt_name} (before)", full_query(opt_details['before'])))
+                after = runner.run_scenario(QueryScenario(
+                    f"{opt_name} (after)", full_query(opt_details['after']),
+                    partition_key=opt_details.get('after_partition_key')
+                ))
+                opt_details['measured'] = {'before': before, 'after': after}
+                for label, result in (("Before", before), ("After", after)):
+                    print(f"  {label:<7} p50 {result['p50_ms']:.2f}ms, p95 {result['p95_ms']:.2f}ms, "
+                          f"{result['request_charge']} RU, {result['pages']} page(s), {result['result_count']} rows")
+            except Exception as e:
+                print(f"  ⚠️  Could not measure: {e}")
         
         return optimizations
     
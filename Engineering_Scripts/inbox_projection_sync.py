@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Keep the per-recipient inbox projection current
+Polls the messages container's change feed and writes one entry per
+recipient to the message-inbox container (partitioned by /recipient). The
+first run backfills from the beginning of the feed.
+
+Usage:
+    python inbox_projection_sync.py              # sync every 10 seconds
+    python inbox_projection_sync.py --once       # single sync (cron)
+"""
+
+import argparse
+import time
+
+from cosmos_db_manager import get_db_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interval', type=float, default=10.0, help='Seconds between syncs')
+    parser.add_argument('--once', action='store_true', help='Run one sync and exit')
+    args = parser.parse_args()
+
+    db = get_db_manager()
+    while True:
+        try:
+            db.sync_inbox()
+        except Exception as e:
+            db.logger.error(f"Inbox sync failed: {str(e)}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
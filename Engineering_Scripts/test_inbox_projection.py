@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test the agent inbox projection
+Runs CosmosDBManager against an in-memory messages container and SQLiteInboxStore
+"""
+
+import os
+import re
+from unittest import mock
+
+os.environ.setdefault('COSMOS_ENDPOINT', 'https://localhost:8081/')
+os.environ.setdefault('COSMOS_KEY', 'test-key')
+
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+
+from cosmos_db_manager import CosmosDBManager, SQLiteInboxStore, inbox_entries
+
+MESSAGES = [
+    {'id': 'm1', 'from': 'SAM', 'to': ['ALICE', 'BOB', 'ALICE', ''], 'subject': 'Review', 'type': 'REQUEST',
+     'status': 'sent', 'requiresResponse': True, 'timestamp': '2025-01-01T09:00:00Z',
+     'partitionKey': '2025-01', '_rid': 'x', '_etag': 'y', '_ts': 1},
+    {'id': 'm2', 'from': 'BOB', 'to': 'ALICE', 'subject': 'Ack', 'type': 'ACKNOWLEDGMENT',
+     'status': 'read', 'requiresResponse': False, 'timestamp': '2025-01-02T09:00:00Z',
+     'partitionKey': '2025-01', '_ts': 2},
+    {'id': 'm3', 'from': 'SYSTEM', 'to': 'ALICE', 'subject': 'ping', 'type': 'HEALTH_CHECK',
+     'status': 'sent', 'timestamp': '2025-01-03T09:00:00Z', 'partitionKey': '2025-01', '_ts': 3},
+    {'id': 'm4', 'from': 'SAM', 'to': 'ALICE', 'subject': 'Follow-up', 'type': 'REQUEST',
+     'status': 'sent', 'requiresResponse': True, 'timestamp': '2025-02-01T09:00:00Z',
+     'partitionKey': '2025-02', '_ts': 4},
+]
+
+
+class FakeMessagesContainer:
+    """The parts of a ContainerProxy the inbox paths use; records the queries that reach it"""
+
+    def __init__(self, messages):
+        self.messages = {(m['id'], m['partitionKey']): dict(m) for m in messages}
+        self.queries = []
+        self.client_connection = type('Connection', (), {'last_response_headers': {'etag': '"4"'}})()
+
+    def query_items_change_feed(self, **kwargs):
+        return [dict(m) for m in self.messages.values()]
+
+    def query_items(self, query, parameters=None, **kwargs):
+        self.queries.append(query)
+        agent = {p['name']: p['value'] for p in parameters or []}.get('@agent')
+        matches = [m for m in self.messages.values()
+                   if m['to'] == agent or (isinstance(m['to'], list) and agent in m['to'])]
+        matches.sort(key=lambda m: m['timestamp'], reverse=True)
+        limit = re.search(r'LIMIT (\d+)', query)
+        return matches[:int(limit.group(1))] if limit else matches
+
+    def read_item(self, item, partition_key):
+        if (item, partition_key) not in self.messages:
+            raise CosmosResourceNotFoundError(message='not found')
+        return dict(self.messages[(item, partition_key)])
+
+    def delete_item(self, item, partition_key):
+        del self.messages[(item, partition_key)]
+
+
+def _manager():
+    with mock.patch('cosmos_db_manager.CosmosClient'):  # its constructor reads the account over the network
+        db = CosmosDBManager()
+    db.container = FakeMessagesContainer(MESSAGES)
+    store = SQLiteInboxStore()
+    db.sync_inbox(store=store)
+    return db, store
+
+
+def test_inbox_entries_from_array_and_string_to():
+    entries = inbox_entries(MESSAGES[0])
+    assert [e['recipient'] for e in entries] == ['ALICE', 'BOB']
+    assert [e['id'] for e in entries] == ['ALICE|m1', 'BOB|m1']
+    assert all(e['messageId'] == 'm1' and '_rid' not in e and '_ts' not in e for e in entries)
+
+    assert [e['id'] for e in inbox_entries(MESSAGES[1])] == ['ALICE|m2']
+    assert inbox_entries(MESSAGES[2]) == []  # health checks are not inbox messages
+    assert inbox_entries({'id': 'm5', 'to': None}) == []
+
+
+def test_store_query_filters():
+    store = SQLiteInboxStore()
+    for message in MESSAGES:
+        store.upsert_entries(inbox_entries(message))
+
+    assert [m['id'] for m in store.query('ALICE')] == ['m4', 'm2', 'm1']
+    assert [m['id'] for m in store.query('ALICE', ascending=True, limit=2)] == ['m1', 'm2']
+    assert [m['id'] for m in store.query('ALICE', statuses=['sent'])] == ['m4', 'm1']
+    assert [m['id'] for m in store.query('ALICE', before='2025-02-01')] == ['m2', 'm1']
+    assert [m['id'] for m in store.query('ALICE', requires_response=False)] == ['m2']
+    assert [m['id'] for m in store.query('BOB')] == ['m1']
+
+    # Entries come back in the message shape
+    message = store.query('BOB')[0]
+    assert message['to'] == ['ALICE', 'BOB', 'ALICE', ''] and 'recipient' not in message
+
+    # Upserting again replaces the entry instead of adding one
+    store.upsert_entries(inbox_entries({**MESSAGES[1], 'status': 'archived'}))
+    assert [m['status'] for m in store.query('ALICE', limit=2)] == ['sent', 'archived']
+
+
+def test_inbox_served_from_projection():
+    db, _ = _manager()
+    assert [m['id'] for m in db.get_agent_inbox('ALICE')] == ['m4', 'm2', 'm1']
+    assert [m['id'] for m in db.get_agent_inbox('BOB')] == ['m1']
+    assert [m['id'] for m in db.get_messages_requiring_response('ALICE')] == ['m1', 'm4']
+    assert db.container.queries == []
+
+
+def test_stale_projection_falls_back_to_messages():
+    db, store = _manager()
+    store.conn.execute("UPDATE inbox_checkpoint SET synced_at = synced_at - 3600")
+    db.inbox_max_staleness = 60
+    db._inbox_checked_at = None  # force a checkpoint re-read
+
+    assert db.get_inbox_store() is None
+    assert [m['id'] for m in db.get_agent_inbox('ALICE', limit=2)] == ['m4', 'm3']
+    assert len(db.container.queries) == 1
+
+    # A fresh sync puts the projection back in use
+    db.sync_inbox(store=store)
+    assert db.get_inbox_store() is store
+
+
+def test_delete_removes_projection_entries():
+    db, store = _manager()
+    assert db.delete_message('m1', '2025-01')
+    assert [m['id'] for m in store.query('ALICE')] == ['m4', 'm2']
+    assert store.query('BOB') == []
+    assert not db.delete_message('m1', '2025-01')
+
+
+if __name__ == "__main__":
+    test_inbox_entries_from_array_and_string_to()
+    test_store_query_filters()
+    test_inbox_served_from_projection()
+    test_stale_projection_falls_back_to_messages()
+    test_delete_removes_projection_entries()
+    print("✅ Inbox projection matches the messages container")
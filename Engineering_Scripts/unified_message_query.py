@@ -58,6 +58,13 @@ class UnifiedMessageQuery:
             List of messages for the agent
         """
         try:
+            # Single-partition read from the inbox projection when it has been built
+            inbox = self.db.get_inbox_store() if direction == "to" else None
+            if inbox:
+                results = inbox.query(agent_name, limit=limit)
+                self.logger.info(f"✅ Found {len(results)} messages for {agent_name} (direction: {direction}, inbox index)")
+                return results
+            
             # Build unified query that handles both string and array recipient types
             if direction == "to":
                 query = """
@@ -340,27 +347,49 @@ class UnifiedMessageQuery:
             self.logger.error(f"❌ Failed to find messages by status: {str(e)}")
             return []
     
-    def find_stale_messages(self, hours: int = 48) -> List[Dict[str, Any]]:
+    def find_stale_messages(self, hours: int = 48, agent_name: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Find messages that haven't been updated in specified hours
         Per Constitutional requirement for stale message alerts
         
         Args:
             hours: Hours since last update (default 48)
+            agent_name: Only messages sent to this agent (uses the inbox index)
             
         Returns:
             List of stale messages needing attention
         """
         try:
             cutoff = datetime.now() - timedelta(hours=hours)
-            query = f"""
-            SELECT * FROM messages 
-            WHERE (messages.status = 'NEW' OR messages.status = 'PENDING')
-            AND messages.timestamp < '{cutoff.isoformat()}Z'
-            ORDER BY messages.timestamp ASC
-            """
-            
-            results = self.db.query_messages(query)
+            inbox = self.db.get_inbox_store() if agent_name else None
+            if inbox:
+                results = inbox.query(
+                    agent_name,
+                    statuses=[MessageStatus.NEW.value, MessageStatus.PENDING.value],
+                    before=f"{cutoff.isoformat()}Z",
+                    ascending=True
+                )
+            elif agent_name:
+                query = """
+                SELECT * FROM messages 
+                WHERE (messages.status = 'NEW' OR messages.status = 'PENDING')
+                AND messages.timestamp < @cutoff
+                AND (messages['to'] = @agent_name OR ARRAY_CONTAINS(messages['to'], @agent_name))
+                ORDER BY messages.timestamp ASC
+                """
+                parameters = [
+                    {"name": "@cutoff", "value": f"{cutoff.isoformat()}Z"},
+                    {"name": "@agent_name", "value": agent_name}
+                ]
+                results = self.db.query_messages(query, parameters)
+            else:
+                query = f"""
+                SELECT * FROM messages 
+                WHERE (messages.status = 'NEW' OR messages.status = 'PENDING')
+                AND messages.timestamp < '{cutoff.isoformat()}Z'
+                ORDER BY messages.timestamp ASC
+                """
+                results = self.db.query_messages(query)
             
             if results:
                 self.logger.warning(f"⚠️ Found {len(results)} stale messages older than {hours} hours")
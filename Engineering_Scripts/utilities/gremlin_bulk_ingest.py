@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Gremlin Bulk Ingestion - shared engine for the knowledge graph integrations
+Batched, parameterized, idempotent vertex/edge upserts over a gremlin_python Client
+"""
+
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 4  # gremlin_python's default connection pool size
+DEFAULT_MAX_RETRIES = 5
+
+# Properties the engine sets itself
+RESERVED_PROPERTIES = {'id', 'label', 'document_id', 'ingest_run'}
+
+
+def gremlin_value(value: Any) -> Optional[Any]:
+    """Coerce a property value to something Gremlin can store (None = skip)"""
+    if value is None:
+        return None
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Back-off requested by a Cosmos 429, or None if the error is not a throttle"""
+    attributes = getattr(error, 'status_attributes', None) or {}
+    try:
+        status = int(attributes.get('x-ms-status-code', 0))
+    except (TypeError, ValueError):
+        status = 0
+    if status != 429 and '429' not in str(error):
+        return None
+
+    retry_after = attributes.get('x-ms-retry-after-ms')
+    if not retry_after:
+        return 1.0
+    retry_after = str(retry_after)
+    # Cosmos sends either milliseconds or a timespan such as "00:00:00.1230000"
+    if ':' in retry_after:
+        hours, minutes, seconds = retry_after.split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return float(retry_after) / 1000
+
+
+class GremlinBulkIngestor:
+    """
+    Upsert a document's vertices and edges in batches
+
+    Every value travels as a binding, so quotes and special characters in
+    properties cannot break a query. Vertices are upserted many per traversal
+    (inject(0).union(...) of V(id).fold().coalesce(unfold(), addV(...))), edges
+    are attached by known vertex ids, and batches are submitted from a bounded
+    thread pool. Vertex properties are written with single cardinality so a
+    re-ingest replaces values rather than appending to them (Cosmos defaults
+    to list). A batch reports an element as created only if its id comes back
+    from the traversal - an edge whose endpoint is missing yields nothing. Each ingestion stamps an ingest_run id; once everything has
+    been upserted, the document's vertices/edges from earlier runs are dropped,
+    so re-ingesting a document converges instead of dropping and recreating it.
+    """
+
+    def __init__(self, gremlin_client, batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY, max_retries: int = DEFAULT_MAX_RETRIES):
+        self.gremlin_client = gremlin_client
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+
+    def ingest(self, document_id: str, vertices: List[Dict[str, Any]],
+               edges: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Upsert vertices ({'id', 'label', 'properties'}) then edges
+        ({'id', 'label', 'source', 'target', 'properties'}) for one document
+        """
+
+        run_id = uuid.uuid4().hex
+
+        vertices_created, vertices_failed = self._submit_batches(
+            vertices, lambda batch: self._vertex_batch_query(batch, document_id, run_id)
+        )
+        print(f"      ✅ Upserted {len(vertices_created)} vertices"
+              f"{f' ({len(vertices_failed)} failed)' if vertices_failed else ''}")
+
+        # Only attach edges whose endpoints made it into the graph
+        created = set(vertices_created)
+        known = {vertex['id'] for vertex in vertices}
+        attachable, edges_failed = [], []
+        for edge in edges:
+            if (edge['source'] in known and edge['source'] not in created) or \
+               (edge['target'] in known and edge['target'] not in created):
+                edges_failed.append(edge['id'])
+            else:
+                attachable.append(edge)
+
+        edges_created, failed = self._submit_batches(
+            attachable, lambda batch: self._edge_batch_query(batch, document_id, run_id)
+        )
+        edges_failed.extend(failed)
+        print(f"      ✅ Upserted {len(edges_created)} edges"
+              f"{f' ({len(edges_failed)} failed)' if edges_failed else ''}")
+
+        # A failed upsert leaves its element on the old run id - keep everything then
+        stale_removed = False
+        if not vertices_failed and not edges_failed:
+            stale_removed = self._drop_stale(document_id, run_id)
+
+        return {
+            "ingest_run": run_id,
+            "vertices_created": vertices_created,
+            "edges_created": edges_created,
+            "vertices_failed": vertices_failed,
+            "edges_failed": edges_failed,
+            "stale_removed": stale_removed
+        }
+
+    def _vertex_batch_query(self, batch: List[Dict[str, Any]], document_id: str,
+                            run_id: str) -> Tuple[str, Dict[str, Any]]:
+        bindings = {'doc_id': document_id, 'run_id': run_id}
+        branches = []
+
+        for i, vertex in enumerate(batch):
+            bindings[f'v{i}'] = vertex['id']
+            bindings[f'v{i}_label'] = vertex['label']
+            branch = (f"__.V(v{i}).fold().coalesce(__.unfold(), "
+                      f"__.addV(v{i}_label).property('id', v{i}))"
+                      f".property(single, 'document_id', doc_id).property(single, 'ingest_run', run_id)")
+            branch += self._property_steps(f'v{i}', vertex.get('properties', {}), bindings, 'single, ')
+            branches.append(branch)
+
+        return f"g.inject(0).union({', '.join(branches)}).id()", bindings
+
+    def _edge_batch_query(self, batch: List[Dict[str, Any]], document_id: str,
+                          run_id: str) -> Tuple[str, Dict[str, Any]]:
+        bindings = {'doc_id': document_id, 'run_id': run_id}
+        branches = []
+
+        for i, edge in enumerate(batch):
+            bindings[f'e{i}'] = edge['id']
+            bindings[f'e{i}_label'] = edge['label']
+            bindings[f'e{i}_out'] = edge['source']
+            bindings[f'e{i}_in'] = edge['target']
+            branch = (f"__.V(e{i}_out).coalesce("
+                      f"__.outE(e{i}_label).has('id', e{i}), "
+                      f"__.addE(e{i}_label).to(__.V(e{i}_in)).property('id', e{i}))"
+                      f".property('document_id', doc_id).property('ingest_run', run_id)")
+            branch += self._property_steps(f'e{i}', edge.get('properties', {}), bindings)
+            branches.append(branch)
+
+        return f"g.inject(0).union({', '.join(branches)}).id()", bindings
+
+    @staticmethod
+    def _property_steps(prefix: str, properties: Dict[str, Any], bindings: Dict[str, Any],
+                        cardinality: str = '') -> str:
+        steps = ''
+        for j, (key, value) in enumerate(properties.items()):
+            value = gremlin_value(value)
+            if value is None or key in RESERVED_PROPERTIES:
+                continue
+            bindings[f'{prefix}_k{j}'] = key
+            bindings[f'{prefix}_p{j}'] = value
+            steps += f".property({cardinality}{prefix}_k{j}, {prefix}_p{j})"
+        return steps
+
+    def _submit_batches(self, items: List[Dict[str, Any]],
+                        build: Callable[[List[Dict[str, Any]]], Tuple[str, Dict[str, Any]]]
+                        ) -> Tuple[List[str], List[str]]:
+        """Submit items in batches from a bounded pool; returns (succeeded ids, failed ids)"""
+
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        if not batches:
+            return [], []
+
+        def run(batch):
+            query, bindings = build(batch)
+            try:
+                returned = {str(element_id) for element_id in self._submit(query, bindings)}
+            except Exception as e:
+                print(f"      ❌ Batch of {len(batch)} failed: {e}")
+                return [], [item['id'] for item in batch]
+            # Branches that matched nothing (e.g. a missing edge endpoint) return no id
+            ok = [item['id'] for item in batch if str(item['id']) in returned]
+            bad = [item['id'] for item in batch if str(item['id']) not in returned]
+            if bad:
+                print(f"      ❌ {len(bad)} of {len(batch)} not upserted: {', '.join(map(str, bad[:5]))}")
+            return ok, bad
+
+        succeeded, failed = [], []
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+            for ok, bad in executor.map(run, batches):
+                succeeded.extend(ok)
+                failed.extend(bad)
+        return succeeded, failed
+
+    def _submit(self, query: str, bindings: Dict[str, Any]) -> List[Any]:
+        """Submit one traversal, honouring Cosmos 429 back-off"""
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.gremlin_client.submit(query, bindings).all().result()
+            except Exception as e:
+                retry_after = _retry_after_seconds(e)
+                if retry_after is None or attempt == self.max_retries:
+                    raise
+                time.sleep(retry_after)
+
+    def _drop_stale(self, document_id: str, run_id: str) -> bool:
+        """Remove the document's vertices/edges not touched by this run"""
+
+        bindings = {'doc_id': document_id, 'run_id': run_id}
+        try:
+            self._submit("g.E().has('document_id', doc_id).not(__.has('ingest_run', run_id)).drop()", bindings)
+            self._submit("g.V().has('document_id', doc_id).not(__.has('ingest_run', run_id)).drop()", bindings)
+            print(f"   🧹 Removed stale graph data for document: {document_id}")
+            return True
+        except Exception as e:
+            print(f"   ⚠️  Could not remove stale graph data: {e}")
+            return False
@@ -14,6 +14,8 @@ from typing import Dict, List, Any
 from azure.cosmos import CosmosClient
 from dotenv import load_dotenv
 
+from gremlin_bulk_ingest import GremlinBulkIngestor
+
 # Gremlin imports
 try:
     from gremlin_python.driver import client, serializer
@@ -111,64 +113,18 @@ class GremlinGraphManager:
             
             print(f"   📊 Found {len(nodes)} nodes and {len(edges)} edges")
             
-            # Clear existing graph data for this document (optional)
-            self._clear_document_graph_data(document_id)
-            
-            # Insert vertices
-            vertices_created = []
-            
-            for node in nodes:
-                try:
-                    # Create vertex with properties
-                    query = f"""
-                    g.addV('{node['type']}')
-                     .property('id', '{node['id']}')
-                     .property('document_id', '{document_id}')
-                     .property('domain', '{node['properties'].get('domain', 'general')}')
-                    """
-                    
-                    # Add all node properties
-                    for prop_key, prop_value in node['properties'].items():
-                        if prop_key != 'domain':  # Already added
-                            if isinstance(prop_value, str):
-                                query += f".property('{prop_key}', '{prop_value}')"
-                            else:
-                                query += f".property('{prop_key}', {prop_value})"
-                    
-                    result = self.gremlin_client.submit(query).all().result()
-                    vertices_created.append(node['id'])
-                    
-                    print(f"      ✅ Created vertex: {node['id']} ({node['type']})")
-                    
-                except Exception as e:
-                    print(f"      ❌ Failed to create vertex {node['id']}: {e}")
-            
-            # Insert edges
-            edges_created = []
-            
-            for edge in edges:
-                try:
-                    # Create edge between vertices
-                    query = f"""
-                    g.V().has('id', '{edge['source']}')
-                     .addE('{edge['label']}')
-                     .to(g.V().has('id', '{edge['target']}'))
-                    """
-                    
-                    # Add edge properties
-                    for prop_key, prop_value in edge.get('properties', {}).items():
-                        if isinstance(prop_value, str):
-                            query += f".property('{prop_key}', '{prop_value}')"
-                        else:
-                            query += f".property('{prop_key}', {prop_value})"
-                    
-                    result = self.gremlin_client.submit(query).all().result()
-                    edges_created.append(edge['id'])
-                    
-                    print(f"      ✅ Created edge: {edge['source']} --{edge['label']}--> {edge['target']}")
-                    
-                except Exception as e:
-                    print(f"      ❌ Failed to create edge {edge['id']}: {e}")
+            # Upsert vertices and edges in batched, parameterized traversals
+            vertices = [
+                {
+                    'id': node['id'],
+                    'label': node['type'],
+                    'properties': {'domain': 'general', **node['properties']}
+                }
+                for node in nodes
+            ]
+            ingestion = GremlinBulkIngestor(self.gremlin_client).ingest(document_id, vertices, edges)
+            vertices_created = ingestion['vertices_created']
+            edges_created = ingestion['edges_created']
             
             # Update Cosmos document with Gremlin references
             document['gremlin_ingested'] = {
@@ -177,7 +133,8 @@ class GremlinGraphManager:
                 "edges_created": edges_created,
                 "gremlin_database": os.getenv('GREMLIN_DATABASE'),
                 "gremlin_collection": os.getenv('GREMLIN_COLLECTION'),
-                "ingestion_success": True
+                "ingest_run": ingestion['ingest_run'],
+                "ingestion_success": not (ingestion['vertices_failed'] or ingestion['edges_failed'])
             }
             
             container.replace_item(
@@ -204,18 +161,6 @@ class GremlinGraphManager:
             print(f"❌ Error ingesting graph data: {e}")
             return {"success": False, "error": str(e)}
     
-    def _clear_document_graph_data(self, document_id: str):
-        """Clear existing graph data for document (optional cleanup)"""
-        
-        try:
-            # Remove vertices associated with this document
-            query = f"g.V().has('document_id', '{document_id}').drop()"
-            self.gremlin_client.submit(query).all().result()
-            print(f"   🧹 Cleared existing graph data for document: {document_id}")
-            
-        except Exception as e:
-            print(f"   ⚠️  Could not clear existing data: {e}")
-    
     def query_research_relationships(self, concept_name: str) -> List[Dict]:
         """Query research relationships around a concept"""
         
@@ -10,7 +10,7 @@ import hashlib
 import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 from dataclasses import dataclass, asdict
 
 # Azure imports
@@ -18,6 +18,8 @@ from azure.storage.blob import BlobServiceClient
 from azure.cosmos import CosmosClient
 from dotenv import load_dotenv
 
+from streaming_chunker import iter_text_windows
+
 # Load environment
 env_paths = [
     Path(__file__).parent.parent / '.env',
@@ -66,67 +68,37 @@ class IntelligentChunker:
     def chunk_document(self, document_text: str, doc_id: str) -> List[DocumentChunk]:
         """Apply semantic chunking strategy"""
         
-        # Simple implementation - can be enhanced with NLP
-        words = document_text.split()
-        chunks = []
-        
-        current_chunk = []
-        current_size = 0
-        chunk_index = 0
+        chunks = list(self.iter_chunks(document_text, doc_id))
         
-        for word in words:
-            current_chunk.append(word)
-            current_size += len(word) + 1  # +1 for space
+        # Update total_chunks for all chunks
+        for chunk in chunks:
+            chunk.total_chunks = len(chunks)
             
-            if current_size >= self.max_size:
-                # Create chunk
-                chunk_text = ' '.join(current_chunk)
-                chunk = DocumentChunk(
-                    chunk_id=f"{doc_id}_chunk_{chunk_index}",
-                    sequence=chunk_index,
-                    text=chunk_text,
-                    position=chunk_index,
-                    total_chunks=0,  # Will be updated later
-                    semantic_density=self.calculate_semantic_density(chunk_text),
-                    has_entities=self.detect_entities(chunk_text),
-                    metadata={
-                        "word_count": len(current_chunk),
-                        "char_count": len(chunk_text),
-                        "chunk_type": "semantic"
-                    }
-                )
-                chunks.append(chunk)
-                
-                # Overlap handling
-                overlap_words = current_chunk[-self.overlap:] if len(current_chunk) > self.overlap else []
-                current_chunk = overlap_words
-                current_size = sum(len(word) + 1 for word in overlap_words)
-                chunk_index += 1
+        return chunks
+    
+    def iter_chunks(self, document_text: str, doc_id: str) -> Iterator[DocumentChunk]:
+        """Yield chunks lazily as character windows over the original text"""
+        
+        windows = iter_text_windows(document_text, self.max_size, self.overlap)
         
-        # Handle remaining words
-        if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunk = DocumentChunk(
+        for chunk_index, (start, end, word_count) in enumerate(windows):
+            chunk_text = document_text[start:end]
+            yield DocumentChunk(
                 chunk_id=f"{doc_id}_chunk_{chunk_index}",
                 sequence=chunk_index,
                 text=chunk_text,
                 position=chunk_index,
-                total_chunks=0,
+                total_chunks=0,  # Known once the stream is exhausted
                 semantic_density=self.calculate_semantic_density(chunk_text),
                 has_entities=self.detect_entities(chunk_text),
                 metadata={
-                    "word_count": len(current_chunk),
+                    "word_count": word_count,
                     "char_count": len(chunk_text),
+                    "start_offset": start,
+                    "end_offset": end,
                     "chunk_type": "semantic"
                 }
             )
-            chunks.append(chunk)
-        
-        # Update total_chunks for all chunks
-        for chunk in chunks:
-            chunk.total_chunks = len(chunks)
-            
-        return chunks
     
     def calculate_semantic_density(self, text: str) -> float:
         """Calculate semantic density score"""
@@ -14,6 +14,8 @@ from typing import Dict, List, Any
 from azure.cosmos import CosmosClient
 from dotenv import load_dotenv
 
+from gremlin_bulk_ingest import GremlinBulkIngestor
+
 # Gremlin imports
 try:
     from gremlin_python.driver import client, serializer
@@ -637,95 +639,47 @@ class MacroEconomicGremlinManager:
             
             print(f"   🌐 Processing {len(nodes)} nodes and {len(edges)} edges")
             
-            # Clear existing graph data for this document
-            self._clear_macro_economic_graph_data(document_id)
-            
             # Create enhanced nodes with detailed summaries
-            vertices_created = []
+            vertices = []
             
             for node in nodes:
-                try:
-                    # Enhanced node creation with detailed metadata
-                    node_properties = node['properties'].copy()
-                    
-                    # Add detailed summary information for document nodes
-                    if node['type'] == 'ResearchDocument':
-                        node_properties.update({
-                            'main_contribution': detailed_summary['executive_summary']['main_contribution'],
-                            'key_innovation': detailed_summary['executive_summary']['key_innovation'],
-                            'practical_impact': detailed_summary['executive_summary']['practical_impact'],
-                            'total_sources': detailed_summary['academic_sources']['total_sources'],
-                            'source_categories': json.dumps(detailed_summary['academic_sources']['source_breakdown']),
-                            'performance_metrics_count': len(detailed_summary['key_facts_and_findings']['performance_metrics']),
-                            'methodological_frameworks_count': len(detailed_summary['methodological_frameworks']['graph_construction_methods'])
-                        })
-                    
-                    # Add economic concept details
-                    elif node['type'] == 'MacroEconomicConcept':
-                        concept_name = node_properties.get('name', '')
-                        # Add context from detailed summary
-                        node_properties['research_context'] = self._get_concept_context(concept_name, detailed_summary)
-                    
-                    # Create Gremlin vertex
-                    query = f"""
-                    g.addV('{node['type']}')
-                     .property('id', '{node['id']}')
-                     .property('document_id', '{document_id}')
-                     .property('domain', 'macro_economics')
-                    """
-                    
-                    # Add all properties
-                    for prop_key, prop_value in node_properties.items():
-                        if isinstance(prop_value, str):
-                            escaped_value = prop_value.replace("'", "\\'").replace('"', '\\"')
-                            query += f".property('{prop_key}', '{escaped_value}')"
-                        elif isinstance(prop_value, (int, float)):
-                            query += f".property('{prop_key}', {prop_value})"
-                        elif isinstance(prop_value, list):
-                            query += f".property('{prop_key}', '{json.dumps(prop_value)}')"
-                    
-                    result = self.gremlin_client.submit(query).all().result()
-                    vertices_created.append(node['id'])
-                    
-                    print(f"      ✅ Created enhanced vertex: {node['id']} ({node['type']})")
-                    
-                except Exception as e:
-                    print(f"      ❌ Failed to create vertex {node['id']}: {e}")
+                # Enhanced node creation with detailed metadata
+                node_properties = {'domain': 'macro_economics', **node['properties']}
+                
+                # Add detailed summary information for document nodes
+                if node['type'] == 'ResearchDocument':
+                    node_properties.update({
+                        'main_contribution': detailed_summary['executive_summary']['main_contribution'],
+                        'key_innovation': detailed_summary['executive_summary']['key_innovation'],
+                        'practical_impact': detailed_summary['executive_summary']['practical_impact'],
+                        'total_sources': detailed_summary['academic_sources']['total_sources'],
+                        'source_categories': json.dumps(detailed_summary['academic_sources']['source_breakdown']),
+                        'performance_metrics_count': len(detailed_summary['key_facts_and_findings']['performance_metrics']),
+                        'methodological_frameworks_count': len(detailed_summary['methodological_frameworks']['graph_construction_methods'])
+                    })
+                
+                # Add economic concept details
+                elif node['type'] == 'MacroEconomicConcept':
+                    concept_name = node_properties.get('name', '')
+                    # Add context from detailed summary
+                    node_properties['research_context'] = self._get_concept_context(concept_name, detailed_summary)
+                
+                vertices.append({'id': node['id'], 'label': node['type'], 'properties': node_properties})
             
             # Create enhanced edges with relationship context
-            edges_created = []
+            enhanced_edges = []
             
             for edge in edges:
-                try:
-                    # Enhanced edge creation with context
-                    edge_properties = edge.get('properties', {}).copy()
-                    
-                    # Add relationship context
-                    edge_properties['relationship_context'] = self._get_relationship_context(
-                        edge['source'], edge['target'], edge['label'], detailed_summary
-                    )
-                    
-                    query = f"""
-                    g.V().has('id', '{edge['source']}')
-                     .addE('{edge['label']}')
-                     .to(g.V().has('id', '{edge['target']}'))
-                    """
-                    
-                    # Add edge properties
-                    for prop_key, prop_value in edge_properties.items():
-                        if isinstance(prop_value, str):
-                            escaped_value = prop_value.replace("'", "\\'").replace('"', '\\"')
-                            query += f".property('{prop_key}', '{escaped_value}')"
-                        elif isinstance(prop_value, (int, float)):
-                            query += f".property('{prop_key}', {prop_value})"
-                    
-                    result = self.gremlin_client.submit(query).all().result()
-                    edges_created.append(edge['id'])
-                    
-                    print(f"      ✅ Created enhanced edge: {edge['source']} --{edge['label']}--> {edge['target']}")
-                    
-                except Exception as e:
-                    print(f"      ❌ Failed to create edge {edge['id']}: {e}")
+                edge_properties = edge.get('properties', {}).copy()
+                edge_properties['relationship_context'] = self._get_relationship_context(
+                    edge['source'], edge['target'], edge['label'], detailed_summary
+                )
+                enhanced_edges.append({**edge, 'properties': edge_properties})
+            
+            # Upsert in batched, parameterized traversals (replaces drop-then-recreate)
+            ingestion = GremlinBulkIngestor(self.gremlin_client).ingest(document_id, vertices, enhanced_edges)
+            vertices_created = ingestion['vertices_created']
+            edges_created = ingestion['edges_created']
             
             # Update Cosmos document with Gremlin references
             document['gremlin_ingested'] = {
@@ -737,7 +691,8 @@ class MacroEconomicGremlinManager:
                 "key_facts_count": len(detailed_summary['key_facts_and_findings']['performance_metrics']),
                 "gremlin_database": os.getenv('GREMLIN_DATABASE'),
                 "gremlin_collection": os.getenv('GREMLIN_COLLECTION'),
-                "ingestion_success": True
+                "ingest_run": ingestion['ingest_run'],
+                "ingestion_success": not (ingestion['vertices_failed'] or ingestion['edges_failed'])
             }
             
             container.replace_item(
@@ -785,17 +740,6 @@ class MacroEconomicGremlinManager:
         
         return '\n'.join(content_parts)
     
-    def _clear_macro_economic_graph_data(self, document_id: str):
-        """Clear existing macro-economic graph data"""
-        
-        try:
-            query = f"g.V().has('document_id', '{document_id}').drop()"
-            self.gremlin_client.submit(query).all().result()
-            print(f"   🧹 Cleared existing macro-economic graph data for document: {document_id}")
-            
-        except Exception as e:
-            print(f"   ⚠️  Could not clear existing data: {e}")
-    
     def _get_concept_context(self, concept_name: str, detailed_summary: Dict) -> str:
         """Get context for economic concept from detailed summary"""
         
@@ -10,7 +10,7 @@ import hashlib
 import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 
 # Azure imports
@@ -18,6 +18,8 @@ from azure.storage.blob import BlobServiceClient
 from azure.cosmos import CosmosClient
 from dotenv import load_dotenv
 
+from streaming_chunker import KeywordScanner, iter_text_windows
+
 # Load environment
 env_paths = [
     Path(__file__).parent.parent / '.env',
@@ -80,19 +82,40 @@ class MacroEconomicChunker:
             'vector_autoregression', 'impulse_response', 'cointegration',
             'machine_learning', 'natural_language_processing', 'sentiment_analysis'
         ]
+        
+        self.data_source_keywords = [
+            'fred', 'world bank', 'imf', 'oecd', 'central bank', 'bea',
+            'eurostat', 'bis', 'bloomberg', 'reuters', 'arxiv', 'ssrn'
+        ]
+        
+        self.economic_keywords = ['economic', 'monetary', 'fiscal', 'financial', 'macroeconomic']
+        self.quantitative_indicators = ['%', 'percent', 'basis points', 'trillion', 'billion', 'growth rate']
+        
+        # One automaton for every term list, matched as "term" or "term with spaces"
+        patterns = []
+        for group, terms in self._term_groups().items():
+            for term in terms:
+                patterns.append((term, (group, term)))
+                if '_' in term:
+                    patterns.append((term.replace('_', ' '), (group, term)))
+        self.term_scanner = KeywordScanner(patterns)
+    
+    def _term_groups(self) -> Dict[str, List[str]]:
+        """Term lists detected in each chunk, by group"""
+        return {
+            'concepts': self.economic_concepts,
+            'indicators': self.economic_indicators,
+            'policies': self.policy_instruments,
+            'methods': self.methodological_terms,
+            'data_sources': self.data_source_keywords,
+            'keywords': self.economic_keywords,
+            'quantitative': self.quantitative_indicators
+        }
     
     def chunk_macro_economic_document(self, document_text: str, doc_id: str) -> List[MacroEconomicChunk]:
         """Apply specialized chunking for macro-economic content"""
         
-        # Split by sections first to preserve economic concepts
-        sections = self._identify_economic_sections(document_text)
-        chunks = []
-        chunk_index = 0
-        
-        for section_title, section_content in sections:
-            section_chunks = self._chunk_section(section_content, doc_id, chunk_index, section_title)
-            chunks.extend(section_chunks)
-            chunk_index += len(section_chunks)
+        chunks = list(self.iter_chunks(document_text, doc_id))
         
         # Update total chunks for all
         for chunk in chunks:
@@ -100,13 +123,22 @@ class MacroEconomicChunker:
             
         return chunks
     
-    def _identify_economic_sections(self, text: str) -> List[tuple]:
-        """Identify economic sections in the document"""
+    def iter_chunks(self, document_text: str, doc_id: str) -> Iterator[MacroEconomicChunk]:
+        """Yield chunks lazily, section by section, as windows over the original text"""
         
-        lines = text.split('\n')
-        sections = []
-        current_section = None
-        current_content = []
+        chunk_index = 0
+        
+        # Chunk within sections to preserve economic concepts
+        for section_title, section_start, section_end in self._identify_economic_sections(document_text):
+            windows = iter_text_windows(document_text, self.max_size, self.overlap, section_start, section_end)
+            for start, end, word_count in windows:
+                yield self._create_economic_chunk(
+                    document_text[start:end], doc_id, chunk_index, section_title, start, word_count
+                )
+                chunk_index += 1
+    
+    def _identify_economic_sections(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (section title, start offset, end offset) for each economic section"""
         
         economic_section_headers = [
             'methodology', 'data sources', 'performance', 'applications',
@@ -114,75 +146,47 @@ class MacroEconomicChunker:
             'economic indicators', 'policy', 'forecasting', 'networks'
         ]
         
-        for line in lines:
+        current_section = None
+        section_start = 0
+        line_start = 0
+        
+        while line_start < len(text):
+            line_end = text.find('\n', line_start)
+            if line_end == -1:
+                line_end = len(text)
+            line = text[line_start:line_end]
             line_lower = line.lower().strip()
             
             # Check if this is a section header
-            is_header = (line.startswith('#') or 
-                        line.startswith('##') or
+            is_header = (line.startswith('#') or
                         any(header in line_lower for header in economic_section_headers))
             
-            if is_header and current_section is not None:
-                # Save previous section
-                sections.append((current_section, '\n'.join(current_content)))
-                current_content = []
-            
             if is_header:
+                if current_section is not None:
+                    yield current_section, section_start, line_start
+                elif line_start > 0:
+                    # Text before the first header is filed under the first section
+                    yield line.strip(), 0, line_start
                 current_section = line.strip()
-            else:
-                current_content.append(line)
-        
-        # Add final section
-        if current_section:
-            sections.append((current_section, '\n'.join(current_content)))
-        
-        return sections
-    
-    def _chunk_section(self, section_content: str, doc_id: str, start_index: int, section_title: str) -> List[MacroEconomicChunk]:
-        """Chunk a specific economic section"""
-        
-        words = section_content.split()
-        chunks = []
-        current_chunk = []
-        current_size = 0
-        chunk_index = start_index
-        
-        for word in words:
-            current_chunk.append(word)
-            current_size += len(word) + 1
+                section_start = line_end + 1
             
-            if current_size >= self.max_size:
-                chunk_text = ' '.join(current_chunk)
-                chunk = self._create_economic_chunk(chunk_text, doc_id, chunk_index, section_title)
-                chunks.append(chunk)
-                
-                # Handle overlap
-                overlap_words = current_chunk[-self.overlap:] if len(current_chunk) > self.overlap else []
-                current_chunk = overlap_words
-                current_size = sum(len(word) + 1 for word in overlap_words)
-                chunk_index += 1
-        
-        # Handle remaining words
-        if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunk = self._create_economic_chunk(chunk_text, doc_id, chunk_index, section_title)
-            chunks.append(chunk)
+            line_start = line_end + 1
         
-        return chunks
+        # Add final section (a document without headers is one section)
+        yield current_section or '', min(section_start, len(text)), len(text)
     
-    def _create_economic_chunk(self, text: str, doc_id: str, chunk_index: int, section_title: str) -> MacroEconomicChunk:
+    def _create_economic_chunk(self, text: str, doc_id: str, chunk_index: int, section_title: str,
+                               start_offset: int = 0, word_count: Optional[int] = None) -> MacroEconomicChunk:
         """Create a macro-economic chunk with specialized analysis"""
         
-        # Extract economic concepts
-        economic_concepts = self._extract_economic_concepts(text)
-        economic_indicators = self._extract_economic_indicators(text)
-        policy_references = self._extract_policy_references(text)
-        methodological_approaches = self._extract_methodological_approaches(text)
-        data_sources = self._extract_data_sources(text)
+        # Every concept, indicator, policy, method and source in one pass
+        terms = self._scan_terms(text)
+        economic_concepts = terms['concepts']
+        economic_indicators = terms['indicators']
         
         # Calculate scores
         semantic_density = self._calculate_semantic_density(text)
-        economic_relevance = self._calculate_economic_relevance(text, economic_concepts, economic_indicators)
+        economic_relevance = self._calculate_economic_relevance(terms)
         
         return MacroEconomicChunk(
             chunk_id=f"{doc_id}_econ_chunk_{chunk_index}",
@@ -192,80 +196,30 @@ class MacroEconomicChunker:
             total_chunks=0,  # Will be updated later
             economic_concepts=economic_concepts,
             economic_indicators=economic_indicators,
-            policy_references=policy_references,
-            methodological_approaches=methodological_approaches,
-            data_sources=data_sources,
+            policy_references=terms['policies'],
+            methodological_approaches=terms['methods'],
+            data_sources=terms['data_sources'],
             semantic_density=semantic_density,
             economic_relevance_score=economic_relevance,
             metadata={
                 "section_title": section_title,
-                "word_count": len(text.split()),
+                "word_count": word_count if word_count is not None else len(text.split()),
                 "char_count": len(text),
+                "start_offset": start_offset,
+                "end_offset": start_offset + len(text),
                 "chunk_type": "macro_economic",
                 "domain": "macro_economics",
                 "specialization": "knowledge_graph_modeling"
             }
         )
     
-    def _extract_economic_concepts(self, text: str) -> List[str]:
-        """Extract economic concepts from text"""
-        text_lower = text.lower()
-        found_concepts = []
-        
-        for concept in self.economic_concepts:
-            if concept.replace('_', ' ') in text_lower or concept in text_lower:
-                found_concepts.append(concept)
-        
-        return found_concepts
-    
-    def _extract_economic_indicators(self, text: str) -> List[str]:
-        """Extract economic indicators from text"""
-        text_lower = text.lower()
-        found_indicators = []
-        
-        for indicator in self.economic_indicators:
-            if indicator.replace('_', ' ') in text_lower or indicator in text_lower:
-                found_indicators.append(indicator)
-        
-        return found_indicators
-    
-    def _extract_policy_references(self, text: str) -> List[str]:
-        """Extract policy references from text"""
-        text_lower = text.lower()
-        found_policies = []
-        
-        for policy in self.policy_instruments:
-            if policy.replace('_', ' ') in text_lower or policy in text_lower:
-                found_policies.append(policy)
-        
-        return found_policies
-    
-    def _extract_methodological_approaches(self, text: str) -> List[str]:
-        """Extract methodological approaches from text"""
-        text_lower = text.lower()
-        found_methods = []
-        
-        for method in self.methodological_terms:
-            if method.replace('_', ' ') in text_lower or method in text_lower:
-                found_methods.append(method)
-        
-        return found_methods
-    
-    def _extract_data_sources(self, text: str) -> List[str]:
-        """Extract data sources mentioned in text"""
-        data_source_keywords = [
-            'fred', 'world bank', 'imf', 'oecd', 'central bank', 'bea',
-            'eurostat', 'bis', 'bloomberg', 'reuters', 'arxiv', 'ssrn'
-        ]
-        
-        text_lower = text.lower()
-        found_sources = []
-        
-        for source in data_source_keywords:
-            if source in text_lower:
-                found_sources.append(source)
-        
-        return found_sources
+    def _scan_terms(self, text: str) -> Dict[str, List[str]]:
+        """Terms found in text, per group, in dictionary order"""
+        found = self.term_scanner.scan(text)
+        return {
+            group: [term for term in terms if (group, term) in found]
+            for group, terms in self._term_groups().items()
+        }
     
     def _calculate_semantic_density(self, text: str) -> float:
         """Calculate semantic density for economic content"""
@@ -281,21 +235,18 @@ class MacroEconomicChunker:
         
         return min(base_density + economic_boost, 1.0)
     
-    def _calculate_economic_relevance(self, text: str, concepts: List[str], indicators: List[str]) -> float:
+    def _calculate_economic_relevance(self, terms: Dict[str, List[str]]) -> float:
         """Calculate economic relevance score"""
-        text_lower = text.lower()
         
         # Score based on economic content density
-        concept_score = len(concepts) * 0.1
-        indicator_score = len(indicators) * 0.15
+        concept_score = len(terms['concepts']) * 0.1
+        indicator_score = len(terms['indicators']) * 0.15
         
         # Boost for specific economic terms
-        economic_keywords = ['economic', 'monetary', 'fiscal', 'financial', 'macroeconomic']
-        keyword_score = sum(0.05 for keyword in economic_keywords if keyword in text_lower)
+        keyword_score = len(terms['keywords']) * 0.05
         
         # Boost for quantitative content
-        quantitative_indicators = ['%', 'percent', 'basis points', 'trillion', 'billion', 'growth rate']
-        quant_score = sum(0.03 for indicator in quantitative_indicators if indicator in text_lower)
+        quant_score = len(terms['quantitative']) * 0.03
         
         total_score = concept_score + indicator_score + keyword_score + quant_score
         return min(total_score, 1.0)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Streaming Chunker - shared text windowing for the document pipelines
+Character-offset chunk windows and single-pass multi-keyword detection
+"""
+
+import re
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+_WORD = re.compile(r'\S+')
+
+
+def iter_text_windows(text: str, max_size: int, overlap: int, start: int = 0,
+                      end: Optional[int] = None) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield (start, end, word_count) windows of whole words over text[start:end]
+
+    A window closes once it spans max_size characters; the next one starts at
+    the last `overlap` words of the previous window. Words are walked lazily
+    and only the start offsets of the last `overlap` words are kept, so the
+    document is never split into a word list or rebuilt with join - one pass,
+    memory bounded by the overlap, and each chunk is text[start:end].
+    """
+
+    end = len(text) if end is None else end
+    recent = deque(maxlen=max(overlap, 1))  # start offsets of the trailing words
+    chunk_start = None
+    words = 0
+    fresh = 0  # words not yet emitted in any window
+    last_end = start
+
+    for match in _WORD.finditer(text, start, end):
+        if chunk_start is None:
+            chunk_start = match.start()
+        recent.append(match.start())
+        words += 1
+        fresh += 1
+        last_end = match.end()
+
+        if last_end - chunk_start + 1 >= max_size:
+            yield chunk_start, last_end, words
+            fresh = 0
+            if overlap and words > overlap:
+                chunk_start = recent[0]
+                words = overlap
+            else:
+                chunk_start = None
+                words = 0
+                recent.clear()
+
+    # A tail made only of overlap words would repeat the previous window
+    if chunk_start is not None and fresh:
+        yield chunk_start, last_end, words
+
+
+class KeywordScanner:
+    """
+    Aho-Corasick automaton over a fixed keyword set
+
+    Finds every keyword (overlapping ones included) in one case-insensitive
+    pass over the text, instead of one substring search per keyword. Each
+    pattern maps to a key; several patterns may share a key (e.g. spelling
+    variants) and one pattern may carry several keys.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Hashable]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[List[Hashable]] = [[]]
+
+        for pattern, key in patterns:
+            state = 0
+            for char in pattern.lower():
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(key)
+
+        # Failure links, breadth first so shallower states are finished first,
+        # folded into each state's transitions so a scan never backtracks
+        fail = [0] * len(self._goto)
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._delta[state] = {**self._delta[fail[state]], **self._goto[state]}
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail[next_state] = self._delta[fail[state]].get(char, 0) if state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[fail[next_state]]
+
+        self._key_count = len({key for outputs in self._outputs for key in outputs})
+
+    def scan(self, text: str) -> Set[Hashable]:
+        """Keys of every pattern that occurs in text"""
+
+        delta, outputs = self._delta, self._outputs
+        found = set()
+        state = 0
+
+        for char in text.lower():
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+                if len(found) == self._key_count:
+                    break
+
+        return found
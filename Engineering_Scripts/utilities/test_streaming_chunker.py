@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the streaming chunker
+Windows are checked against a word-list reference, keywords against substring search
+"""
+
+import random
+
+from streaming_chunker import KeywordScanner, iter_text_windows
+
+
+def reference_windows(text, max_size, overlap):
+    """Word-list chunking the windows replace: (first word, last word, word count)"""
+    words = text.split()
+    windows, current = [], []
+    for index, word in enumerate(words):
+        current.append(index)
+        if len(' '.join(words[i] for i in current)) + 1 >= max_size:
+            windows.append((current[0], current[-1], len(current)))
+            current = current[-overlap:] if overlap and len(current) > overlap else []
+    if current and (not windows or current[-1] > windows[-1][1]):
+        windows.append((current[0], current[-1], len(current)))
+    return windows
+
+
+def test_windows_match_word_list_chunking():
+    rng = random.Random(7)
+    vocabulary = ['fx', 'volatility', 'surface', 'a', 'delta-hedged', 'EURUSD', 'x' * 30]
+    for _ in range(200):
+        text = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 80)))
+        max_size, overlap = rng.randint(10, 120), rng.randint(0, 6)
+
+        words = text.split()
+        starts = [i for i, char in enumerate(text) if char != ' ' and (i == 0 or text[i - 1] == ' ')]
+        ends = [start + len(word) for start, word in zip(starts, words)]
+        expected = [(starts[first], ends[last], count)
+                    for first, last, count in reference_windows(text, max_size, overlap)]
+        assert list(iter_text_windows(text, max_size, overlap)) == expected, (text, max_size, overlap)
+
+
+def test_windows_respect_bounds_and_whitespace():
+    text = "  alpha\tbeta\n\ngamma   delta  "
+    assert list(iter_text_windows(text, 1000, 2)) == [(2, 27, 4)]
+    start, end, count = next(iter_text_windows(text, 1000, 0, start=8, end=19))
+    assert text[start:end] == 'beta\n\ngamma' and count == 2
+    assert list(iter_text_windows('', 10, 2)) == []
+    assert list(iter_text_windows('   ', 10, 2)) == []
+
+
+def test_keyword_scanner_matches_substring_search():
+    patterns = [('vol', 'vol'), ('volatility', 'volatility'), ('atility', 'tail'),
+                ('he', 'he'), ('she', 'she'), ('his', 'his'), ('hers', 'hers'),
+                ('colour', 'colour'), ('color', 'colour')]
+    scanner = KeywordScanner(patterns)
+
+    rng = random.Random(11)
+    for _ in range(500):
+        text = ''.join(rng.choice('volatiyshercuVOLHERS ') for _ in range(rng.randint(0, 40)))
+        expected = {key for pattern, key in patterns if pattern in text.lower()}
+        assert scanner.scan(text) == expected, text
+
+    assert scanner.scan('USHERS of Volatility, in colour') == {'he', 'she', 'hers', 'vol', 'volatility',
+                                                                'tail', 'colour'}
+    assert KeywordScanner([]).scan('anything') == set()
+
+
+if __name__ == "__main__":
+    test_windows_match_word_list_chunking()
+    test_windows_respect_bounds_and_whitespace()
+    test_keyword_scanner_matches_substring_search()
+    print("✅ Streaming chunker matches the word-list reference")
@@ -1,5 +1,6 @@
 # PROFESSIONAL BLOOMBERG API - ENHANCED VERSION
 # ZERO TOLERANCE FOR MOCK DATA
+import asyncio
 import logging
 import os
 import sys
@@ -8,10 +9,13 @@ from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, Depends, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, validator
 import uvicorn
 import json
 
+from bloomberg_dispatcher import RequestDispatcher, parse_historical_message, parse_reference_message
+
 # Try to import Bloomberg API - handle gracefully if not available
 try:
     import blpapi
@@ -69,24 +73,36 @@ def validate_api_key(credentials: HTTPAuthorizationCredentials = Security(securi
 # ==========================================
 
 class BloombergSession:
-    def __init__(self):
+    """
+    One blpapi session shared by all handlers
+    Requests are multiplexed through a RequestDispatcher: a single event-pump
+    thread drains nextEvent and resolves per-request futures by correlation ID,
+    so many requests can be in flight without blocking the event loop.
+    """
+
+    def __init__(self, blpapi_module=None):
+        self.blpapi = blpapi_module or (blpapi if BLOOMBERG_AVAILABLE else None)
         self.session = None
         self.service = None
+        self.dispatcher = None
         self.is_connected = False
         
     def start(self):
         """Start Bloomberg session - Enhanced error handling"""
-        if not BLOOMBERG_AVAILABLE:
+        if self.is_connected:
+            return True
+
+        if self.blpapi is None:
             raise Exception("Bloomberg API (blpapi) not installed. Install Bloomberg Terminal and Python API package.")
         
         try:
             # Create session options
-            session_options = blpapi.SessionOptions()
+            session_options = self.blpapi.SessionOptions()
             session_options.setServerHost("localhost")
             session_options.setServerPort(8194)
             
             # Create session
-            self.session = blpapi.Session(session_options)
+            self.session = self.blpapi.Session(session_options)
             
             if not self.session.start():
                 raise Exception("Failed to start Bloomberg session - Terminal not running or not logged in")
@@ -96,6 +112,10 @@ class BloombergSession:
                 raise Exception("Failed to open Bloomberg reference data service - Terminal not authenticated")
             
             self.service = self.session.getService("//blp/refdata")
+
+            # Single event pump for every in-flight request on this session
+            self.dispatcher = RequestDispatcher(self.session, self.blpapi)
+            self.dispatcher.start()
             self.is_connected = True
             
             logger.info("Bloomberg session started successfully")
@@ -105,98 +125,99 @@ class BloombergSession:
             logger.error(f"Bloomberg connection failed: {e}")
             self.is_connected = False
             raise HTTPException(status_code=503, detail=f"Bloomberg Terminal not available: {e}")
-    
-    def get_reference_data(self, securities: List[str], fields: List[str]) -> Dict[str, Any]:
-        """Get reference data from Bloomberg Terminal - NO CACHING"""
+
+    def _create_request(self, request_type: str, securities: List[str], fields: List[str]):
         if not self.is_connected:
             self.start()
+
+        request = self.service.createRequest(request_type)
         
+        # Add securities
+        for security in securities:
+            request.append("securities", security)
+        
+        # Add fields
+        for field in fields:
+            request.append("fields", field)
+
+        return request
+
+    def _submit_reference_request(self, securities: List[str], fields: List[str]):
+        request = self._create_request("ReferenceDataRequest", securities, fields)
+        
+        # Send request to Bloomberg Terminal; the dispatcher resolves the future
+        return self.dispatcher.submit(request, self._process_response)
+
+    async def stream_reference_data(self, securities: List[str], fields: List[str]):
+        """
+        Yield (security, data) as each PARTIAL_RESPONSE arrives - NO CACHING
+        data is a field dict, or an "Error: ..." string for security errors
+        """
+        request = self._create_request("ReferenceDataRequest", securities, fields)
+        handler = lambda msg: parse_reference_message(msg, self.blpapi)
+        async for chunk in self.dispatcher.stream(request, handler):
+            # VALIDATION: Reject any mock data indicators, chunk by chunk
+            self._validate_real_data(chunk)
+            for security, data in chunk.items():
+                yield security, data
+
+    async def stream_historical_data(self, securities: List[str], fields: List[str],
+                                     start_date: str, end_date: str,
+                                     periodicity: str = "DAILY"):
+        """Yield (security, rows) per security as Bloomberg returns it - NO CACHING"""
+        request = self._create_request("HistoricalDataRequest", securities, fields)
+        request.set("startDate", start_date)
+        request.set("endDate", end_date)
+        request.set("periodicitySelection", periodicity)
+        handler = lambda msg: parse_historical_message(msg, self.blpapi)
+        async for chunk in self.dispatcher.stream(request, handler):
+            self._validate_real_data(chunk)
+            for security, rows in chunk.items():
+                yield security, rows
+    
+    def get_reference_data(self, securities: List[str], fields: List[str]) -> Dict[str, Any]:
+        """Get reference data from Bloomberg Terminal - NO CACHING (blocking)"""
         try:
-            request = self.service.createRequest("ReferenceDataRequest")
-            
-            # Add securities
-            for security in securities:
-                request.append("securities", security)
+            response_data = self._submit_reference_request(securities, fields).result()
             
-            # Add fields
-            for field in fields:
-                request.append("fields", field)
-            
-            # Send request to Bloomberg Terminal
-            self.session.sendRequest(request)
+            # VALIDATION: Reject any mock data indicators
+            self._validate_real_data(response_data)
             
-            # Process response - REAL DATA ONLY
-            response_data = {}
+            return response_data
             
-            while True:
-                event = self.session.nextEvent(5000)  # 5 second timeout
-                
-                if event.eventType() == blpapi.Event.RESPONSE:
-                    for msg in event:
-                        response_data = self._process_response(msg)
-                    break
-                elif event.eventType() == blpapi.Event.TIMEOUT:
-                    raise Exception("Bloomberg request timed out")
-                elif event.eventType() == blpapi.Event.REQUEST_STATUS:
-                    for msg in event:
-                        logger.warning(f"Request status: {msg}")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Bloomberg data retrieval failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Bloomberg data retrieval failed: {e}")
+
+    async def get_reference_data_async(self, securities: List[str], fields: List[str]) -> Dict[str, Any]:
+        """Get reference data from Bloomberg Terminal - NO CACHING, awaits the dispatcher"""
+        try:
+            response_data = await asyncio.wrap_future(
+                self._submit_reference_request(securities, fields)
+            )
             
             # VALIDATION: Reject any mock data indicators
             self._validate_real_data(response_data)
             
             return response_data
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Bloomberg data retrieval failed: {e}")
             raise HTTPException(status_code=500, detail=f"Bloomberg data retrieval failed: {e}")
     
     def _process_response(self, msg) -> Dict[str, Any]:
-        """Process Bloomberg response - extract real data"""
-        data = {}
-        
+        """Process Bloomberg response message - extract real data, skip security errors"""
         try:
-            securities = msg.getElement("securityData")
-            
-            for i in range(securities.numValues()):
-                security = securities.getValueAsElement(i)
-                security_name = security.getElementAsString("security")
-                
-                # Check for security errors
-                if security.hasElement("securityError"):
-                    error_info = security.getElement("securityError")
-                    error_msg = error_info.getElementAsString("message")
-                    logger.warning(f"Security error for {security_name}: {error_msg}")
-                    continue
-                
-                # Extract field data
-                if security.hasElement("fieldData"):
-                    field_data = security.getElement("fieldData")
-                    security_data = {}
-                    
-                    for j in range(field_data.numElements()):
-                        field = field_data.getElement(j)
-                        field_name = field.name()
-                        
-                        if field.isNull():
-                            security_data[field_name] = None
-                        else:
-                            # Handle different data types
-                            if field.datatype() == blpapi.DataType.STRING:
-                                security_data[field_name] = field.getValueAsString()
-                            elif field.datatype() == blpapi.DataType.FLOAT64:
-                                security_data[field_name] = field.getValueAsFloat()
-                            elif field.datatype() == blpapi.DataType.INT32:
-                                security_data[field_name] = field.getValueAsInt()
-                            else:
-                                security_data[field_name] = field.getValueAsString()
-                    
-                    data[security_name] = security_data
-                    
+            data = parse_reference_message(msg, self.blpapi)
         except Exception as e:
             logger.error(f"Error processing Bloomberg response: {e}")
             raise
         
-        return data
+        return {security: fields for security, fields in data.items() if isinstance(fields, dict)}
     
     def _validate_real_data(self, data: Dict[str, Any]):
         """CRITICAL: Validate data is real, not mock"""
@@ -277,6 +298,17 @@ class FXVolatilityRequest(BaseModel):
                 raise ValueError(f"Unsupported tenor: {tenor}")
         return v
 
+class BloombergReferenceRequest(BaseModel):
+    securities: List[str]
+    fields: List[str]
+
+class BloombergHistoricalRequest(BaseModel):
+    securities: List[str]
+    fields: List[str]
+    start_date: str  # YYYYMMDD
+    end_date: str    # YYYYMMDD
+    periodicity: str = "DAILY"
+
 # ==========================================
 # API ENDPOINTS - ENHANCED
 # ==========================================
@@ -290,7 +322,7 @@ async def health_check():
     try:
         # Test Bloomberg connection
         if BLOOMBERG_AVAILABLE:
-            bloomberg.start()
+            bloomberg.start()  # No-op once connected
             bloomberg_connected = True
             logger.info("Health check: Bloomberg Terminal connected")
         else:
@@ -317,6 +349,7 @@ async def health_check():
             "is_using_mock_data": False
         },
         "error": bloomberg_error,
+        "dispatcher": bloomberg.dispatcher.get_stats() if bloomberg.dispatcher else None,
         "timestamp": datetime.now().isoformat(),
         "query_id": f"health_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
     }
@@ -333,7 +366,7 @@ async def get_live_fx_rates(request: FXRatesRequest, api_key: str = Depends(vali
         fields = ["PX_LAST", "PX_BID", "PX_ASK", "PX_OPEN", "PX_HIGH", "PX_LOW", "LAST_UPDATE_TIME"]
         
         # Get REAL data from Bloomberg Terminal
-        bloomberg_data = bloomberg.get_reference_data(securities, fields)
+        bloomberg_data = await bloomberg.get_reference_data_async(securities, fields)
         
         # Transform to API format
         rates = []
@@ -401,7 +434,7 @@ async def get_live_fx_volatility(request: FXVolatilityRequest, api_key: str = De
         fields = ["PX_LAST", "PX_BID", "PX_ASK", "LAST_UPDATE_TIME"]
         
         # Get REAL data from Bloomberg Terminal
-        bloomberg_data = bloomberg.get_reference_data(securities, fields)
+        bloomberg_data = await bloomberg.get_reference_data_async(securities, fields)
         
         # Transform to structured volatility surface
         volatility_data = []
@@ -438,6 +471,63 @@ async def get_live_fx_volatility(request: FXVolatilityRequest, api_key: str = De
         logger.error(f"FX volatility error: {e} | Query ID: {query_id}")
         raise HTTPException(status_code=503, detail=f"Bloomberg Terminal not available: {e}")
 
+@app.post("/api/bloomberg/reference/stream")
+async def stream_bloomberg_reference_data(request: BloombergReferenceRequest, api_key: str = Depends(validate_api_key)):
+    """
+    Stream reference data as NDJSON - one line per security as partial responses
+    arrive, then a summary line. No request size limit and bounded server memory.
+    """
+    query_id = f"reference_stream_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    logger.info(f"Streaming reference request | Securities: {len(request.securities)} | Fields: {len(request.fields)} | Query ID: {query_id}")
+
+    async def lines():
+        returned = 0
+        try:
+            async for security, data in bloomberg.stream_reference_data(request.securities, request.fields):
+                returned += 1
+                if isinstance(data, dict):
+                    item = {"security": security, "fields": data, "success": True}
+                else:
+                    item = {"security": security, "fields": {}, "success": False, "error": data}
+                yield json.dumps(item, default=str) + "\n"
+            error = None
+        except Exception as e:
+            logger.error(f"Streaming reference error: {e} | Query ID: {query_id}")
+            error = str(getattr(e, "detail", e))
+        logger.info(f"Streaming reference response: {returned} securities | Query ID: {query_id}")
+        yield json.dumps({"done": True, "success": error is None, "error": error,
+                          "securities_returned": returned, "query_id": query_id}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/bloomberg/historical/stream")
+async def stream_bloomberg_historical_data(request: BloombergHistoricalRequest, api_key: str = Depends(validate_api_key)):
+    """Stream historical data as NDJSON - one line per security, then a summary line"""
+    query_id = f"historical_stream_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    logger.info(f"Streaming historical request | Securities: {len(request.securities)} | {request.start_date}-{request.end_date} | Query ID: {query_id}")
+
+    async def lines():
+        returned = 0
+        try:
+            async for security, rows in bloomberg.stream_historical_data(
+                request.securities, request.fields, request.start_date,
+                request.end_date, request.periodicity
+            ):
+                returned += 1
+                if isinstance(rows, list):
+                    item = {"security": security, "data": rows, "success": True}
+                else:
+                    item = {"security": security, "data": [], "success": False, "error": rows}
+                yield json.dumps(item, default=str) + "\n"
+            error = None
+        except Exception as e:
+            logger.error(f"Streaming historical error: {e} | Query ID: {query_id}")
+            error = str(getattr(e, "detail", e))
+        yield json.dumps({"done": True, "success": error is None, "error": error,
+                          "securities_returned": returned, "query_id": query_id}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # ==========================================
 # APPLICATION STARTUP
 # ==========================================
@@ -8,14 +8,21 @@ Environment Variables:
 - REDIS_CONNECTION: Redis connection string (optional, for production)
 - ENABLE_CACHE: Enable caching (default: false for dev, true for prod)
 - CACHE_TTL: Cache time-to-live in seconds (default: 900)
+- CACHE_TTL_SPOT / CACHE_TTL_VOL / CACHE_TTL_CURVE: Per data-class TTLs (default: 5 / CACHE_TTL / 3600)
+- CACHE_L1_MAX_ENTRIES: Bound on the in-process LRU tier (default: 1024)
+- REFERENCE_BATCH_WINDOW_MS: Fan-in window for /api/bloomberg/reference requests (default: 5)
+- REFERENCE_CHUNK_SIZE: Securities per Bloomberg VM request (default: 100, the VM maximum)
 - LOG_LEVEL: Logging level (default: INFO)
 """
 
 import os
+import re
 import json
+import time
 import logging
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Awaitable, Callable, Tuple
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Request, Response
@@ -37,6 +44,16 @@ BLOOMBERG_API_URL = os.getenv("BLOOMBERG_API_URL", "http://20.172.249.92:8080")
 REDIS_CONNECTION = os.getenv("REDIS_CONNECTION")
 ENABLE_CACHE = os.getenv("ENABLE_CACHE", "false").lower() == "true"
 CACHE_TTL = int(os.getenv("CACHE_TTL", "900"))  # 15 minutes default
+CACHE_TTLS = {
+    "spot": int(os.getenv("CACHE_TTL_SPOT", "5")),
+    "vol": int(os.getenv("CACHE_TTL_VOL", str(CACHE_TTL))),
+    "curve": int(os.getenv("CACHE_TTL_CURVE", "3600")),
+    "default": CACHE_TTL,
+}
+CACHE_L1_MAX_ENTRIES = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1024"))
+REFERENCE_BATCH_WINDOW_MS = float(os.getenv("REFERENCE_BATCH_WINDOW_MS", "5"))
+REFERENCE_CHUNK_SIZE = int(os.getenv("REFERENCE_CHUNK_SIZE", "100"))
+REFERENCE_MAX_FIELDS = 50  # Bloomberg VM limit per request
 
 # Load ticker repository
 TICKER_REPO_PATH = Path(__file__).parent.parent / "knowledge" / "technical_resources" / "bloomberg_api" / "central_bloomberg_ticker_repository_v3.json"
@@ -54,58 +71,142 @@ except Exception as e:
 
 # Cache implementation
 class CacheManager:
-    def __init__(self):
-        self.cache = {}
+    """
+    Tiered cache: bounded in-process LRU (L1) in front of async Redis (L2)
+
+    TTLs are per data class (spot / vol / curve). get_or_fetch coalesces
+    concurrent misses for the same key onto a single upstream request, which
+    also applies when caching is disabled.
+    """
+
+    def __init__(self, max_entries: int = CACHE_L1_MAX_ENTRIES):
+        self.cache: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self.max_entries = max_entries
         self.redis_client = None
-        
-        if REDIS_CONNECTION and ENABLE_CACHE:
-            try:
-                import redis
-                self.redis_client = redis.from_url(REDIS_CONNECTION)
-                self.redis_client.ping()
-                logger.info("Connected to Redis cache")
-            except Exception as e:
-                logger.warning(f"Redis connection failed: {e}. Using in-memory cache.")
-    
-    async def get(self, key: str) -> Optional[Dict]:
-        if not ENABLE_CACHE:
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "coalesced": 0,
+                      "upstream_fetches": 0, "l1_evictions": 0}
+
+    async def connect(self):
+        if not (REDIS_CONNECTION and ENABLE_CACHE):
+            return
+        try:
+            import redis.asyncio as aioredis
+            self.redis_client = aioredis.from_url(REDIS_CONNECTION)
+            await self.redis_client.ping()
+            logger.info("Connected to Redis cache")
+        except Exception as e:
+            logger.warning(f"Redis connection failed: {e}. Using in-memory cache only.")
+            self.redis_client = None
+
+    async def close(self):
+        if self.redis_client:
+            await self.redis_client.aclose()
+            self.redis_client = None
+
+    def _l1_get(self, key: str) -> Optional[Dict]:
+        entry = self.cache.get(key)
+        if entry is None:
             return None
-            
+        data, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return data
+
+    def _l1_set(self, key: str, value: Dict, ttl: int):
+        self.cache[key] = (value, time.monotonic() + ttl)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+            self.stats["l1_evictions"] += 1
+
+    async def get(self, key: str, data_class: str = "default") -> Tuple[Optional[Dict], Optional[str]]:
+        """Return (value, tier) where tier is "L1", "L2" or None on a miss"""
+        if not ENABLE_CACHE:
+            return None, None
+
+        data = self._l1_get(key)
+        if data is not None:
+            self.stats["l1_hits"] += 1
+            return data, "L1"
+
         if self.redis_client:
             try:
-                data = self.redis_client.get(key)
-                if data:
-                    return json.loads(data)
+                raw = await self.redis_client.get(key)
+                if raw:
+                    data = json.loads(raw)
+                    # Promote into L1 for the remainder of the Redis TTL
+                    ttl = await self.redis_client.ttl(key)
+                    self._l1_set(key, data, ttl if ttl and ttl > 0 else CACHE_TTLS.get(data_class, CACHE_TTL))
+                    self.stats["l2_hits"] += 1
+                    return data, "L2"
             except Exception as e:
                 logger.error(f"Redis get error: {e}")
-        else:
-            # In-memory cache
-            if key in self.cache:
-                data, timestamp = self.cache[key]
-                if datetime.now() - timestamp < timedelta(seconds=CACHE_TTL):
-                    return data
-                else:
-                    del self.cache[key]
-        return None
+
+        self.stats["misses"] += 1
+        return None, None
     
-    async def set(self, key: str, value: Dict):
+    async def set(self, key: str, value: Dict, data_class: str = "default"):
         if not ENABLE_CACHE:
             return
-            
+
+        ttl = CACHE_TTLS.get(data_class, CACHE_TTL)
+        self._l1_set(key, value, ttl)
         if self.redis_client:
             try:
-                self.redis_client.setex(key, CACHE_TTL, json.dumps(value))
+                await self.redis_client.setex(key, ttl, json.dumps(value))
             except Exception as e:
                 logger.error(f"Redis set error: {e}")
-        else:
-            # In-memory cache
-            self.cache[key] = (value, datetime.now())
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Dict]],
+                           data_class: str = "default",
+                           force_fresh: bool = False) -> Tuple[Dict, str]:
+        """
+        Serve from L1/L2, otherwise run fetch() once for all concurrent callers
+        Returns (value, source) with source in L1, L2, UPSTREAM or COALESCED
+        """
+        if not force_fresh:
+            data, tier = await self.get(key, data_class)
+            if data is not None:
+                return data, tier
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task), "COALESCED"
+
+        async def load() -> Dict:
+            try:
+                self.stats["upstream_fetches"] += 1
+                value = await fetch()
+                await self.set(key, value, data_class)
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.ensure_future(load())
+        self._inflight[key] = task
+        return await asyncio.shield(task), "UPSTREAM"
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "l1_entries": len(self.cache),
+            "l1_max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "redis": self.redis_client is not None,
+            "ttls": CACHE_TTLS,
+        }
     
     async def clear(self):
+        self.cache.clear()
         if self.redis_client:
-            self.redis_client.flushdb()
-        else:
-            self.cache.clear()
+            await self.redis_client.flushdb()
 
 # Initialize cache
 cache_manager = CacheManager()
@@ -119,8 +220,10 @@ async def lifespan(app: FastAPI):
     logger.info("Bloomberg Gateway starting up...")
     logger.info(f"Cache enabled: {ENABLE_CACHE}")
     logger.info(f"Bloomberg API: {BLOOMBERG_API_URL}")
+    await cache_manager.connect()
     yield
     # Shutdown
+    await cache_manager.close()
     await http_client.aclose()
     logger.info("Bloomberg Gateway shutting down...")
 
@@ -184,8 +287,20 @@ def get_volatility_tickers(pair: str, tenors: List[str]) -> Dict[str, List[str]]
     
     return tickers
 
-async def fetch_bloomberg_data(securities: List[str], fields: List[str]) -> Dict:
-    """Fetch data from Bloomberg API"""
+VOL_TICKER_PATTERN = re.compile(r"^[A-Z]{6}(V|\d{1,2}[RB])[0-9A-Z]+ ")
+
+
+def ticker_data_class(ticker: str) -> str:
+    """Map a Bloomberg ticker onto the cache data classes used for TTLs"""
+    if VOL_TICKER_PATTERN.match(ticker):
+        return "vol"
+    if ticker.endswith(" Index") or " BGN Curncy" in ticker:
+        return "curve"
+    return "spot"
+
+
+async def post_reference_request(securities: List[str], fields: List[str]) -> Dict:
+    """Single round-trip to the Bloomberg VM reference endpoint"""
     payload = {
         "securities": securities,
         "fields": fields
@@ -213,6 +328,198 @@ async def fetch_bloomberg_data(securities: List[str], fields: List[str]) -> Dict
         logger.error(f"Bloomberg API connection error: {e}")
         return {"error": str(e)}
 
+
+class ReferenceBatcher:
+    """
+    Fan-in micro-batching for reference data requests
+
+    Requests arriving within REFERENCE_BATCH_WINDOW_MS are merged, securities
+    are deduplicated across callers, (ticker, field) pairs still fresh in the
+    ticker cache are skipped, and the rest is fetched in VM-sized chunks in
+    parallel. Each caller gets back a VM-shaped response for exactly the
+    securities and fields it asked for, with per-security staleness metadata.
+    """
+
+    def __init__(self, window_ms: float = REFERENCE_BATCH_WINDOW_MS,
+                 chunk_size: int = REFERENCE_CHUNK_SIZE):
+        self.window = window_ms / 1000
+        self.chunk_size = chunk_size
+        # (ticker, field) -> (value, monotonic fetch time, ISO fetch time)
+        self.values: Dict[Tuple[str, str], Tuple[Any, float, str]] = {}
+        # ticker -> (error, monotonic fetch time)
+        self.errors: Dict[str, Tuple[str, float]] = {}
+        self._pending: List[Tuple[List[str], List[str], Optional[float], asyncio.Future]] = []
+        self._flush_scheduled = False
+        self.stats = {"requests": 0, "served_from_cache": 0, "batches": 0,
+                      "vm_round_trips": 0, "tickers_requested": 0, "tickers_fetched": 0}
+
+    def _ttl(self, ticker: str) -> float:
+        # Without caching only deduplicate within a batch, never serve stale data
+        return CACHE_TTLS.get(ticker_data_class(ticker), CACHE_TTL) if ENABLE_CACHE else 0
+
+    def _is_fresh(self, ticker: str, fields: List[str], max_age: Optional[float], now: float) -> bool:
+        ttl = self._ttl(ticker) if max_age is None else min(self._ttl(ticker), max_age)
+        error = self.errors.get(ticker)
+        if error is not None and now - error[1] < ttl:
+            return True
+        for field in fields:
+            entry = self.values.get((ticker, field))
+            if entry is None or now - entry[1] >= ttl:
+                return False
+        return True
+
+    async def request(self, securities: List[str], fields: List[str],
+                      max_age: Optional[float] = None) -> Dict:
+        """Reference data for securities x fields; max_age (seconds) tightens the TTL"""
+        self.stats["requests"] += 1
+        self.stats["tickers_requested"] += len(securities)
+        now = time.monotonic()
+        if all(self._is_fresh(ticker, fields, max_age, now) for ticker in securities):
+            self.stats["served_from_cache"] += 1
+            return self._build_response(securities, fields, {})
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((securities, fields, max_age, future))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_later(
+                self.window, lambda: asyncio.ensure_future(self._flush())
+            )
+        return await future
+
+    async def _flush(self):
+        pending, self._pending = self._pending, []
+        self._flush_scheduled = False
+        if not pending:
+            return
+        try:
+            await self._flush_batch(pending)
+        except Exception as e:
+            # Nothing awaits this task, so every caller in the batch has to be told
+            logger.error(f"Reference batch failed: {e}")
+            for _, _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _flush_batch(self, pending: List[Tuple[List[str], List[str], Optional[float], asyncio.Future]]):
+        self.stats["batches"] += 1
+        if self.stats["batches"] % 100 == 0:
+            self.prune()
+
+        now = time.monotonic()
+        all_fields = sorted({field for _, fields, _, _ in pending for field in fields})
+        missing: Dict[str, None] = {}
+        for securities, fields, max_age, _ in pending:
+            for ticker in securities:
+                if ticker not in missing and not self._is_fresh(ticker, fields, max_age, now):
+                    missing[ticker] = None
+
+        tickers = list(missing)
+        requests = [
+            (tickers[i:i + self.chunk_size], all_fields[j:j + REFERENCE_MAX_FIELDS])
+            for i in range(0, len(tickers), self.chunk_size)
+            for j in range(0, len(all_fields), REFERENCE_MAX_FIELDS)
+        ]
+        self.stats["vm_round_trips"] += len(requests)
+        self.stats["tickers_fetched"] += len(tickers)
+        responses = await asyncio.gather(
+            *(post_reference_request(chunk, fields) for chunk, fields in requests)
+        )
+
+        failed: Dict[str, str] = {}
+        fetched_at = datetime.now().isoformat()
+        fetched_mono = time.monotonic()
+        for (chunk, fields), response in zip(requests, responses):
+            if "error" in response and not response.get("data"):
+                error = response["error"]
+                message = error.get("message") if isinstance(error, dict) else str(error)
+                failed.update({ticker: message for ticker in chunk})
+                continue
+            for item in (response.get("data") or {}).get("securities_data", []):
+                ticker = item["security"]
+                if not item.get("success"):
+                    self.errors[ticker] = (item.get("error", "Unknown error"), fetched_mono)
+                    continue
+                self.errors.pop(ticker, None)
+                item_fields = item.get("fields", {})
+                for field in fields:
+                    self.values[(ticker, field)] = (item_fields.get(field), fetched_mono, fetched_at)
+
+        for securities, fields, _, future in pending:
+            if future.done():
+                continue
+            failures = [failed[ticker] for ticker in securities if ticker in failed]
+            if failures:
+                future.set_result({"error": failures[0]})
+            else:
+                future.set_result(self._build_response(securities, fields, missing))
+
+    def _build_response(self, securities: List[str], fields: List[str],
+                        fetched_now: Dict[str, None]) -> Dict:
+        now = time.monotonic()
+        securities_data = []
+        errors = {}
+        for ticker in securities:
+            error = self.errors.get(ticker)
+            if error is not None:
+                errors[ticker] = error[0]
+                securities_data.append({
+                    "security": ticker, "fields": {}, "success": False, "error": error[0]
+                })
+                continue
+            entries = [self.values[(ticker, f)] for f in fields if (ticker, f) in self.values]
+            oldest = min(entries, key=lambda entry: entry[1]) if entries else None
+            securities_data.append({
+                "security": ticker,
+                "fields": {f: self.values[(ticker, f)][0] for f in fields
+                           if self.values.get((ticker, f), (None,))[0] is not None},
+                "success": True,
+                "staleness": {
+                    "cached": ticker not in fetched_now,
+                    "fetched_at": oldest[2] if oldest else None,
+                    "age_ms": round((now - oldest[1]) * 1000, 1) if oldest else None,
+                },
+            })
+
+        timestamp = datetime.now().isoformat()
+        return {
+            "success": True,
+            "data": {
+                "query_type": "reference_data",
+                "timestamp": timestamp,
+                "securities_requested": len(securities),
+                "fields_requested": len(fields),
+                "securities_returned": len(securities_data),
+                "securities_data": securities_data,
+                "errors": errors or None,
+                "source": "Bloomberg Gateway - BATCHED",
+            },
+            "error": None,
+            "timestamp": timestamp,
+        }
+
+    def prune(self):
+        """Drop ticker cache entries past their TTL"""
+        now = time.monotonic()
+        self.values = {key: entry for key, entry in self.values.items()
+                       if now - entry[1] < self._ttl(key[0])}
+        self.errors = {ticker: entry for ticker, entry in self.errors.items()
+                       if now - entry[1] < self._ttl(ticker)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "cached_ticker_fields": len(self.values),
+                "pending": len(self._pending)}
+
+
+# Initialize reference batcher
+reference_batcher = ReferenceBatcher()
+
+
+async def fetch_bloomberg_data(securities: List[str], fields: List[str],
+                               max_age: Optional[float] = None) -> Dict:
+    """Fetch data from Bloomberg API through the fan-in reference batcher"""
+    return await reference_batcher.request(securities, fields, max_age=max_age)
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -240,6 +547,8 @@ async def health_check():
         "status": "healthy" if bloomberg_status else "degraded",
         "bloomberg_api": bloomberg_status,
         "cache": ENABLE_CACHE,
+        "cache_stats": cache_manager.get_stats(),
+        "reference_batching": reference_batcher.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -251,20 +560,6 @@ async def get_volatility_surface(pair: str, force_fresh: bool = False):
     """
     cache_key = f"vol_{pair}"
     
-    # Check cache first (unless forced fresh)
-    if not force_fresh:
-        cached_data = await cache_manager.get(cache_key)
-        if cached_data:
-            return VolatilityResponse(
-                data=cached_data,
-                metadata={
-                    "source": "CACHE",
-                    "cached_at": cached_data.get("timestamp"),
-                    "pair": pair,
-                    "cache_ttl": CACHE_TTL
-                }
-            )
-    
     # Define standard tenors
     tenors = ["ON", "1W", "2W", "1M", "2M", "3M", "6M", "9M", "1Y", "18M", "2Y"]
     
@@ -274,41 +569,60 @@ async def get_volatility_surface(pair: str, force_fresh: bool = False):
     for group in ticker_groups.values():
         all_tickers.extend(group)
     
-    # Fetch from Bloomberg
-    fields = ["PX_LAST", "PX_BID", "PX_ASK", "LAST_UPDATE"]
-    bloomberg_response = await fetch_bloomberg_data(all_tickers, fields)
-    
-    if "error" in bloomberg_response:
-        raise HTTPException(status_code=503, detail=bloomberg_response["error"])
-    
-    # Process response
-    processed_data = {
-        "pair": pair,
-        "timestamp": datetime.now().isoformat(),
-        "tenors": {},
-        "spot": None
-    }
+    async def fetch_surface() -> Dict:
+        # Fetch from Bloomberg
+        fields = ["PX_LAST", "PX_BID", "PX_ASK", "LAST_UPDATE"]
+        # force_fresh bypasses the ticker cache as well as the surface cache
+        bloomberg_response = await fetch_bloomberg_data(all_tickers, fields, max_age=0 if force_fresh else None)
+        
+        if "error" in bloomberg_response:
+            raise HTTPException(status_code=503, detail=bloomberg_response["error"])
+        
+        # Process response
+        processed_data = {
+            "pair": pair,
+            "timestamp": datetime.now().isoformat(),
+            "tenors": {},
+            "spot": None
+        }
+        
+        # Extract data
+        if "data" in bloomberg_response and "securities_data" in bloomberg_response["data"]:
+            for security_data in bloomberg_response["data"]["securities_data"]:
+                if security_data.get("success"):
+                    ticker = security_data["security"]
+                    fields = security_data.get("fields", {})
+                    
+                    # Process based on ticker type
+                    if ticker == f"{pair} Curncy":
+                        processed_data["spot"] = fields.get("PX_LAST")
+                    # Add more processing logic here
+        
+        return processed_data
     
-    # Extract data
-    if "data" in bloomberg_response and "securities_data" in bloomberg_response["data"]:
-        for security_data in bloomberg_response["data"]["securities_data"]:
-            if security_data.get("success"):
-                ticker = security_data["security"]
-                fields = security_data.get("fields", {})
-                
-                # Process based on ticker type
-                if ticker == f"{pair} Curncy":
-                    processed_data["spot"] = fields.get("PX_LAST")
-                # Add more processing logic here
+    # Cache first (unless forced fresh); concurrent misses share one fetch
+    data, source = await cache_manager.get_or_fetch(
+        cache_key, fetch_surface, data_class="vol", force_fresh=force_fresh
+    )
     
-    # Cache the result
-    await cache_manager.set(cache_key, processed_data)
+    if source in ("L1", "L2"):
+        return VolatilityResponse(
+            data=data,
+            metadata={
+                "source": "CACHE",
+                "cache_tier": source,
+                "cached_at": data.get("timestamp"),
+                "pair": pair,
+                "cache_ttl": CACHE_TTLS["vol"]
+            }
+        )
     
     return VolatilityResponse(
-        data=processed_data,
+        data=data,
         metadata={
             "source": "BLOOMBERG_LIVE",
-            "fetched_at": datetime.now().isoformat(),
+            "coalesced": source == "COALESCED",
+            "fetched_at": data.get("timestamp"),
             "pair": pair,
             "tickers_checked": len(all_tickers)
         }
@@ -319,6 +633,8 @@ async def clear_cache():
     """Clear cache - useful for development"""
     if ENABLE_CACHE:
         await cache_manager.clear()
+        reference_batcher.values.clear()
+        reference_batcher.errors.clear()
         return {"status": "Cache cleared"}
     else:
         return {"status": "Cache not enabled"}
@@ -326,28 +642,18 @@ async def clear_cache():
 # Direct proxy endpoints for frontend compatibility
 @app.post("/api/bloomberg/reference")
 async def bloomberg_reference_proxy(request: Dict[str, Any]):
-    """Direct proxy to Bloomberg reference endpoint - for frontend compatibility"""
+    """
+    Direct proxy to Bloomberg reference endpoint - for frontend compatibility
+    Requests are fanned in through the reference batcher; an optional
+    max_age_ms bounds how stale cached ticker fields may be
+    """
     try:
-        payload = {
-            "securities": request.get("securities", []),
-            "fields": request.get("fields", [])
-        }
-        
-        headers = {
-            "Authorization": "Bearer test",
-            "Content-Type": "application/json"
-        }
-        
-        response = await http_client.post(
-            f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
-            json=payload,
-            headers=headers
+        max_age_ms = request.get("max_age_ms")
+        return await reference_batcher.request(
+            request.get("securities", []),
+            request.get("fields", []),
+            max_age=max_age_ms / 1000 if max_age_ms is not None else None
         )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": f"Bloomberg API returned {response.status_code}"}
             
     except Exception as e:
         logger.error(f"Bloomberg reference proxy error: {e}")
@@ -1,6 +1,7 @@
 """Market data API endpoints"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from datetime import datetime
+from typing import List
 from services.bloomberg import BloombergClient
 from models.market import (
     SpotRateRequest, 
@@ -10,10 +11,22 @@ from models.market import (
 )
 
 router = APIRouter()
-bloomberg_client = BloombergClient()
+
+def get_bloomberg_client(request: Request) -> BloombergClient:
+    """Shared pooled client created in the app lifespan"""
+    return request.app.state.bloomberg_client
+
+@router.get("/client-stats")
+async def get_client_stats(bloomberg_client: BloombergClient = Depends(get_bloomberg_client)):
+    """Bloomberg call latency per operation"""
+    return {
+        "max_connections": bloomberg_client.max_connections,
+        "chunk_size": bloomberg_client.chunk_size,
+        "latency": bloomberg_client.latency_summary()
+    }
 
 @router.post("/spot", response_model=MarketDataResponse)
-async def get_spot_rates(request: SpotRateRequest):
+async def get_spot_rates(request: SpotRateRequest, bloomberg_client: BloombergClient = Depends(get_bloomberg_client)):
     """Get real-time spot rates from Bloomberg"""
     try:
         data = await bloomberg_client.get_spot_rates(request.pairs)
@@ -26,7 +39,7 @@ async def get_spot_rates(request: SpotRateRequest):
         raise HTTPException(status_code=500, detail=f"Failed to fetch spot rates: {str(e)}")
 
 @router.post("/forward-points", response_model=MarketDataResponse)
-async def get_forward_points(request: ForwardPointsRequest):
+async def get_forward_points(request: ForwardPointsRequest, bloomberg_client: BloombergClient = Depends(get_bloomberg_client)):
     """Get forward points from Bloomberg"""
     try:
         data = await bloomberg_client.get_forward_points(request.pairs, request.tenors)
@@ -39,7 +52,7 @@ async def get_forward_points(request: ForwardPointsRequest):
         raise HTTPException(status_code=500, detail=f"Failed to fetch forward points: {str(e)}")
 
 @router.post("/interest-rates", response_model=MarketDataResponse)
-async def get_interest_rates(request: InterestRatesRequest):
+async def get_interest_rates(request: InterestRatesRequest, bloomberg_client: BloombergClient = Depends(get_bloomberg_client)):
     """Get interest rates from Bloomberg"""
     try:
         data = await bloomberg_client.get_interest_rates(request.currencies, request.tenors)
@@ -52,7 +65,7 @@ async def get_interest_rates(request: InterestRatesRequest):
         raise HTTPException(status_code=500, detail=f"Failed to fetch interest rates: {str(e)}")
 
 @router.post("/volatility-surface")
-async def get_volatility_surface(pair: str, tenors: List[str]):
+async def get_volatility_surface(pair: str, tenors: List[str], bloomberg_client: BloombergClient = Depends(get_bloomberg_client)):
     """Get volatility surface data from Bloomberg"""
     try:
         data = await bloomberg_client.get_volatility_surface(pair, tenors)
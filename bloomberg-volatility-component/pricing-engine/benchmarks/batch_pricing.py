@@ -0,0 +1,105 @@
+"""
+Benchmark: vectorised price_options_batch vs the scalar _price_option_core loop
+
+Generates a random G10-style book, prices it both ways, checks that the two
+paths agree and reports throughput. The scalar loop is timed on at most
+--scalar-limit options and extrapolated for larger books, since a 1M option
+scalar run takes minutes.
+
+Usage:
+    python benchmarks/batch_pricing.py
+    python benchmarks/batch_pricing.py --sizes 10000 1000000 --scalar-limit 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fx_options import FXOptionsEngine  # noqa: E402
+
+GREEKS = ["price", "delta", "gamma", "vega", "theta", "rho_domestic", "rho_foreign"]
+
+
+def make_book(size: int, seed: int = 42) -> dict:
+    """Random book around EUR/USD-like levels"""
+    rng = np.random.default_rng(seed)
+    spot = rng.uniform(0.9, 1.4, size)
+    return {
+        "spot": spot,
+        "strike": spot * rng.uniform(0.8, 1.2, size),
+        "domestic_rate": rng.uniform(0.0, 0.06, size),
+        "foreign_rate": rng.uniform(-0.01, 0.05, size),
+        "volatility": rng.uniform(0.04, 0.25, size),
+        "time_to_expiry": rng.uniform(1 / 365.25, 2.0, size),
+        "is_call": rng.random(size) < 0.5,
+    }
+
+
+def run_scalar(engine: FXOptionsEngine, book: dict, count: int) -> tuple:
+    start = time.perf_counter()
+    results = [
+        engine._price_option_core(
+            float(book["spot"][i]), float(book["strike"][i]),
+            float(book["domestic_rate"][i]), float(book["foreign_rate"][i]),
+            float(book["volatility"][i]), float(book["time_to_expiry"][i]),
+            bool(book["is_call"][i]),
+        )
+        for i in range(count)
+    ]
+    return time.perf_counter() - start, results
+
+
+def run_batch(engine: FXOptionsEngine, book: dict, repeats: int = 3) -> tuple:
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = engine.price_options_batch(**book)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def max_relative_error(scalar_results: list, batch_result) -> float:
+    worst = 0.0
+    for greek in GREEKS:
+        expected = np.array([getattr(r, greek) for r in scalar_results])
+        actual = getattr(batch_result, greek)[:len(expected)]
+        scale = np.maximum(np.abs(expected), 1e-12)
+        worst = max(worst, float(np.max(np.abs(actual - expected) / scale)))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--scalar-limit", type=int, default=20_000,
+                        help="Maximum options priced through the scalar loop")
+    args = parser.parse_args()
+
+    engine = FXOptionsEngine()
+    print(f"{'options':>10} {'scalar (s)':>12} {'batch (s)':>11} {'speedup':>9} "
+          f"{'opts/s batch':>14} {'max rel err':>12}")
+
+    for size in args.sizes:
+        book = make_book(size)
+        scalar_count = min(size, args.scalar_limit)
+        scalar_time, scalar_results = run_scalar(engine, book, scalar_count)
+        extrapolated = scalar_count < size
+        scalar_time *= size / scalar_count
+
+        batch_time, batch_result = run_batch(engine, book)
+        error = max_relative_error(scalar_results, batch_result)
+
+        scalar_label = f"{scalar_time:.3f}{'*' if extrapolated else ''}"
+        print(f"{size:>10,} {scalar_label:>12} {batch_time:>11.4f} "
+              f"{scalar_time / batch_time:>8.0f}x {size / batch_time:>14,.0f} {error:>12.2e}")
+
+    print("* scalar time extrapolated from --scalar-limit options")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: full smile strike grid via calculate_strikes_from_delta_batch
+
+Solves the 5/10/15/25/35-delta call and put strikes across 15 tenors
+(a 15 x 10 grid) for each delta convention and reports the time per grid,
+the worst delta round-trip error and the scalar Newton loop for comparison.
+
+Usage:
+    python benchmarks/delta_strikes.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.stats import norm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fx_options import FXOptionsEngine  # noqa: E402
+
+TENOR_YEARS = np.array([
+    1, 2, 3, 7, 14, 21, 30, 61, 91, 122, 152, 182, 273, 365, 730
+]) / 365.25
+DELTAS = np.array([0.05, 0.10, 0.15, 0.25, 0.35, -0.35, -0.25, -0.15, -0.10, -0.05])
+
+SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY = 1.0850, 0.0530, 0.0390, 0.075
+
+
+def round_trip_error(strikes, time_to_expiry, is_call, delta_type) -> float:
+    """Recompute delta at the solved strikes and compare with the targets"""
+    sign = np.where(is_call, 1.0, -1.0)
+    vol_sqrt_t = VOLATILITY * np.sqrt(time_to_expiry)
+    forward = SPOT * np.exp((DOMESTIC_RATE - FOREIGN_RATE) * time_to_expiry)
+    d1 = (np.log(forward / strikes) + 0.5 * vol_sqrt_t**2) / vol_sqrt_t
+    df_foreign = np.exp(-FOREIGN_RATE * time_to_expiry)
+    if delta_type == "spot":
+        delta = sign * df_foreign * norm.cdf(sign * d1)
+    elif delta_type == "forward":
+        delta = sign * norm.cdf(sign * d1)
+    else:
+        delta = sign * df_foreign * strikes / forward * norm.cdf(sign * (d1 - vol_sqrt_t))
+    return float(np.nanmax(np.abs(delta - DELTAS)))
+
+
+def main(repeats: int = 2000):
+    engine = FXOptionsEngine()
+    time_to_expiry = TENOR_YEARS[:, None]
+    is_call = DELTAS[None, :] > 0
+    grid = (DELTAS[None, :], SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY,
+            time_to_expiry, is_call)
+
+    print(f"grid: {len(TENOR_YEARS)} tenors x {len(DELTAS)} deltas")
+    print(f"{'delta_type':>18} {'per grid (us)':>14} {'max |delta err|':>16}")
+    for delta_type in ("spot", "forward", "premium_adjusted"):
+        strikes = engine.calculate_strikes_from_delta_batch(*grid, delta_type=delta_type)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            engine.calculate_strikes_from_delta_batch(*grid, delta_type=delta_type)
+        per_grid = (time.perf_counter() - start) / repeats
+        error = round_trip_error(strikes, time_to_expiry, is_call, delta_type)
+        print(f"{delta_type:>18} {per_grid * 1e6:>14.1f} {error:>16.2e}")
+
+    start = time.perf_counter()
+    for t in TENOR_YEARS:
+        for target in DELTAS:
+            engine.calculate_strike_from_delta(
+                target, SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY, t,
+                "call" if target > 0 else "put"
+            )
+    print(f"{'scalar loop (spot)':>18} {(time.perf_counter() - start) * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
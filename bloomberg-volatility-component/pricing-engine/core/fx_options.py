@@ -5,10 +5,13 @@ Follows RESEARCH_001's technical specification for production FX options pricing
 import math
 from typing import Dict, Optional, Union
 from scipy.stats import norm
+from scipy.special import log_ndtr, ndtr, ndtri
 from dataclasses import dataclass, asdict
 from datetime import datetime, date
 import numpy as np
 
+from core.volatility import SmileQuotes, SmileSliceCache, SVISlice, VolSurface, atm_log_moneyness
+
 
 @dataclass
 class OptionSpec:
@@ -32,6 +35,7 @@ class MarketData:
     foreign_rate: float   # EUR rate (continuous)
     volatility: float     # Annualized volatility
     forward_rate: Optional[float] = None
+    vol_surface: Optional[VolSurface] = None  # Used when volatility_type == "smile"
 
 
 @dataclass
@@ -55,14 +59,49 @@ class PricingResult:
         return asdict(self)
 
 
+@dataclass
+class BatchPricingResult:
+    """Struct-of-arrays pricing result for a book of options
+
+    Every field is a 1-D NumPy array; element i matches the PricingResult
+    the scalar path would return for option i.
+    """
+    price: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    vega: np.ndarray
+    theta: np.ndarray
+    rho_domestic: np.ndarray
+    rho_foreign: np.ndarray
+
+    # Additional metadata
+    strike_used: np.ndarray
+    volatility_used: np.ndarray
+    time_to_expiry: np.ndarray
+    forward_rate: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def result_at(self, index: int) -> PricingResult:
+        """Materialise a single option as a PricingResult"""
+        return PricingResult(**{
+            name: float(values[index]) for name, values in self.to_dict().items()
+        })
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        return dict(self.__dict__)
+
+
 class FXOptionsEngine:
     """
     Production FX Options Pricing Engine
     Implements Garman-Kohlhagen model as specified by RESEARCH_001
     """
     
-    def __init__(self):
+    def __init__(self, smile_cache: Optional[SmileSliceCache] = None):
         self.DAYS_PER_YEAR = 365.25
+        self.smile_cache = smile_cache or SmileSliceCache()
         
     def calculate_time_to_expiry(self, expiry_date: date, calc_date: date = None) -> float:
         """Calculate time to expiry in years using ACT/365.25"""
@@ -80,51 +119,232 @@ class FXOptionsEngine:
     def calculate_strike_from_delta(self, target_delta: float, spot: float, 
                                   domestic_rate: float, foreign_rate: float,
                                   volatility: float, time_to_expiry: float,
-                                  option_type: str) -> float:
+                                  option_type: str, delta_type: str = "spot") -> float:
         """
-        Calculate strike price from target delta using Newton-Raphson
-        Uses spot delta as specified by RESEARCH_001
+        Calculate strike price from target delta
+        Spot delta (RESEARCH_001 default) and forward delta invert in closed form;
+        premium-adjusted delta uses the bracketed solver in
+        calculate_strikes_from_delta_batch
         """
-        # Initial guess: ATM strike
-        strike = spot
-        
-        for _ in range(10):  # Newton-Raphson iterations
-            result = self._price_option_core(
-                spot, strike, domestic_rate, foreign_rate, 
-                volatility, time_to_expiry, option_type == "call"
+        strikes = self.calculate_strikes_from_delta_batch(
+            target_delta, spot, domestic_rate, foreign_rate,
+            volatility, time_to_expiry, option_type == "call", delta_type
+        )
+        return float(strikes)
+
+    def calculate_strikes_from_delta_batch(self, target_delta, spot, domestic_rate,
+                                           foreign_rate, volatility, time_to_expiry,
+                                           is_call, delta_type: str = "spot",
+                                           tolerance: float = 1e-12,
+                                           max_iterations: int = 50) -> np.ndarray:
+        """
+        Vectorised delta-to-strike inversion for a whole smile grid
+
+        Arrays (or scalars) broadcast against each other, e.g. a tenors x deltas
+        grid. Put deltas may be given with either sign. delta_type follows
+        OptionSpec:
+          - "spot":    delta = exp(-rf*T) * N(d1)           -> closed form
+          - "forward": delta = N(d1)                         -> closed form
+          - "premium_adjusted": delta = exp(-rf*T) * K/F * N(d2)
+            -> safeguarded Newton in d2, bracketed between the spot-delta strike
+               and (for calls) the strike of maximum premium-adjusted delta, so
+               the solver stays on the standard branch and cannot diverge in
+               the 5D/10D wings
+        Unreachable targets (e.g. a premium-adjusted call delta above the
+        maximum attainable) come back as NaN.
+        """
+        if delta_type not in ("spot", "forward", "premium_adjusted"):
+            raise ValueError(f"Unsupported delta_type: {delta_type}")
+
+        target_delta, spot, domestic_rate, foreign_rate, volatility, time_to_expiry, is_call = (
+            np.broadcast_arrays(
+                np.asarray(target_delta, dtype=np.float64),
+                np.asarray(spot, dtype=np.float64),
+                np.asarray(domestic_rate, dtype=np.float64),
+                np.asarray(foreign_rate, dtype=np.float64),
+                np.asarray(volatility, dtype=np.float64),
+                np.maximum(np.asarray(time_to_expiry, dtype=np.float64), 1e-8),
+                np.asarray(is_call, dtype=bool),
             )
-            
-            delta_diff = result.delta - target_delta
-            if abs(delta_diff) < 1e-6:
+        )
+        sign = np.where(is_call, 1.0, -1.0)
+        vol_sqrt_t = volatility * np.sqrt(time_to_expiry)
+        forward = spot * np.exp((domestic_rate - foreign_rate) * time_to_expiry)
+
+        # Undiscounted |delta|: N(d1) for calls, N(-d1) for puts
+        level = np.abs(target_delta)
+        if delta_type != "forward":
+            level = level * np.exp(foreign_rate * time_to_expiry)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            d1 = sign * ndtri(level)
+            d1 = np.where((level > 0) & (level < 1), d1, np.nan)
+            if delta_type != "premium_adjusted":
+                return forward * np.exp(-d1 * vol_sqrt_t + 0.5 * vol_sqrt_t**2)
+
+            d2 = self._solve_premium_adjusted_d2(
+                level, d1 - vol_sqrt_t, vol_sqrt_t, is_call, tolerance, max_iterations
+            )
+            return forward * np.exp(-d2 * vol_sqrt_t - 0.5 * vol_sqrt_t**2)
+
+    def _solve_premium_adjusted_d2(self, level, spot_d2, vol_sqrt_t, is_call,
+                                   tolerance, max_iterations) -> np.ndarray:
+        """
+        Solve exp(-s*d2 - s^2/2) * N(+/-d2) = level for d2 (s = vol * sqrt(T))
+
+        Works on log-delta, which is monotone in d2 on the standard branch, with
+        Newton steps that fall back to bisection whenever they leave the bracket.
+        """
+        s = vol_sqrt_t
+        sign = np.where(is_call, 1.0, -1.0)
+        log_level = np.log(level)
+
+        # Call branch: K between the strike of peak PA delta and the spot-delta
+        # strike. Put: PA |delta| exceeds spot |delta| and N(-d2) bounds it above.
+        peak = self._premium_adjusted_peak_d2(s)
+        lower = spot_d2
+        upper = np.where(is_call, peak,
+                         np.maximum(np.maximum(-ndtri(level), 0.0), spot_d2))
+
+        def objective(x):
+            # Oriented so it increases in d2 for both calls and puts
+            log_n = sign * (log_ndtr(sign * x) - log_level - s * x - 0.5 * s**2)
+            mills = np.exp(-0.5 * x**2 - 0.5 * math.log(2 * math.pi) - log_ndtr(sign * x))
+            return log_n, mills - sign * s
+
+        unreachable = is_call & (objective(peak)[0] < 0)
+        x = lower.copy()
+        for _ in range(max_iterations):
+            value, slope = objective(x)
+            converged = np.abs(value) < tolerance
+            if np.all(converged | ~np.isfinite(value)):
                 break
-                
-            # Newton-Raphson update: K_new = K_old - f(K)/f'(K)
-            # f'(K) = -gamma (derivative of delta w.r.t. strike)
-            strike = strike + delta_diff / result.gamma
-            
-        return strike
+            lower = np.where(value < 0, x, lower)
+            upper = np.where(value > 0, x, upper)
+            step = x - value / slope
+            inside = (step > lower) & (step < upper)
+            x = np.where(converged, x, np.where(inside, step, 0.5 * (lower + upper)))
+
+        return np.where(unreachable, np.nan, x)
+
+    def _premium_adjusted_peak_d2(self, vol_sqrt_t) -> np.ndarray:
+        """d2 at which premium-adjusted call delta peaks: n(d2) = s * N(d2)"""
+        s = vol_sqrt_t
+        # n(x)/N(x) ~ n(x) for large x, which gives the starting point
+        x = np.sqrt(np.maximum(-2 * np.log(s * math.sqrt(2 * math.pi)), 0.0))
+        for _ in range(20):
+            log_mills = -0.5 * x**2 - 0.5 * math.log(2 * math.pi) - log_ndtr(x)
+            value = log_mills - np.log(s)
+            if np.all(np.abs(value) < 1e-14):
+                break
+            x = x - value / (-x - np.exp(log_mills))
+        return x
     
-    def build_smile_volatility(self, vol_data: Dict, target_delta_or_strike: Union[float, None] = None) -> float:
+    def build_smile_volatility(self, vol_data: Dict, target_delta_or_strike: Union[float, None] = None,
+                               market_data: Optional[MarketData] = None,
+                               time_to_expiry: Optional[float] = None,
+                               currency_pair: str = "", tenor: str = "",
+                               delta_type: str = "spot", is_delta: bool = False) -> float:
         """
         Convert Bloomberg RR/BF data to actual volatility
         Implements RESEARCH_001's Bloomberg conversion formulas
+
+        With a target and market context the tenor's SVI slice is calibrated
+        (or fetched from the smile cache) and evaluated at the target, a
+        strike unless is_delta is set (deltas are negative for puts; strikes
+        below 1 are common, e.g. EURGBP, so the value alone cannot tell).
+        Without them the ATM vol is returned.
         """
         try:
-            # Extract Bloomberg volatility data (assuming percentages)
-            atm_vol = (vol_data.get('atm_bid', 0) + vol_data.get('atm_ask', 0)) / 2 / 100
-            rr_25d = (vol_data.get('rr_25d_bid', 0) + vol_data.get('rr_25d_ask', 0)) / 2 / 100
-            bf_25d = (vol_data.get('bf_25d_bid', 0) + vol_data.get('bf_25d_ask', 0)) / 2 / 100
-            
-            # Bloomberg standard conversion
-            vol_25d_call = atm_vol + bf_25d + 0.5 * rr_25d
-            vol_25d_put = atm_vol + bf_25d - 0.5 * rr_25d
-            
-            # For now, return ATM volatility
-            # TODO: Implement full smile interpolation based on target delta/strike
-            return atm_vol
+            quotes = SmileQuotes.from_vol_data(vol_data)
+            if target_delta_or_strike is None or market_data is None or time_to_expiry is None:
+                return quotes.atm
+
+            smile = self.get_smile_slice(
+                currency_pair, tenor, quotes, market_data, time_to_expiry, delta_type
+            )
+            surface = VolSurface([smile])
+            if is_delta:
+                return self.smile_volatility_for_delta(
+                    surface, target_delta_or_strike, market_data, time_to_expiry, delta_type
+                )
+            forward = self.calculate_forward_rate(
+                market_data.spot_rate, market_data.domestic_rate,
+                market_data.foreign_rate, time_to_expiry
+            )
+            return float(surface.volatility(target_delta_or_strike, time_to_expiry, forward))
             
         except Exception as e:
             raise ValueError(f"Failed to build smile volatility: {e}")
+
+    def calibrate_smile_slice(self, quotes: SmileQuotes, market_data: MarketData,
+                              time_to_expiry: float, delta_type: str = "spot") -> SVISlice:
+        """
+        Fit an SVI slice to the ATM and per-delta call/put pillar vols
+        Pillar strikes come from the delta solver at each pillar's own vol.
+        ATM-only quotes (no RR/BF pillars) give a flat slice at the ATM vol.
+        """
+        if not quotes.risk_reversals:
+            return SVISlice.flat(quotes.atm, time_to_expiry)
+        deltas, call_vols, put_vols = quotes.pillar_vols()
+        target = np.concatenate([deltas, -deltas])
+        vols = np.concatenate([call_vols, put_vols])
+        strikes = self.calculate_strikes_from_delta_batch(
+            target, market_data.spot_rate, market_data.domestic_rate,
+            market_data.foreign_rate, vols, time_to_expiry, target > 0, delta_type
+        )
+        forward = self.calculate_forward_rate(
+            market_data.spot_rate, market_data.domestic_rate,
+            market_data.foreign_rate, time_to_expiry
+        )
+        valid = np.isfinite(strikes)
+        log_moneyness = np.append(np.log(strikes[valid] / forward),
+                                  atm_log_moneyness(quotes.atm, time_to_expiry, delta_type))
+        return SVISlice.calibrate(log_moneyness, np.append(vols[valid], quotes.atm), time_to_expiry)
+
+    def get_smile_slice(self, currency_pair: str, tenor: str, quotes: SmileQuotes,
+                        market_data: MarketData, time_to_expiry: float,
+                        delta_type: str = "spot") -> SVISlice:
+        """Calibrated slice for (pair, tenor, quote snapshot, calibration inputs), calibrating on a cache miss"""
+        calibration_key = (delta_type, time_to_expiry, market_data.domestic_rate, market_data.foreign_rate)
+        smile = self.smile_cache.get(currency_pair, tenor, quotes, calibration_key)
+        if smile is None:
+            smile = self.calibrate_smile_slice(quotes, market_data, time_to_expiry, delta_type)
+            self.smile_cache.put(currency_pair, tenor, quotes, smile, calibration_key)
+        return smile
+
+    def build_vol_surface(self, currency_pair: str, tenor_quotes: Dict[str, SmileQuotes],
+                          tenor_expiries: Dict[str, float], market_data: MarketData,
+                          delta_type: str = "spot") -> VolSurface:
+        """Assemble a surface from per-tenor quotes, reusing cached slices"""
+        return VolSurface([
+            self.get_smile_slice(currency_pair, tenor, quotes, market_data,
+                                 tenor_expiries[tenor], delta_type)
+            for tenor, quotes in tenor_quotes.items()
+        ])
+
+    def smile_volatility_for_delta(self, surface: VolSurface, target_delta: float,
+                                   market_data: MarketData, time_to_expiry: float,
+                                   delta_type: str = "spot") -> float:
+        """
+        Smile vol at a delta: iterate strike(delta, vol) -> vol(strike) to a fixed point
+        """
+        forward = self.calculate_forward_rate(
+            market_data.spot_rate, market_data.domestic_rate,
+            market_data.foreign_rate, time_to_expiry
+        )
+        volatility = float(surface.volatility(forward, time_to_expiry, forward))
+        for _ in range(20):
+            strike = self.calculate_strike_from_delta(
+                target_delta, market_data.spot_rate, market_data.domestic_rate,
+                market_data.foreign_rate, volatility, time_to_expiry,
+                "call" if target_delta > 0 else "put", delta_type
+            )
+            updated = float(surface.volatility(strike, time_to_expiry, forward))
+            if abs(updated - volatility) < 1e-10:
+                return updated
+            volatility = updated
+        return volatility
     
     def _price_option_core(self, spot: float, strike: float, domestic_rate: float,
                           foreign_rate: float, volatility: float, time_to_expiry: float,
@@ -196,6 +416,112 @@ class FXOptionsEngine:
             forward_rate=forward
         )
     
+    def price_options_batch(self, spot, strike, domestic_rate, foreign_rate,
+                            volatility, time_to_expiry, is_call,
+                            notional=None) -> BatchPricingResult:
+        """
+        Vectorised Garman-Kohlhagen pricing for a whole book in one pass
+
+        Inputs are NumPy arrays (or scalars, broadcast against the arrays) with
+        time_to_expiry in years as returned by calculate_time_to_expiry.
+        Mirrors _price_option_core element by element, including the intrinsic
+        value fallback for expired options. If notional is given, price and
+        Greeks are scaled by it the same way price_option does.
+        """
+        spot, strike, domestic_rate, foreign_rate, volatility, time_to_expiry, is_call = (
+            np.broadcast_arrays(
+                np.asarray(spot, dtype=np.float64),
+                np.asarray(strike, dtype=np.float64),
+                np.asarray(domestic_rate, dtype=np.float64),
+                np.asarray(foreign_rate, dtype=np.float64),
+                np.asarray(volatility, dtype=np.float64),
+                np.asarray(time_to_expiry, dtype=np.float64),
+                np.asarray(is_call, dtype=bool),
+            )
+        )
+        spot, strike, domestic_rate, foreign_rate, volatility, time_to_expiry, is_call = (
+            np.atleast_1d(a).ravel() for a in
+            (spot, strike, domestic_rate, foreign_rate, volatility, time_to_expiry, is_call)
+        )
+
+        # Expired options take the intrinsic value path; give them a dummy
+        # positive expiry so the live formulas stay finite, then mask them out
+        expired = time_to_expiry <= 0
+        t = np.where(expired, 1.0, time_to_expiry)
+
+        # Standard Garman-Kohlhagen calculations
+        sqrt_t = np.sqrt(t)
+        vol_sqrt_t = volatility * sqrt_t
+        d1 = (np.log(spot / strike) + (domestic_rate - foreign_rate + 0.5 * volatility**2) * t) / vol_sqrt_t
+        d2 = d1 - vol_sqrt_t
+
+        # Standard normal CDF and PDF (norm.cdf is ndtr under the hood)
+        nd1 = ndtr(d1)
+        nd2 = ndtr(d2)
+        n_minus_d1 = ndtr(-d1)
+        n_minus_d2 = ndtr(-d2)
+        n_d1 = norm.pdf(d1)
+
+        forward = spot * np.exp((domestic_rate - foreign_rate) * t)
+
+        # Discount factors
+        df_domestic = np.exp(-domestic_rate * t)
+        df_foreign = np.exp(-foreign_rate * t)
+
+        spot_leg = spot * df_foreign
+        strike_leg = strike * df_domestic
+
+        price = np.where(is_call,
+                         spot_leg * nd1 - strike_leg * nd2,
+                         strike_leg * n_minus_d2 - spot_leg * n_minus_d1)
+        delta = np.where(is_call, df_foreign * nd1, -df_foreign * n_minus_d1)
+        rho_domestic = np.where(is_call,
+                                -strike * t * df_domestic * nd2,
+                                strike * t * df_domestic * n_minus_d2)
+        rho_foreign = np.where(is_call,
+                               spot * t * df_foreign * nd1,
+                               -spot * t * df_foreign * n_minus_d1)
+
+        # Greeks (same for calls and puts)
+        gamma = df_foreign * n_d1 / (spot * vol_sqrt_t)
+        vega = spot * df_foreign * n_d1 * sqrt_t / 100  # Per 1% vol change
+        theta = (
+            -spot * df_foreign * n_d1 * volatility / (2 * sqrt_t)
+            - foreign_rate * spot * df_foreign * np.where(is_call, nd1, -n_minus_d1)
+            + domestic_rate * strike * df_domestic * np.where(is_call, nd2, -n_minus_d2)
+        ) / 365  # Per day
+
+        if expired.any():
+            intrinsic = np.maximum(0, np.where(is_call, spot - strike, strike - spot))
+            price = np.where(expired, intrinsic, price)
+            delta, gamma, vega, theta, rho_domestic, rho_foreign = (
+                np.where(expired, 0.0, greek)
+                for greek in (delta, gamma, vega, theta, rho_domestic, rho_foreign)
+            )
+            forward = np.where(expired, spot, forward)
+            time_to_expiry = np.where(expired, 0.0, time_to_expiry)
+
+        if notional is not None:
+            notional = np.asarray(notional, dtype=np.float64)
+            price, delta, gamma, vega, theta, rho_domestic, rho_foreign = (
+                greek * notional
+                for greek in (price, delta, gamma, vega, theta, rho_domestic, rho_foreign)
+            )
+
+        return BatchPricingResult(
+            price=price,
+            delta=delta,
+            gamma=gamma,
+            vega=vega,
+            theta=theta,
+            rho_domestic=rho_domestic,
+            rho_foreign=rho_foreign,
+            strike_used=strike,
+            volatility_used=volatility,
+            time_to_expiry=time_to_expiry,
+            forward_rate=forward
+        )
+
     def price_option(self, option_spec: OptionSpec, market_data: MarketData) -> PricingResult:
         """
         Main pricing method - handles all option specification types
@@ -204,18 +530,34 @@ class FXOptionsEngine:
         calc_date = option_spec.calculation_date or date.today()
         time_to_expiry = self.calculate_time_to_expiry(option_spec.expiry_date, calc_date)
         
+        # Smile vol comes from the surface when one is attached
+        volatility = market_data.volatility
+        use_smile = option_spec.volatility_type == "smile" and market_data.vol_surface is not None
+        if use_smile and option_spec.target_delta is not None and option_spec.strike_price is None:
+            volatility = self.smile_volatility_for_delta(
+                market_data.vol_surface, option_spec.target_delta, market_data,
+                time_to_expiry, option_spec.delta_type
+            )
+
         # Determine strike price
         if option_spec.strike_price is not None:
             strike = option_spec.strike_price
+            if use_smile:
+                forward = self.calculate_forward_rate(
+                    market_data.spot_rate, market_data.domestic_rate,
+                    market_data.foreign_rate, time_to_expiry
+                )
+                volatility = float(market_data.vol_surface.volatility(strike, time_to_expiry, forward))
         elif option_spec.target_delta is not None:
             strike = self.calculate_strike_from_delta(
                 option_spec.target_delta,
                 market_data.spot_rate,
                 market_data.domestic_rate,
                 market_data.foreign_rate,
-                market_data.volatility,
+                volatility,
                 time_to_expiry,
-                option_spec.option_type
+                option_spec.option_type,
+                option_spec.delta_type
             )
         else:
             raise ValueError("Must specify either strike_price or target_delta")
@@ -226,7 +568,7 @@ class FXOptionsEngine:
             strike,
             market_data.domestic_rate,
             market_data.foreign_rate,
-            market_data.volatility,
+            volatility,
             time_to_expiry,
             option_spec.option_type == "call"
         )
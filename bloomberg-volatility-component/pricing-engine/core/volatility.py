@@ -0,0 +1,235 @@
+"""
+Volatility Smile and Surface - SVI slices calibrated from Bloomberg ATM/RR/BF quotes
+Each tenor is fitted once to a raw SVI total-variance slice in forward log-moneyness;
+tenors are joined by linear interpolation in total variance
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import least_squares
+
+SMILE_DELTAS = (5, 10, 15, 25, 35)
+
+# Fewer points than this (e.g. ATM only) give a flat slice instead of an SVI fit
+MIN_SVI_POINTS = 3
+
+
+@dataclass
+class SmileQuotes:
+    """Mid ATM / risk reversal / butterfly quotes for one tenor, as decimals"""
+    atm: float
+    risk_reversals: Dict[int, float] = field(default_factory=dict)
+    butterflies: Dict[int, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_vol_data(cls, vol_data: Dict) -> "SmileQuotes":
+        """
+        Parse the bid/ask percentage dict used by build_smile_volatility,
+        e.g. atm_bid, atm_ask, rr_25d_bid, rr_25d_ask, bf_25d_bid, bf_25d_ask
+        """
+        def mid(prefix: str) -> Optional[float]:
+            bid, ask = vol_data.get(f"{prefix}_bid"), vol_data.get(f"{prefix}_ask")
+            if bid is None or ask is None:
+                return None
+            return (bid + ask) / 2 / 100
+
+        quotes = cls(atm=mid("atm") or 0.0)
+        for delta in SMILE_DELTAS:
+            rr, bf = mid(f"rr_{delta}d"), mid(f"bf_{delta}d")
+            if rr is not None and bf is not None:
+                quotes.risk_reversals[delta] = rr
+                quotes.butterflies[delta] = bf
+        return quotes
+
+    @classmethod
+    def from_bloomberg(cls, pair: str, tenor: str, securities: Dict[str, Dict]) -> "SmileQuotes":
+        """
+        Parse BloombergClient.get_volatility_surface output (security -> fields)
+        for one tenor, e.g. EURUSDV1M / EURUSD25R1M / EURUSD25B1M BGN Curncy
+        """
+        def mid(security: str) -> Optional[float]:
+            fields = securities.get(security)
+            if not fields:
+                return None
+            bid, ask = fields.get("PX_BID"), fields.get("PX_ASK")
+            value = (bid + ask) / 2 if bid is not None and ask is not None else fields.get("PX_LAST")
+            return None if value is None else value / 100
+
+        atm_ticker = f"{pair}VON Curncy" if tenor == "ON" else f"{pair}V{tenor} BGN Curncy"
+        atm = mid(atm_ticker)
+        if atm is None:
+            raise ValueError(f"Missing ATM quote {atm_ticker}")
+
+        quotes = cls(atm=atm)
+        for delta in SMILE_DELTAS:
+            rr = mid(f"{pair}{delta}R{tenor} BGN Curncy")
+            bf = mid(f"{pair}{delta}B{tenor} BGN Curncy")
+            if rr is not None and bf is not None:
+                quotes.risk_reversals[delta] = rr
+                quotes.butterflies[delta] = bf
+        return quotes
+
+    def snapshot_key(self) -> Tuple:
+        """Hashable identity of this quote set, rounded to 1e-6 vol points"""
+        return (round(self.atm, 8),) + tuple(
+            (delta, round(self.risk_reversals[delta], 8), round(self.butterflies[delta], 8))
+            for delta in sorted(self.risk_reversals)
+        )
+
+    def pillar_vols(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Bloomberg smile conversion per delta pillar:
+        call vol = ATM + BF + RR/2, put vol = ATM + BF - RR/2
+        Returns (deltas as fractions, call vols, put vols)
+        """
+        deltas = np.array(sorted(self.risk_reversals), dtype=np.float64)
+        rr = np.array([self.risk_reversals[d] for d in sorted(self.risk_reversals)])
+        bf = np.array([self.butterflies[d] for d in sorted(self.butterflies)])
+        return deltas / 100, self.atm + bf + 0.5 * rr, self.atm + bf - 0.5 * rr
+
+
+@dataclass
+class SVISlice:
+    """
+    Raw SVI total variance slice:
+    w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + sigma^2)),  k = ln(K / F)
+    """
+    a: float
+    b: float
+    rho: float
+    m: float
+    sigma: float
+    time_to_expiry: float
+    rms_error: float = 0.0
+
+    @classmethod
+    def flat(cls, volatility: float, time_to_expiry: float) -> "SVISlice":
+        """Slice with the same vol at every strike"""
+        return cls(a=volatility**2 * time_to_expiry, b=0.0, rho=0.0, m=0.0, sigma=1e-6,
+                   time_to_expiry=time_to_expiry)
+
+    @classmethod
+    def calibrate(cls, log_moneyness: np.ndarray, volatilities: np.ndarray,
+                  time_to_expiry: float) -> "SVISlice":
+        """
+        Least-squares fit of the SVI parameters to pillar vols
+        With fewer than MIN_SVI_POINTS points the slice is flat at the vol
+        nearest the money.
+        """
+        k = np.asarray(log_moneyness, dtype=np.float64)
+        vols = np.asarray(volatilities, dtype=np.float64)
+        if len(k) < MIN_SVI_POINTS:
+            if not len(k):
+                raise ValueError("SVI calibration needs at least one pillar vol")
+            return cls.flat(float(vols[np.argmin(np.abs(k))]), time_to_expiry)
+
+        w = vols**2 * time_to_expiry
+        scale = max(float(w.mean()), 1e-12)
+
+        def residuals(params):
+            a, b, rho, m, sigma = params
+            return (a + b * (rho * (k - m) + np.sqrt((k - m) ** 2 + sigma**2)) - w) / scale
+
+        spread = max(float(np.ptp(k)), 1e-4)
+        initial = [float(w.min()) * 0.9, scale / spread, 0.0,
+                   float(np.clip(k[np.argmin(w)], -2 * spread, 2 * spread)), spread / 4]
+        fit = least_squares(
+            residuals, initial,
+            bounds=([-scale, 0.0, -0.999, -2 * spread, 1e-6],
+                    [4 * float(w.max()) + 1e-8, np.inf, 0.999, 2 * spread, 4 * spread]),
+            method="trf",
+        )
+        a, b, rho, m, sigma = fit.x
+        rms = float(np.sqrt(np.mean((fit.fun * scale) ** 2)))
+        return cls(a=float(a), b=float(b), rho=float(rho), m=float(m), sigma=float(sigma),
+                   time_to_expiry=time_to_expiry, rms_error=rms)
+
+    def total_variance(self, log_moneyness) -> np.ndarray:
+        k = np.asarray(log_moneyness, dtype=np.float64) - self.m
+        w = self.a + self.b * (self.rho * k + np.sqrt(k**2 + self.sigma**2))
+        return np.maximum(w, 1e-12)
+
+    def volatility(self, strike, forward: float) -> np.ndarray:
+        k = np.log(np.asarray(strike, dtype=np.float64) / forward)
+        return np.sqrt(self.total_variance(k) / self.time_to_expiry)
+
+
+class VolSurface:
+    """
+    Term structure of SVI slices with linear interpolation in total variance
+    at constant forward log-moneyness; flat vol extrapolation outside the pillars
+    """
+
+    def __init__(self, slices: List[SVISlice]):
+        if not slices:
+            raise ValueError("VolSurface needs at least one calibrated slice")
+        self.slices = sorted(slices, key=lambda s: s.time_to_expiry)
+        self.expiries = np.array([s.time_to_expiry for s in self.slices])
+
+    def total_variance(self, log_moneyness, time_to_expiry: float) -> np.ndarray:
+        expiries = self.expiries
+        if time_to_expiry <= expiries[0]:
+            first = self.slices[0]
+            return first.total_variance(log_moneyness) * time_to_expiry / first.time_to_expiry
+        if time_to_expiry >= expiries[-1]:
+            last = self.slices[-1]
+            return last.total_variance(log_moneyness) * time_to_expiry / last.time_to_expiry
+
+        upper = int(np.searchsorted(expiries, time_to_expiry))
+        left, right = self.slices[upper - 1], self.slices[upper]
+        weight = (time_to_expiry - left.time_to_expiry) / (right.time_to_expiry - left.time_to_expiry)
+        return ((1 - weight) * left.total_variance(log_moneyness)
+                + weight * right.total_variance(log_moneyness))
+
+    def volatility(self, strike, time_to_expiry: float, forward: float) -> np.ndarray:
+        k = np.log(np.asarray(strike, dtype=np.float64) / forward)
+        return np.sqrt(self.total_variance(k, time_to_expiry) / max(time_to_expiry, 1e-8))
+
+
+class SmileSliceCache:
+    """
+    LRU cache of calibrated slices keyed by (pair, tenor, quote snapshot,
+    calibration inputs). Slices live in forward log-moneyness, so they stay
+    valid across spot ticks; they depend on the delta convention, the expiry
+    and the rates, which are part of the key with the vol quotes.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._slices: "OrderedDict[Tuple, SVISlice]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pair: str, tenor: str, quotes: SmileQuotes,
+            calibration_key: Tuple = ()) -> Optional[SVISlice]:
+        key = (pair, tenor, quotes.snapshot_key(), calibration_key)
+        smile = self._slices.get(key)
+        if smile is None:
+            self.misses += 1
+            return None
+        self._slices.move_to_end(key)
+        self.hits += 1
+        return smile
+
+    def put(self, pair: str, tenor: str, quotes: SmileQuotes, smile: SVISlice,
+            calibration_key: Tuple = ()) -> None:
+        key = (pair, tenor, quotes.snapshot_key(), calibration_key)
+        self._slices[key] = smile
+        self._slices.move_to_end(key)
+        while len(self._slices) > self.max_entries:
+            self._slices.popitem(last=False)
+
+    def clear(self) -> None:
+        self._slices.clear()
+
+    def __len__(self) -> int:
+        return len(self._slices)
+
+
+def atm_log_moneyness(atm_vol: float, time_to_expiry: float, delta_type: str = "spot") -> float:
+    """Delta-neutral straddle ATM strike as ln(K / F)"""
+    half_variance = 0.5 * atm_vol**2 * time_to_expiry
+    return -half_variance if delta_type == "premium_adjusted" else half_variance
+
@@ -2,15 +2,27 @@
 FX Options Pricing Engine API
 Integrates with Bloomberg data for real-time options pricing
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 from api import health, market_data, pricing
+from services.bloomberg import BloombergClient
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Bloomberg client shared by every request
+    app.state.bloomberg_client = BloombergClient()
+    await app.state.bloomberg_client.start()
+    yield
+    await app.state.bloomberg_client.aclose()
+
 app = FastAPI(
     title="FX Options Pricing Engine",
     description="Real-time FX options pricing with Bloomberg data",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS for frontend
@@ -27,6 +39,9 @@ app.include_router(health.router, tags=["health"])
 app.include_router(market_data.router, prefix="/api/market-data", tags=["market"])
 app.include_router(pricing.router, prefix="/api/pricing", tags=["pricing"])
 
+# Prometheus metrics (Bloomberg client latency histograms)
+app.mount("/metrics", make_asgi_app())
+
 @app.get("/")
 async def root():
     return {
@@ -35,7 +50,8 @@ async def root():
         "endpoints": {
             "health": "/health",
             "market_data": "/api/market-data",
-            "pricing": "/api/pricing"
+            "pricing": "/api/pricing",
+            "metrics": "/metrics"
         }
     }
 
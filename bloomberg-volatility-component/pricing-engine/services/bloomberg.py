@@ -1,24 +1,101 @@
 """Bloomberg API client for market data"""
+import asyncio
 import httpx
-from typing import List, Dict, Optional
+import json
+import time
+from typing import AsyncIterator, List, Dict, Optional
 import logging
 
+from prometheus_client import Histogram
+
 logger = logging.getLogger(__name__)
 
+# Per-call latency, labelled by client operation (and "reference_chunk" per sub-request)
+BLOOMBERG_REQUEST_LATENCY = Histogram(
+    "bloomberg_client_request_seconds",
+    "Latency of Bloomberg API calls made by BloombergClient",
+    ["operation", "outcome"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
 class BloombergClient:
-    """Client for fetching market data from Bloomberg API"""
+    """
+    Client for fetching market data from Bloomberg API
+
+    Holds one pooled keep-alive httpx.AsyncClient for its lifetime (use
+    start()/aclose() or "async with"); large security lists are split into
+    chunks fetched in parallel under a concurrency bound.
+    """
     
-    def __init__(self, base_url: str = "http://20.172.249.92:8080"):
+    def __init__(self, base_url: str = "http://20.172.249.92:8080",
+                 max_connections: int = 20, max_concurrency: int = 8,
+                 chunk_size: int = 100, timeout: float = 30.0):
         self.base_url = base_url
         self.headers = {
             "Authorization": "Bearer test",
             "Content-Type": "application/json"
         }
+        self.max_connections = max_connections
+        self.chunk_size = chunk_size  # Bloomberg VM limit is 100 securities per request
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        """Open the pooled HTTP client (idempotent)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0
+                ),
+            )
+            logger.info(f"Bloomberg client pool opened ({self.max_connections} connections)")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Bloomberg client pool closed")
+
+    async def __aenter__(self) -> "BloombergClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("BloombergClient not started - call start() or use 'async with'")
+        return self._client
+
+    @staticmethod
+    def latency_summary() -> Dict[str, Dict]:
+        """Count, total and mean latency per operation from the histogram"""
+        summary: Dict[str, Dict] = {}
+        for metric in BLOOMBERG_REQUEST_LATENCY.collect():
+            for sample in metric.samples:
+                key = f"{sample.labels['operation']}:{sample.labels['outcome']}"
+                if sample.name.endswith("_count"):
+                    summary.setdefault(key, {})["count"] = int(sample.value)
+                elif sample.name.endswith("_sum"):
+                    summary.setdefault(key, {})["total_seconds"] = round(sample.value, 4)
+        for stats in summary.values():
+            if stats.get("count"):
+                stats["mean_seconds"] = round(stats["total_seconds"] / stats["count"], 4)
+        return summary
         
     async def get_spot_rates(self, pairs: List[str]) -> Dict[str, Dict]:
         """Get spot rates for currency pairs"""
         securities = [f"{pair} Curncy" for pair in pairs]
-        return await self._fetch_reference_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"])
+        return await self._fetch_reference_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"], "spot")
     
     async def get_forward_points(self, pairs: List[str], tenors: List[str]) -> Dict[str, Dict]:
         """Get forward points for currency pairs and tenors"""
@@ -28,7 +105,7 @@ class BloombergClient:
                 # EURUSD1M Curncy format
                 securities.append(f"{pair}{tenor} Curncy")
         
-        return await self._fetch_reference_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"])
+        return await self._fetch_reference_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"], "forward_points")
     
     async def get_interest_rates(self, currencies: List[str], tenors: List[str]) -> Dict[str, Dict]:
         """Get interest rates for currencies and tenors"""
@@ -41,7 +118,7 @@ class BloombergClient:
                 else:
                     securities.append(f"{ccy}000{tenor} Index")  # e.g., US0001M Index
         
-        return await self._fetch_reference_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"])
+        return await self._fetch_reference_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"], "interest_rates")
     
     async def get_volatility_surface(self, pair: str, tenors: List[str]) -> Dict[str, Dict]:
         """Get volatility surface data (ATM, RR, BF)"""
@@ -59,17 +136,38 @@ class BloombergClient:
                 securities.append(f"{pair}{delta}R{tenor} BGN Curncy")
                 securities.append(f"{pair}{delta}B{tenor} BGN Curncy")
         
-        return await self._fetch_reference_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"])
+        # Split into parallel sub-requests rather than one large request
+        return await self._fetch_reference_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"], "volatility_surface")
     
-    async def _fetch_reference_data(self, securities: List[str], fields: List[str]) -> Dict[str, Dict]:
-        """Fetch reference data from Bloomberg API"""
-        async with httpx.AsyncClient() as client:
+    async def _fetch_reference_data(self, securities: List[str], fields: List[str],
+                                    operation: str = "reference") -> Dict[str, Dict]:
+        """Fetch reference data from Bloomberg API, chunked into parallel sub-requests"""
+        if self._client is None:
+            await self.start()
+
+        chunks = [securities[i:i + self.chunk_size] for i in range(0, len(securities), self.chunk_size)]
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            results = await asyncio.gather(*(self._fetch_chunk(chunk, fields) for chunk in chunks))
+            outcome = "ok"
+        finally:
+            BLOOMBERG_REQUEST_LATENCY.labels(operation, outcome).observe(time.perf_counter() - start)
+
+        merged: Dict[str, Dict] = {}
+        for result in results:
+            merged.update(result)
+        return merged
+
+    async def _fetch_chunk(self, securities: List[str], fields: List[str]) -> Dict[str, Dict]:
+        """One sub-request on the shared pool, bounded by the concurrency semaphore"""
+        async with self._semaphore:
+            start = time.perf_counter()
+            outcome = "error"
             try:
-                response = await client.post(
-                    f"{self.base_url}/api/bloomberg/reference",
+                response = await self.client.post(
+                    "/api/bloomberg/reference",
                     json={"securities": securities, "fields": fields},
-                    headers=self.headers,
-                    timeout=30.0
                 )
                 response.raise_for_status()
                 
@@ -85,8 +183,42 @@ class BloombergClient:
                     else:
                         logger.warning(f"Failed to fetch {item['security']}: {item.get('error')}")
                 
+                outcome = "ok"
                 return result
                 
             except Exception as e:
                 logger.error(f"Bloomberg API request failed: {e}")
-                raise
\ No newline at end of file
+                raise
+            finally:
+                BLOOMBERG_REQUEST_LATENCY.labels("reference_chunk", outcome).observe(
+                    time.perf_counter() - start
+                )
+
+    async def stream_reference_data(self, securities: List[str], fields: List[str]) -> AsyncIterator[Dict]:
+        """
+        Stream reference data from the NDJSON endpoint, one security at a time
+        Yields {"security", "fields", "success"[, "error"]} as Bloomberg partial
+        responses arrive, so large lists (e.g. a 2,000-ticker validation) start
+        producing results immediately and never sit in memory as a whole.
+        """
+        if self._client is None:
+            await self.start()
+
+        async with self.client.stream(
+            "POST",
+            "/api/bloomberg/reference/stream",
+            json={"securities": securities, "fields": fields},
+            timeout=httpx.Timeout(self.timeout, read=None)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                if item.get("done"):
+                    if not item.get("success"):
+                        raise Exception(f"Bloomberg API error: {item.get('error', 'Unknown error')}")
+                    return
+                if not item["success"]:
+                    logger.warning(f"Failed to fetch {item['security']}: {item.get('error')}")
+                yield item
@@ -0,0 +1,72 @@
+"""
+Delta-to-strike solver: round trips over a smile grid for each delta convention
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fx_options import FXOptionsEngine  # noqa: E402
+
+TENOR_YEARS = np.array([1, 7, 30, 91, 182, 365, 730])[:, None] / 365.25
+DELTAS = np.array([0.05, 0.10, 0.25, 0.35, -0.35, -0.25, -0.10, -0.05])[None, :]
+SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY = 1.0850, 0.0530, 0.0390, 0.075
+
+
+def delta_at(strikes, delta_type):
+    """Delta of calls/puts at the given strikes, same conventions as the engine"""
+    sign = np.where(DELTAS > 0, 1.0, -1.0)
+    vol_sqrt_t = VOLATILITY * np.sqrt(TENOR_YEARS)
+    forward = SPOT * np.exp((DOMESTIC_RATE - FOREIGN_RATE) * TENOR_YEARS)
+    d1 = (np.log(forward / strikes) + 0.5 * vol_sqrt_t**2) / vol_sqrt_t
+    df_foreign = np.exp(-FOREIGN_RATE * TENOR_YEARS)
+    if delta_type == "spot":
+        return sign * df_foreign * norm.cdf(sign * d1)
+    if delta_type == "forward":
+        return sign * norm.cdf(sign * d1)
+    return sign * df_foreign * strikes / forward * norm.cdf(sign * (d1 - vol_sqrt_t))
+
+
+@pytest.mark.parametrize("delta_type", ["spot", "forward", "premium_adjusted"])
+def test_grid_round_trip(delta_type):
+    strikes = FXOptionsEngine().calculate_strikes_from_delta_batch(
+        DELTAS, SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY, TENOR_YEARS,
+        DELTAS > 0, delta_type=delta_type
+    )
+    assert strikes.shape == (TENOR_YEARS.size, DELTAS.size)
+    assert np.all(np.isfinite(strikes))
+    np.testing.assert_allclose(delta_at(strikes, delta_type), np.broadcast_to(DELTAS, strikes.shape),
+                               atol=1e-10)
+    # Calls get further out of the money as delta falls, puts as |delta| falls
+    assert np.all(np.diff(strikes[:, :4], axis=1) < 0)
+    assert np.all(np.diff(strikes[:, 4:], axis=1) < 0)
+
+
+def test_scalar_matches_batch():
+    engine = FXOptionsEngine()
+    strikes = engine.calculate_strikes_from_delta_batch(
+        DELTAS, SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY, TENOR_YEARS, DELTAS > 0
+    )
+    for i, t in enumerate(TENOR_YEARS[:, 0]):
+        for j, target in enumerate(DELTAS[0]):
+            scalar = engine.calculate_strike_from_delta(
+                target, SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY, t,
+                "call" if target > 0 else "put"
+            )
+            assert scalar == pytest.approx(strikes[i, j], rel=1e-14)
+
+
+def test_unreachable_targets_are_nan():
+    engine = FXOptionsEngine()
+    # Premium-adjusted call delta peaks below 1; a long, high-vol 95D call cannot be reached
+    assert np.isnan(engine.calculate_strike_from_delta(
+        0.95, SPOT, DOMESTIC_RATE, FOREIGN_RATE, 0.5, 5.0, "call", delta_type="premium_adjusted"))
+    assert np.isnan(engine.calculate_strike_from_delta(
+        1.5, SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY, 1.0, "call"))
+    with pytest.raises(ValueError):
+        engine.calculate_strike_from_delta(0.25, SPOT, DOMESTIC_RATE, FOREIGN_RATE, VOLATILITY, 1.0,
+                                           "call", delta_type="smile")
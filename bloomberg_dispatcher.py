@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Bloomberg Request Dispatcher - many requests in flight on one blpapi session
+One background thread drains session.nextEvent() and routes PARTIAL_RESPONSE /
+RESPONSE messages to per-request futures by correlation ID, so async handlers
+await their own result instead of serializing on a blocking nextEvent loop.
+Large requests can also be consumed as a stream of per-message chunks.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_reference_message(msg, blpapi) -> Dict[str, Any]:
+    """
+    Extract securityData from a ReferenceDataResponse message
+    Securities with a securityError map to an "Error: ..." string
+    """
+    data = {}
+    securities = msg.getElement("securityData")
+
+    for i in range(securities.numValues()):
+        security = securities.getValueAsElement(i)
+        security_name = security.getElementAsString("security")
+
+        # Check for security errors
+        if security.hasElement("securityError"):
+            error_info = security.getElement("securityError")
+            error_msg = error_info.getElementAsString("message")
+            logger.warning(f"Security error for {security_name}: {error_msg}")
+            data[security_name] = f"Error: {error_msg}"
+            continue
+
+        # Extract field data
+        if security.hasElement("fieldData"):
+            field_data = security.getElement("fieldData")
+            security_data = {}
+
+            for j in range(field_data.numElements()):
+                field = field_data.getElement(j)
+                field_name = str(field.name())
+
+                if field.isNull():
+                    security_data[field_name] = None
+                elif field.datatype() == blpapi.DataType.STRING:
+                    security_data[field_name] = field.getValueAsString()
+                elif field.datatype() == blpapi.DataType.FLOAT64:
+                    security_data[field_name] = field.getValueAsFloat()
+                elif field.datatype() == blpapi.DataType.INT32:
+                    security_data[field_name] = field.getValueAsInteger()
+                else:
+                    security_data[field_name] = field.getValueAsString()
+
+            data[security_name] = security_data
+
+    return data
+
+
+def parse_historical_message(msg, blpapi) -> Dict[str, Any]:
+    """
+    Extract one security's rows from a HistoricalDataResponse message
+    Returns {security: [{"date": ..., field: value, ...}, ...]} or an "Error: ..." string
+    """
+    security_data = msg.getElement("securityData")
+    security_name = security_data.getElementAsString("security")
+
+    if security_data.hasElement("securityError"):
+        error_msg = security_data.getElement("securityError").getElementAsString("message")
+        logger.warning(f"Security error for {security_name}: {error_msg}")
+        return {security_name: f"Error: {error_msg}"}
+
+    rows = []
+    field_data = security_data.getElement("fieldData")
+    for i in range(field_data.numValues()):
+        point = field_data.getValueAsElement(i)
+        row = {}
+        for j in range(point.numElements()):
+            field = point.getElement(j)
+            row[str(field.name())] = None if field.isNull() else (
+                field.getValueAsFloat() if field.datatype() == blpapi.DataType.FLOAT64
+                else field.getValueAsString()
+            )
+        rows.append(row)
+    return {security_name: rows}
+
+
+# Marks the end of a streamed request
+STREAM_END = object()
+
+
+class PendingRequest:
+    """Book-keeping for one in-flight request"""
+
+    def __init__(self, correlation_value: int, handler: Callable, timeout: float,
+                 sink: Optional[Callable[[Any], None]] = None):
+        self.correlation_value = correlation_value
+        self.future: Future = Future()
+        self.handler = handler
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.sink = sink
+        self.data: Dict[str, Any] = {}
+        self.partial_messages = 0
+
+
+class RequestDispatcher:
+    """
+    Correlation-ID based multiplexer over a synchronous blpapi.Session
+
+    submit() sends the request tagged with a fresh CorrelationId and returns a
+    concurrent.futures.Future; the pump thread merges every PARTIAL_RESPONSE
+    message through the request's handler and resolves the future on RESPONSE.
+    Use asyncio.wrap_future() to await it from FastAPI handlers, or stream()
+    to receive each message's chunk as soon as it arrives without holding the
+    whole response.
+
+    request_timeout is an idle timeout: every message pushes the deadline
+    out again, so a long request times out only when Bloomberg goes quiet.
+    """
+
+    def __init__(self, session, blpapi, poll_timeout_ms: int = 100,
+                 request_timeout: float = 30.0, stream_buffer: int = 64):
+        self.session = session
+        self.blpapi = blpapi
+        self.poll_timeout_ms = poll_timeout_ms
+        self.request_timeout = request_timeout
+        self.stream_buffer = stream_buffer
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, PendingRequest] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "timed_out": 0,
+                      "cancelled": 0, "partial_messages": 0, "max_in_flight": 0}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="blpapi-event-pump", daemon=True)
+        self._thread.start()
+
+    def stop(self, reason: str = "Dispatcher stopped"):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_timeout_ms / 1000 * 5)
+        self._fail_all(reason)
+
+    def submit(self, request, handler: Callable[[Any], Dict[str, Any]],
+               timeout: Optional[float] = None,
+               sink: Optional[Callable[[Any], None]] = None) -> Future:
+        """
+        Send request; handler(msg) -> dict is merged per response message
+        With a sink, each chunk is passed to sink() instead of being merged,
+        followed by STREAM_END or the failing exception
+        """
+        return self._send(request, handler, timeout, sink).future
+
+    def _send(self, request, handler: Callable[[Any], Dict[str, Any]],
+              timeout: Optional[float], sink: Optional[Callable[[Any], None]]) -> PendingRequest:
+        correlation_value = next(self._ids)
+        pending = PendingRequest(correlation_value, handler, timeout or self.request_timeout, sink)
+        with self._lock:
+            self._pending[correlation_value] = pending
+            self.stats["submitted"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], len(self._pending))
+
+        try:
+            self.session.sendRequest(request, correlationId=self.blpapi.CorrelationId(correlation_value))
+        except Exception as e:
+            self._finish(correlation_value, error=Exception(f"Bloomberg sendRequest failed: {e}"))
+        return pending
+
+    def cancel(self, correlation_value: int, reason: str = "Bloomberg request cancelled"):
+        """Stop routing a request and ask the session to drop it"""
+        with self._lock:
+            pending = self._pending.get(correlation_value)
+        if pending is None:
+            return
+        self.stats["cancelled"] += 1
+        try:
+            self.session.cancel(self.blpapi.CorrelationId(correlation_value))
+        except Exception as e:
+            logger.debug(f"Bloomberg cancel of request {correlation_value} failed: {e}")
+        self._finish(correlation_value, error=Exception(reason))
+
+    async def stream(self, request, handler: Callable[[Any], Dict[str, Any]],
+                     timeout: Optional[float] = None,
+                     max_buffered: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield handler(msg) for every PARTIAL_RESPONSE / RESPONSE message as it arrives
+        At most max_buffered chunks wait for the consumer; one that falls further
+        behind has the request cancelled and gets the error instead, since the
+        event pump is shared and must never block. Closing the iterator early
+        (e.g. the client disconnected) cancels the request.
+        """
+        loop = asyncio.get_running_loop()
+        limit = max_buffered or self.stream_buffer
+        chunks: asyncio.Queue = asyncio.Queue()
+        pending: Optional[PendingRequest] = None
+        overflowed = False
+
+        def put(item):
+            nonlocal overflowed
+            if overflowed:
+                return  # Chunks already on their way, and the request's own end
+            if chunks.qsize() >= limit and item is not STREAM_END and not isinstance(item, Exception):
+                # The pump may have finished the request already, so the error is queued here
+                overflowed = True
+                reason = f"Bloomberg stream consumer fell more than {limit} messages behind"
+                self.cancel(pending.correlation_value, reason)
+                chunks.put_nowait(Exception(reason))
+                return
+            chunks.put_nowait(item)
+
+        def sink(item):
+            loop.call_soon_threadsafe(put, item)
+
+        pending = self._send(request, handler, timeout, sink)
+        finished = False
+        try:
+            while True:
+                item = await chunks.get()
+                if item is STREAM_END:
+                    finished = True
+                    return
+                if isinstance(item, Exception):
+                    finished = True
+                    raise item
+                yield item
+        finally:
+            if not finished:
+                self.cancel(pending.correlation_value, "Bloomberg stream closed by consumer")
+
+    def _run(self):
+        event_types = self.blpapi.Event
+        while not self._stopping.is_set():
+            try:
+                event = self.session.nextEvent(self.poll_timeout_ms)
+                event_type = event.eventType()
+
+                if event_type in (event_types.PARTIAL_RESPONSE, event_types.RESPONSE):
+                    final = event_type == event_types.RESPONSE
+                    for msg in event:
+                        self._route(msg, final)
+                elif event_type == event_types.REQUEST_STATUS:
+                    for msg in event:
+                        if str(msg.messageType()) == "RequestFailure":
+                            for correlation_id in msg.correlationIds():
+                                self._finish(correlation_id.value(),
+                                             error=Exception(f"Bloomberg request failed: {msg}"))
+                elif event_type == event_types.SESSION_STATUS:
+                    for msg in event:
+                        if str(msg.messageType()) in ("SessionTerminated", "SessionConnectionDown"):
+                            self._fail_all(f"Bloomberg session lost: {msg.messageType()}")
+
+                self._expire()
+            except Exception as e:
+                logger.error(f"Bloomberg event pump error: {e}")
+
+    def _route(self, msg, final: bool):
+        for correlation_id in msg.correlationIds():
+            correlation_value = correlation_id.value()
+            pending = self._pending.get(correlation_value)
+            if pending is None:
+                continue
+            try:
+                chunk = pending.handler(msg)
+                if pending.sink is not None:
+                    pending.sink(chunk)
+                else:
+                    pending.data.update(chunk)
+                pending.partial_messages += 1
+                pending.deadline = time.monotonic() + pending.timeout
+                if not final:
+                    self.stats["partial_messages"] += 1
+            except Exception as e:
+                self._finish(correlation_value, error=e)
+                continue
+            if final:
+                self._finish(correlation_value)
+
+    def _finish(self, correlation_value: int, error: Optional[Exception] = None):
+        with self._lock:
+            pending = self._pending.pop(correlation_value, None)
+        if pending is None or pending.future.done():
+            return
+        if pending.sink is not None:
+            pending.sink(STREAM_END if error is None else error)
+        if error is None:
+            self.stats["completed"] += 1
+            pending.future.set_result(pending.data)
+        else:
+            self.stats["failed"] += 1
+            pending.future.set_exception(error)
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [cid for cid, pending in list(self._pending.items()) if pending.deadline <= now]
+        for correlation_value in expired:
+            self.stats["timed_out"] += 1
+            self._finish(correlation_value, error=Exception("Bloomberg request timed out"))
+
+    def _fail_all(self, reason: str):
+        for correlation_value in list(self._pending):
+            self._finish(correlation_value, error=Exception(reason))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "in_flight": self.in_flight,
+                "pump_alive": bool(self._thread and self._thread.is_alive())}
+
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serialized nextEvent loop vs RequestDispatcher multiplexing
+Runs against the fake blpapi session, so no Bloomberg Terminal is needed.
+
+Usage:
+    python bloomberg_dispatcher_benchmark.py --requests 50 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from bloomberg_dispatcher import RequestDispatcher, parse_reference_message
+from bloomberg_fake_session import fake_blpapi
+
+FIELDS = ["PX_LAST", "PX_BID", "PX_ASK"]
+
+
+def build_request(service, securities):
+    request = service.createRequest("ReferenceDataRequest")
+    for security in securities:
+        request.append("securities", security)
+    for field in FIELDS:
+        request.append("fields", field)
+    return request
+
+
+def securities_for(index: int, size: int):
+    return [f"PAIR{index:03d}{n:03d} Curncy" for n in range(size)]
+
+
+def run_serial(args) -> float:
+    """One request at a time, blocking on nextEvent until RESPONSE (previous behaviour)"""
+    session = fake_blpapi.Session(latency=args.latency, partial_size=args.partial_size)
+    service = session.getService("//blp/refdata")
+    start = time.perf_counter()
+    for index in range(args.requests):
+        session.sendRequest(build_request(service, securities_for(index, args.securities)),
+                            correlationId=fake_blpapi.CorrelationId(index))
+        while session.nextEvent(5000).eventType() != fake_blpapi.Event.RESPONSE:
+            pass
+    return time.perf_counter() - start
+
+
+async def run_multiplexed(args) -> float:
+    session = fake_blpapi.Session(latency=args.latency, partial_size=args.partial_size)
+    service = session.getService("//blp/refdata")
+    dispatcher = RequestDispatcher(session, fake_blpapi, poll_timeout_ms=50)
+    dispatcher.start()
+
+    def handler(msg):
+        return parse_reference_message(msg, fake_blpapi)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        asyncio.wrap_future(dispatcher.submit(
+            build_request(service, securities_for(index, args.securities)), handler
+        ))
+        for index in range(args.requests)
+    ))
+    elapsed = time.perf_counter() - start
+    dispatcher.stop()
+
+    assert all(len(result) == args.securities for result in results), "missing securities"
+    print(f"dispatcher stats: {dispatcher.get_stats()}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RequestDispatcher benchmark")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--securities", type=int, default=40, help="Securities per request")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated terminal latency (s)")
+    parser.add_argument("--partial-size", type=int, default=10, help="Securities per partial response")
+    args = parser.parse_args()
+
+    serial = run_serial(args)
+    multiplexed = asyncio.run(run_multiplexed(args))
+    print(f"{args.requests} requests x {args.securities} securities, latency {args.latency * 1000:.0f} ms")
+    print(f"  serialized nextEvent loop: {serial:.3f}s ({args.requests / serial:.1f} req/s)")
+    print(f"  multiplexed dispatcher:    {multiplexed:.3f}s ({args.requests / multiplexed:.1f} req/s)")
+    print(f"  speedup: {serial / multiplexed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Fake blpapi - in-process stand-in for the Bloomberg Terminal session
+For exercising and benchmarking RequestDispatcher without a terminal. Never
+wire this into the production API: the VM service only serves real data.
+
+Usage:
+    from bloomberg_fake_session import fake_blpapi
+    session = fake_blpapi.Session(fake_blpapi.SessionOptions(), latency=0.05, partial_size=25)
+"""
+import hashlib
+import queue
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+
+class FakeName(str):
+    """blpapi.Name stand-in - str() gives the element name"""
+
+
+class FakeElement:
+    """Minimal blpapi.Element: scalar value, sequence of elements or named children"""
+
+    def __init__(self, name: str, value: Any = None, children: Optional[Dict[str, "FakeElement"]] = None,
+                 values: Optional[List["FakeElement"]] = None):
+        self._name = FakeName(name)
+        self._value = value
+        self._children = children or {}
+        self._values = values or []
+
+    def name(self):
+        return self._name
+
+    def hasElement(self, name: str) -> bool:
+        return name in self._children
+
+    def getElement(self, name_or_index):
+        if isinstance(name_or_index, int):
+            return list(self._children.values())[name_or_index]
+        return self._children[name_or_index]
+
+    def getElementAsString(self, name: str) -> str:
+        return str(self._children[name]._value)
+
+    def numElements(self) -> int:
+        return len(self._children)
+
+    def numValues(self) -> int:
+        return len(self._values)
+
+    def getValueAsElement(self, index: int) -> "FakeElement":
+        return self._values[index]
+
+    def isNull(self) -> bool:
+        return self._value is None
+
+    def datatype(self):
+        if isinstance(self._value, float):
+            return DataType.FLOAT64
+        if isinstance(self._value, int):
+            return DataType.INT32
+        return DataType.STRING
+
+    def getValue(self):
+        return self._value
+
+    def getValueAsFloat(self) -> float:
+        return float(self._value)
+
+    def getValueAsInteger(self) -> int:
+        return int(self._value)
+
+    def getValueAsString(self) -> str:
+        return str(self._value)
+
+    def appendValue(self, value):
+        self._values.append(value)
+
+
+class CorrelationId:
+    def __init__(self, value: int):
+        self._value = value
+
+    def value(self) -> int:
+        return self._value
+
+
+class Event:
+    SESSION_STATUS = 2
+    REQUEST_STATUS = 4
+    PARTIAL_RESPONSE = 6
+    RESPONSE = 5
+    TIMEOUT = 10
+
+    def __init__(self, event_type: int, messages: Optional[List["FakeMessage"]] = None):
+        self._type = event_type
+        self._messages = messages or []
+
+    def eventType(self) -> int:
+        return self._type
+
+    def __iter__(self):
+        return iter(self._messages)
+
+
+class DataType:
+    STRING = 8
+    FLOAT64 = 7
+    INT32 = 3
+
+
+class FakeMessage:
+    def __init__(self, message_type: str, correlation_id: CorrelationId, root: FakeElement):
+        self._type = FakeName(message_type)
+        self._correlation_ids = [correlation_id]
+        self._root = root
+
+    def messageType(self):
+        return self._type
+
+    def correlationIds(self) -> List[CorrelationId]:
+        return self._correlation_ids
+
+    def getElement(self, name: str) -> FakeElement:
+        return self._root.getElement(name)
+
+    def __str__(self):
+        return f"{self._type}"
+
+
+class FakeRequest:
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._elements = {"securities": FakeElement("securities"), "fields": FakeElement("fields")}
+        self.settings: Dict[str, Any] = {}
+
+    def getElement(self, name: str) -> FakeElement:
+        return self._elements[name]
+
+    def append(self, name: str, value: str):
+        self._elements[name].appendValue(value)
+
+    def set(self, name: str, value: Any):
+        self.settings[name] = value
+
+    @property
+    def securities(self) -> List[str]:
+        return list(self._elements["securities"]._values)
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._elements["fields"]._values)
+
+
+class FakeService:
+    def createRequest(self, operation: str) -> FakeRequest:
+        return FakeRequest(operation)
+
+
+class SessionOptions:
+    def setServerHost(self, host: str):
+        self.host = host
+
+    def setServerPort(self, port: int):
+        self.port = port
+
+
+def fake_price(security: str, field: str) -> float:
+    """Deterministic pseudo-price per (security, field)"""
+    digest = hashlib.md5(f"{security}|{field}".encode()).digest()
+    return round(0.5 + int.from_bytes(digest[:4], "big") / 2**32, 6)
+
+
+class Session:
+    """
+    Synchronous-mode blpapi.Session stand-in
+
+    Each sendRequest is answered after `latency` seconds on a timer thread,
+    split into PARTIAL_RESPONSE messages of `partial_size` securities followed
+    by a RESPONSE (historical requests: one message per security). Securities
+    starting with "INVALID" get a securityError. `message_interval` spaces the
+    messages of one response out; cancel() stops a response's remaining ones.
+    """
+
+    def __init__(self, options: Optional[SessionOptions] = None, latency: float = 0.05,
+                 partial_size: int = 100, history_days: int = 5, message_interval: float = 0.0):
+        self.options = options
+        self.history_days = history_days
+        self.latency = latency
+        self.partial_size = partial_size
+        self.message_interval = message_interval
+        self._events: "queue.Queue[Event]" = queue.Queue()
+        self._cancelled = set()
+        self.requests_sent = 0
+        self.messages_sent = 0
+
+    def start(self) -> bool:
+        return True
+
+    def stop(self):
+        pass
+
+    def openService(self, name: str) -> bool:
+        return True
+
+    def getService(self, name: str) -> FakeService:
+        return FakeService()
+
+    def sendRequest(self, request: FakeRequest, correlationId: Optional[CorrelationId] = None):
+        self.requests_sent += 1
+        timer = threading.Timer(self.latency, self._respond, args=(request, correlationId))
+        timer.daemon = True
+        timer.start()
+        return correlationId
+
+    def cancel(self, correlationId: CorrelationId):
+        self._cancelled.add(correlationId.value())
+
+    def _emit(self, correlation_id: CorrelationId, final: bool, message: FakeMessage) -> bool:
+        """Queue one response message; False once the request is cancelled"""
+        if correlation_id is not None and correlation_id.value() in self._cancelled:
+            return False
+        self._events.put(Event(Event.RESPONSE if final else Event.PARTIAL_RESPONSE, [message]))
+        self.messages_sent += 1
+        if self.message_interval and not final:
+            time.sleep(self.message_interval)
+        return True
+
+    def nextEvent(self, timeout: int = 0) -> Event:
+        try:
+            return self._events.get(timeout=timeout / 1000 if timeout else None)
+        except queue.Empty:
+            return Event(Event.TIMEOUT)
+
+    def _respond(self, request: FakeRequest, correlation_id: CorrelationId):
+        if request.operation == "HistoricalDataRequest":
+            self._respond_historical(request, correlation_id)
+            return
+
+        securities = request.securities or [""]
+        chunks = [securities[i:i + self.partial_size]
+                  for i in range(0, len(securities), self.partial_size)]
+        for index, chunk in enumerate(chunks):
+            final = index == len(chunks) - 1
+            message = FakeMessage(
+                "ReferenceDataResponse", correlation_id,
+                FakeElement("response", children={
+                    "securityData": FakeElement("securityData", values=[
+                        self._security_element(security, request.fields) for security in chunk
+                    ])
+                })
+            )
+            if not self._emit(correlation_id, final, message):
+                return
+
+    def _respond_historical(self, request: FakeRequest, correlation_id: CorrelationId):
+        """One message per security, like the terminal, with `history_days` rows each"""
+        securities = request.securities
+        for index, security in enumerate(securities):
+            final = index == len(securities) - 1
+            rows = [
+                FakeElement("fieldData", children={
+                    "date": FakeElement("date", f"day{day}"),
+                    **{field: FakeElement(field, fake_price(security, f"{field}{day}"))
+                       for field in request.fields},
+                })
+                for day in range(self.history_days)
+            ]
+            message = FakeMessage(
+                "HistoricalDataResponse", correlation_id,
+                FakeElement("response", children={
+                    "securityData": FakeElement("securityData", children={
+                        "security": FakeElement("security", security),
+                        "fieldData": FakeElement("fieldData", values=rows),
+                    })
+                })
+            )
+            if not self._emit(correlation_id, final, message):
+                return
+
+    def _security_element(self, security: str, fields: List[str]) -> FakeElement:
+        children = {"security": FakeElement("security", security)}
+        if security.startswith("INVALID"):
+            children["securityError"] = FakeElement("securityError", children={
+                "message": FakeElement("message", "Unknown/Invalid security")
+            })
+        else:
+            children["fieldData"] = FakeElement("fieldData", children={
+                field: FakeElement(field, fake_price(security, field)) for field in fields
+            })
+        return FakeElement("securityData", children=children)
+
+
+# Module-like namespace so code written against `blpapi` can take this instead
+fake_blpapi = SimpleNamespace(
+    Session=Session,
+    SessionOptions=SessionOptions,
+    CorrelationId=CorrelationId,
+    Event=Event,
+    DataType=DataType,
+)
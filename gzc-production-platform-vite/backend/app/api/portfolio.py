@@ -8,6 +8,7 @@ from app.core.database import get_db
 from app.core.redis_client import redis_client
 from app.models.portfolio import PortfolioPosition, LiveQuote
 from app.services.auth import get_current_user
+from app.services.portfolio_metrics import portfolio_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -124,50 +125,13 @@ async def get_portfolio_metrics(
 ):
     """
     Get portfolio summary metrics
+    Served from the incrementally maintained aggregator (see
+    app.services.portfolio_metrics), which the portfolio stream refreshes
+    every tick; only changed positions/quotes are read on a refresh.
     """
     try:
-        user_id = current_user.get("sub", "unknown")
-        cache_key = f"portfolio_metrics:{user_id}:{fundId or 'all'}"
-        
-        # Try cache first
-        cached_metrics = await redis_client.get(cache_key)
-        if cached_metrics:
-            return cached_metrics
-        
-        # Build query
-        query = select(PortfolioPosition).where(PortfolioPosition.IsActive == True)
-        if fundId:
-            query = query.where(PortfolioPosition.FundID == fundId)
-        
-        result = await db.execute(query)
-        positions = result.scalars().all()
-        
-        # Calculate metrics
-        total_positions = len(positions)
-        total_pnl = sum(pos.PnL for pos in positions if pos.PnL)
-        total_pnl_ytd = sum(pos.PnLYTD for pos in positions if pos.PnLYTD)
-        total_pnl_mtd = sum(pos.PnLMTD for pos in positions if pos.PnLMTD)
-        total_pnl_dtd = sum(pos.PnLDTD for pos in positions if pos.PnLDTD)
-        
-        total_value = sum(pos.CurrentPrice * pos.OrderQty for pos in positions 
-                         if pos.CurrentPrice and pos.OrderQty)
-        
-        metrics = {
-            "totalPositions": total_positions,
-            "totalValue": total_value,
-            "totalPnL": total_pnl,
-            "totalPnLYTD": total_pnl_ytd,
-            "totalPnLMTD": total_pnl_mtd,
-            "totalPnLDTD": total_pnl_dtd,
-            "activeSymbols": len(set(pos.Symbol for pos in positions)),
-            "activeFunds": len(set(pos.FundID for pos in positions if pos.FundID)),
-            "activeTraders": len(set(pos.Trader for pos in positions if pos.Trader))
-        }
-        
-        # Cache metrics
-        await redis_client.set(cache_key, metrics, ttl=60)  # 1 minute cache
-        
-        return metrics
+        await portfolio_metrics.ensure_fresh(db)
+        return portfolio_metrics.get_metrics(fundId)
         
     except Exception as e:
         logger.error(f"Error calculating portfolio metrics: {e}")
@@ -21,6 +21,10 @@ class Settings(BaseSettings):
     
     # Database Configuration (will be loaded from Key Vault)
     DATABASE_URL: str = ""
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
     
     # Redis Configuration (will be loaded from Key Vault)
     REDIS_URL: str = ""
@@ -38,6 +42,14 @@ class Settings(BaseSettings):
     CACHE_TTL: int = 300  # 5 minutes
     QUOTES_CACHE_TTL: int = 30  # 30 seconds for live quotes
     
+    # Portfolio Metrics
+    PORTFOLIO_METRICS_MAX_AGE: float = 2.0  # endpoint refreshes if the stream has not
+    PORTFOLIO_METRICS_RESYNC_SECONDS: int = 300  # periodic full reload
+    
+    # FX Price Streaming
+    FX_STREAM_MAX_UPDATES_PER_SEC: float = 4.0  # per-pair conflation, 0 = unlimited
+    FX_STREAM_POLL_INTERVAL: float = 1.0  # every subscribed pair is re-read at least this often
+    
     class Config:
         env_file = ".env"
 
@@ -1,9 +1,10 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.pool import NullPool
 import logging
 from typing import Optional
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 # Global variables for engine and session
@@ -18,10 +19,16 @@ def initialize_database(database_url: str):
     """Initialize database engine and session factory"""
     global engine, AsyncSessionLocal
     
-    # Create async engine
+    # Create async engine with a sized connection pool, so per-second
+    # readers like the portfolio quote stream reuse connections instead of
+    # opening a new one on every tick
     engine = create_async_engine(
         database_url,
-        poolclass=NullPool,  # Better for Azure PostgreSQL
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,  # Azure PostgreSQL drops idle connections
+        pool_pre_ping=True,
         echo=False,  # Set to True for SQL debugging
         future=True
     )
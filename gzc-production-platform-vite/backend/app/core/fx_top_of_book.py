@@ -0,0 +1,196 @@
+"""
+FX Top-of-Book Index in Redis
+Keeps best bid/ask per pair and instrument readable in one pipelined call,
+instead of SCAN + GET + json.loads over every exchange_rate:esp:* bank key.
+
+Layout (maintained by the feed via update_quote, or rebuilt by index_pair):
+    fx_tob:{pair}:{instrument}:Bid   sorted set  bank -> rate
+    fx_tob:{pair}:{instrument}:Ask   sorted set  bank -> rate
+    fx_tob:{pair}:{instrument}:ts    hash        "{side}:{bank}" -> timestamp
+    fx_tob:{pair}:{instrument}:{side}:expires   sorted set  bank -> expiry (epoch s)
+
+where instrument is "SPOT" or "FORWARD:{amount}:{tenor}". update_quote also
+publishes the pair on fx_tob:updates so streams can push instead of poll.
+
+Key TTLs only expire a whole book, which a single active bank keeps alive,
+so each bank quote also carries its own expiry; reads prune the banks past
+it before picking the best.
+"""
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOB_PREFIX = "fx_tob"
+QUOTE_TTL_SECONDS = 300  # bank quotes expire with the feed, like the per-bank keys
+UPDATES_CHANNEL = f"{TOB_PREFIX}:updates"  # pub/sub channel, message = pair
+
+
+def spot_instrument() -> str:
+    return "SPOT"
+
+
+def forward_instrument(tenor: str, amount: int) -> str:
+    return f"FORWARD:{amount}:{tenor}"
+
+
+def tob_key(pair: str, instrument: str, suffix: str) -> str:
+    return f"{TOB_PREFIX}:{pair}:{instrument}:{suffix}"
+
+
+def expiry_key(pair: str, instrument: str, side: str) -> str:
+    return tob_key(pair, instrument, f"{side}:expires")
+
+
+# KEYS: Bid book, Ask book, ts hash, Bid expiries, Ask expiries; ARGV: now
+_PRUNE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local sides = {'Bid', 'Ask'}
+for i = 1, 2 do
+    local stale = redis.call('ZRANGEBYSCORE', KEYS[i + 3], '-inf', now)
+    for _, bank in ipairs(stale) do
+        redis.call('ZREM', KEYS[i], bank)
+        redis.call('HDEL', KEYS[3], sides[i] .. ':' .. bank)
+    end
+    if #stale > 0 then
+        redis.call('ZREMRANGEBYSCORE', KEYS[i + 3], '-inf', now)
+    end
+end
+return 0
+"""
+
+
+def queue_quote(pipe, pair: str, instrument: str, side: str, bank: str,
+                rate: float, timestamp: Optional[str] = None,
+                ttl: int = QUOTE_TTL_SECONDS) -> None:
+    """Queue the index writes for one bank quote on a pipeline the caller executes"""
+    book_key = tob_key(pair, instrument, side)
+    ts_key = tob_key(pair, instrument, "ts")
+    expires_key = expiry_key(pair, instrument, side)
+    pipe.zadd(book_key, {bank: rate})
+    pipe.hset(ts_key, f"{side}:{bank}", timestamp or "")
+    pipe.zadd(expires_key, {bank: time.time() + ttl})
+    # Key TTLs only collect abandoned books; a short-lived quote must not
+    # cut the TTL that longer-lived banks in the same book rely on
+    key_ttl = max(ttl, QUOTE_TTL_SECONDS)
+    pipe.expire(book_key, key_ttl)
+    pipe.expire(ts_key, key_ttl)
+    pipe.expire(expires_key, key_ttl)
+
+
+def update_quote(client, pair: str, instrument: str, side: str, bank: str,
+                 rate: float, timestamp: Optional[str] = None,
+                 ttl: int = QUOTE_TTL_SECONDS) -> None:
+    """Record one bank quote in the index (feed-side write, next to its SET)"""
+    pipe = client.pipeline(transaction=False)
+    queue_quote(pipe, pair, instrument, side, bank, rate, timestamp, ttl)
+    pipe.publish(UPDATES_CHANNEL, pair)
+    pipe.execute()
+
+
+def remove_quote(client, pair: str, instrument: str, side: str, bank: str) -> None:
+    """Withdraw a bank's quote so it can no longer be best"""
+    pipe = client.pipeline(transaction=False)
+    pipe.zrem(tob_key(pair, instrument, side), bank)
+    pipe.hdel(tob_key(pair, instrument, "ts"), f"{side}:{bank}")
+    pipe.zrem(expiry_key(pair, instrument, side), bank)
+    pipe.publish(UPDATES_CHANNEL, pair)
+    pipe.execute()
+
+
+def _parse_esp_key(key: str) -> Optional[Tuple[str, str, str]]:
+    """exchange_rate:esp:... key -> (instrument, side, bank)"""
+    parts = key.split(':')
+    if len(parts) >= 5 and parts[3] == "SPOT":
+        return spot_instrument(), parts[4], parts[5] if len(parts) > 5 else "UNKNOWN"
+    if len(parts) >= 7 and parts[3] == "FORWARD":
+        return (forward_instrument(parts[6], int(parts[4])), parts[5],
+                parts[7] if len(parts) > 7 else "UNKNOWN")
+    return None
+
+
+def index_pair(client, pair: str, ttl: int = QUOTE_TTL_SECONDS) -> int:
+    """
+    Rebuild the index for a pair from the per-bank exchange_rate:esp keys
+    Bridges feeds that do not call update_quote yet; returns quotes indexed
+    """
+    keys = list(client.scan_iter(match=f"exchange_rate:esp:{pair}:*", count=500))
+    if not keys:
+        return 0
+
+    values = client.mget(keys)
+    pipe = client.pipeline(transaction=False)
+    indexed = 0
+    for key, value in zip(keys, values):
+        parsed = _parse_esp_key(key)
+        if not value or parsed is None:
+            continue
+        try:
+            data = json.loads(value)
+            rate = float(data.get("rate", 0))
+        except (ValueError, TypeError):
+            continue
+        instrument, side, bank = parsed
+        if side not in ("Bid", "Ask"):
+            continue
+        queue_quote(pipe, pair, instrument, side, bank, rate, data.get("timestamp"), ttl)
+        indexed += 1
+    pipe.execute()
+    return indexed
+
+
+def queue_prune(pipe, prune, pair: str, instrument: str, now: Optional[float] = None) -> None:
+    """Queue the removal of one book's expired bank quotes (prune = register_script(_PRUNE_SCRIPT))"""
+    prune(keys=[tob_key(pair, instrument, "Bid"), tob_key(pair, instrument, "Ask"),
+                tob_key(pair, instrument, "ts"),
+                expiry_key(pair, instrument, "Bid"), expiry_key(pair, instrument, "Ask")],
+          args=[time.time() if now is None else now], client=pipe)
+
+
+def queue_top_of_book(pipe, pair: str, instrument: str) -> None:
+    """Queue the three reads for one book on a pipeline (see parse_top_of_book)"""
+    pipe.zrevrange(tob_key(pair, instrument, "Bid"), 0, 0, withscores=True)
+    pipe.zrange(tob_key(pair, instrument, "Ask"), 0, 0, withscores=True)
+    pipe.hgetall(tob_key(pair, instrument, "ts"))
+
+
+def parse_top_of_book(results: List[Any], instrument: str = "SPOT") -> Dict[str, Any]:
+    """Turn the three pipeline results for one book into {'bid': ..., 'ask': ...}"""
+    best_bid, best_ask, timestamps = results
+    extra = {}
+    if instrument.startswith("FORWARD:"):
+        _, amount, tenor = instrument.split(':', 2)
+        extra = {'tenor': tenor, 'amount': int(amount)}
+
+    prices: Dict[str, Any] = {}
+    for label, side, best in (("bid", "Bid", best_bid), ("ask", "Ask", best_ask)):
+        if best:
+            bank, rate = best[0]
+            prices[label] = {
+                'rate': float(rate),
+                'bank': bank,
+                'timestamp': (timestamps or {}).get(f"{side}:{bank}") or None,
+                **extra
+            }
+    return prices
+
+
+def read_top_of_book(client, books: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Best bid/ask for every (pair, instrument) in a single pipelined round-trip
+    Each book is pruned of expired bank quotes just before it is read.
+    """
+    books = list(books)
+    prune = client.register_script(_PRUNE_SCRIPT)
+    now = time.time()
+    pipe = client.pipeline(transaction=False)
+    for pair, instrument in books:
+        queue_prune(pipe, prune, pair, instrument, now)
+        queue_top_of_book(pipe, pair, instrument)
+    results = pipe.execute()
+    return {
+        book: parse_top_of_book(results[i * 4 + 1:i * 4 + 4], book[1])
+        for i, book in enumerate(books)
+    }
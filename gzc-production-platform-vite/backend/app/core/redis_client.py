@@ -1,7 +1,7 @@
 import redis.asyncio as redis
 import json
 import logging
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -112,6 +112,22 @@ class RedisClient:
         ttl = ttl or settings.QUOTES_CACHE_TTL
         return await self.set(cache_key, quote_data, ttl)
     
+    async def set_quote_cache_bulk(self, quotes: Dict[str, dict], ttl: int = None) -> bool:
+        """Cache many live quotes in one pipelined round-trip"""
+        if not self.redis or not quotes:
+            return False
+        
+        ttl = ttl or settings.QUOTES_CACHE_TTL
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for symbol, quote_data in quotes.items():
+                    pipe.setex(f"quote:{symbol}", ttl, json.dumps(quote_data))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis pipeline SET error: {e}")
+            return False
+    
     async def get_quote_cache(self, symbol: str):
         """Get cached quote data"""
         cache_key = f"quote:{symbol}"
@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.portfolio import LiveQuote, PortfolioPosition
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PositionContribution:
+    """
+    What one active position adds to its fund's totals
+    The stored PnL is as of base_price (the row's CurrentPrice); price is the
+    latest mark, and the difference between the two is added on top.
+    """
+    fund_id: Optional[int]
+    symbol: str
+    trader: Optional[str]
+    quantity: float
+    direction: int  # +1 long, -1 short
+    base_price: Optional[float]
+    price: Optional[float]
+    updated: Optional[datetime]
+    pnl: float
+    pnl_ytd: float
+    pnl_mtd: float
+    pnl_dtd: float
+
+    @property
+    def value(self) -> float:
+        return self.price * self.quantity if self.price and self.quantity else 0.0
+
+    @property
+    def mark(self) -> float:
+        """PnL move from the row's CurrentPrice to the latest quote"""
+        if self.price is None or self.base_price is None:
+            return 0.0
+        return (self.price - self.base_price) * self.quantity * self.direction
+
+
+@dataclass
+class _Totals:
+    """
+    Running totals for one fund (or all funds)
+    Distinct symbols/funds/traders are reference counts, so a count stays
+    exact when the last position for a value goes away
+    """
+    positions: int = 0
+    value: float = 0.0
+    pnl: float = 0.0
+    pnl_ytd: float = 0.0
+    pnl_mtd: float = 0.0
+    pnl_dtd: float = 0.0
+    symbols: Counter = field(default_factory=Counter)
+    funds: Counter = field(default_factory=Counter)
+    traders: Counter = field(default_factory=Counter)
+
+    def apply(self, contribution: _PositionContribution, sign: int):
+        self.positions += sign
+        self.value += sign * contribution.value
+        mark = contribution.mark
+        self.pnl += sign * (contribution.pnl + mark)
+        self.pnl_ytd += sign * (contribution.pnl_ytd + mark)
+        self.pnl_mtd += sign * (contribution.pnl_mtd + mark)
+        self.pnl_dtd += sign * (contribution.pnl_dtd + mark)
+        for counter, key in ((self.symbols, contribution.symbol),
+                             (self.funds, contribution.fund_id),
+                             (self.traders, contribution.trader)):
+            if not key:
+                continue
+            counter[key] += sign
+            if counter[key] <= 0:
+                del counter[key]
+
+    def to_dict(self) -> dict:
+        return {
+            "totalPositions": self.positions,
+            "totalValue": self.value,
+            "totalPnL": self.pnl,
+            "totalPnLYTD": self.pnl_ytd,
+            "totalPnLMTD": self.pnl_mtd,
+            "totalPnLDTD": self.pnl_dtd,
+            "activeSymbols": len(self.symbols),
+            "activeFunds": len(self.funds),
+            "activeTraders": len(self.traders)
+        }
+
+
+class PortfolioMetricsAggregator:
+    """
+    Portfolio summary metrics kept up to date incrementally
+
+    Positions are picked up by their LastUpdate and quotes by their Timestamp,
+    so each refresh only reads the rows that moved. A quote newer than a
+    position's row marks it: PnL is the stored PnL plus
+    (quote - CurrentPrice) x quantity x direction. That depends only on the
+    row and the latest quote, so a full reload (which applies the quotes
+    the same way) lands on the same metrics as the incremental path.
+    get_metrics is O(1).
+    """
+
+    def __init__(self):
+        self._positions: Dict[int, _PositionContribution] = {}
+        self._positions_by_symbol: Dict[str, Set[int]] = {}
+        self._all = _Totals()
+        self._funds: Dict[int, _Totals] = {}
+        self._position_watermark: Optional[datetime] = None
+        self._quote_watermark: Optional[datetime] = None
+        self._last_refresh = 0.0
+        self._last_load = 0.0
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        # Bumped on every change so streams can tell when to push
+        self.version = 0
+
+    def get_metrics(self, fund_id: Optional[int] = None) -> dict:
+        """Current metrics for a fund, or for all funds"""
+        totals = self._funds.get(fund_id) if fund_id else self._all
+        return (totals or _Totals()).to_dict()
+
+    def get_fund_metrics(self) -> Dict[int, dict]:
+        return {fund_id: totals.to_dict() for fund_id, totals in self._funds.items()}
+
+    def _fund_totals(self, fund_id: Optional[int]) -> Optional[_Totals]:
+        if not fund_id:
+            return None
+        if fund_id not in self._funds:
+            self._funds[fund_id] = _Totals()
+        return self._funds[fund_id]
+
+    def _add(self, position_id: int, contribution: _PositionContribution):
+        self._positions[position_id] = contribution
+        self._positions_by_symbol.setdefault(contribution.symbol, set()).add(position_id)
+        self._all.apply(contribution, 1)
+        fund = self._fund_totals(contribution.fund_id)
+        if fund:
+            fund.apply(contribution, 1)
+
+    def _remove(self, position_id: int):
+        contribution = self._positions.pop(position_id, None)
+        if contribution is None:
+            return
+        ids = self._positions_by_symbol.get(contribution.symbol)
+        if ids is not None:
+            ids.discard(position_id)
+            if not ids:
+                del self._positions_by_symbol[contribution.symbol]
+        self._all.apply(contribution, -1)
+        fund = self._funds.get(contribution.fund_id)
+        if fund:
+            fund.apply(contribution, -1)
+            if not fund.positions:
+                del self._funds[contribution.fund_id]
+
+    def apply_position(self, position: PortfolioPosition):
+        """Insert, replace or (if inactive) drop one position"""
+        self._remove(position.Id)
+        if position.IsActive:
+            self._add(position.Id, _PositionContribution(
+                fund_id=position.FundID,
+                symbol=position.Symbol,
+                trader=position.Trader,
+                quantity=position.OrderQty or 0.0,
+                direction=-1 if (position.Position or "").lower() == "short" else 1,
+                base_price=position.CurrentPrice,
+                price=position.CurrentPrice,
+                updated=position.LastUpdate,
+                pnl=position.PnL or 0.0,
+                pnl_ytd=position.PnLYTD or 0.0,
+                pnl_mtd=position.PnLMTD or 0.0,
+                pnl_dtd=position.PnLDTD or 0.0
+            ))
+        self.version += 1
+
+    def apply_quote(self, symbol: str, price: Optional[float], as_of: Optional[datetime] = None):
+        """Mark the positions in a symbol to a quote (skipping rows written after it)"""
+        if price is None:
+            return
+
+        moved = False
+        for position_id in list(self._positions_by_symbol.get(symbol, ())):
+            old = self._positions[position_id]
+            if old.price == price:
+                continue
+            # The row's CurrentPrice is already at least as recent as the quote
+            if as_of is not None and old.updated is not None and as_of <= old.updated:
+                continue
+            self._remove(position_id)
+            self._add(position_id, replace(old, price=price))
+            moved = True
+        if moved:
+            self.version += 1
+
+    @staticmethod
+    def _quote_price(quote: LiveQuote) -> Optional[float]:
+        if quote.Last is not None:
+            return quote.Last
+        if quote.Bid is not None and quote.Ask is not None:
+            return (quote.Bid + quote.Ask) / 2
+        return None
+
+    async def load(self, db: AsyncSession):
+        """Rebuild everything from the active positions and their quotes"""
+        async with self._lock:
+            await self._load(db)
+
+    async def _load(self, db: AsyncSession):
+        result = await db.execute(select(PortfolioPosition).where(PortfolioPosition.IsActive == True))
+        positions = result.scalars().all()
+        quotes = []
+        if positions:
+            result = await db.execute(
+                select(LiveQuote).where(LiveQuote.Symbol.in_(list({pos.Symbol for pos in positions})))
+            )
+            quotes = result.scalars().all()
+
+        self._positions, self._positions_by_symbol = {}, {}
+        self._all, self._funds = _Totals(), {}
+        for position in positions:
+            self.apply_position(position)
+        for quote in quotes:
+            self.apply_quote(quote.Symbol, self._quote_price(quote), quote.Timestamp)
+
+        self._position_watermark = max((pos.LastUpdate for pos in positions if pos.LastUpdate), default=None)
+        self._quote_watermark = max((quote.Timestamp for quote in quotes if quote.Timestamp), default=None)
+        self._last_refresh = self._last_load = time.monotonic()
+        self.loaded = True
+        self.version += 1
+        logger.info(f"Portfolio metrics loaded from {len(positions)} positions")
+
+    async def refresh(self, db: AsyncSession) -> bool:
+        """
+        Apply the positions and quotes that changed since the last refresh
+        Returns True if the metrics moved. Falls back to a full reload every
+        PORTFOLIO_METRICS_RESYNC_SECONDS to settle float drift and catch rows
+        that committed behind the watermarks.
+        """
+        async with self._lock:
+            version = self.version
+            if not self.loaded:
+                await self._load(db)
+                return True
+            if time.monotonic() - self._last_load > settings.PORTFOLIO_METRICS_RESYNC_SECONDS:
+                before = self._all.to_dict()
+                await self._load(db)
+                self._check_resync(before, self._all.to_dict())
+                return True
+
+            query = select(PortfolioPosition)
+            if self._position_watermark is not None:
+                query = query.where(PortfolioPosition.LastUpdate > self._position_watermark)
+            result = await db.execute(query)
+            for position in result.scalars().all():
+                self.apply_position(position)
+                if position.LastUpdate and (self._position_watermark is None
+                                            or position.LastUpdate > self._position_watermark):
+                    self._position_watermark = position.LastUpdate
+
+            held = list(self._positions_by_symbol)
+            if held:
+                query = select(LiveQuote).where(LiveQuote.Symbol.in_(held))
+                if self._quote_watermark is not None:
+                    query = query.where(LiveQuote.Timestamp > self._quote_watermark)
+                result = await db.execute(query)
+                for quote in result.scalars().all():
+                    self.apply_quote(quote.Symbol, self._quote_price(quote), quote.Timestamp)
+                    if quote.Timestamp and (self._quote_watermark is None
+                                            or quote.Timestamp > self._quote_watermark):
+                        self._quote_watermark = quote.Timestamp
+
+            self._last_refresh = time.monotonic()
+            return self.version != version
+
+    @staticmethod
+    def _check_resync(before: dict, after: dict, tolerance: float = 1e-6):
+        """A full reload should only settle float drift; anything more means the incremental path went wrong"""
+        drifted = {
+            key: (before[key], after[key]) for key in before
+            if abs(after[key] - before[key]) > tolerance * max(1.0, abs(before[key]))
+        }
+        if drifted:
+            logger.warning(f"Portfolio metrics moved on resync (before, after): {drifted}")
+        return drifted
+
+    async def ensure_fresh(self, db: AsyncSession, max_age: float = None):
+        """Refresh if nothing (e.g. the portfolio stream) has done so recently"""
+        max_age = settings.PORTFOLIO_METRICS_MAX_AGE if max_age is None else max_age
+        if not self.loaded or time.monotonic() - self._last_refresh > max_age:
+            await self.refresh(db)
+
+
+# Global metrics aggregator
+portfolio_metrics = PortfolioMetricsAggregator()
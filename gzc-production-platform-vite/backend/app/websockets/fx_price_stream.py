@@ -1,19 +1,56 @@
 """
 FX Price WebSocket Streaming from Redis
 Real-time streaming of spot and forward FX prices
+
+Driven by fx_tob:updates pushes from the feed, with a poll of every pair each
+stream interval for what pushes miss (quotes expiring, pairs the feed does not
+publish), conflated per pair, and fanned out as field-level deltas to one
+Socket.IO room per pair.
 """
 import asyncio
-import json
 import logging
-from typing import Dict, Set, List, Any
+import time
+from typing import Dict, Set, List, Any, Optional, Tuple
 from datetime import datetime
 import redis
 
 from app.core.azure_keyvault import keyvault_client
+from app.core.config import settings
+from app.core.fx_top_of_book import (
+    UPDATES_CHANNEL,
+    forward_instrument,
+    index_pair,
+    read_top_of_book,
+    spot_instrument,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def fx_room(pair: str) -> str:
+    """Socket.IO room holding every session subscribed to a pair"""
+    return f"fx:{pair}"
+
+
+def diff_prices(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Changed fields of current vs previous price data, per instrument and side
+    Returns (changes like {"spot": {"bid": {"rate": ...}}}, removed like ["forward.ask"])
+    """
+    changes: Dict[str, Any] = {}
+    removed: List[str] = []
+    for instrument in ("spot", "forward"):
+        old_sides = (previous or {}).get(instrument) or {}
+        new_sides = current.get(instrument) or {}
+        for side, quote in new_sides.items():
+            old_quote = old_sides.get(side) or {}
+            changed = {field: value for field, value in quote.items() if old_quote.get(field) != value}
+            if changed:
+                changes.setdefault(instrument, {})[side] = changed
+        removed.extend(f"{instrument}.{side}" for side in old_sides if side not in new_sides)
+    return changes, removed
+
+
 class FXPriceStreamManager:
     """Manages real-time FX price streaming from Redis to WebSocket clients"""
     
@@ -23,7 +60,22 @@ class FXPriceStreamManager:
         self.subscribed_pairs: Dict[str, Set[str]] = {}  # pair -> set of session_ids
         self.session_pairs: Dict[str, Set[str]] = {}  # session_id -> set of pairs
         self.is_streaming = False
-        self.stream_interval = 1.0  # 1 second refresh rate
+        self.stream_interval = settings.FX_STREAM_POLL_INTERVAL  # poll every pair this often
+        self.max_updates_per_second = settings.FX_STREAM_MAX_UPDATES_PER_SEC
+        self.forward_tenor = "M1"
+        self.forward_amount = 1000000
+        self.index_rebuilds = 0
+        
+        # Push-driven state
+        self._dirty: Set[str] = set()  # pairs with feed updates not yet sent
+        self._wakeup: Optional[asyncio.Event] = None
+        self._conflation_timer: Optional[asyncio.TimerHandle] = None
+        self._last_emit: Dict[str, float] = {}  # pair -> monotonic time of last delta
+        self._last_sent: Dict[str, Dict[str, Any]] = {}  # pair -> price data clients hold
+        self._last_poll = 0.0  # monotonic time every pair was last marked dirty
+        self._pubsub = None
+        self._pubsub_thread = None
+        self.stats = {"pushes": 0, "polls": 0, "deltas_sent": 0, "unchanged_skipped": 0}
         
     async def connect_redis(self):
         """Connect to Azure Redis"""
@@ -63,12 +115,44 @@ class FXPriceStreamManager:
         if not self.is_streaming:
             await self.connect_redis()
             self.is_streaming = True
+            self._wakeup = asyncio.Event()
+            self._start_listener()
             self.streaming_task = asyncio.create_task(self._stream_prices())
             logger.info("FX price streaming started")
     
+    def _start_listener(self):
+        """Subscribe to feed pushes on a background thread; polling covers failures"""
+        loop = asyncio.get_running_loop()
+        
+        def on_message(message):
+            loop.call_soon_threadsafe(self._mark_dirty, message["data"])
+        
+        try:
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{UPDATES_CHANNEL: on_message})
+            self._pubsub_thread = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+            logger.info(f"Listening for FX price pushes on {UPDATES_CHANNEL}")
+        except Exception as e:
+            logger.error(f"FX price push listener unavailable, polling only: {e}")
+            self._pubsub = None
+    
+    def _mark_dirty(self, pair: str):
+        if pair in self.subscribed_pairs:
+            self.stats["pushes"] += 1
+            self._dirty.add(pair)
+            self._wakeup.set()
+    
     async def stop_streaming(self):
         """Stop the price streaming task"""
         self.is_streaming = False
+        if self._pubsub_thread:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+        if self._pubsub:
+            self._pubsub.close()
+            self._pubsub = None
+        if self._conflation_timer:
+            self._conflation_timer.cancel()
         if self.streaming_task:
             self.streaming_task.cancel()
             try:
@@ -83,6 +167,9 @@ class FXPriceStreamManager:
         if session_id not in self.session_pairs:
             self.session_pairs[session_id] = set()
         
+        # Import here to avoid circular dependency
+        from app.websockets.manager import sio
+        
         # Subscribe to each pair
         for pair in currency_pairs:
             pair = pair.upper()
@@ -91,6 +178,7 @@ class FXPriceStreamManager:
             
             self.subscribed_pairs[pair].add(session_id)
             self.session_pairs[session_id].add(pair)
+            await sio.enter_room(session_id, fx_room(pair))
         
         logger.info(f"Client {session_id} subscribed to pairs: {currency_pairs}")
         
@@ -100,206 +188,122 @@ class FXPriceStreamManager:
     async def unsubscribe_client(self, session_id: str):
         """Unsubscribe a client from all updates"""
         if session_id in self.session_pairs:
+            from app.websockets.manager import sio
+            
             # Remove from all pair subscriptions
             for pair in self.session_pairs[session_id]:
+                await sio.leave_room(session_id, fx_room(pair))
                 if pair in self.subscribed_pairs:
                     self.subscribed_pairs[pair].discard(session_id)
                     if not self.subscribed_pairs[pair]:
                         del self.subscribed_pairs[pair]
+                        self._dirty.discard(pair)
+                        self._last_sent.pop(pair, None)
+                        self._last_emit.pop(pair, None)
             
             # Remove session
             del self.session_pairs[session_id]
             logger.info(f"Client {session_id} unsubscribed from all pairs")
     
     async def _stream_prices(self):
-        """Main streaming loop"""
+        """Main streaming loop - woken by feed pushes, and polls every pair once per interval"""
+        min_gap = 1.0 / self.max_updates_per_second if self.max_updates_per_second > 0 else 0.0
+        self._last_poll = time.monotonic()
+        
         while self.is_streaming:
             try:
-                if self.subscribed_pairs and self.redis_client:
-                    # Fetch prices for all subscribed pairs
-                    price_updates = await self._fetch_current_prices()
-                    
-                    # Send updates to subscribed clients
+                timeout = max(0.0, self._last_poll + self.stream_interval - time.monotonic())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                
+                # Pushes only cover pairs the feed publishes, so refresh every pair
+                # once per interval however busy they are (quotes expiring, pairs
+                # without pushes); deltas drop no-ops
+                if time.monotonic() - self._last_poll >= self.stream_interval:
+                    self._last_poll = time.monotonic()
+                    self.stats["polls"] += 1
+                    self._dirty.update(self.subscribed_pairs)
+                
+                if not (self._dirty and self.redis_client):
+                    continue
+                
+                # Conflate: a pair goes out at most max_updates_per_second times;
+                # later pushes inside the window collapse into one read
+                now = time.monotonic()
+                due = [pair for pair in self._dirty if now - self._last_emit.get(pair, 0.0) >= min_gap]
+                held = self._dirty.difference(due)
+                if held:
+                    delay = min(self._last_emit[pair] + min_gap for pair in held) - now
+                    if self._conflation_timer:
+                        self._conflation_timer.cancel()
+                    self._conflation_timer = asyncio.get_running_loop().call_later(delay, self._wakeup.set)
+                
+                if due:
+                    self._dirty.difference_update(due)
+                    for pair in due:
+                        self._last_emit[pair] = now
+                    price_updates = await self._fetch_current_prices(due)
                     if price_updates:
                         await self._broadcast_price_updates(price_updates)
                 
-                # Wait before next update
-                await asyncio.sleep(self.stream_interval)
-                
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in price streaming loop: {e}")
                 await asyncio.sleep(5)  # Wait longer on error
     
-    async def _fetch_current_prices(self) -> Dict[str, Any]:
-        """Fetch current prices from Redis for all subscribed pairs"""
-        price_updates = {}
-        
+    async def _fetch_current_prices(self, pairs: List[str]) -> Dict[str, Any]:
+        """Fetch current prices from Redis for the given pairs"""
         try:
-            for pair in self.subscribed_pairs.keys():
-                # Fetch spot prices
-                spot_prices = await self._fetch_spot_prices(pair)
-                
-                # Fetch forward prices (1M)
-                forward_prices = await self._fetch_forward_prices(pair, "M1", 1000000)
-                
-                if spot_prices or forward_prices:
-                    price_updates[pair] = {
-                        "pair": pair,
-                        "spot": spot_prices,
-                        "forward": forward_prices,
-                        "timestamp": datetime.now().isoformat()
-                    }
-        
+            # One pipelined top-of-book read, off the event loop
+            return await asyncio.to_thread(self._read_prices, pairs)
         except Exception as e:
             logger.error(f"Error fetching prices: {e}")
-        
-        return price_updates
-    
-    async def _fetch_spot_prices(self, pair: str) -> Dict[str, Any]:
-        """Fetch spot prices for a currency pair"""
-        spot_prices = {}
-        
-        try:
-            # Pattern for ESP spot prices
-            pattern = f"exchange_rate:esp:{pair}:SPOT:*"
-            
-            # Scan for matching keys
-            cursor = 0
-            keys = []
-            while True:
-                cursor, batch = self.redis_client.scan(cursor, match=pattern, count=50)
-                keys.extend(batch)
-                if cursor == 0 or len(keys) > 100:
-                    break
-            
-            # Get best bid/ask
-            best_bid = None
-            best_ask = None
-            
-            for key in keys:
-                try:
-                    value = self.redis_client.get(key)
-                    if value:
-                        data = json.loads(value)
-                        rate = float(data.get("rate", 0))
-                        
-                        # Parse key to get bid/ask
-                        parts = key.split(':')
-                        if len(parts) >= 5:
-                            side = parts[4]
-                            bank = parts[5] if len(parts) > 5 else "UNKNOWN"
-                            
-                            if side == "Bid":
-                                if best_bid is None or rate > best_bid['rate']:
-                                    best_bid = {
-                                        'rate': rate,
-                                        'bank': bank,
-                                        'timestamp': data.get('timestamp')
-                                    }
-                            elif side == "Ask":
-                                if best_ask is None or rate < best_ask['rate']:
-                                    best_ask = {
-                                        'rate': rate,
-                                        'bank': bank,
-                                        'timestamp': data.get('timestamp')
-                                    }
-                except:
-                    continue
-            
-            if best_bid:
-                spot_prices['bid'] = best_bid
-            if best_ask:
-                spot_prices['ask'] = best_ask
-                
-        except Exception as e:
-            logger.error(f"Error fetching spot prices for {pair}: {e}")
-        
-        return spot_prices
+            return {}
     
-    async def _fetch_forward_prices(self, pair: str, tenor: str, amount: int) -> Dict[str, Any]:
-        """Fetch forward prices for a currency pair"""
-        forward_prices = {}
+    def _read_prices(self, pairs: List[str]) -> Dict[str, Any]:
+        """Best spot and forward bid/ask per pair from the fx_tob index"""
+        spot = spot_instrument()
+        forward = forward_instrument(self.forward_tenor, self.forward_amount)
+        books = [(pair, instrument) for pair in pairs for instrument in (spot, forward)]
+        top = read_top_of_book(self.redis_client, books)
         
-        try:
-            # Pattern for ESP forward prices
-            pattern = f"exchange_rate:esp:{pair}:FORWARD:{amount}:*:{tenor}:*"
-            
-            # Scan for matching keys
-            cursor = 0
-            keys = []
-            while True:
-                cursor, batch = self.redis_client.scan(cursor, match=pattern, count=50)
-                keys.extend(batch)
-                if cursor == 0 or len(keys) > 100:
-                    break
-            
-            # Get best bid/ask
-            best_bid = None
-            best_ask = None
-            
-            for key in keys:
-                try:
-                    value = self.redis_client.get(key)
-                    if value:
-                        data = json.loads(value)
-                        rate = float(data.get("rate", 0))
-                        
-                        # Parse key to get bid/ask
-                        parts = key.split(':')
-                        if len(parts) >= 7:
-                            side = parts[5]
-                            bank = parts[7] if len(parts) > 7 else "UNKNOWN"
-                            
-                            if side == "Bid":
-                                if best_bid is None or rate > best_bid['rate']:
-                                    best_bid = {
-                                        'rate': rate,
-                                        'bank': bank,
-                                        'timestamp': data.get('timestamp'),
-                                        'tenor': tenor,
-                                        'amount': amount
-                                    }
-                            elif side == "Ask":
-                                if best_ask is None or rate < best_ask['rate']:
-                                    best_ask = {
-                                        'rate': rate,
-                                        'bank': bank,
-                                        'timestamp': data.get('timestamp'),
-                                        'tenor': tenor,
-                                        'amount': amount
-                                    }
-                except:
-                    continue
-            
-            if best_bid:
-                forward_prices['bid'] = best_bid
-            if best_ask:
-                forward_prices['ask'] = best_ask
-                
-        except Exception as e:
-            logger.error(f"Error fetching forward prices for {pair}: {e}")
+        # Pairs the feed does not index yet: rebuild from the per-bank keys with a
+        # one-tick TTL so the bridge never serves quotes older than the old SCAN path
+        missing = [pair for pair in pairs if not top[(pair, spot)] and not top[(pair, forward)]]
+        if missing:
+            ttl = max(1, int(self.stream_interval))
+            if any([index_pair(self.redis_client, pair, ttl=ttl) for pair in missing]):
+                self.index_rebuilds += 1
+                top.update(read_top_of_book(
+                    self.redis_client, [book for book in books if book[0] in missing]
+                ))
         
-        return forward_prices
+        price_updates = {}
+        for pair in pairs:
+            spot_prices, forward_prices = top[(pair, spot)], top[(pair, forward)]
+            if spot_prices or forward_prices:
+                price_updates[pair] = {
+                    "pair": pair,
+                    "spot": spot_prices,
+                    "forward": forward_prices,
+                    "timestamp": datetime.now().isoformat()
+                }
+        return price_updates
     
     async def _send_initial_prices(self, session_id: str, currency_pairs: List[str]):
         """Send initial prices to a newly subscribed client"""
         try:
-            initial_prices = {}
-            
-            for pair in currency_pairs:
-                pair = pair.upper()
-                spot_prices = await self._fetch_spot_prices(pair)
-                forward_prices = await self._fetch_forward_prices(pair, "M1", 1000000)
-                
-                if spot_prices or forward_prices:
-                    initial_prices[pair] = {
-                        "pair": pair,
-                        "spot": spot_prices,
-                        "forward": forward_prices,
-                        "timestamp": datetime.now().isoformat()
-                    }
+            # Pairs already streaming start from what the room holds, so the
+            # next delta applies cleanly; new pairs are read fresh
+            pairs = [pair.upper() for pair in currency_pairs]
+            initial_prices = {pair: self._last_sent[pair] for pair in pairs if pair in self._last_sent}
+            unseen = [pair for pair in pairs if pair not in initial_prices]
+            if unseen:
+                initial_prices.update(await asyncio.to_thread(self._read_prices, unseen))
             
             if initial_prices:
                 # Import here to avoid circular dependency
@@ -314,28 +318,44 @@ class FXPriceStreamManager:
             logger.error(f"Error sending initial prices: {e}")
     
     async def _broadcast_price_updates(self, price_updates: Dict[str, Any]):
-        """Broadcast price updates to subscribed clients"""
+        """Send changed fields only, once per pair room"""
         try:
             # Import here to avoid circular dependency
             from app.websockets.manager import sio
             
-            # Send updates to clients subscribed to each pair
             for pair, price_data in price_updates.items():
-                if pair in self.subscribed_pairs:
-                    sessions = list(self.subscribed_pairs[pair])
-                    
-                    for session_id in sessions:
-                        try:
-                            await sio.emit("fx_price_update", {
-                                "pair": pair,
-                                "data": price_data,
-                                "timestamp": datetime.now().isoformat()
-                            }, room=session_id)
-                        except Exception as e:
-                            logger.error(f"Error sending to session {session_id}: {e}")
+                if pair not in self.subscribed_pairs:
+                    continue
+                
+                changes, removed = diff_prices(self._last_sent.get(pair), price_data)
+                if not changes and not removed:
+                    self.stats["unchanged_skipped"] += 1
+                    continue
+                
+                self._last_sent[pair] = price_data
+                self.stats["deltas_sent"] += 1
+                try:
+                    await sio.emit("fx_price_delta", {
+                        "pair": pair,
+                        "changes": changes,
+                        "removed": removed,
+                        "timestamp": price_data["timestamp"]
+                    }, room=fx_room(pair))
+                except Exception as e:
+                    logger.error(f"Error sending {pair} update: {e}")
             
         except Exception as e:
             logger.error(f"Error broadcasting price updates: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "index_rebuilds": self.index_rebuilds,
+            "subscribed_pairs": len(self.subscribed_pairs),
+            "sessions": len(self.session_pairs),
+            "push_listener": bool(self._pubsub_thread and self._pubsub_thread.is_alive()),
+            "max_updates_per_second": self.max_updates_per_second
+        }
 
 
 # Global instance
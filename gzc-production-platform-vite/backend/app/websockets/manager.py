@@ -198,6 +198,7 @@ async def subscribe_fx_prices(sid, data):
         await sio.emit("fx_prices_subscribed", {
             "pairs": currency_pairs,
             "refresh_rate": fx_price_stream_manager.stream_interval,
+            "max_updates_per_second": fx_price_stream_manager.max_updates_per_second,
             "timestamp": datetime.now().isoformat()
         }, room=sid)
         
@@ -1,15 +1,17 @@
 import asyncio
 import json
 import logging
-from typing import Dict, Set
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
 from fastapi import WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import or_, select
 
-from app.core.database import AsyncSessionLocal
+from app.core import database
 from app.core.redis_client import redis_client
 from app.models.portfolio import LiveQuote, PortfolioPosition
 from app.services.auth import MSALAuthenticator
+from app.services.portfolio_metrics import portfolio_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +22,14 @@ class PortfolioStreamManager:
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # Subscribed symbols: user_id -> {symbols}
         self.user_subscriptions: Dict[str, Set[str]] = {}
+        # Inverted index: symbol -> {user_ids}, kept in step with user_subscriptions
+        self.symbol_subscribers: Dict[str, Set[str]] = {}
+        # Change detection: symbol -> Timestamp / payload of the last forwarded quote
+        self._last_timestamps: Dict[str, datetime] = {}
+        self._last_quotes: Dict[str, dict] = {}
         self.authenticator = MSALAuthenticator()
         self._streaming_task = None
+        self._metrics_version_sent = None
         
     async def connect(self, websocket: WebSocket, token: str):
         """
@@ -77,6 +85,7 @@ class PortfolioStreamManager:
                 if not self.active_connections[user_id]:
                     del self.active_connections[user_id]
                     if user_id in self.user_subscriptions:
+                        self._remove_subscriptions(user_id, self.user_subscriptions[user_id])
                         del self.user_subscriptions[user_id]
                     
                 logger.info(f"WebSocket disconnected for user: {user_id}")
@@ -84,6 +93,30 @@ class PortfolioStreamManager:
         except Exception as e:
             logger.error(f"WebSocket disconnect error: {e}")
     
+    def _add_subscriptions(self, user_id: str, symbols: Iterable[str]):
+        """
+        Record subscriptions in both directions
+        """
+        for symbol in symbols:
+            self.user_subscriptions[user_id].add(symbol)
+            self.symbol_subscribers.setdefault(symbol, set()).add(user_id)
+    
+    def _remove_subscriptions(self, user_id: str, symbols: Iterable[str]):
+        """
+        Drop subscriptions in both directions; symbols nobody follows any more
+        also lose their change-detection state
+        """
+        for symbol in list(symbols):
+            self.user_subscriptions.get(user_id, set()).discard(symbol)
+            subscribers = self.symbol_subscribers.get(symbol)
+            if subscribers is None:
+                continue
+            subscribers.discard(user_id)
+            if not subscribers:
+                del self.symbol_subscribers[symbol]
+                self._last_timestamps.pop(symbol, None)
+                self._last_quotes.pop(symbol, None)
+    
     async def send_to_user(self, user_id: str, data: dict):
         """
         Send data to all WebSocket connections for a user
@@ -91,7 +124,15 @@ class PortfolioStreamManager:
         if user_id not in self.active_connections:
             return
         
-        message = json.dumps(data)
+        await self._send_text(user_id, json.dumps(data))
+    
+    async def _send_text(self, user_id: str, message: str):
+        """
+        Send an already serialized message to all WebSocket connections for a user
+        """
+        if user_id not in self.active_connections:
+            return
+        
         disconnected = set()
         
         for websocket in self.active_connections[user_id]:
@@ -118,7 +159,7 @@ class PortfolioStreamManager:
                 if isinstance(symbols, str):
                     symbols = [symbols]
                 
-                self.user_subscriptions[user_id].update(symbols)
+                self._add_subscriptions(user_id, symbols)
                 
                 await self.send_to_user(user_id, {
                     "type": "subscription",
@@ -126,14 +167,19 @@ class PortfolioStreamManager:
                     "symbols": list(self.user_subscriptions[user_id])
                 })
                 
+                # Quotes already streaming to other users will not change just
+                # because this user joined, so send the last known ones now
+                for symbol in symbols:
+                    if symbol in self._last_quotes:
+                        await self.send_to_user(user_id, self._quote_message(symbol, self._last_quotes[symbol]))
+                
             elif message_type == "unsubscribe":
                 # Unsubscribe from symbol updates
                 symbols = data.get("symbols", [])
                 if isinstance(symbols, str):
                     symbols = [symbols]
                 
-                for symbol in symbols:
-                    self.user_subscriptions[user_id].discard(symbol)
+                self._remove_subscriptions(user_id, symbols)
                 
                 await self.send_to_user(user_id, {
                     "type": "subscription",
@@ -151,22 +197,27 @@ class PortfolioStreamManager:
         except Exception as e:
             logger.error(f"Error handling WebSocket message: {e}")
     
+    def _quote_message(self, symbol: str, quote_data: dict) -> dict:
+        return {
+            "type": "quote_update",
+            "symbol": symbol,
+            "data": quote_data,
+            "timestamp": asyncio.get_event_loop().time()
+        }
+    
     async def broadcast_quote_update(self, symbol: str, quote_data: dict):
         """
         Broadcast quote updates to subscribed users
         """
         try:
-            message = {
-                "type": "quote_update",
-                "symbol": symbol,
-                "data": quote_data,
-                "timestamp": asyncio.get_event_loop().time()
-            }
+            subscribers = self.symbol_subscribers.get(symbol)
+            if not subscribers:
+                return
             
-            # Send to users subscribed to this symbol
-            for user_id, subscriptions in self.user_subscriptions.items():
-                if symbol in subscriptions:
-                    await self.send_to_user(user_id, message)
+            # Serialize once, then send only to users subscribed to this symbol
+            message = json.dumps(self._quote_message(symbol, quote_data))
+            for user_id in list(subscribers):
+                await self._send_text(user_id, message)
                     
         except Exception as e:
             logger.error(f"Error broadcasting quote update: {e}")
@@ -187,6 +238,27 @@ class PortfolioStreamManager:
         except Exception as e:
             logger.error(f"Error broadcasting portfolio update: {e}")
     
+    async def broadcast_metrics_update(self):
+        """
+        Push portfolio metrics to every connected user when they moved
+        """
+        try:
+            if not portfolio_metrics.loaded or portfolio_metrics.version == self._metrics_version_sent:
+                return
+            self._metrics_version_sent = portfolio_metrics.version
+            
+            message = json.dumps({
+                "type": "metrics_update",
+                "data": portfolio_metrics.get_metrics(),
+                "funds": portfolio_metrics.get_fund_metrics(),
+                "timestamp": asyncio.get_event_loop().time()
+            })
+            for user_id in list(self.active_connections):
+                await self._send_text(user_id, message)
+            
+        except Exception as e:
+            logger.error(f"Error broadcasting metrics update: {e}")
+    
     async def start_streaming(self):
         """
         Start background streaming task
@@ -210,36 +282,72 @@ class PortfolioStreamManager:
         
         logger.info("Portfolio streaming service stopped")
     
+    async def _fetch_changed_quotes(self, symbols: Set[str]) -> List[LiveQuote]:
+        """
+        Quotes for the subscribed symbols whose Timestamp moved since they were
+        last forwarded; symbols never forwarded are always included
+        """
+        known = [symbol for symbol in symbols if symbol in self._last_timestamps]
+        new = symbols.difference(known)
+        
+        conditions = []
+        if new:
+            conditions.append(LiveQuote.Symbol.in_(list(new)))
+        if known:
+            # One watermark keeps the statement simple; the per-symbol check
+            # below drops rows that only passed because of another symbol
+            watermark = min(self._last_timestamps[symbol] for symbol in known)
+            conditions.append(LiveQuote.Symbol.in_(known) & (LiveQuote.Timestamp > watermark))
+        
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(select(LiveQuote).where(or_(*conditions)))
+            quotes = result.scalars().all()
+        
+        return [quote for quote in quotes if self._quote_changed(quote)]
+    
+    def _quote_changed(self, quote: LiveQuote) -> bool:
+        last = self._last_timestamps.get(quote.Symbol)
+        return last is None or quote.Timestamp is None or quote.Timestamp > last
+    
     async def _stream_quotes(self):
         """
         Background task to stream live quotes
         """
         while True:
             try:
-                # Get all subscribed symbols
-                all_symbols = set()
-                for subscriptions in self.user_subscriptions.values():
-                    all_symbols.update(subscriptions)
+                if database.AsyncSessionLocal is None:
+                    await asyncio.sleep(1)
+                    continue
+                
+                # Keep portfolio metrics current for the endpoint and connected users
+                if self.active_connections:
+                    async with database.AsyncSessionLocal() as db:
+                        await portfolio_metrics.refresh(db)
+                    await self.broadcast_metrics_update()
+                
+                # Symbols with at least one subscriber
+                all_symbols = set(self.symbol_subscribers)
                 
                 if not all_symbols:
                     await asyncio.sleep(1)
                     continue
                 
-                # Fetch quotes from database
-                async with AsyncSessionLocal() as db:
-                    query = select(LiveQuote).where(LiveQuote.Symbol.in_(all_symbols))
-                    result = await db.execute(query)
-                    quotes = result.scalars().all()
-                    
-                    # Broadcast updates
+                # Fetch only the quotes that changed (pooled connection)
+                quotes = await self._fetch_changed_quotes(all_symbols)
+                
+                if quotes:
+                    changed = {quote.Symbol: quote.to_dict() for quote in quotes}
                     for quote in quotes:
-                        quote_data = quote.to_dict()
-                        
-                        # Cache the quote
-                        await redis_client.set_quote_cache(quote.Symbol, quote_data)
-                        
-                        # Broadcast to subscribed users
-                        await self.broadcast_quote_update(quote.Symbol, quote_data)
+                        if quote.Timestamp is not None:
+                            self._last_timestamps[quote.Symbol] = quote.Timestamp
+                    self._last_quotes.update(changed)
+                    
+                    # Cache all changed quotes in one pipelined write
+                    await redis_client.set_quote_cache_bulk(changed)
+                    
+                    # Broadcast to subscribed users
+                    for symbol, quote_data in changed.items():
+                        await self.broadcast_quote_update(symbol, quote_data)
                 
                 # Stream every 1 second
                 await asyncio.sleep(1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark FX best bid/ask reads: SCAN + GET per bank key vs the fx_tob index
+Seeds a local Redis with ESP spot/forward quotes for N pairs x M banks (plus
+unrelated keys so SCAN has a realistic keyspace), then times one streaming tick
+of each path.
+
+Usage:
+    python benchmark_fx_top_of_book.py --url redis://localhost:6379/15 --pairs 30 --banks 12
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+import redis
+
+sys.path.append('.')
+
+from app.core.fx_top_of_book import (
+    forward_instrument,
+    queue_quote,
+    read_top_of_book,
+    spot_instrument,
+)
+
+CURRENCIES = ["EUR", "USD", "GBP", "JPY", "CHF", "AUD", "CAD", "NZD", "SEK", "NOK", "DKK", "SGD"]
+
+
+def make_pairs(count):
+    pairs = [f"{base}{quote}" for base in CURRENCIES for quote in CURRENCIES if base != quote]
+    return pairs[:count]
+
+
+def seed(client, pairs, banks, noise_keys, tenor="M1", amount=1000000):
+    """Write per-bank ESP keys (old layout) and the fx_tob index (new layout)"""
+    client.flushdb()
+    pipe = client.pipeline(transaction=False)
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    for pair in pairs:
+        mid = random.uniform(0.5, 150)
+        for bank in banks:
+            for side, rate in (("Bid", mid * 0.9999), ("Ask", mid * 1.0001)):
+                rate *= random.uniform(0.9999, 1.0001)
+                value = json.dumps({"rate": rate, "timestamp": timestamp})
+                pipe.set(f"exchange_rate:esp:{pair}:SPOT:{side}:{bank}", value)
+                pipe.set(f"exchange_rate:esp:{pair}:FORWARD:{amount}:{side}:{tenor}:{bank}", value)
+                queue_quote(pipe, pair, spot_instrument(), side, bank, rate, timestamp)
+                queue_quote(pipe, pair, forward_instrument(tenor, amount), side, bank, rate, timestamp)
+        pipe.execute()
+    for i in range(noise_keys):
+        pipe.set(f"portfolio:noise:{i}", "x")
+        if i % 1000 == 999:
+            pipe.execute()
+    pipe.execute()
+
+
+def scan_best(client, pattern, side_index, bank_index):
+    """The previous FXPriceStreamManager path: SCAN, then GET + json.loads per key"""
+    cursor, keys = 0, []
+    while True:
+        cursor, batch = client.scan(cursor, match=pattern, count=50)
+        keys.extend(batch)
+        if cursor == 0 or len(keys) > 100:
+            break
+    best_bid = best_ask = None
+    for key in keys:
+        value = client.get(key)
+        if not value:
+            continue
+        rate = float(json.loads(value).get("rate", 0))
+        parts = key.split(':')
+        side, bank = parts[side_index], parts[bank_index]
+        if side == "Bid" and (best_bid is None or rate > best_bid[0]):
+            best_bid = (rate, bank)
+        elif side == "Ask" and (best_ask is None or rate < best_ask[0]):
+            best_ask = (rate, bank)
+    return best_bid, best_ask
+
+
+def tick_scan(client, pairs, tenor="M1", amount=1000000):
+    return {
+        pair: (
+            scan_best(client, f"exchange_rate:esp:{pair}:SPOT:*", 4, 5),
+            scan_best(client, f"exchange_rate:esp:{pair}:FORWARD:{amount}:*:{tenor}:*", 5, 7),
+        )
+        for pair in pairs
+    }
+
+
+def tick_index(client, pairs, tenor="M1", amount=1000000):
+    books = [(pair, instrument) for pair in pairs
+             for instrument in (spot_instrument(), forward_instrument(tenor, amount))]
+    return read_top_of_book(client, books)
+
+
+def count_commands(client, fn, *args):
+    before = client.info("stats")["total_commands_processed"]
+    fn(client, *args)
+    # Subtract the INFO calls themselves
+    return client.info("stats")["total_commands_processed"] - before - 1
+
+
+def time_ticks(client, fn, pairs, ticks):
+    samples = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        fn(client, pairs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def check_agreement(client, pairs):
+    old = tick_scan(client, pairs)
+    new = tick_index(client, pairs)
+    for pair, (spot, _) in old.items():
+        book = new[(pair, spot_instrument())]
+        if book["bid"]["bank"] != spot[0][1] or abs(book["bid"]["rate"] - spot[0][0]) > 1e-9:
+            raise AssertionError(f"Best bid mismatch for {pair}")
+        if book["ask"]["bank"] != spot[1][1] or abs(book["ask"]["rate"] - spot[1][0]) > 1e-9:
+            raise AssertionError(f"Best ask mismatch for {pair}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="redis://localhost:6379/15", help="Scratch Redis DB (flushed!)")
+    parser.add_argument("--pairs", type=int, default=30)
+    parser.add_argument("--banks", type=int, default=12)
+    parser.add_argument("--noise-keys", type=int, default=20000)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    client = redis.from_url(args.url, decode_responses=True)
+    pairs = make_pairs(args.pairs)
+    banks = [f"BANK{i:02d}" for i in range(args.banks)]
+
+    print(f"Seeding {len(pairs)} pairs x {len(banks)} banks (+{args.noise_keys} unrelated keys)...")
+    seed(client, pairs, banks, args.noise_keys)
+    check_agreement(client, pairs)
+    print("Best bid/ask agree between both paths\n")
+
+    for name, fn in (("SCAN + GET", tick_scan), ("fx_tob index", tick_index)):
+        commands = count_commands(client, fn, pairs)
+        samples = time_ticks(client, fn, pairs, args.ticks)
+        print(f"{name:<14} {commands:>6} commands/tick   "
+              f"median {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+
+    client.flushdb()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,20 @@
 """
 Combined Azure Server V2 - PostgreSQL + Redis FX Prices + GZC Data
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+from datetime import date, datetime
 from pydantic import BaseModel
 import uvicorn
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import asyncio
+import asyncpg
+import base64
+import csv
+import io
+import os
 import redis
 import json
 import sys
@@ -37,39 +43,91 @@ class FXTradeResponse(BaseModel):
     trades: List[Dict[str, Any]]
     count: int
     source: str
+    next_cursor: Optional[str] = None  # keyset cursor for the next page (gzc source)
+
+# Pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "512"))
+EXPORT_PREFETCH_ROWS = 500
 
 # Global connections
 db_connection_string = None
+db_pool: Optional[asyncpg.Pool] = None
+db_pool_lock = asyncio.Lock()
 redis_client = None
+positions_store_ready = None  # gzc_fx_position tables installed (create_fx_positions_store.sql)
 
-def get_azure_connection():
-    """Get REAL Azure PostgreSQL connection"""
-    global db_connection_string
+async def get_db_pool() -> asyncpg.Pool:
+    """Shared asyncpg pool to Azure PostgreSQL (prepared statements cached per connection)"""
+    global db_connection_string, db_pool
+    
+    if db_pool is not None:
+        return db_pool
     
-    if not db_connection_string:
+    async with db_pool_lock:
+        if db_pool is not None:
+            return db_pool
+        
+        if not db_connection_string:
+            try:
+                print("🔑 Getting REAL Azure connection from Key Vault...")
+                db_secret = keyvault_client.get_secret('postgres-connection-string')
+                if not db_secret:
+                    raise Exception("No Azure database connection string found")
+                
+                # Convert to libpq URL format
+                db_connection_string = db_secret.replace('postgresql+asyncpg://', 'postgresql://')
+                print("✅ Azure Key Vault connection string retrieved")
+            except Exception as e:
+                print(f"❌ Failed to get Azure connection: {e}")
+                raise HTTPException(status_code=503, detail="Azure Key Vault connection failed")
+        
         try:
-            print("🔑 Getting REAL Azure connection from Key Vault...")
-            db_secret = keyvault_client.get_secret('postgres-connection-string')
-            if not db_secret:
-                raise Exception("No Azure database connection string found")
-            
-            # Convert to psycopg2 format
-            db_connection_string = db_secret.replace('postgresql+asyncpg://', 'postgresql://')
-            print("✅ Azure Key Vault connection string retrieved")
+            db_pool = await asyncpg.create_pool(
+                db_connection_string,
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+                max_inactive_connection_lifetime=300,
+                command_timeout=30,
+                ssl='require'
+            )
+            print(f"✅ Azure PostgreSQL pool ready ({DB_POOL_MIN_SIZE}-{DB_POOL_MAX_SIZE} connections)")
+            return db_pool
         except Exception as e:
-            print(f"❌ Failed to get Azure connection: {e}")
-            raise HTTPException(status_code=503, detail="Azure Key Vault connection failed")
+            print(f"❌ Azure PostgreSQL connection failed: {e}")
+            raise HTTPException(status_code=503, detail="Azure PostgreSQL connection failed")
+
+class QueryParams:
+    """Collects query parameters and hands out asyncpg $n placeholders"""
     
+    def __init__(self):
+        self.values: List[Any] = []
+    
+    def add(self, value) -> str:
+        self.values.append(value)
+        return f"${len(self.values)}"
+
+def parse_date(value: Optional[str], name: str) -> Optional[date]:
+    if value is None:
+        return None
     try:
-        conn = psycopg2.connect(
-            db_connection_string,
-            connect_timeout=30,
-            sslmode='require'
-        )
-        return conn
-    except Exception as e:
-        print(f"❌ Azure PostgreSQL connection failed: {e}")
-        raise HTTPException(status_code=503, detail="Azure PostgreSQL connection failed")
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected YYYY-MM-DD")
+
+def encode_trade_cursor(trade_date: Optional[date], trade_id: int) -> str:
+    """Opaque keyset cursor for (trade_date, trade_id); an empty date stands for NULL"""
+    value = trade_date.isoformat() if trade_date else ''
+    return base64.urlsafe_b64encode(f"{value}|{trade_id}".encode()).decode()
+
+def decode_trade_cursor(cursor: str) -> Tuple[Optional[date], int]:
+    try:
+        trade_date, trade_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return (date.fromisoformat(trade_date) if trade_date else None), int(trade_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 def get_redis_client():
     """Get Azure Redis client"""
@@ -107,11 +165,190 @@ def get_redis_client():
     
     return redis_client
 
+async def positions_store_available(conn) -> bool:
+    """Check once whether the trigger-maintained positions store exists"""
+    global positions_store_ready
+    
+    if positions_store_ready is None:
+        positions_store_ready = bool(await conn.fetchval(
+            "SELECT to_regclass('gzc_fx_position_snapshot') IS NOT NULL"
+        ))
+        print(f"{'✅' if positions_store_ready else '⚠️'} FX positions store "
+              f"{'available' if positions_store_ready else 'not installed - aggregating trades'}")
+    return positions_store_ready
+
+def positions_from_store(as_of_date, currency_pair, trader, fund_id):
+    """
+    position_calc CTE body over the positions store: current rows, or each key's
+    latest snapshot on/before as_of_date, summed across funds unless filtered
+    """
+    conditions = ["1=1"]
+    params = QueryParams()
+    
+    if as_of_date:
+        conditions.append(f"as_of_date <= {params.add(as_of_date)}")
+    
+    if currency_pair:
+        conditions.append(f"currency_pair = {params.add(currency_pair)}")
+    
+    if trader:
+        conditions.append(f"trader = {params.add(trader)}")
+    
+    if fund_id:
+        conditions.append(f"fund_id = {params.add(fund_id)}")
+    
+    where_clause = " AND ".join(conditions)
+    
+    if as_of_date:
+        source = f"""(
+                SELECT DISTINCT ON (currency_pair, trader, counter_party_code, fund_id) *
+                FROM gzc_fx_position_snapshot
+                WHERE {where_clause}
+                ORDER BY currency_pair, trader, counter_party_code, fund_id, as_of_date DESC
+            )"""
+    else:
+        source = f"(SELECT * FROM gzc_fx_position WHERE {where_clause})"
+    
+    query = f"""
+                SELECT 
+                    currency_pair,
+                    NULLIF(trader, '') as trader,
+                    NULLIF(counter_party_code, '') as counter_party_code,
+                    SUM(net_position) as net_position,
+                    SUM(trade_count) as trade_count,
+                    SUM(rate_volume) / NULLIF(SUM(total_volume), 0) as weighted_avg_rate,
+                    MAX(last_trade_date) as last_trade_date,
+                    MIN(first_trade_date) as first_trade_date,
+                    SUM(active_trades) as active_trades,
+                    SUM(total_volume) as total_volume
+                FROM {source} AS positions
+                GROUP BY currency_pair, trader, counter_party_code
+    """
+    return query, params.values
+
+def positions_from_trades(as_of_date, currency_pair, trader, fund_id, active_status):
+    """position_calc CTE body aggregating gzc_fx_trade directly (GZCDB methodology)"""
+    conditions = ["1=1"]
+    params = QueryParams()
+    
+    if as_of_date:
+        conditions.append(f"trade_date <= {params.add(as_of_date)}")
+    
+    if currency_pair:
+        conditions.append(f"(trade_currency || '/' || settlement_currency) = {params.add(currency_pair)}")
+    
+    if trader:
+        conditions.append(f"trader = {params.add(trader)}")
+    
+    if fund_id:
+        conditions.append(f"fund_id = {params.add(fund_id)}")
+    
+    if active_status == "active":
+        conditions.append("maturity_date > CURRENT_DATE")
+    elif active_status == "inactive":
+        conditions.append("maturity_date <= CURRENT_DATE")
+    
+    where_clause = " AND ".join(conditions)
+    
+    query = f"""
+                SELECT 
+                    trade_currency || '/' || settlement_currency as currency_pair,
+                    trader,
+                    counter_party_code,
+                    -- Net position: BUY adds, SELL subtracts
+                    SUM(CASE 
+                        WHEN UPPER(position) = 'BUY' THEN quantity 
+                        ELSE -quantity 
+                    END) as net_position,
+                    COUNT(*) as trade_count,
+                    -- Weighted average rate
+                    SUM(price * ABS(quantity)) / NULLIF(SUM(ABS(quantity)), 0) as weighted_avg_rate,
+                    MAX(trade_date) as last_trade_date,
+                    MIN(trade_date) as first_trade_date,
+                    SUM(CASE WHEN active THEN 1 ELSE 0 END) as active_trades,
+                    SUM(ABS(quantity)) as total_volume
+                FROM gzc_fx_trade
+                WHERE {where_clause}
+                GROUP BY trade_currency || '/' || settlement_currency, trader, counter_party_code
+    """
+    return query, params.values
+
+def gzc_trade_filters(params: QueryParams, status, currency_pair, trader, fund_id, active_status) -> List[str]:
+    """WHERE conditions for gzc_fx_trade shared by the trades page and export"""
+    conditions = ["1=1"]
+    if status == "ACTIVE":
+        conditions.append("active = true")
+    elif status == "INACTIVE":
+        conditions.append("active = false")
+    if currency_pair and '/' in currency_pair:
+        # Split the pair so the (trade_currency, settlement_currency) columns can use an index
+        base, quote = currency_pair.split('/', 1)
+        conditions.append(f"trade_currency = {params.add(base)} AND settlement_currency = {params.add(quote)}")
+    elif currency_pair:
+        conditions.append(f"(trade_currency || '/' || settlement_currency) = {params.add(currency_pair)}")
+    if trader:
+        conditions.append(f"trader ILIKE {params.add(f'%{trader}%')}")
+    
+    # Add active status filter based on maturity date
+    if active_status == "active":
+        conditions.append("maturity_date > CURRENT_DATE")
+    elif active_status == "inactive":
+        conditions.append("maturity_date <= CURRENT_DATE")
+    
+    # Add fund filter
+    if fund_id:
+        conditions.append(f"fund_id = {params.add(fund_id)}")
+    return conditions
+
+# Keyset order for gzc trades: newest first, trades without a trade_date last.
+# A single sort key keeps the keyset one row comparison the index can serve.
+GZC_TRADE_SORT_KEY = "COALESCE(trade_date, '-infinity'::date)"
+GZC_TRADE_ORDER = f"{GZC_TRADE_SORT_KEY} DESC, trade_id DESC"
+
+GZC_TRADE_COLUMNS = """
+                    trade_id,
+                    'GZC-' || trade_id::text as id,
+                    trade_date,
+                    maturity_date as value_date,
+                    trade_currency || '/' || settlement_currency as currency_pair,
+                    quantity as notional,
+                    price as rate,
+                    price as market_rate,
+                    0 as pnl,
+                    counter_party_code as counterparty,
+                    CASE WHEN active THEN 'ACTIVE' ELSE 'INACTIVE' END as status,
+                    trader,
+                    mod_timestamp as created_at,
+                    mod_timestamp as updated_at
+"""
+
+def serialize_trade(row, source: str) -> Dict[str, Any]:
+    trade = dict(row)
+    trade.pop("trade_id", None)
+    trade["trade_date"] = trade["trade_date"].isoformat() if trade["trade_date"] else None
+    trade["value_date"] = trade["value_date"].isoformat() if trade["value_date"] else None
+    trade["created_at"] = trade["created_at"].isoformat() if trade["created_at"] else None
+    trade["updated_at"] = trade["updated_at"].isoformat() if trade["updated_at"] else None
+    trade["notional"] = float(trade["notional"]) if trade["notional"] else 0
+    trade["rate"] = float(trade["rate"]) if trade["rate"] else 0
+    trade["market_rate"] = float(trade["market_rate"]) if trade["market_rate"] else 0
+    trade["pnl"] = float(trade["pnl"]) if trade["pnl"] else 0
+    trade["source"] = source
+    return trade
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if db_pool is not None:
+        await db_pool.close()
+        print("🔌 Azure PostgreSQL pool closed")
+
 # Create FastAPI app
 app = FastAPI(
     title="GZC Trading Platform API",
     description="Real Azure data with PostgreSQL and Redis",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -143,7 +380,8 @@ async def get_fx_forward_trades(
     trader: Optional[str] = None,
     fund_id: Optional[int] = Query(None, description="Fund ID: 1=GMF, 6=GCF"),
     active_status: Optional[str] = Query(None, description="Filter by active status: 'active' (not matured), 'inactive' (matured), or None for all"),
-    limit: int = Query(100, description="Maximum number of records"),
+    limit: int = Query(100, ge=1, le=5000, description="Maximum number of records"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (gzc source only)"),
 ):
     """Get FX forward trades from Azure PostgreSQL
     
@@ -151,118 +389,81 @@ async def get_fx_forward_trades(
     - 'original': fx_forward_trades table (5 demo trades)
     - 'gzc': gzc_fx_trade table (1,100+ real historical trades)
     - 'combined': Both sources merged
+    
+    GZC trades are paged newest first by keyset on (trade_date, trade_id),
+    trades without a trade_date last: pass the returned next_cursor to get
+    the following page.
     """
+    if cursor and source != "gzc":
+        raise HTTPException(status_code=400, detail="cursor pagination is only supported for source='gzc'")
+    
     try:
-        conn = get_azure_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
+        pool = await get_db_pool()
         trades = []
-        
-        # Get original trades
-        if source in ["original", "combined"]:
-            query = """
-                SELECT id, trade_date, value_date, currency_pair, notional, rate, 
-                       market_rate, pnl, counterparty, status, trader, created_at, updated_at
-                FROM fx_forward_trades 
-                WHERE 1=1
-            """
-            
-            params = []
-            if status:
-                query += " AND status = %s"
-                params.append(status)
-            if currency_pair:
-                query += " AND currency_pair = %s"
-                params.append(currency_pair)
-            if trader:
-                query += " AND trader ILIKE %s"
-                params.append(f"%{trader}%")
-            
-            # Add active status filter based on value date
-            if active_status == "active":
-                query += " AND value_date > CURRENT_DATE"
-            elif active_status == "inactive":
-                query += " AND value_date <= CURRENT_DATE"
-            
-            query += " ORDER BY trade_date DESC"
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                trade = dict(row)
-                trade["trade_date"] = trade["trade_date"].isoformat() if trade["trade_date"] else None
-                trade["value_date"] = trade["value_date"].isoformat() if trade["value_date"] else None
-                trade["created_at"] = trade["created_at"].isoformat() if trade["created_at"] else None
-                trade["updated_at"] = trade["updated_at"].isoformat() if trade["updated_at"] else None
-                trade["source"] = "original"
-                trades.append(trade)
-        
-        # Get GZC trades
-        if source in ["gzc", "combined"]:
-            query = """
-                SELECT 
-                    'GZC-' || trade_id::text as id,
-                    trade_date,
-                    maturity_date as value_date,
-                    trade_currency || '/' || settlement_currency as currency_pair,
-                    quantity as notional,
-                    price as rate,
-                    price as market_rate,
-                    0 as pnl,
-                    counter_party_code as counterparty,
-                    CASE WHEN active THEN 'ACTIVE' ELSE 'INACTIVE' END as status,
-                    trader,
-                    mod_timestamp as created_at,
-                    mod_timestamp as updated_at
-                FROM gzc_fx_trade
-                WHERE 1=1
-            """
-            
-            params = []
-            if status:
-                if status == "ACTIVE":
-                    query += " AND active = true"
-                elif status == "INACTIVE":
-                    query += " AND active = false"
-            if currency_pair:
-                query += " AND (trade_currency || '/' || settlement_currency) = %s"
-                params.append(currency_pair)
-            if trader:
-                query += " AND trader ILIKE %s"
-                params.append(f"%{trader}%")
-            
-            # Add active status filter based on maturity date
-            if active_status == "active":
-                query += " AND maturity_date > CURRENT_DATE"
-            elif active_status == "inactive":
-                query += " AND maturity_date <= CURRENT_DATE"
-            
-            # Add fund filter
-            if fund_id:
-                query += " AND fund_id = %s"
-                params.append(fund_id)
-            
-            query += f" ORDER BY trade_date DESC LIMIT {limit}"
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+        next_cursor = None
+        
+        async with pool.acquire() as conn:
+            # Get original trades
+            if source in ["original", "combined"]:
+                params = QueryParams()
+                query = """
+                    SELECT id, trade_date, value_date, currency_pair, notional, rate, 
+                           market_rate, pnl, counterparty, status, trader, created_at, updated_at
+                    FROM fx_forward_trades 
+                    WHERE 1=1
+                """
+                
+                if status:
+                    query += f" AND status = {params.add(status)}"
+                if currency_pair:
+                    query += f" AND currency_pair = {params.add(currency_pair)}"
+                if trader:
+                    query += f" AND trader ILIKE {params.add(f'%{trader}%')}"
+                
+                # Add active status filter based on value date
+                if active_status == "active":
+                    query += " AND value_date > CURRENT_DATE"
+                elif active_status == "inactive":
+                    query += " AND value_date <= CURRENT_DATE"
+                
+                query += f" ORDER BY trade_date DESC LIMIT {params.add(limit)}"
+                
+                for row in await conn.fetch(query, *params.values):
+                    trade = dict(row)
+                    trade["trade_date"] = trade["trade_date"].isoformat() if trade["trade_date"] else None
+                    trade["value_date"] = trade["value_date"].isoformat() if trade["value_date"] else None
+                    trade["created_at"] = trade["created_at"].isoformat() if trade["created_at"] else None
+                    trade["updated_at"] = trade["updated_at"].isoformat() if trade["updated_at"] else None
+                    trade["source"] = "original"
+                    trades.append(trade)
             
-            for row in rows:
-                trade = dict(row)
-                trade["trade_date"] = trade["trade_date"].isoformat() if trade["trade_date"] else None
-                trade["value_date"] = trade["value_date"].isoformat() if trade["value_date"] else None
-                trade["created_at"] = trade["created_at"].isoformat() if trade["created_at"] else None
-                trade["updated_at"] = trade["updated_at"].isoformat() if trade["updated_at"] else None
-                trade["notional"] = float(trade["notional"]) if trade["notional"] else 0
-                trade["rate"] = float(trade["rate"]) if trade["rate"] else 0
-                trade["market_rate"] = float(trade["market_rate"]) if trade["market_rate"] else 0
-                trade["pnl"] = float(trade["pnl"]) if trade["pnl"] else 0
-                trade["source"] = "gzc"
-                trades.append(trade)
-        
-        cursor.close()
-        conn.close()
+            # Get GZC trades
+            if source in ["gzc", "combined"]:
+                params = QueryParams()
+                conditions = gzc_trade_filters(params, status, currency_pair, trader, fund_id, active_status)
+                
+                # Keyset: rows strictly older than the last row of the previous page
+                if cursor:
+                    after_date, after_id = decode_trade_cursor(cursor)
+                    conditions.append(f"({GZC_TRADE_SORT_KEY}, trade_id) < "
+                                      f"(COALESCE({params.add(after_date)}::date, '-infinity'::date), {params.add(after_id)})")
+                
+                # Fetch one extra row to know whether another page exists
+                query = f"""
+                    SELECT {GZC_TRADE_COLUMNS}
+                    FROM gzc_fx_trade
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY {GZC_TRADE_ORDER}
+                    LIMIT {params.add(limit + 1)}
+                """
+                rows = await conn.fetch(query, *params.values)
+                
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    if source == "gzc":
+                        next_cursor = encode_trade_cursor(rows[-1]["trade_date"], rows[-1]["trade_id"])
+                
+                trades.extend(serialize_trade(row, "gzc") for row in rows)
         
         # Sort by trade date (newest first)
         trades.sort(key=lambda x: x['trade_date'] or '', reverse=True)
@@ -271,7 +472,7 @@ async def get_fx_forward_trades(
         trades = trades[:limit]
         
         print(f"✅ Retrieved {len(trades)} trades from source: {source}")
-        return {"trades": trades, "count": len(trades), "source": source}
+        return {"trades": trades, "count": len(trades), "source": source, "next_cursor": next_cursor}
         
     except HTTPException:
         raise
@@ -279,6 +480,47 @@ async def get_fx_forward_trades(
         print(f"❌ Database error: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+@app.get("/api/fx-forward-trades/export")
+async def export_fx_forward_trades(
+    status: Optional[str] = None,
+    currency_pair: Optional[str] = None,
+    trader: Optional[str] = None,
+    fund_id: Optional[int] = Query(None, description="Fund ID: 1=GMF, 6=GCF"),
+    active_status: Optional[str] = Query(None, description="'active', 'inactive', or None for all"),
+):
+    """Stream all matching GZC trades as CSV through a server-side cursor"""
+    pool = await get_db_pool()
+    params = QueryParams()
+    conditions = gzc_trade_filters(params, status, currency_pair, trader, fund_id, active_status)
+    query = f"""
+        SELECT {GZC_TRADE_COLUMNS}
+        FROM gzc_fx_trade
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {GZC_TRADE_ORDER}
+    """
+    columns = ["id", "trade_date", "value_date", "currency_pair", "notional", "rate", "market_rate",
+               "pnl", "counterparty", "status", "trader", "created_at", "updated_at"]
+    
+    async def rows_as_csv() -> AsyncIterator[str]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        
+        # Cursors need a transaction; rows arrive EXPORT_PREFETCH_ROWS at a time
+        async with pool.acquire() as conn:
+            async with conn.transaction(readonly=True):
+                async for row in conn.cursor(query, *params.values, prefetch=EXPORT_PREFETCH_ROWS):
+                    writer.writerow(serialize_trade(row, "gzc"))
+                    if buffer.tell() > 64 * 1024:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+        yield buffer.getvalue()
+    
+    filename = f"gzc_fx_trades_{datetime.now():%Y%m%d_%H%M%S}.csv"
+    return StreamingResponse(rows_as_csv(), media_type="text/csv",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @app.get("/api/fx-prices")
 async def get_fx_prices(
     pairs: str = "EUR/USD,GBP/USD,USD/JPY,EUR/GBP,AUD/USD",
@@ -359,83 +601,44 @@ async def get_fx_positions(
     active_status: Optional[str] = Query(None, description="Filter by active status based on maturity date")
 ):
     """Calculate FX positions from trades using GZCDB methodology"""
+    as_of = parse_date(as_of_date, "as_of_date")
     try:
-        conn = get_azure_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Build query with filters
-        conditions = ["1=1"]
-        params = []
-        
-        if as_of_date:
-            conditions.append("trade_date <= %s")
-            params.append(as_of_date)
-        
-        if currency_pair:
-            conditions.append("(trade_currency || '/' || settlement_currency) = %s")
-            params.append(currency_pair)
-        
-        if trader:
-            conditions.append("trader = %s")
-            params.append(trader)
-        
-        if fund_id:
-            conditions.append("fund_id = %s")
-            params.append(fund_id)
-        
-        if active_status == "active":
-            conditions.append("maturity_date > CURRENT_DATE")
-        elif active_status == "inactive":
-            conditions.append("maturity_date <= CURRENT_DATE")
-        
-        where_clause = " AND ".join(conditions)
-        
-        # Calculate positions using GZCDB methodology
-        query = f"""
-            WITH position_calc AS (
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            # Positions store is O(positions); maturity-based active filters depend on
+            # today's date, so those still aggregate the trades
+            if active_status is None and await positions_store_available(conn):
+                position_calc, params = positions_from_store(as_of, currency_pair, trader, fund_id)
+                source = "positions_store"
+            else:
+                position_calc, params = positions_from_trades(as_of, currency_pair, trader, fund_id, active_status)
+                source = "gzc_fx_trade"
+        
+            # Calculate positions using GZCDB methodology
+            query = f"""
+                WITH position_calc AS ({position_calc})
                 SELECT 
-                    trade_currency || '/' || settlement_currency as currency_pair,
+                    currency_pair,
                     trader,
                     counter_party_code,
-                    -- Net position: BUY adds, SELL subtracts
-                    SUM(CASE 
-                        WHEN UPPER(position) = 'BUY' THEN quantity 
-                        ELSE -quantity 
-                    END) as net_position,
-                    COUNT(*) as trade_count,
-                    -- Weighted average rate
-                    SUM(price * ABS(quantity)) / NULLIF(SUM(ABS(quantity)), 0) as weighted_avg_rate,
-                    MAX(trade_date) as last_trade_date,
-                    MIN(trade_date) as first_trade_date,
-                    SUM(CASE WHEN active THEN 1 ELSE 0 END) as active_trades,
-                    SUM(ABS(quantity)) as total_volume
-                FROM gzc_fx_trade
-                WHERE {where_clause}
-                GROUP BY trade_currency || '/' || settlement_currency, trader, counter_party_code
-            )
-            SELECT 
-                currency_pair,
-                trader,
-                counter_party_code,
-                net_position,
-                trade_count,
-                weighted_avg_rate,
-                last_trade_date,
-                first_trade_date,
-                active_trades,
-                total_volume,
-                CASE 
-                    WHEN net_position > 0 THEN 'LONG'
-                    WHEN net_position < 0 THEN 'SHORT'
-                    ELSE 'FLAT'
-                END as position_status
-            FROM position_calc
-            WHERE ABS(net_position) > 0
-            ORDER BY ABS(net_position) DESC
-        """
-        
-        cursor.execute(query, params)
-        positions = cursor.fetchall()
+                    net_position,
+                    trade_count,
+                    weighted_avg_rate,
+                    last_trade_date,
+                    first_trade_date,
+                    active_trades,
+                    total_volume,
+                    CASE 
+                        WHEN net_position > 0 THEN 'LONG'
+                        WHEN net_position < 0 THEN 'SHORT'
+                        ELSE 'FLAT'
+                    END as position_status
+                FROM position_calc
+                WHERE ABS(net_position) > 0
+                ORDER BY ABS(net_position) DESC
+            """
+            
+            positions = [dict(row) for row in await conn.fetch(query, *params)]
         
         # Convert decimals to floats for JSON
         for pos in positions:
@@ -455,15 +658,15 @@ async def get_fx_positions(
             'unique_traders': len(set(p['trader'] for p in positions))
         }
         
-        cursor.close()
-        conn.close()
-        
         return {
             'as_of_date': as_of_date or 'current',
             'summary': summary,
-            'positions': positions
+            'positions': positions,
+            'source': source
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error calculating positions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -475,16 +678,14 @@ async def get_fx_positions_aggregated(
 ):
     """Get positions aggregated by currency pair"""
     try:
-        conn = get_azure_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        pool = await get_db_pool()
         
         # Build query with filters
         conditions = ["1=1"]
-        params = []
+        params = QueryParams()
         
         if fund_id:
-            conditions.append("fund_id = %s")
-            params.append(fund_id)
+            conditions.append(f"fund_id = {params.add(fund_id)}")
         
         if active_status == "active":
             conditions.append("maturity_date > CURRENT_DATE")
@@ -530,8 +731,8 @@ async def get_fx_positions_aggregated(
             ORDER BY ABS(net_position) DESC
         """
         
-        cursor.execute(query, params)
-        positions = cursor.fetchall()
+        async with pool.acquire() as conn:
+            positions = [dict(row) for row in await conn.fetch(query, *params.values)]
         
         # Convert decimals to floats
         for pos in positions:
@@ -549,9 +750,6 @@ async def get_fx_positions_aggregated(
             'unique_pairs': len(positions)
         }
         
-        cursor.close()
-        conn.close()
-        
         return {
             'summary': summary,
             'positions': positions,
@@ -569,53 +767,46 @@ async def get_fx_positions_aggregated(
 async def get_gzc_stats():
     """Get statistics about GZC data"""
     try:
-        conn = get_azure_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Total trades
-        cursor.execute("SELECT COUNT(*) as total FROM gzc_fx_trade")
-        total = cursor.fetchone()["total"]
-        
-        # By status
-        cursor.execute("""
-            SELECT 
-                CASE WHEN active THEN 'ACTIVE' ELSE 'INACTIVE' END as status,
-                COUNT(*) as count
-            FROM gzc_fx_trade
-            GROUP BY active
-        """)
-        status_breakdown = {row["status"]: row["count"] for row in cursor.fetchall()}
-        
-        # By year
-        cursor.execute("""
-            SELECT 
-                EXTRACT(YEAR FROM trade_date) as year,
-                COUNT(*) as count
-            FROM gzc_fx_trade
-            GROUP BY EXTRACT(YEAR FROM trade_date)
-            ORDER BY year DESC
-            LIMIT 10
-        """)
-        yearly_breakdown = [{"year": int(row["year"]), "count": row["count"]} for row in cursor.fetchall()]
-        
-        # Top currency pairs
-        cursor.execute("""
-            SELECT 
-                trade_currency || '/' || settlement_currency as pair,
-                COUNT(*) as count
-            FROM gzc_fx_trade
-            GROUP BY trade_currency, settlement_currency
-            ORDER BY count DESC
-            LIMIT 10
-        """)
-        top_pairs = [{"pair": row["pair"], "count": row["count"]} for row in cursor.fetchall()]
-        
-        # Available currencies
-        cursor.execute("SELECT currency, yield_curve_id FROM gzc_currency ORDER BY currency")
-        currencies = [{"code": row["currency"], "yield_curve": row["yield_curve_id"]} for row in cursor.fetchall()]
-        
-        cursor.close()
-        conn.close()
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            # Total trades
+            total = await conn.fetchval("SELECT COUNT(*) as total FROM gzc_fx_trade")
+            
+            # By status
+            status_breakdown = {row["status"]: row["count"] for row in await conn.fetch("""
+                SELECT 
+                    CASE WHEN active THEN 'ACTIVE' ELSE 'INACTIVE' END as status,
+                    COUNT(*) as count
+                FROM gzc_fx_trade
+                GROUP BY active
+            """)}
+            
+            # By year
+            yearly_breakdown = [{"year": int(row["year"]), "count": row["count"]} for row in await conn.fetch("""
+                SELECT 
+                    EXTRACT(YEAR FROM trade_date) as year,
+                    COUNT(*) as count
+                FROM gzc_fx_trade
+                GROUP BY EXTRACT(YEAR FROM trade_date)
+                ORDER BY year DESC
+                LIMIT 10
+            """)]
+            
+            # Top currency pairs
+            top_pairs = [{"pair": row["pair"], "count": row["count"]} for row in await conn.fetch("""
+                SELECT 
+                    trade_currency || '/' || settlement_currency as pair,
+                    COUNT(*) as count
+                FROM gzc_fx_trade
+                GROUP BY trade_currency, settlement_currency
+                ORDER BY count DESC
+                LIMIT 10
+            """)]
+            
+            # Available currencies
+            currencies = [{"code": row["currency"], "yield_curve": row["yield_curve_id"]} for row in await conn.fetch(
+                "SELECT currency, yield_curve_id FROM gzc_currency ORDER BY currency"
+            )]
         
         return {
             "total_trades": total,
@@ -0,0 +1,280 @@
+-- FX Positions Store
+-- Running position sums per (currency pair, trader, counterparty, fund), kept in
+-- step with gzc_fx_trade by triggers so /api/fx-positions reads positions instead
+-- of aggregating every trade.
+--
+--   gzc_fx_position            current running sums, one row per key
+--   gzc_fx_position_snapshot   cumulative sums as of each date a key traded;
+--                              the position at date D is the key's latest
+--                              snapshot with as_of_date <= D
+--
+-- Same methodology as the positions query: BUY adds quantity, anything else
+-- subtracts; weighted average rate = SUM(price * |qty|) / SUM(|qty|).
+-- NULL trader / counterparty / fund are stored as '' / 0 so they can be keyed.
+-- NULLs never block a trade booking: trades without a currency pair are not
+-- positions and are skipped; NULL quantity / price add nothing, as SUM skipped
+-- them; trades without a trade date count in the current position but in no
+-- snapshot, as the trade_date <= D filter left them out.
+
+CREATE TABLE IF NOT EXISTS gzc_fx_position (
+    currency_pair VARCHAR(15) NOT NULL,
+    trader VARCHAR(100) NOT NULL DEFAULT '',
+    counter_party_code VARCHAR(100) NOT NULL DEFAULT '',
+    fund_id INTEGER NOT NULL DEFAULT 0,
+    net_position NUMERIC NOT NULL DEFAULT 0,
+    trade_count INTEGER NOT NULL DEFAULT 0,
+    active_trades INTEGER NOT NULL DEFAULT 0,
+    total_volume NUMERIC NOT NULL DEFAULT 0,
+    rate_volume NUMERIC NOT NULL DEFAULT 0, -- SUM(price * |qty|)
+    first_trade_date DATE,
+    last_trade_date DATE,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (currency_pair, trader, counter_party_code, fund_id)
+);
+
+CREATE TABLE IF NOT EXISTS gzc_fx_position_snapshot (
+    currency_pair VARCHAR(15) NOT NULL,
+    trader VARCHAR(100) NOT NULL DEFAULT '',
+    counter_party_code VARCHAR(100) NOT NULL DEFAULT '',
+    fund_id INTEGER NOT NULL DEFAULT 0,
+    as_of_date DATE NOT NULL,
+    net_position NUMERIC NOT NULL DEFAULT 0,
+    trade_count INTEGER NOT NULL DEFAULT 0,
+    active_trades INTEGER NOT NULL DEFAULT 0,
+    total_volume NUMERIC NOT NULL DEFAULT 0,
+    rate_volume NUMERIC NOT NULL DEFAULT 0,
+    first_trade_date DATE,
+    last_trade_date DATE,
+    PRIMARY KEY (currency_pair, trader, counter_party_code, fund_id, as_of_date)
+);
+
+-- Latest snapshot per key at or before a date (DISTINCT ON ... ORDER BY as_of_date DESC)
+CREATE INDEX IF NOT EXISTS idx_gzc_fx_position_snapshot_latest
+    ON gzc_fx_position_snapshot (currency_pair, trader, counter_party_code, fund_id, as_of_date DESC);
+CREATE INDEX IF NOT EXISTS idx_gzc_fx_position_snapshot_date
+    ON gzc_fx_position_snapshot (as_of_date);
+
+-- Rebuilding one key after an update/delete reads only that pair's trades
+CREATE INDEX IF NOT EXISTS idx_gzc_fx_trade_pair_date
+    ON gzc_fx_trade (trade_currency, settlement_currency, trade_date);
+
+
+-- Apply one inserted trade: O(1) for the current row, plus the snapshots on or
+-- after its trade date (just one row for same-day bookings)
+CREATE OR REPLACE FUNCTION gzc_fx_position_apply_trade(
+    p_pair VARCHAR, p_trader VARCHAR, p_counterparty VARCHAR, p_fund INTEGER,
+    p_trade_date DATE, p_net NUMERIC, p_volume NUMERIC, p_rate_volume NUMERIC, p_active INTEGER
+) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO gzc_fx_position AS p (
+        currency_pair, trader, counter_party_code, fund_id, net_position, trade_count,
+        active_trades, total_volume, rate_volume, first_trade_date, last_trade_date
+    ) VALUES (
+        p_pair, p_trader, p_counterparty, p_fund, p_net, 1,
+        p_active, p_volume, p_rate_volume, p_trade_date, p_trade_date
+    )
+    ON CONFLICT (currency_pair, trader, counter_party_code, fund_id) DO UPDATE SET
+        net_position = p.net_position + EXCLUDED.net_position,
+        trade_count = p.trade_count + 1,
+        active_trades = p.active_trades + EXCLUDED.active_trades,
+        total_volume = p.total_volume + EXCLUDED.total_volume,
+        rate_volume = p.rate_volume + EXCLUDED.rate_volume,
+        first_trade_date = LEAST(p.first_trade_date, EXCLUDED.first_trade_date),
+        last_trade_date = GREATEST(p.last_trade_date, EXCLUDED.last_trade_date),
+        updated_at = NOW();
+
+    IF p_trade_date IS NULL THEN
+        RETURN;
+    END IF;
+
+    -- Open a snapshot on the trade date, carrying the previous cumulative sums
+    INSERT INTO gzc_fx_position_snapshot (
+        currency_pair, trader, counter_party_code, fund_id, as_of_date, net_position,
+        trade_count, active_trades, total_volume, rate_volume, first_trade_date, last_trade_date
+    )
+    SELECT p_pair, p_trader, p_counterparty, p_fund, p_trade_date,
+           COALESCE(prev.net_position, 0), COALESCE(prev.trade_count, 0),
+           COALESCE(prev.active_trades, 0), COALESCE(prev.total_volume, 0),
+           COALESCE(prev.rate_volume, 0), prev.first_trade_date, prev.last_trade_date
+    FROM (SELECT 1) AS one
+    LEFT JOIN LATERAL (
+        SELECT * FROM gzc_fx_position_snapshot s
+        WHERE s.currency_pair = p_pair AND s.trader = p_trader
+          AND s.counter_party_code = p_counterparty AND s.fund_id = p_fund
+          AND s.as_of_date < p_trade_date
+        ORDER BY s.as_of_date DESC
+        LIMIT 1
+    ) AS prev ON TRUE
+    ON CONFLICT (currency_pair, trader, counter_party_code, fund_id, as_of_date) DO NOTHING;
+
+    -- Roll the trade into that snapshot and every later one (back-dated bookings)
+    UPDATE gzc_fx_position_snapshot SET
+        net_position = net_position + p_net,
+        trade_count = trade_count + 1,
+        active_trades = active_trades + p_active,
+        total_volume = total_volume + p_volume,
+        rate_volume = rate_volume + p_rate_volume,
+        first_trade_date = LEAST(COALESCE(first_trade_date, p_trade_date), p_trade_date),
+        last_trade_date = GREATEST(COALESCE(last_trade_date, p_trade_date), p_trade_date)
+    WHERE currency_pair = p_pair AND trader = p_trader
+      AND counter_party_code = p_counterparty AND fund_id = p_fund
+      AND as_of_date >= p_trade_date;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Recompute one key from its trades (updates and deletes can't be undone from sums
+-- alone because of first/last trade dates); index-served, touches one key only
+CREATE OR REPLACE FUNCTION gzc_fx_position_rebuild_key(
+    p_pair VARCHAR, p_trader VARCHAR, p_counterparty VARCHAR, p_fund INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    v_base VARCHAR := split_part(p_pair, '/', 1);
+    v_quote VARCHAR := split_part(p_pair, '/', 2);
+BEGIN
+    DELETE FROM gzc_fx_position
+    WHERE currency_pair = p_pair AND trader = p_trader
+      AND counter_party_code = p_counterparty AND fund_id = p_fund;
+    DELETE FROM gzc_fx_position_snapshot
+    WHERE currency_pair = p_pair AND trader = p_trader
+      AND counter_party_code = p_counterparty AND fund_id = p_fund;
+
+    INSERT INTO gzc_fx_position_snapshot (
+        currency_pair, trader, counter_party_code, fund_id, as_of_date, net_position,
+        trade_count, active_trades, total_volume, rate_volume, first_trade_date, last_trade_date
+    )
+    SELECT p_pair, p_trader, p_counterparty, p_fund, trade_date,
+           SUM(net) OVER w, SUM(trades) OVER w, SUM(active) OVER w,
+           SUM(volume) OVER w, SUM(rate_volume) OVER w,
+           MIN(trade_date) OVER w, trade_date
+    FROM (
+        SELECT trade_date,
+               COALESCE(SUM(CASE WHEN UPPER(position) = 'BUY' THEN quantity ELSE -quantity END), 0) AS net,
+               COUNT(*) AS trades,
+               SUM(CASE WHEN active THEN 1 ELSE 0 END) AS active,
+               COALESCE(SUM(ABS(quantity)), 0) AS volume,
+               COALESCE(SUM(price * ABS(quantity)), 0) AS rate_volume
+        FROM gzc_fx_trade
+        WHERE trade_currency = v_base AND settlement_currency = v_quote
+          AND COALESCE(trader, '') = p_trader
+          AND COALESCE(counter_party_code, '') = p_counterparty
+          AND COALESCE(fund_id, 0) = p_fund
+          AND trade_date IS NOT NULL
+        GROUP BY trade_date
+    ) AS daily
+    WINDOW w AS (ORDER BY trade_date);
+
+    -- The current row also counts trades without a trade date, so it is summed
+    -- from the trades rather than taken from the latest snapshot
+    INSERT INTO gzc_fx_position (
+        currency_pair, trader, counter_party_code, fund_id, net_position, trade_count,
+        active_trades, total_volume, rate_volume, first_trade_date, last_trade_date
+    )
+    SELECT p_pair, p_trader, p_counterparty, p_fund,
+           COALESCE(SUM(CASE WHEN UPPER(position) = 'BUY' THEN quantity ELSE -quantity END), 0),
+           COUNT(*),
+           SUM(CASE WHEN active THEN 1 ELSE 0 END),
+           COALESCE(SUM(ABS(quantity)), 0),
+           COALESCE(SUM(price * ABS(quantity)), 0),
+           MIN(trade_date), MAX(trade_date)
+    FROM gzc_fx_trade
+    WHERE trade_currency = v_base AND settlement_currency = v_quote
+      AND COALESCE(trader, '') = p_trader
+      AND COALESCE(counter_party_code, '') = p_counterparty
+      AND COALESCE(fund_id, 0) = p_fund
+    HAVING COUNT(*) > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION gzc_fx_position_on_trade() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.trade_currency IS NOT NULL AND NEW.settlement_currency IS NOT NULL THEN
+            PERFORM gzc_fx_position_apply_trade(
+                NEW.trade_currency || '/' || NEW.settlement_currency,
+                COALESCE(NEW.trader, ''), COALESCE(NEW.counter_party_code, ''), COALESCE(NEW.fund_id, 0),
+                NEW.trade_date,
+                COALESCE(CASE WHEN UPPER(NEW.position) = 'BUY' THEN NEW.quantity ELSE -NEW.quantity END, 0),
+                COALESCE(ABS(NEW.quantity), 0), COALESCE(NEW.price * ABS(NEW.quantity), 0),
+                CASE WHEN NEW.active THEN 1 ELSE 0 END
+            );
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE')
+       AND OLD.trade_currency IS NOT NULL AND OLD.settlement_currency IS NOT NULL THEN
+        PERFORM gzc_fx_position_rebuild_key(
+            OLD.trade_currency || '/' || OLD.settlement_currency,
+            COALESCE(OLD.trader, ''), COALESCE(OLD.counter_party_code, ''), COALESCE(OLD.fund_id, 0)
+        );
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND (
+        NEW.trade_currency, NEW.settlement_currency, COALESCE(NEW.trader, ''),
+        COALESCE(NEW.counter_party_code, ''), COALESCE(NEW.fund_id, 0)
+    ) IS DISTINCT FROM (
+        OLD.trade_currency, OLD.settlement_currency, COALESCE(OLD.trader, ''),
+        COALESCE(OLD.counter_party_code, ''), COALESCE(OLD.fund_id, 0)
+    ) AND NEW.trade_currency IS NOT NULL AND NEW.settlement_currency IS NOT NULL THEN
+        PERFORM gzc_fx_position_rebuild_key(
+            NEW.trade_currency || '/' || NEW.settlement_currency,
+            COALESCE(NEW.trader, ''), COALESCE(NEW.counter_party_code, ''), COALESCE(NEW.fund_id, 0)
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_gzc_fx_position ON gzc_fx_trade;
+CREATE TRIGGER trg_gzc_fx_position
+    AFTER INSERT OR UPDATE OR DELETE ON gzc_fx_trade
+    FOR EACH ROW EXECUTE FUNCTION gzc_fx_position_on_trade();
+
+
+-- Backfill from existing trades (idempotent: rebuilds both tables)
+TRUNCATE gzc_fx_position, gzc_fx_position_snapshot;
+
+INSERT INTO gzc_fx_position_snapshot (
+    currency_pair, trader, counter_party_code, fund_id, as_of_date, net_position,
+    trade_count, active_trades, total_volume, rate_volume, first_trade_date, last_trade_date
+)
+SELECT currency_pair, trader, counter_party_code, fund_id, trade_date,
+       SUM(net) OVER w, SUM(trades) OVER w, SUM(active) OVER w,
+       SUM(volume) OVER w, SUM(rate_volume) OVER w,
+       MIN(trade_date) OVER w, trade_date
+FROM (
+    SELECT trade_currency || '/' || settlement_currency AS currency_pair,
+           COALESCE(trader, '') AS trader,
+           COALESCE(counter_party_code, '') AS counter_party_code,
+           COALESCE(fund_id, 0) AS fund_id,
+           trade_date,
+           COALESCE(SUM(CASE WHEN UPPER(position) = 'BUY' THEN quantity ELSE -quantity END), 0) AS net,
+           COUNT(*) AS trades,
+           SUM(CASE WHEN active THEN 1 ELSE 0 END) AS active,
+           COALESCE(SUM(ABS(quantity)), 0) AS volume,
+           COALESCE(SUM(price * ABS(quantity)), 0) AS rate_volume
+    FROM gzc_fx_trade
+    WHERE trade_currency IS NOT NULL AND settlement_currency IS NOT NULL
+      AND trade_date IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+) AS daily
+WINDOW w AS (PARTITION BY currency_pair, trader, counter_party_code, fund_id ORDER BY trade_date);
+
+INSERT INTO gzc_fx_position (
+    currency_pair, trader, counter_party_code, fund_id, net_position, trade_count,
+    active_trades, total_volume, rate_volume, first_trade_date, last_trade_date
+)
+SELECT trade_currency || '/' || settlement_currency,
+       COALESCE(trader, ''), COALESCE(counter_party_code, ''), COALESCE(fund_id, 0),
+       COALESCE(SUM(CASE WHEN UPPER(position) = 'BUY' THEN quantity ELSE -quantity END), 0),
+       COUNT(*),
+       SUM(CASE WHEN active THEN 1 ELSE 0 END),
+       COALESCE(SUM(ABS(quantity)), 0),
+       COALESCE(SUM(price * ABS(quantity)), 0),
+       MIN(trade_date), MAX(trade_date)
+FROM gzc_fx_trade
+WHERE trade_currency IS NOT NULL AND settlement_currency IS NOT NULL
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,17 @@
+-- Indexes for the gzc_fx_trade API paths (combined_azure_server_v2.py)
+
+-- Keyset pagination and exports, trades without a trade_date last (GZC_TRADE_ORDER):
+-- ORDER BY COALESCE(trade_date, '-infinity') DESC, trade_id DESC,
+-- next page WHERE (COALESCE(trade_date, '-infinity'), trade_id) < (cursor_date, cursor_id)
+DROP INDEX IF EXISTS idx_gzc_fx_trade_keyset;
+CREATE INDEX IF NOT EXISTS idx_gzc_fx_trade_keyset_dated
+    ON gzc_fx_trade ((COALESCE(trade_date, '-infinity'::date)) DESC, trade_id DESC);
+
+-- Currency pair filters compare the split columns instead of the concatenation
+CREATE INDEX IF NOT EXISTS idx_gzc_fx_trade_pair_date
+    ON gzc_fx_trade (trade_currency, settlement_currency, trade_date);
+
+-- Fund filters (1=GMF, 6=GCF)
+DROP INDEX IF EXISTS idx_gzc_fx_trade_fund_keyset;
+CREATE INDEX IF NOT EXISTS idx_gzc_fx_trade_fund_keyset_dated
+    ON gzc_fx_trade (fund_id, (COALESCE(trade_date, '-infinity'::date)) DESC, trade_id DESC);
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Load test for the trades and positions endpoints of combined_azure_server_v2.py
+N concurrent users loop over a mix of trade pages (following next_cursor),
+current / as-of positions and aggregated positions; prints p50/p95/p99 per
+endpoint.
+
+Usage:
+    python combined_azure_server_v2.py &
+    python load_test_trades_positions.py --users 50 --duration 60
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+AS_OF_DATES = ["2022-12-31", "2023-06-30", "2023-12-31", "2024-06-30"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def timed_get(client, latencies, errors, name, path, params=None):
+    start = time.perf_counter()
+    try:
+        response = await client.get(path, params=params)
+        response.raise_for_status()
+        return response.json()
+    except Exception:
+        errors[name] += 1
+        return None
+    finally:
+        latencies[name].append((time.perf_counter() - start) * 1000)
+
+
+async def user(client, deadline, latencies, errors, pages):
+    while time.perf_counter() < deadline:
+        scenario = random.random()
+        if scenario < 0.4:
+            # Blotter: first page, then follow the keyset cursor a few pages
+            params = {"source": "gzc", "limit": 100}
+            for _ in range(pages):
+                data = await timed_get(client, latencies, errors, "trades page", "/api/fx-forward-trades", params)
+                if not data or not data.get("next_cursor"):
+                    break
+                params = {**params, "cursor": data["next_cursor"]}
+        elif scenario < 0.7:
+            await timed_get(client, latencies, errors, "positions", "/api/fx-positions")
+        elif scenario < 0.9:
+            await timed_get(client, latencies, errors, "positions as-of", "/api/fx-positions",
+                            {"as_of_date": random.choice(AS_OF_DATES)})
+        else:
+            await timed_get(client, latencies, errors, "positions aggregated", "/api/fx-positions-aggregated",
+                            {"fund_id": random.choice([1, 6])})
+
+
+async def run(base_url, users, duration, pages):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        # Warm up the server's pool and statement caches
+        await timed_get(client, defaultdict(list), defaultdict(int), "warmup", "/api/fx-positions")
+
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(user(client, deadline, latencies, errors, pages) for _ in range(users)))
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"\n{users} users, {elapsed:.1f}s, {total} requests ({total / elapsed:.1f} req/s)\n")
+    print(f"{'endpoint':<22}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, samples in sorted(latencies.items()):
+        print(f"{name:<22}{len(samples):>9}{errors[name]:>8}"
+              f"{statistics.median(samples):>10.1f}{percentile(samples, 95):>10.1f}"
+              f"{percentile(samples, 99):>10.1f}{max(samples):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds")
+    parser.add_argument("--pages", type=int, default=3, help="Cursor pages per blotter scenario")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.users, args.duration, args.pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Install the FX positions store in Azure PostgreSQL and verify it
+Creates gzc_fx_position / gzc_fx_position_snapshot with their triggers on
+gzc_fx_trade, backfills them, and checks a few as-of dates against a full
+aggregation of the trades.
+"""
+import asyncio
+import os
+import sys
+import asyncpg
+sys.path.append('/Users/mikaeleage/Projects Container/gzc-production-platform/backend')
+
+from app.core.azure_keyvault import keyvault_client
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'create_fx_positions_store.sql')
+
+STORE_QUERY = """
+    SELECT currency_pair, trader, counter_party_code,
+           SUM(net_position) AS net_position, SUM(trade_count) AS trade_count
+    FROM (
+        SELECT DISTINCT ON (currency_pair, trader, counter_party_code, fund_id) *
+        FROM gzc_fx_position_snapshot
+        WHERE as_of_date <= $1
+        ORDER BY currency_pair, trader, counter_party_code, fund_id, as_of_date DESC
+    ) AS positions
+    GROUP BY currency_pair, trader, counter_party_code
+"""
+
+TRADES_QUERY = """
+    SELECT trade_currency || '/' || settlement_currency AS currency_pair,
+           COALESCE(trader, '') AS trader,
+           COALESCE(counter_party_code, '') AS counter_party_code,
+           COALESCE(SUM(CASE WHEN UPPER(position) = 'BUY' THEN quantity ELSE -quantity END), 0) AS net_position,
+           COUNT(*) AS trade_count
+    FROM gzc_fx_trade
+    WHERE trade_date <= $1
+      AND trade_currency IS NOT NULL AND settlement_currency IS NOT NULL
+    GROUP BY 1, 2, 3
+"""
+
+
+async def verify(conn, as_of_date):
+    store = {(r['currency_pair'], r['trader'], r['counter_party_code']): (r['net_position'], r['trade_count'])
+             for r in await conn.fetch(STORE_QUERY, as_of_date)}
+    trades = {(r['currency_pair'], r['trader'], r['counter_party_code']): (r['net_position'], r['trade_count'])
+              for r in await conn.fetch(TRADES_QUERY, as_of_date)}
+    mismatched = [key for key in trades.keys() | store.keys() if store.get(key) != trades.get(key)]
+    status = '✅' if not mismatched else '❌'
+    print(f'{status} {as_of_date}: {len(store)} positions, {len(mismatched)} mismatches')
+    return not mismatched
+
+
+async def setup_positions_store():
+    try:
+        print('🔑 Getting database connection from Azure Key Vault...')
+        db_secret = keyvault_client.get_secret('postgres-connection-string')
+        if not db_secret:
+            raise Exception('Failed to get database connection string from Key Vault')
+
+        conn = await asyncpg.connect(db_secret.replace('postgresql+asyncpg://', 'postgresql://'), ssl='require')
+        print('✅ Connected to Azure PostgreSQL')
+
+        with open(SCHEMA_FILE, 'r') as f:
+            sql_content = f.read()
+
+        print('📊 Creating positions store, triggers and backfilling from gzc_fx_trade...')
+        async with conn.transaction():
+            await conn.execute(sql_content)
+
+        counts = await conn.fetchrow("""
+            SELECT (SELECT COUNT(*) FROM gzc_fx_position) AS positions,
+                   (SELECT COUNT(*) FROM gzc_fx_position_snapshot) AS snapshots,
+                   (SELECT MIN(trade_date) FROM gzc_fx_trade) AS first_date,
+                   (SELECT MAX(trade_date) FROM gzc_fx_trade) AS last_date
+        """)
+        print(f"📈 {counts['positions']} positions, {counts['snapshots']} daily snapshots")
+
+        # Compare against a full aggregation at the ends and middle of the history
+        if counts['first_date']:
+            middle = counts['first_date'] + (counts['last_date'] - counts['first_date']) / 2
+            results = [await verify(conn, day) for day in (counts['first_date'], middle, counts['last_date'])]
+            if not all(results):
+                raise Exception('Positions store does not match gzc_fx_trade aggregation')
+
+        await conn.close()
+        print('🎉 FX positions store ready!')
+
+    except Exception as e:
+        print(f'❌ Error: {e}')
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    asyncio.run(setup_positions_store())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test the incremental portfolio metrics against a full reload
+Runs on an in-memory SQLite database (needs aiosqlite)
+"""
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.portfolio import LiveQuote, PortfolioPosition
+from app.services.portfolio_metrics import PortfolioMetricsAggregator
+
+T0 = datetime(2025, 1, 6, 9, 0)
+
+
+@asynccontextmanager
+async def _session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            await _seed(db)
+            yield db
+    finally:
+        await engine.dispose()
+
+
+async def _seed(db):
+    db.add_all([
+        PortfolioPosition(Id=1, Symbol="EURUSD", Position="Long", OrderQty=1000, Price=1.08,
+                          CurrentPrice=1.10, PnL=20.0, PnLYTD=20.0, PnLMTD=5.0, PnLDTD=1.0,
+                          FundID=1, Trader="AB", IsActive=True, LastUpdate=T0),
+        # Same symbol, different CurrentPrice: each position is marked from its own
+        PortfolioPosition(Id=2, Symbol="EURUSD", Position="Short", OrderQty=500, Price=1.12,
+                          CurrentPrice=1.11, PnL=5.0, PnLYTD=5.0, PnLMTD=5.0, PnLDTD=0.0,
+                          FundID=2, Trader="CD", IsActive=True, LastUpdate=T0),
+        PortfolioPosition(Id=3, Symbol="GBPUSD", Position="Long", OrderQty=200, Price=1.25,
+                          CurrentPrice=None, PnL=0.0, FundID=1, Trader="AB", IsActive=True,
+                          LastUpdate=T0),
+        LiveQuote(Symbol="EURUSD", Bid=1.10, Ask=1.10, Last=1.10, Timestamp=T0 - timedelta(minutes=1)),
+        LiveQuote(Symbol="GBPUSD", Bid=1.26, Ask=1.26, Last=1.26, Timestamp=T0 - timedelta(minutes=1)),
+    ])
+    await db.commit()
+
+
+async def _tick(db, symbol, price, at):
+    await db.execute(update(LiveQuote).where(LiveQuote.Symbol == symbol)
+                     .values(Last=price, Bid=price, Ask=price, Timestamp=at))
+    await db.commit()
+
+
+def _assert_same(before, after):
+    assert before.keys() == after.keys()
+    for key in before:
+        assert abs(before[key] - after[key]) < 1e-9, (key, before[key], after[key])
+
+
+async def _resync_matches_incremental():
+    async with _session() as db:
+        metrics = PortfolioMetricsAggregator()
+        await metrics.load(db)
+
+        await _tick(db, "EURUSD", 1.12, T0 + timedelta(minutes=1))
+        await _tick(db, "GBPUSD", 1.30, T0 + timedelta(minutes=1))
+        await metrics.refresh(db)
+        await _tick(db, "EURUSD", 1.13, T0 + timedelta(minutes=2))
+        await metrics.refresh(db)
+
+        incremental = metrics.get_metrics()
+        # Long 1000 from 1.10 and short 500 from 1.11 to 1.13; GBPUSD had no price to mark from
+        assert abs(incremental["totalPnL"] - (20.0 + 30.0 + 5.0 - 10.0)) < 1e-9, incremental
+        assert abs(incremental["totalPnLDTD"] - (1.0 + 30.0 - 10.0)) < 1e-9, incremental
+        assert abs(incremental["totalValue"] - (1000 * 1.13 + 500 * 1.13 + 200 * 1.30)) < 1e-9, incremental
+        funds = {fund_id: dict(totals) for fund_id, totals in metrics.get_fund_metrics().items()}
+
+        await metrics.load(db)
+        _assert_same(incremental, metrics.get_metrics())
+        for fund_id, totals in metrics.get_fund_metrics().items():
+            _assert_same(funds[fund_id], totals)
+
+
+async def _row_update_resets_baseline():
+    async with _session() as db:
+        metrics = PortfolioMetricsAggregator()
+        await metrics.load(db)
+        await _tick(db, "EURUSD", 1.12, T0 + timedelta(minutes=1))
+        await metrics.refresh(db)
+
+        # The position is revalued after the quote: its stored PnL is now authoritative
+        await db.execute(update(PortfolioPosition).where(PortfolioPosition.Id == 1)
+                         .values(CurrentPrice=1.12, PnL=40.0, PnLYTD=40.0, PnLMTD=25.0, PnLDTD=21.0,
+                                 LastUpdate=T0 + timedelta(minutes=2)))
+        await db.commit()
+        await metrics.refresh(db)
+        incremental = metrics.get_metrics()
+        assert abs(incremental["totalPnL"] - (40.0 + 5.0 - 5.0)) < 1e-9, incremental
+
+        await metrics.load(db)
+        _assert_same(incremental, metrics.get_metrics())
+
+
+def test_resync_matches_incremental():
+    asyncio.run(_resync_matches_incremental())
+
+
+def test_row_update_resets_baseline():
+    asyncio.run(_row_update_resets_baseline())
+
+
+if __name__ == "__main__":
+    test_resync_matches_incremental()
+    test_row_update_resets_baseline()
+    print("✅ Portfolio metrics resync matches the incremental path")
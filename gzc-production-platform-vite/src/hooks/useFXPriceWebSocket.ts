@@ -34,6 +34,36 @@ interface FXPriceData {
   timestamp: string;
 }
 
+// Server sends only changed fields per instrument/side, e.g.
+// { pair, changes: { spot: { bid: { rate, timestamp } } }, removed: ['forward.ask'], timestamp }
+interface FXPriceDelta {
+  pair: string;
+  changes: { [instrument: string]: { [side: string]: { [field: string]: any } } };
+  removed: string[];
+  timestamp: string;
+}
+
+const applyPriceDelta = (current: FXPriceData | undefined, delta: FXPriceDelta): FXPriceData => {
+  const next: any = { ...(current || { pair: delta.pair }), timestamp: delta.timestamp };
+
+  for (const [instrument, sides] of Object.entries(delta.changes || {})) {
+    next[instrument] = { ...(next[instrument] || {}) };
+    for (const [side, fields] of Object.entries(sides)) {
+      next[instrument][side] = { ...(next[instrument][side] || {}), ...fields };
+    }
+  }
+
+  for (const path of delta.removed || []) {
+    const [instrument, side] = path.split('.');
+    if (next[instrument]) {
+      next[instrument] = { ...next[instrument] };
+      delete next[instrument][side];
+    }
+  }
+
+  return next;
+};
+
 interface UseFXPriceWebSocketOptions {
   currencyPairs: string[];
   enabled?: boolean;
@@ -107,16 +137,15 @@ export const useFXPriceWebSocket = ({
         }
       });
 
-      socket.on('fx_price_update', (data: any) => {
-        if (data.pair && data.data) {
-          setPrices(prev => ({
-            ...prev,
-            [data.pair]: data.data
-          }));
-          
-          onPriceUpdate?.({
-            ...prices,
-            [data.pair]: data.data
+      socket.on('fx_price_delta', (data: FXPriceDelta) => {
+        if (data.pair) {
+          setPrices(prev => {
+            const next = {
+              ...prev,
+              [data.pair]: applyPriceDelta(prev[data.pair], data)
+            };
+            onPriceUpdate?.(next);
+            return next;
           });
         }
       });
@@ -7,7 +7,7 @@ Enhanced Cosmos DB viewer with formatted display and message composition
 import warnings
 warnings.filterwarnings('ignore', message='urllib3 v2 only supports OpenSSL')
 
-from flask import Flask, jsonify, send_from_directory, request, render_template_string
+from flask import Flask, jsonify, send_from_directory, request, render_template_string, Response, stream_with_context
 from flask_cors import CORS
 import os
 import sys
@@ -24,7 +24,11 @@ load_dotenv(env_path)
 scripts_dir = Path(__file__).parent.parent.parent / 'Engineering Workspace' / 'scripts'
 sys.path.insert(0, str(scripts_dir))
 from cosmos_db_manager import get_db_manager
-import hashlib
+from dashboard_stats import ContainerStatsService
+from search_index import DocumentSearchIndex
+from dedupe import DuplicateIndex, get_job, stamp_content_hash, start_backfill_job, start_delete_job, wait_for_job
+from session_chunks import CHUNK_SIZE, SessionChunkStore
+from docs_index import DocsIndex
 from collections import defaultdict
 import glob
 import markdown
@@ -153,6 +157,15 @@ if STATIC_CYTOSCAPE_AVAILABLE:
 # Global database connection
 db = None
 
+# Container document counts, shared by /api/containers and /api/stats
+container_stats = ContainerStatsService(lambda: db.client.get_database_client(db.database_name))
+
+# Local full-text index behind /api/search, synced from Cosmos in the background
+search_index = DocumentSearchIndex()
+
+# Token index of the repository's markdown and Python files behind /api/docs/search
+docs_index = DocsIndex(Path(__file__).parent.parent.parent)
+
 def init_db():
     """Initialize database connection"""
     global db
@@ -162,6 +175,18 @@ def init_db():
         # Ensure required containers exist
         ensure_required_containers()
         
+        # Warm the container statistics so the first request is served from cache
+        container_stats.refresh_async()
+        
+        # Keep the search index current
+        search_index.start_background_sync(
+            lambda: db.client.get_database_client(db.database_name),
+            interval=float(os.getenv('SEARCH_INDEX_SYNC_SECONDS', 60))
+        )
+        
+        # Index the documentation once, then re-read only files that changed
+        docs_index.start_background_refresh(interval=float(os.getenv('DOCS_INDEX_REFRESH_SECONDS', 30)))
+        
         return True
     except Exception as e:
         print(f"Failed to initialize database: {e}")
@@ -293,74 +318,14 @@ def simple_test():
 
 @app.route('/api/containers')
 def get_containers():
-    """Get all containers with document counts - with Redis caching"""
+    """Get all containers with document counts - served from the statistics cache"""
     try:
-        # Try to get from Redis cache first
-        cache_key = "dashboard:containers"
-        
-        # Import redis at the top if not already
-        import redis
-        import json
-        
-        # Create Redis connection
-        redis_client = redis.Redis(
-            host=os.getenv('REDIS_HOST', 'localhost'),
-            port=int(os.getenv('REDIS_PORT', 6379)),
-            password=os.getenv('REDIS_PASSWORD'),
-            ssl=os.getenv('REDIS_SSL', 'True').lower() == 'true',
-            decode_responses=True,
-            db=0  # Use DB 0 for general caching
-        )
-        
-        # Try to get cached containers
-        try:
-            cached_containers = redis_client.get(cache_key)
-            if cached_containers:
-                containers_data = json.loads(cached_containers)
-                return jsonify({
-                    'success': True,
-                    'containers': containers_data,
-                    'cached': True
-                })
-        except:
-            pass  # If Redis fails, continue to fetch from DB
-        
-        # Fetch from database
-        database = db.client.get_database_client(db.database_name)
-        containers = []
-        
-        for container in database.list_containers():
-            container_client = database.get_container_client(container['id'])
-            
-            # Get document count
-            count_query = "SELECT VALUE COUNT(1) FROM c"
-            count = list(container_client.query_items(
-                query=count_query,
-                enable_cross_partition_query=True
-            ))[0]
-            
-            containers.append({
-                'id': container['id'],
-                'count': count,
-                'partitionKey': container.get('partitionKey', {}).get('paths', [''])[0]
-            })
-        
-        sorted_containers = sorted(containers, key=lambda x: x['count'], reverse=True)
-        
-        # Cache the results for 5 minutes
-        try:
-            redis_client.setex(
-                cache_key,
-                300,  # 5 minutes TTL
-                json.dumps(sorted_containers)
-            )
-        except:
-            pass  # If Redis fails, still return the data
+        snapshot = container_stats.get_snapshot()
         
         return jsonify({
             'success': True,
-            'containers': sorted_containers,
-            'cached': False
+            'containers': snapshot['containers'],
+            'cached': snapshot['cached']
         })
         
     except Exception as e:
@@ -437,7 +402,7 @@ def get_document(container_id, document_id):
 
 @app.route('/api/search')
 def search_documents():
-    """Search across all containers"""
+    """Search across all containers - ranked results from the local search index"""
     try:
         search_term = request.args.get('q', '')
         if not search_term:
@@ -445,47 +410,27 @@ def search_documents():
                 'success': False,
                 'error': 'Search term required'
             }), 400
-            
-        results = []
-        database = db.client.get_database_client(db.database_name)
         
-        # Search in each container
-        for container_info in database.list_containers():
-            container = database.get_container_client(container_info['id'])
-            
-            # Search in common text fields
-            query = """
-            SELECT * FROM c 
-            WHERE CONTAINS(LOWER(c.content), LOWER(@search))
-               OR CONTAINS(LOWER(c.subject), LOWER(@search))
-               OR CONTAINS(LOWER(c.action), LOWER(@search))
-               OR CONTAINS(LOWER(c.id), LOWER(@search))
-            """
-            
-            parameters = [{"name": "@search", "value": search_term}]
-            
-            try:
-                docs = list(container.query_items(
-                    query=query,
-                    parameters=parameters,
-                    enable_cross_partition_query=True,
-                    max_item_count=10
-                ))
-                
-                for doc in docs:
-                    results.append({
-                        'container': container_info['id'],
-                        'document': doc
-                    })
-                    
-            except:
-                # Skip containers where query fails
-                pass
+        # SQLite reads LIMIT -1 as no limit, so negatives must not reach it
+        limit = max(min(int(request.args.get('limit', 50)), 200), 0)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        
+        found = search_index.search(
+            search_term,
+            container=request.args.get('container') or None,
+            limit=limit,
+            offset=offset
+        )
         
         return jsonify({
             'success': True,
-            'results': results[:50],  # Limit total results
-            'count': len(results),
+            'results': found['results'],
+            'count': found['total'],
+            'facets': found['facets'],
+            'offset': offset,
+            'limit': limit,
+            'took_ms': found['took_ms'],
+            'index': search_index.status(),
             'search_term': search_term
         })
         
@@ -535,6 +480,9 @@ def send_message():
             'tags': data.get('tags', [])
         }
         
+        # Store the content hash duplicate detection groups on
+        stamp_content_hash('system_inbox', message_doc)
+        
         # Store in messages container
         database = db.client.get_database_client(db.database_name)
         container = database.get_container_client('system_inbox')
@@ -556,75 +504,14 @@ def send_message():
 
 @app.route('/api/stats')
 def get_stats():
-    """Get database statistics with Redis caching"""
+    """Get database statistics - served from the statistics cache"""
     try:
-        # Try to get from Redis cache first
-        cache_key = "dashboard:stats"
-        
-        # Import redis at the top if not already
-        import redis
-        import json
-        from datetime import datetime
-        
-        # Create Redis connection
-        redis_client = redis.Redis(
-            host=os.getenv('REDIS_HOST', 'localhost'),
-            port=int(os.getenv('REDIS_PORT', 6379)),
-            password=os.getenv('REDIS_PASSWORD'),
-            ssl=os.getenv('REDIS_SSL', 'True').lower() == 'true',
-            decode_responses=True,
-            db=0  # Use DB 0 for general caching
-        )
-        
-        # Try to get cached stats
-        try:
-            cached_stats = redis_client.get(cache_key)
-            if cached_stats:
-                stats_data = json.loads(cached_stats)
-                # Add cache indicator
-                stats_data['cached'] = True
-                stats_data['cache_timestamp'] = redis_client.ttl(cache_key)
-                return jsonify({
-                    'success': True,
-                    'stats': stats_data
-                })
-        except:
-            pass  # If Redis fails, continue to fetch from DB
-        
-        # Fetch from database
-        database = db.client.get_database_client(db.database_name)
         stats = {
             'database': db.database_name,
             'endpoint': db.endpoint,
-            'containers': {},
-            'totalDocuments': 0,
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
+            **container_stats.get_stats()
         }
         
-        for container_info in database.list_containers():
-            container = database.get_container_client(container_info['id'])
-            
-            # Get count
-            count_query = "SELECT VALUE COUNT(1) FROM c"
-            count = list(container.query_items(
-                query=count_query,
-                enable_cross_partition_query=True
-            ))[0]
-            
-            stats['containers'][container_info['id']] = count
-            stats['totalDocuments'] += count
-        
-        # Cache the results for 5 minutes
-        try:
-            redis_client.setex(
-                cache_key,
-                300,  # 5 minutes TTL
-                json.dumps(stats)
-            )
-        except:
-            pass  # If Redis fails, still return the data
-        
-        stats['cached'] = False
         return jsonify({
             'success': True,
             'stats': stats
@@ -638,66 +525,73 @@ def get_stats():
 
 @app.route('/api/logs/analyze', methods=['GET'])
 def analyze_logs():
-    """Analyze logs for duplicates and terminal history"""
+    """Analyze logs for duplicates and terminal history (unhashed logs need POST /api/logs/backfill-hashes first)"""
     try:
         if not db:
             return jsonify({'success': False, 'error': 'Database not initialized'}), 500
         
         container = db.database.get_container_client('logs')
-        query = "SELECT * FROM c"
-        all_logs = list(container.query_items(query=query, enable_cross_partition_query=True))
-        
-        # Analyze duplicates
-        seen_hashes = {}
-        duplicates = []
-        terminal_logs = []
-        agent_logs = []
+        index = DuplicateIndex(container, 'logs')
+        
+        # Stream only the fields the summary needs
+        query = """
+        SELECT VALUE {
+            "logType": c.logType ?? c.type,
+            "agentName": c.agentName,
+            "hasFlow": IS_DEFINED(c.conversation_flow),
+            "hasCapture": IS_DEFINED(c.capture_completeness),
+            "terminalType": CONTAINS(LOWER(c.logType ?? c.type ?? ""), "terminal"),
+            "hasUser": EXISTS(SELECT VALUE f FROM f IN c.conversation_flow WHERE f.type = "user_input"),
+            "hasClaude": EXISTS(SELECT VALUE f FROM f IN c.conversation_flow WHERE f.type = "claude_response")
+        } FROM c
+        """
+        
+        total_logs = 0
+        terminal_logs = 0
+        valid_terminal = 0
+        agent_logs = 0
         log_stats = defaultdict(int)
         
-        for log in all_logs:
-            # Create hash
-            content_hash = create_log_hash(log)
-            
-            if content_hash in seen_hashes:
-                duplicates.append({
-                    'original_id': seen_hashes[content_hash]['id'],
-                    'duplicate_id': log.get('id', 'unknown'),
-                    'type': log.get('logType', log.get('type', 'unknown'))
-                })
-            else:
-                seen_hashes[content_hash] = log
-            
-            # Categorize
-            if 'terminal' in str(log).lower() or 'conversation_flow' in log:
-                terminal_logs.append(log)
-            elif log.get('agentName'):
-                agent_logs.append(log)
-            
-            # Stats
-            log_type = log.get('logType', log.get('type', 'unknown'))
-            log_stats[log_type] += 1
+        for page in index.iter_pages(query):
+            for log in page:
+                total_logs += 1
+                
+                # Categorize
+                if log.get('hasFlow') or log.get('terminalType'):
+                    terminal_logs += 1
+                    # Verify terminal logs
+                    if log.get('hasFlow'):
+                        if log.get('hasUser') and log.get('hasClaude'):
+                            valid_terminal += 1
+                    elif log.get('hasCapture'):
+                        valid_terminal += 1
+                elif log.get('agentName'):
+                    agent_logs += 1
+                
+                # Stats
+                log_stats[log.get('logType') or 'unknown'] += 1
         
-        # Verify terminal logs
-        valid_terminal = 0
-        for log in terminal_logs:
-            if 'conversation_flow' in log:
-                flow = log['conversation_flow']
-                has_user = any(item.get('type') == 'user_input' for item in flow)
-                has_claude = any(item.get('type') == 'claude_response' for item in flow)
-                if has_user and has_claude:
-                    valid_terminal += 1
-            elif 'capture_completeness' in log:
-                valid_terminal += 1
+        # Analyze duplicates
+        duplicates = [
+            {
+                'original_id': group['original']['id'],
+                'duplicate_id': duplicate['id'],
+                'partitionKey': index.partition_value(duplicate),
+                'type': duplicate.get('logType', duplicate.get('type', 'unknown'))
+            }
+            for group in index.duplicate_groups(extra_fields=('logType', 'type'))
+            for duplicate in group['duplicates']
+        ]
         
         return jsonify({
             'success': True,
             'analysis': {
-                'total_logs': len(all_logs),
+                'total_logs': total_logs,
                 'duplicates': len(duplicates),
                 'duplicate_details': duplicates[:10],  # First 10
-                'terminal_logs': len(terminal_logs),
+                'terminal_logs': terminal_logs,
                 'valid_terminal_logs': valid_terminal,
-                'agent_logs': len(agent_logs),
+                'agent_logs': agent_logs,
                 'log_types': dict(log_stats)
             }
         })
@@ -712,8 +606,6 @@ def remove_duplicate_logs():
         if not db:
             return jsonify({'success': False, 'error': 'Database not initialized'}), 500
         
-        container = db.database.get_container_client('logs')
-        
         # Get duplicate IDs from request
         data = request.get_json()
         duplicate_ids = data.get('duplicate_ids', [])
@@ -721,64 +613,48 @@ def remove_duplicate_logs():
         if not duplicate_ids:
             return jsonify({'success': False, 'error': 'No duplicate IDs provided'}), 400
         
-        removed = 0
-        errors = []
-        
-        for dup in duplicate_ids:
-            try:
-                container.delete_item(
-                    item=dup['id'], 
-                    partition_key=dup.get('partitionKey', dup.get('agentName', 'unknown'))
-                )
-                removed += 1
-            except Exception as e:
-                errors.append({'id': dup['id'], 'error': str(e)})
-        
-        return jsonify({
-            'success': True,
-            'removed': removed,
-            'errors': errors
-        })
+        items = [
+            {'id': dup['id'], 'partitionKey': dup.get('partitionKey', dup.get('agentName'))}
+            if isinstance(dup, dict) else dup
+            for dup in duplicate_ids
+        ]
+        return delete_duplicates('logs', items, data)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/messages/analyze', methods=['GET'])
 def analyze_messages():
-    """Analyze messages for duplicates"""
+    """Analyze messages for duplicates (unhashed messages need POST /api/messages/backfill-hashes first)"""
     try:
         if not db:
             return jsonify({'success': False, 'error': 'Database not initialized'}), 500
         
         container = db.database.get_container_client('system_inbox')
-        query = "SELECT * FROM c"
-        all_messages = list(container.query_items(query=query, enable_cross_partition_query=True))
+        index = DuplicateIndex(container, 'system_inbox')
         
-        # Group by content hash
-        content_groups = defaultdict(list)
-        
-        for msg in all_messages:
-            key_content = f"{msg.get('subject', '')}-{msg.get('content', '')}-{msg.get('from', '')}-{msg.get('to', '')}"
-            content_hash = hashlib.md5(key_content.encode()).hexdigest()
-            content_groups[content_hash].append(msg)
+        total_messages = list(container.query_items(
+            query="SELECT VALUE COUNT(1) FROM c",
+            enable_cross_partition_query=True
+        ))[0]
         
         # Find duplicates
         duplicates = []
         total_duplicates = 0
         
-        for group in content_groups.values():
-            if len(group) > 1:
-                total_duplicates += len(group) - 1
-                duplicates.append({
-                    'subject': group[0].get('subject', 'No subject'),
-                    'copies': len(group),
-                    'duplicate_ids': [msg['id'] for msg in group[1:]]  # All except first
-                })
+        for group in index.duplicate_groups(extra_fields=('subject',)):
+            total_duplicates += len(group['duplicates'])
+            duplicates.append({
+                'subject': group['original'].get('subject', 'No subject'),
+                'copies': len(group['duplicates']) + 1,
+                'duplicate_ids': [msg['id'] for msg in group['duplicates']],  # All except first
+                'duplicate_keys': [index.delete_key(msg) for msg in group['duplicates']]
+            })
         
         return jsonify({
             'success': True,
             'analysis': {
-                'total_messages': len(all_messages),
+                'total_messages': total_messages,
                 'duplicate_groups': len(duplicates),
                 'total_duplicates': total_duplicates,
                 'duplicate_details': duplicates[:10]  # First 10 groups
@@ -795,59 +671,70 @@ def remove_duplicate_messages():
         if not db:
             return jsonify({'success': False, 'error': 'Database not initialized'}), 500
         
-        container = db.database.get_container_client('system_inbox')
         data = request.get_json()
         duplicate_ids = data.get('duplicate_ids', [])
         
         if not duplicate_ids:
             return jsonify({'success': False, 'error': 'No duplicate IDs provided'}), 400
         
-        removed = 0
-        errors = []
-        
-        # Get the actual partition key values for each message
-        for msg_id in duplicate_ids:
-            try:
-                # First get the message to find its partition key
-                msg_query = f"SELECT * FROM c WHERE c.id = '{msg_id}'"
-                msg_results = list(container.query_items(query=msg_query, enable_cross_partition_query=True))
-                
-                if msg_results:
-                    msg = msg_results[0]
-                    partition_key = msg.get('partitionKey', '2025-06')  # Default fallback
-                    container.delete_item(item=msg_id, partition_key=partition_key)
-                    removed += 1
-                else:
-                    errors.append({'id': msg_id, 'error': 'Message not found'})
-            except Exception as e:
-                errors.append({'id': msg_id, 'error': str(e)})
-        
-        return jsonify({
-            'success': True,
-            'removed': removed,
-            'errors': errors
-        })
+        return delete_duplicates('system_inbox', duplicate_ids, data)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-def create_log_hash(log):
-    """Create hash from log content to identify duplicates"""
-    key_fields = []
+def delete_duplicates(container_name, items, options):
+    """
+    Delete ids (or {'id', 'partitionKey'} items) concurrently as a background job
+    Waits for the job unless options['wait'] is false; progress is at /api/dedupe/jobs/<job_id>.
+    """
+    container = db.database.get_container_client(container_name)
+    index = DuplicateIndex(container, container_name)
     
-    if 'conversation_flow' in log:
-        key_fields.append(log.get('session_metadata', {}).get('session_id', ''))
-        key_fields.append(str(log.get('conversation_flow', [])))
-    elif log.get('agentName'):
-        key_fields.append(log.get('agentName', ''))
-        key_fields.append(log.get('action', ''))
-        key_fields.append(log.get('timestamp', ''))
-    else:
-        key_fields.append(str(log.get('content', '')))
-        key_fields.append(str(log.get('complete_conversation_flow', '')))
+    # Partition keys the caller did not send are looked up in batches
+    keys = index.resolve_partition_keys(items)
+    found = {key['id'] for key in keys}
+    not_found = [
+        {'id': item_id, 'error': 'Document not found'}
+        for item_id in (item['id'] if isinstance(item, dict) else item for item in items)
+        if item_id not in found
+    ]
+    
+    job = start_delete_job(container, container_name, keys, concurrency=int(options.get('concurrency', 16)))
+    if not options.get('wait', True):
+        return jsonify({'success': True, 'job': job, 'errors': not_found}), 202
+    
+    job = wait_for_job(job['job_id'])
+    return jsonify({
+        'success': True,
+        'removed': job['removed'],
+        'errors': not_found + job['errors'],
+        'job': job
+    })
+
+@app.route('/api/<any(logs, messages):kind>/backfill-hashes', methods=['POST'])
+def backfill_content_hashes(kind):
+    """Hash documents written before content hashes were stored, as a background job"""
+    try:
+        if not db:
+            return jsonify({'success': False, 'error': 'Database not initialized'}), 500
+        
+        container_name = 'logs' if kind == 'logs' else 'system_inbox'
+        container = db.database.get_container_client(container_name)
+        data = request.get_json(silent=True) or {}
+        job = start_backfill_job(DuplicateIndex(container, container_name),
+                                 concurrency=int(data.get('concurrency', 8)))
+        return jsonify({'success': True, 'job': job}), 202
         
-    content = '|'.join(key_fields)
-    return hashlib.md5(content.encode()).hexdigest()
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/dedupe/jobs/<job_id>')
+def get_dedupe_job(job_id):
+    """Progress of a duplicate removal or hash backfill job"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
 
 @app.route('/api/containers/<container_name>/documents', methods=['POST'])
 def create_document(container_name):
@@ -867,7 +754,7 @@ def create_document(container_name):
         # Check if this is a large session upload
         if 'raw_content' in data and len(data.get('raw_content', '')) > 1500000:  # ~1.5MB
             # Handle large uploads by chunking
-            return handle_large_session_upload(container, data)
+            return handle_large_session_upload(container_name, data)
         
         # Ensure required fields
         if 'id' not in data:
@@ -876,6 +763,9 @@ def create_document(container_name):
         if 'timestamp' not in data:
             data['timestamp'] = datetime.now().isoformat() + 'Z'
         
+        # Store the content hash duplicate detection groups on
+        stamp_content_hash(container_name, data)
+        
         # Create item
         result = container.create_item(body=data)
         
@@ -888,52 +778,212 @@ def create_document(container_name):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-def handle_large_session_upload(container, data):
+def handle_large_session_upload(container_name, data):
     """Handle large session uploads by chunking"""
     try:
         raw_content = data.pop('raw_content', '')
         content_size = len(raw_content)
-        chunk_size = 1000000  # 1MB chunks
-        
-        # Create master record
-        master_id = data['id']
-        master_doc = {
-            **data,
-            'id': master_id,
-            'type': 'TERMINAL_SESSION_MASTER',
-            'content_size': content_size,
-            'chunk_count': (content_size // chunk_size) + 1,
-            'chunks': []
-        }
+        chunk_size = CHUNK_SIZE
         
-        # Split content into chunks
-        chunk_ids = []
-        for i in range(0, content_size, chunk_size):
-            chunk_id = f"{master_id}_chunk_{i // chunk_size}"
-            chunk_doc = {
-                'id': chunk_id,
-                'master_id': master_id,
-                'chunk_index': i // chunk_size,
-                'content': raw_content[i:i + chunk_size],
-                'partitionKey': data.get('partitionKey', 'terminal_conversations')
-            }
-            container.create_item(body=chunk_doc)
-            chunk_ids.append(chunk_id)
-        
-        # Update master with chunk references
-        master_doc['chunks'] = chunk_ids
-        container.create_item(body=master_doc)
+        # Master record, then the chunks written concurrently
+        store = get_session_store(container_name)
+        master = store.begin(data['id'], data)
+        store.put_chunks(master, (raw_content[i:i + chunk_size] for i in range(0, content_size, chunk_size)))
+        master = store.complete(master)
         
         return jsonify({
             'success': True,
-            'document_id': master_id,
-            'message': f'Large session uploaded in {len(chunk_ids)} chunks',
+            'document_id': master['id'],
+            'message': f'Large session uploaded in {master["chunk_count"]} chunks',
             'total_size': f'{content_size / 1024 / 1024:.1f} MB'
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': f'Chunking error: {str(e)}'}), 500
 
+# Chunk stores for large sessions, one per container, shared across requests
+session_stores = {}
+
+def get_session_store(container_name):
+    store = session_stores.get(container_name)
+    if store is None:
+        store = session_stores.setdefault(
+            container_name, SessionChunkStore(db.database.get_container_client(container_name))
+        )
+    return store
+
+def session_summary(store, master):
+    """Upload state of a session, with the chunk indexes received so far"""
+    summary = {
+        'session_id': master['id'],
+        'status': master.get('upload_status', 'complete'),
+        'chunk_size': master.get('chunk_size', CHUNK_SIZE),
+        'chunk_count': master.get('chunk_count', len(master.get('chunks', []))),
+        'content_size': master.get('content_size', 0)
+    }
+    if summary['status'] == 'uploading':
+        summary['received_chunks'] = store.received(master)
+    return summary
+
+@app.route('/api/containers/<container_name>/sessions', methods=['POST'])
+def begin_session_upload(container_name):
+    """
+    Start a chunked upload of a large session, or resume one with the same id
+    Chunks go to PUT .../sessions/<id>/chunks/<index> (in any order, concurrently,
+    safe to repeat) or as one stream to PUT .../sessions/<id>/content.
+    """
+    try:
+        if not db:
+            return jsonify({'success': False, 'error': 'Database not initialized'}), 500
+        
+        containers = [c['id'] for c in db.database.list_containers()]
+        if container_name not in containers:
+            return jsonify({'success': False, 'error': f'Container {container_name} not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        data.pop('raw_content', None)
+        try:
+            chunk_size = min(int(data.pop('chunk_size', CHUNK_SIZE)), CHUNK_SIZE)
+        except (TypeError, ValueError):
+            chunk_size = 0
+        if chunk_size <= 0:
+            # put_stream would read zero bytes per chunk and never finish
+            return jsonify({'success': False, 'error': 'chunk_size must be a positive integer'}), 400
+        session_id = data.pop('id', None) or f"{container_name}_session_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        
+        store = get_session_store(container_name)
+        master = store.begin(session_id, data, chunk_size=chunk_size)
+        summary = session_summary(store, master)
+        resumed = bool(summary.get('received_chunks')) or summary['status'] != 'uploading'
+        
+        return jsonify({'success': True, 'resumed': resumed, 'session': summary}), 200 if resumed else 201
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/containers/<container_name>/sessions/<session_id>')
+def get_session_upload(container_name, session_id):
+    """Upload state of a session, including the chunks already stored"""
+    try:
+        if not db:
+            return jsonify({'success': False, 'error': 'Database not initialized'}), 500
+        
+        store = get_session_store(container_name)
+        master = store.get_master(session_id)
+        if not master:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        return jsonify({'success': True, 'session': session_summary(store, master)})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/containers/<container_name>/sessions/<session_id>/chunks/<int:index>', methods=['PUT'])
+def put_session_chunk(container_name, session_id, index):
+    """Store one chunk (the raw request body); re-sending an index replaces it"""
+    try:
+        if not db:
+            return jsonify({'success': False, 'error': 'Database not initialized'}), 500
+        
+        store = get_session_store(container_name)
+        master = store.get_master(session_id)
+        if not master:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        chunk_size = master.get('chunk_size', CHUNK_SIZE)
+        content = request.stream.read(chunk_size + 1)
+        if len(content) > chunk_size:
+            return jsonify({'success': False, 'error': f'Chunk larger than {chunk_size} bytes'}), 413
+        
+        chunk = store.put_chunk(master, index, content)
+        return jsonify({'success': True, 'session_id': session_id, 'chunk': chunk})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/containers/<container_name>/sessions/<session_id>/content', methods=['PUT'])
+def put_session_content(container_name, session_id):
+    """
+    Stream a session body; it is cut into chunks that are written concurrently
+    as they arrive. ?first_chunk=N resumes after the chunks already stored,
+    ?complete=false leaves the upload open for more chunks.
+    """
+    try:
+        if not db:
+            return jsonify({'success': False, 'error': 'Database not initialized'}), 500
+        
+        store = get_session_store(container_name)
+        master = store.get_master(session_id)
+        if not master:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        first_chunk = int(request.args.get('first_chunk', 0))
+        written = store.put_stream(master, request.stream, first_index=first_chunk)
+        if request.args.get('complete', 'true').lower() == 'true':
+            master = store.complete(master)
+        
+        return jsonify({
+            'success': True,
+            'chunks_written': len(written),
+            'bytes_written': sum(chunk['size'] for chunk in written),
+            'session': session_summary(store, master)
+        })
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/containers/<container_name>/sessions/<session_id>/complete', methods=['POST'])
+def complete_session_upload(container_name, session_id):
+    """Check every chunk arrived and mark the session complete"""
+    try:
+        if not db:
+            return jsonify({'success': False, 'error': 'Database not initialized'}), 500
+        
+        store = get_session_store(container_name)
+        master = store.get_master(session_id)
+        if not master:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        chunk_count = (request.get_json(silent=True) or {}).get('chunk_count')
+        if master.get('upload_status') == 'uploading':
+            master = store.complete(master, chunk_count=chunk_count)
+        
+        return jsonify({'success': True, 'session': session_summary(store, master)})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/containers/<container_name>/sessions/<session_id>/content')
+def get_session_content(container_name, session_id):
+    """Reassembled session content, streamed chunk by chunk in order"""
+    try:
+        if not db:
+            return jsonify({'success': False, 'error': 'Database not initialized'}), 500
+        
+        store = get_session_store(container_name)
+        master = store.get_master(session_id)
+        if not master:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        chunks = store.iter_content(master)
+        
+        headers = {'X-Chunk-Count': str(len(master.get('chunks', [])))}
+        if 'upload_status' in master:
+            # Sizes of older sessions were counted in characters, not bytes
+            headers['Content-Length'] = str(master['content_size'])
+        return Response(stream_with_context(chunks), mimetype='text/plain', headers=headers)
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/docs/structure')
 def get_docs_structure():
     """Get documentation structure from database_operations directory"""
@@ -1063,51 +1113,15 @@ def search_docs():
         if not search_term:
             return jsonify({'success': False, 'error': 'Search term required'}), 400
         
-        results = []
-        docs_base = Path(__file__).parent.parent.parent
-        
-        # Search in all markdown and Python files
-        for pattern in ['**/*.md', '**/*.py']:
-            for file_path in docs_base.glob(pattern):
-                if file_path.name.startswith('__'):
-                    continue
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Search in content and filename
-                    if search_term in content.lower() or search_term in file_path.name.lower():
-                        # Find matching lines
-                        matches = []
-                        lines = content.split('\n')
-                        for i, line in enumerate(lines):
-                            if search_term in line.lower():
-                                matches.append({
-                                    'line': i + 1,
-                                    'text': line.strip()[:100] + '...' if len(line.strip()) > 100 else line.strip()
-                                })
-                                if len(matches) >= 3:  # Limit matches per file
-                                    break
-                        
-                        rel_path = str(file_path.relative_to(docs_base))
-                        results.append({
-                            'path': rel_path,
-                            'name': file_path.name,
-                            'matches': matches,
-                            'match_count': content.lower().count(search_term)
-                        })
-                
-                except Exception:
-                    pass  # Skip files that can't be read
-        
-        # Sort by match count
-        results.sort(key=lambda x: x['match_count'], reverse=True)
+        limit = min(int(request.args.get('limit', 20)), 100)
+        found = docs_index.search(search_term, limit=limit)
         
         return jsonify({
             'success': True,
-            'results': results[:20],  # Limit to top 20 results
-            'total': len(results),
+            'results': found['results'],
+            'total': found['total'],
+            'took_ms': found['took_ms'],
+            'index': docs_index.status(),
             'search_term': search_term
         })
         
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Dashboard Statistics Service
+Container document counts for the dashboard, served stale-while-revalidate
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+
+_redis_pool = None
+_redis_pool_lock = threading.Lock()
+
+
+def get_redis_client() -> redis.Redis:
+    """Process-wide Redis client; every caller shares one connection pool"""
+    global _redis_pool
+    if _redis_pool is None:
+        with _redis_pool_lock:
+            if _redis_pool is None:
+                connection_class = (redis.SSLConnection
+                                    if os.getenv('REDIS_SSL', 'True').lower() == 'true'
+                                    else redis.Connection)
+                _redis_pool = redis.ConnectionPool(
+                    connection_class=connection_class,
+                    host=os.getenv('REDIS_HOST', 'localhost'),
+                    port=int(os.getenv('REDIS_PORT', 6379)),
+                    password=os.getenv('REDIS_PASSWORD'),
+                    decode_responses=True,
+                    db=0,  # Use DB 0 for general caching
+                    max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', 32)),
+                    socket_timeout=5,
+                    socket_connect_timeout=2
+                )
+    return redis.Redis(connection_pool=_redis_pool)
+
+
+class ContainerStatsService:
+    """
+    Per-container document counts, counted concurrently and cached in Redis
+
+    A snapshot younger than fresh_seconds is served as is. An older one is
+    still served, and a background recount is started (at most one per
+    process, and across processes while the Redis refresh lock is held), so
+    requests never wait on a recount once the first snapshot exists. The
+    snapshot is also kept in memory so a Redis outage does not force
+    recounting on every request.
+    """
+
+    CACHE_KEY = "dashboard:container_stats"
+    LOCK_KEY = "dashboard:container_stats:refresh"
+
+    # Delete the lock only while it still holds our token, so a refresh that
+    # outlived the lock's expiry cannot release another process's lock
+    RELEASE_LOCK_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, get_database: Callable[[], Any], fresh_seconds: int = 300,
+                 retain_seconds: int = 24 * 3600, max_workers: int = 8,
+                 redis_factory: Callable[[], redis.Redis] = get_redis_client):
+        self.get_database = get_database
+        self.fresh_seconds = fresh_seconds
+        self.retain_seconds = retain_seconds
+        self.max_workers = max_workers
+        self.redis_factory = redis_factory
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock_token: Optional[str] = None
+        self._refresh_lock = threading.Lock()
+        self._refresh_done = threading.Event()
+        self._refresh_done.set()
+
+    def get_snapshot(self, wait_timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        Latest snapshot: {'containers': [...], 'computed_at': epoch seconds, 'cached': bool}
+        Only a process with no snapshot anywhere waits, for the first count.
+        """
+
+        snapshot = self._read_cache() or self._snapshot
+        if snapshot is None:
+            # Count here, or wait for the process that holds the refresh lock
+            deadline = time.monotonic() + wait_timeout
+            while snapshot is None and time.monotonic() < deadline:
+                if self._refresh_done.is_set():
+                    self.refresh_async()
+                self._refresh_done.wait(0.25)
+                snapshot = self._snapshot or self._read_cache()
+            if snapshot is None:
+                raise RuntimeError("Container statistics are not available yet")
+            return {**snapshot, 'cached': False}
+
+        if time.time() - snapshot['computed_at'] > self.fresh_seconds:
+            self.refresh_async()
+        return {**snapshot, 'cached': True}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Totals view of the snapshot, as served by /api/stats"""
+        snapshot = self.get_snapshot()
+        return {
+            'containers': {container['id']: container['count'] for container in snapshot['containers']},
+            'totalDocuments': sum(container['count'] for container in snapshot['containers']),
+            'timestamp': datetime.utcfromtimestamp(snapshot['computed_at']).isoformat() + 'Z',
+            'age_seconds': int(time.time() - snapshot['computed_at']),
+            'cached': snapshot['cached']
+        }
+
+    def refresh_async(self) -> bool:
+        """Start a background recount unless one is already running"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        if not self._acquire_distributed_lock():
+            self._refresh_lock.release()
+            return False
+
+        self._refresh_done.clear()
+        threading.Thread(target=self._refresh_in_background, name="container-stats-refresh", daemon=True).start()
+        return True
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Container statistics refresh failed: {e}")
+        finally:
+            self._release_distributed_lock()
+            self._refresh_done.set()
+            self._refresh_lock.release()
+
+    def refresh(self) -> Dict[str, Any]:
+        """Count every container concurrently and publish the snapshot"""
+
+        database = self.get_database()
+        container_infos = list(database.list_containers())
+
+        def count(container_info) -> Dict[str, Any]:
+            container_client = database.get_container_client(container_info['id'])
+            result = list(container_client.query_items(
+                query="SELECT VALUE COUNT(1) FROM c",
+                enable_cross_partition_query=True
+            ))
+            return {
+                'id': container_info['id'],
+                'count': result[0] if result else 0,
+                'partitionKey': container_info.get('partitionKey', {}).get('paths', [''])[0]
+            }
+
+        containers: List[Dict[str, Any]] = []
+        if container_infos:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(container_infos))) as executor:
+                containers = list(executor.map(count, container_infos))
+
+        snapshot = {
+            'containers': sorted(containers, key=lambda x: x['count'], reverse=True),
+            'computed_at': time.time()
+        }
+        self._snapshot = snapshot
+
+        try:
+            self.redis_factory().setex(self.CACHE_KEY, self.retain_seconds, json.dumps(snapshot))
+        except Exception:
+            pass  # If Redis fails, the in-memory snapshot still serves
+        return snapshot
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        try:
+            cached = self.redis_factory().get(self.CACHE_KEY)
+        except Exception:
+            return None
+        if not cached:
+            return None
+        snapshot = json.loads(cached)
+        if self._snapshot is None or snapshot['computed_at'] > self._snapshot['computed_at']:
+            self._snapshot = snapshot
+        return snapshot
+
+    def _acquire_distributed_lock(self) -> bool:
+        # Only called under the process lock, so one token per process is enough
+        self._lock_token = f"{os.getpid()}:{uuid.uuid4().hex}"
+        try:
+            return bool(self.redis_factory().set(self.LOCK_KEY, self._lock_token, nx=True, ex=120))
+        except Exception:
+            return True  # Without Redis, the process lock alone has to do
+
+    def _release_distributed_lock(self):
+        try:
+            self.redis_factory().eval(self.RELEASE_LOCK_SCRIPT, 1, self.LOCK_KEY, self._lock_token)
+        except Exception:
+            pass
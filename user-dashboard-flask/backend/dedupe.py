@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Dashboard Duplicate Detection
+Content hashes stored at write time, grouped duplicate queries and bulk deletes
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+CONTENT_HASH_FIELD = 'contentHash'
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def log_content_hash(log: Dict[str, Any]) -> str:
+    """Hash of the fields that make two logs the same entry"""
+    key_fields = []
+
+    if 'conversation_flow' in log:
+        key_fields.append((log.get('session_metadata') or {}).get('session_id', ''))
+        key_fields.append(_canonical(log.get('conversation_flow', [])))
+    elif log.get('agentName'):
+        key_fields.append(log.get('agentName', ''))
+        key_fields.append(log.get('action', ''))
+        key_fields.append(log.get('timestamp', ''))
+    else:
+        key_fields.append(_canonical(log.get('content', '')))
+        key_fields.append(_canonical(log.get('complete_conversation_flow', '')))
+
+    content = '|'.join(str(field) for field in key_fields)
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+def message_content_hash(message: Dict[str, Any]) -> str:
+    """Hash of subject, content, sender and recipient"""
+    key_content = f"{message.get('subject', '')}-{message.get('content', '')}-{message.get('from', '')}-{message.get('to', '')}"
+    return hashlib.md5(key_content.encode()).hexdigest()
+
+
+# Containers with duplicate detection: hash function and the fields it reads
+DEDUPE_PROFILES = {
+    'logs': {
+        'hash': log_content_hash,
+        'fields': ['conversation_flow', 'session_metadata', 'agentName', 'action', 'timestamp',
+                   'content', 'complete_conversation_flow']
+    },
+    'system_inbox': {
+        'hash': message_content_hash,
+        'fields': ['subject', 'content', 'from', 'to']
+    }
+}
+
+
+def stamp_content_hash(container_name: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the content hash to a document about to be written (no-op for other containers)"""
+    profile = DEDUPE_PROFILES.get(container_name)
+    if profile:
+        document[CONTENT_HASH_FIELD] = profile['hash'](document)
+    return document
+
+
+def _projection(fields: List[str]) -> str:
+    """SELECT VALUE object over the given top-level fields (undefined ones are omitted)"""
+    return '{' + ', '.join(f'"{field}": c["{field}"]' for field in fields) + '}'
+
+
+class DuplicateIndex:
+    """
+    Duplicate detection for one container over its stored content hashes
+
+    Documents written through the dashboard carry contentHash already;
+    backfill() streams the rest page by page, projected to the fields the
+    hash needs, and patches the hash in - it writes, so it runs as an
+    explicit job (start_backfill_job), never from an analysis read.
+    Duplicates are then grouped here from a paged scan projected to the
+    hash, id, _ts and partition key. The earliest copy of a group is the
+    original.
+    """
+
+    def __init__(self, container, container_name: str, page_size: int = 500):
+        self.container = container
+        self.container_name = container_name
+        self.profile = DEDUPE_PROFILES[container_name]
+        self.page_size = page_size
+        self._partition_path = None
+
+    @property
+    def partition_path(self) -> List[str]:
+        if self._partition_path is None:
+            path = self.container.read()['partitionKey']['paths'][0]
+            self._partition_path = [segment for segment in path.split('/') if segment]
+        return self._partition_path
+
+    def partition_value(self, document: Dict[str, Any]) -> Any:
+        value = document
+        for segment in self.partition_path:
+            value = value.get(segment) if isinstance(value, dict) else None
+        return value
+
+    def iter_pages(self, query: str, parameters: Optional[List[Dict]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Stream a cross-partition query a page at a time"""
+        pages = self.container.query_items(
+            query=query,
+            parameters=parameters or [],
+            enable_cross_partition_query=True,
+            max_item_count=self.page_size
+        ).by_page()
+        for page in pages:
+            yield list(page)
+
+    def backfill(self, concurrency: int = 8, progress: Optional[Callable[[int], None]] = None) -> int:
+        """Store contentHash on documents that predate write-time hashing; returns documents patched"""
+
+        fields = ['id'] + [self.partition_path[0]] + self.profile['fields']
+        query = f"SELECT VALUE {_projection(list(dict.fromkeys(fields)))} FROM c WHERE NOT IS_DEFINED(c.{CONTENT_HASH_FIELD})"
+
+        def patch(document):
+            self.container.patch_item(
+                item=document['id'],
+                partition_key=self.partition_value(document),
+                patch_operations=[{'op': 'add', 'path': f'/{CONTENT_HASH_FIELD}',
+                                   'value': self.profile['hash'](document)}]
+            )
+
+        patched = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for page in self.iter_pages(query):
+                for future in as_completed([executor.submit(patch, document) for document in page]):
+                    try:
+                        future.result()
+                        patched += 1
+                    except Exception as e:
+                        print(f"Could not store content hash in {self.container_name}: {e}")
+                if progress:
+                    progress(patched)
+        return patched
+
+    def duplicate_groups(self, extra_fields: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+        """Groups of documents sharing a content hash: [{'hash', 'original', 'duplicates'}]"""
+
+        # Grouped here from a projected scan: the SDK cannot GROUP BY across
+        # partitions, and per-partition groups would miss cross-partition copies
+        fields = list(dict.fromkeys(['id', '_ts', CONTENT_HASH_FIELD, self.partition_path[0], *extra_fields]))
+        query = (f"SELECT VALUE {_projection(fields)} FROM c "
+                 f"WHERE IS_DEFINED(c.{CONTENT_HASH_FIELD})")
+        members: Dict[str, List[Dict[str, Any]]] = {}
+        for page in self.iter_pages(query):
+            for document in page:
+                members.setdefault(document[CONTENT_HASH_FIELD], []).append(document)
+
+        groups = []
+        for content_hash, documents in members.items():
+            if len(documents) > 1:
+                documents.sort(key=lambda d: (d.get('_ts') or 0, d['id']))
+                groups.append({'hash': content_hash, 'original': documents[0], 'duplicates': documents[1:]})
+        return groups
+
+    def delete_key(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return {'id': document['id'], 'partitionKey': self.partition_value(document)}
+
+    def resolve_partition_keys(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """Turn ids or {'id', 'partitionKey'} items into delete keys, looking up missing keys in batches"""
+
+        keys, missing = [], []
+        for item in items:
+            if isinstance(item, dict) and item.get('partitionKey') is not None:
+                keys.append({'id': item['id'], 'partitionKey': item['partitionKey']})
+            else:
+                missing.append(item['id'] if isinstance(item, dict) else item)
+
+        fields = ['id', self.partition_path[0]]
+        for i in range(0, len(missing), 100):
+            query = f"SELECT VALUE {_projection(fields)} FROM c WHERE ARRAY_CONTAINS(@ids, c.id)"
+            for page in self.iter_pages(query, [{"name": "@ids", "value": missing[i:i + 100]}]):
+                keys.extend(self.delete_key(document) for document in page)
+        return keys
+
+
+# === BACKGROUND JOBS (bulk deletes, hash backfills) ===
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_job_done: Dict[str, threading.Event] = {}
+_jobs_lock = threading.Lock()
+MAX_JOBS = 100
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return {**job, 'errors': list(job['errors'])} if job else None
+
+
+def _register_job(container_name: str, kind: str, **counters) -> Dict[str, Any]:
+    """Create a running job record; call with _jobs_lock held"""
+    job_id = uuid.uuid4().hex
+    job = {
+        'job_id': job_id,
+        'kind': kind,
+        'container': container_name,
+        'status': 'running',
+        **counters,
+        'errors': [],
+        'started_at': time.time(),
+        'finished_at': None
+    }
+    # Forget the oldest finished jobs
+    finished = [jid for jid, j in _jobs.items() if j['status'] != 'running']
+    for jid in finished[:max(0, len(_jobs) - MAX_JOBS + 1)]:
+        del _jobs[jid]
+        _job_done.pop(jid, None)
+    _jobs[job_id] = job
+    _job_done[job_id] = threading.Event()
+    return job
+
+
+def _finish_job(job: Dict[str, Any], status: str = 'completed'):
+    with _jobs_lock:
+        job['status'] = status
+        job['finished_at'] = time.time()
+    _job_done[job['job_id']].set()
+
+
+def start_delete_job(container, container_name: str, keys: List[Dict[str, Any]],
+                     concurrency: int = 16) -> Dict[str, Any]:
+    """
+    Delete documents concurrently in the background
+    Progress (removed/failed/total) is readable through get_job while it runs.
+    """
+
+    with _jobs_lock:
+        job = _register_job(container_name, 'delete', total=len(keys), removed=0, failed=0)
+
+    def delete(key):
+        container.delete_item(item=key['id'], partition_key=key['partitionKey'])
+
+    def run():
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(delete, key): key for key in keys}
+            for done, future in enumerate(as_completed(futures), 1):
+                error = future.exception()
+                with _jobs_lock:
+                    if error is None:
+                        job['removed'] += 1
+                    else:
+                        job['failed'] += 1
+                        if len(job['errors']) < 100:
+                            job['errors'].append({'id': futures[future]['id'], 'error': str(error)})
+                if done % 500 == 0:
+                    print(f"Deleting duplicates from {container_name}: {done}/{len(keys)}")
+        _finish_job(job)
+
+    threading.Thread(target=run, name=f"delete-{job['job_id'][:8]}", daemon=True).start()
+    return get_job(job['job_id'])
+
+
+def start_backfill_job(index: DuplicateIndex, concurrency: int = 8) -> Dict[str, Any]:
+    """
+    Store missing content hashes for one container in the background
+    Only one backfill runs per container; starting another returns the running one.
+    """
+
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job['kind'] == 'backfill' and job['container'] == index.container_name and job['status'] == 'running':
+                return {**job, 'errors': list(job['errors'])}
+        job = _register_job(index.container_name, 'backfill', patched=0)
+
+    def progress(patched):
+        with _jobs_lock:
+            job['patched'] = patched
+
+    def run():
+        try:
+            progress(index.backfill(concurrency=concurrency, progress=progress))
+        except Exception as e:
+            with _jobs_lock:
+                job['errors'].append({'error': str(e)})
+            _finish_job(job, 'failed')
+            return
+        _finish_job(job)
+
+    threading.Thread(target=run, name=f"backfill-{job['job_id'][:8]}", daemon=True).start()
+    return get_job(job['job_id'])
+
+
+def wait_for_job(job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Block until a job finishes (or timeout), then return its state"""
+    done = _job_done.get(job_id)
+    if done:
+        done.wait(timeout)
+    return get_job(job_id)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Dashboard Documentation Index
+In-memory token index over the repository's markdown and Python files
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+_TOKEN = re.compile(r'\w+')
+
+DOC_SUFFIXES = ('.md', '.py')
+
+# Dependency and tooling directories are not documentation
+EXCLUDED_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv', '.mypy_cache', '.pytest_cache'}
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def index_tokens(text: str) -> Iterator[str]:
+    """Tokens to index: each word, plus the parts of snake_case words"""
+    for token in tokenize(text):
+        yield token
+        if '_' in token:
+            yield from (part for part in token.split('_') if part)
+
+
+class IndexedFile:
+    """One file's line start offsets and, per token, the lines it occurs on"""
+
+    __slots__ = ('path', 'name', 'mtime', 'size', 'line_offsets', 'lines', 'name_tokens', 'length')
+
+    def __init__(self, path: str, name: str, mtime: float, size: int, line_offsets: List[int],
+                 lines: Dict[str, List[int]], name_tokens: Set[str]):
+        self.path = path
+        self.name = name
+        self.mtime = mtime
+        self.size = size
+        self.line_offsets = line_offsets
+        self.lines = lines
+        self.name_tokens = name_tokens
+        self.length = sum(len(numbers) for numbers in lines.values())
+
+
+class DocsIndex:
+    """
+    Token index of the documentation under a root directory
+
+    Each file is read once and kept as line start offsets plus, for every
+    token, the lines it occurs on; the index maps tokens to the files that
+    contain them. refresh() re-reads only files whose mtime or size changed
+    and forgets deleted ones, and runs at startup and then periodically in
+    the background. A search looks up each query word as a prefix in the
+    sorted vocabulary, intersects the files, ranks them by bm25 (filename
+    hits weigh extra) and reads just the matching lines of the top results
+    back through their offsets for snippets.
+    """
+
+    def __init__(self, root: Path, suffixes: Iterable[str] = DOC_SUFFIXES,
+                 excluded_dirs: Iterable[str] = EXCLUDED_DIRS):
+        self.root = Path(root)
+        self.suffixes = tuple(suffixes)
+        self.excluded_dirs = set(excluded_dirs)
+        self.files: Dict[str, IndexedFile] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}   # token -> {path: occurrences}
+        self.name_postings: Dict[str, Set[str]] = {}    # filename token -> {path}
+        self._vocabulary: List[str] = []
+        self._vocabulary_stale = False
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        self.refreshed_at: Optional[float] = None
+
+    # === BUILDING ===
+
+    def _walk(self) -> Iterable[Path]:
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [name for name in subdirectories if name not in self.excluded_dirs]
+            for filename in filenames:
+                if filename.endswith(self.suffixes) and not filename.startswith('__'):
+                    yield Path(directory) / filename
+
+    def _read(self, file_path: Path, rel_path: str, stat: os.stat_result) -> Optional[IndexedFile]:
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            data.decode('utf-8')
+        except (OSError, UnicodeDecodeError):
+            return None  # Skip files that can't be read
+
+        line_offsets, lines = [], {}
+        offset = 0
+        for number, line in enumerate(data.split(b'\n'), 1):
+            line_offsets.append(offset)
+            offset += len(line) + 1
+            for token in index_tokens(line.decode('utf-8')):
+                # One entry per occurrence, so the list length is the term frequency
+                lines.setdefault(token, []).append(number)
+
+        return IndexedFile(rel_path, file_path.name, stat.st_mtime, stat.st_size,
+                           line_offsets, lines, set(index_tokens(file_path.name)))
+
+    def _add(self, entry: IndexedFile):
+        self.files[entry.path] = entry
+        self._total_length += entry.length
+        for token, numbers in entry.lines.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                self._vocabulary_stale = True
+            self.postings[token][entry.path] = len(numbers)
+        for token in entry.name_tokens:
+            if token not in self.name_postings:
+                self._vocabulary_stale = True
+            self.name_postings.setdefault(token, set()).add(entry.path)
+
+    def _remove(self, rel_path: str):
+        entry = self.files.pop(rel_path, None)
+        if entry is None:
+            return
+        self._total_length -= entry.length
+        for token in entry.lines:
+            paths = self.postings.get(token, {})
+            paths.pop(rel_path, None)
+            if not paths:
+                self.postings.pop(token, None)
+                self._vocabulary_stale = True
+        for token in entry.name_tokens:
+            paths = self.name_postings.get(token, set())
+            paths.discard(rel_path)
+            if not paths:
+                self.name_postings.pop(token, None)
+                self._vocabulary_stale = True
+
+    def _update_file(self, file_path: Path, rel_path: str, stat: os.stat_result) -> bool:
+        entry = self._read(file_path, rel_path, stat)
+        with self._lock:
+            self._remove(rel_path)
+            if entry:
+                self._add(entry)
+        return entry is not None
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-index changed files and drop deleted ones; returns counts of each"""
+
+        with self._refresh_lock:
+            started = time.perf_counter()
+            seen, updated = set(), 0
+            for file_path in self._walk():
+                rel_path = str(file_path.relative_to(self.root))
+                try:
+                    stat = file_path.stat()
+                except OSError:
+                    continue
+                seen.add(rel_path)
+                entry = self.files.get(rel_path)
+                if entry and entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+                    continue
+                self._update_file(file_path, rel_path, stat)
+                updated += 1
+
+            with self._lock:
+                removed = [rel_path for rel_path in self.files if rel_path not in seen]
+                for rel_path in removed:
+                    self._remove(rel_path)
+            self.refreshed_at = time.time()
+
+        if updated or removed:
+            print(f"Docs index refreshed: {updated} files indexed, {len(removed)} removed "
+                  f"in {time.perf_counter() - started:.2f}s")
+        return {'updated': updated, 'removed': len(removed)}
+
+    def ensure_built(self):
+        if self.refreshed_at is None:
+            self.refresh()
+
+    def start_background_refresh(self, interval: float = 30.0):
+        """Build the index now and keep it current from a daemon thread"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def run():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Docs index refresh failed: {e}")
+                time.sleep(interval)
+
+        self._refresh_thread = threading.Thread(target=run, name="docs-index-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    # === QUERIES ===
+
+    def _expand(self, prefix: str) -> List[str]:
+        """Indexed tokens starting with prefix"""
+        if self._vocabulary_stale:
+            self._vocabulary = sorted(set(self.postings) | set(self.name_postings))
+            self._vocabulary_stale = False
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        end = start
+        while end < len(vocabulary) and vocabulary[end].startswith(prefix):
+            end += 1
+        return vocabulary[start:end]
+
+    def _snippets(self, entry: IndexedFile, line_numbers: List[int]) -> List[Dict[str, Any]]:
+        matches = []
+        try:
+            with open(self.root / entry.path, 'rb') as f:
+                for number in line_numbers:
+                    f.seek(entry.line_offsets[number - 1])
+                    text = f.readline().decode('utf-8', errors='replace').strip()
+                    matches.append({
+                        'line': number,
+                        'text': text[:100] + '...' if len(text) > 100 else text
+                    })
+        except OSError:
+            pass
+        return matches
+
+    def search(self, search_term: str, limit: int = 20, snippets: int = 3,
+               k1: float = 1.2, b: float = 0.75, name_weight: float = 2.0) -> Dict[str, Any]:
+        """Files matching every word of the term (as a prefix), best first, with matching lines"""
+
+        started = time.perf_counter()
+        self.ensure_built()
+        words = list(dict.fromkeys(tokenize(search_term)))
+        if not words:
+            return {'results': [], 'total': 0, 'took_ms': 0.0}
+
+        with self._lock:
+            file_count = max(len(self.files), 1)
+            average_length = self._total_length / file_count or 1.0
+
+            # Per word: matching tokens, and occurrences / filename hits per file
+            expansions, occurrences, name_hits = [], [], []
+            for word in words:
+                tokens = self._expand(word)
+                counts, names = Counter(), set()
+                for token in tokens:
+                    counts.update(self.postings.get(token, {}))
+                    names.update(self.name_postings.get(token, ()))
+                expansions.append(tokens)
+                occurrences.append(counts)
+                name_hits.append(names)
+
+            candidates = None
+            for counts, names in zip(occurrences, name_hits):
+                paths = set(counts) | names
+                candidates = paths if candidates is None else candidates & paths
+
+            scored = []
+            for path in candidates or ():
+                entry = self.files[path]
+                score = 0.0
+                for counts, names in zip(occurrences, name_hits):
+                    frequency = len(set(counts) | names)
+                    idf = math.log(1 + (file_count - frequency + 0.5) / (frequency + 0.5))
+                    tf = counts.get(path, 0)
+                    score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * entry.length / average_length))
+                    if path in names:
+                        score += name_weight * idf
+                scored.append((score, path))
+            scored.sort(key=lambda item: (-item[0], item[1]))
+
+            top = []
+            for score, path in scored[:limit]:
+                entry = self.files[path]
+                word_lines = [
+                    set().union(*(entry.lines.get(token, ()) for token in tokens))
+                    for tokens in expansions
+                ]
+                # Lines with every word first, then lines with any of them
+                every = sorted(set.intersection(*word_lines))
+                lines = every[:snippets] or sorted(set.union(*word_lines))[:snippets]
+                top.append((entry, score, lines, sum(counts.get(path, 0) for counts in occurrences)))
+
+        results = [
+            {
+                'path': entry.path,
+                'name': entry.name,
+                'matches': self._snippets(entry, lines),
+                'match_count': match_count,
+                'score': round(score, 4)
+            }
+            for entry, score, lines, match_count in top
+        ]
+        return {
+            'results': results,
+            'total': len(scored),
+            'took_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'files': len(self.files),
+                'tokens': len(self.postings),
+                'ready': self.refreshed_at is not None,
+                'refreshed_at': self.refreshed_at
+            }
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Dashboard Search Index
+Local SQLite FTS5 index over every Cosmos container, kept current incrementally
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Flask's instance folder: local state that is not part of the source tree
+DEFAULT_INDEX_PATH = os.getenv('DASHBOARD_SEARCH_INDEX',
+                               str(Path(__file__).parent / 'instance' / 'dashboard_search.db'))
+
+# Fields matched by /api/search, with their bm25 weights
+SEARCH_FIELDS = {'id': 2.0, 'subject': 4.0, 'content': 1.0, 'action': 1.0}
+
+
+def _field_text(value: Any) -> str:
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+
+def build_match_query(search_term: str) -> Optional[str]:
+    """FTS5 MATCH expression: every word of the term, as a prefix (None if no words)"""
+    tokens = re.findall(r'\w+', search_term.lower())
+    return ' '.join(f'"{token}"*' for token in tokens) or None
+
+
+class DocumentSearchIndex:
+    """
+    Inverted full-text index of the dashboard's containers
+
+    Documents are pulled per container by their _ts watermark (ORDER BY
+    c._ts, checkpointed per page), so each sync only reads what changed.
+    Deletes do not move the watermark; a periodic id sweep removes them.
+    Searches are ranked by bm25 over id/subject/content/action, paginated,
+    and come with per-container facet counts.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._sync_thread = None
+        columns = ', '.join(SEARCH_FIELDS)
+        with self._lock:
+            self.conn.executescript(f"""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS documents (
+                    rowid INTEGER PRIMARY KEY,
+                    container TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    ts INTEGER,
+                    body TEXT NOT NULL,
+                    UNIQUE (container, doc_id)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                    container UNINDEXED, {columns}, tokenize='unicode61'
+                );
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    container TEXT PRIMARY KEY,
+                    watermark INTEGER,
+                    synced_at REAL,
+                    swept_at REAL
+                );
+            """)
+
+    # === WRITES ===
+
+    def upsert(self, container: str, documents: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace documents of one container"""
+        written = 0
+        with self._lock:
+            for document in documents:
+                doc_id = str(document.get('id', ''))
+                row = self.conn.execute(
+                    "SELECT rowid FROM documents WHERE container = ? AND doc_id = ?", (container, doc_id)
+                ).fetchone()
+                if row:
+                    self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+                    self.conn.execute("UPDATE documents SET ts = ?, body = ? WHERE rowid = ?",
+                                      (document.get('_ts'), json.dumps(document, default=str), row[0]))
+                    rowid = row[0]
+                else:
+                    rowid = self.conn.execute(
+                        "INSERT INTO documents (container, doc_id, ts, body) VALUES (?, ?, ?, ?)",
+                        (container, doc_id, document.get('_ts'), json.dumps(document, default=str))
+                    ).lastrowid
+                self.conn.execute(
+                    f"INSERT INTO documents_fts (rowid, container, {', '.join(SEARCH_FIELDS)}) "
+                    f"VALUES (?, ?, {', '.join('?' for _ in SEARCH_FIELDS)})",
+                    (rowid, container, *(_field_text(document.get(field)) for field in SEARCH_FIELDS))
+                )
+                written += 1
+            self.conn.commit()
+        return written
+
+    def remove_missing(self, container: str, live_ids: Iterable[str]) -> int:
+        """Drop indexed documents of a container that no longer exist"""
+        live = set(live_ids)
+        with self._lock:
+            stale = [rowid for rowid, doc_id in self.conn.execute(
+                "SELECT rowid, doc_id FROM documents WHERE container = ?", (container,)
+            ) if doc_id not in live]
+            for rowid in stale:
+                self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (rowid,))
+                self.conn.execute("DELETE FROM documents WHERE rowid = ?", (rowid,))
+            self.conn.commit()
+        return len(stale)
+
+    def drop_container(self, container: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM documents_fts WHERE container = ?", (container,))
+            self.conn.execute("DELETE FROM documents WHERE container = ?", (container,))
+            self.conn.execute("DELETE FROM sync_state WHERE container = ?", (container,))
+            self.conn.commit()
+
+    # === SYNC ===
+
+    def _state(self, container: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT watermark, synced_at, swept_at FROM sync_state WHERE container = ?", (container,)
+            ).fetchone()
+        return {'watermark': row[0], 'synced_at': row[1], 'swept_at': row[2]} if row else {}
+
+    def _save_state(self, container: str, **values):
+        state = {**self._state(container), **values}
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                (container, state.get('watermark'), state.get('synced_at'), state.get('swept_at'))
+            )
+            self.conn.commit()
+
+    def sync_container(self, container_client, container: str, page_size: int = 500,
+                       sweep_seconds: float = 6 * 3600) -> int:
+        """Index documents changed since the container's watermark; returns documents written"""
+
+        watermark = self._state(container).get('watermark')
+        if watermark is None:
+            query, parameters = "SELECT * FROM c ORDER BY c._ts", []
+        else:
+            # >= so documents sharing the watermark second are not missed (upserts are idempotent)
+            query = "SELECT * FROM c WHERE c._ts >= @since ORDER BY c._ts"
+            parameters = [{"name": "@since", "value": watermark}]
+
+        written = 0
+        pages = container_client.query_items(
+            query=query,
+            parameters=parameters,
+            enable_cross_partition_query=True,
+            max_item_count=page_size
+        ).by_page()
+        for page in pages:
+            documents = list(page)
+            if not documents:
+                continue
+            written += self.upsert(container, documents)
+            watermark = max([watermark or 0] + [doc.get('_ts') or 0 for doc in documents])
+            self._save_state(container, watermark=watermark)
+
+        now = time.time()
+        self._save_state(container, watermark=watermark, synced_at=now)
+
+        swept_at = self._state(container).get('swept_at')
+        if swept_at is None or now - swept_at > sweep_seconds:
+            live_ids = container_client.query_items(
+                query="SELECT VALUE c.id FROM c",
+                enable_cross_partition_query=True,
+                max_item_count=5000
+            )
+            self.remove_missing(container, live_ids)
+            self._save_state(container, swept_at=now)
+
+        return written
+
+    def sync(self, database, **kwargs) -> Dict[str, int]:
+        """Sync every container of the database; containers that went away are dropped"""
+        written = {}
+        containers = [info['id'] for info in database.list_containers()]
+        for container in containers:
+            try:
+                written[container] = self.sync_container(database.get_container_client(container), container, **kwargs)
+            except Exception as e:
+                print(f"Search index sync failed for {container}: {e}")
+
+        with self._lock:
+            indexed = [row[0] for row in self.conn.execute("SELECT container FROM sync_state")]
+        for container in set(indexed) - set(containers):
+            self.drop_container(container)
+        return written
+
+    def start_background_sync(self, get_database: Callable[[], Any], interval: float = 60.0):
+        """Keep the index current from a daemon thread"""
+        if self._sync_thread and self._sync_thread.is_alive():
+            return
+
+        def run():
+            while True:
+                try:
+                    written = self.sync(get_database())
+                    if any(written.values()):
+                        print(f"Search index updated: {sum(written.values())} documents")
+                except Exception as e:
+                    print(f"Search index sync failed: {e}")
+                time.sleep(interval)
+
+        self._sync_thread = threading.Thread(target=run, name="search-index-sync", daemon=True)
+        self._sync_thread.start()
+
+    # === QUERIES ===
+
+    def search(self, search_term: str, container: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Ranked, paginated matches plus per-container facet counts"""
+
+        started = time.perf_counter()
+        match = build_match_query(search_term)
+        if match is None:
+            return {'results': [], 'total': 0, 'facets': {}, 'took_ms': 0.0}
+
+        weights = ', '.join(['0'] + [str(weight) for weight in SEARCH_FIELDS.values()])
+        container_filter = " AND documents_fts.container = ?" if container else ""
+        parameters: List[Any] = [match] + ([container] if container else [])
+
+        with self._lock:
+            facets = dict(self.conn.execute(
+                "SELECT container, COUNT(*) FROM documents_fts WHERE documents_fts MATCH ? GROUP BY container",
+                (match,)
+            ).fetchall())
+            rows = self.conn.execute(
+                f"""
+                SELECT documents_fts.container, documents.body, bm25(documents_fts, {weights}) AS score
+                FROM documents_fts JOIN documents ON documents.rowid = documents_fts.rowid
+                WHERE documents_fts MATCH ?{container_filter}
+                ORDER BY score
+                LIMIT ? OFFSET ?
+                """,
+                parameters + [int(limit), int(offset)]
+            ).fetchall()
+
+        return {
+            'results': [
+                {'container': row[0], 'document': json.loads(row[1]), 'score': round(-row[2], 4)}
+                for row in rows
+            ],
+            'total': facets.get(container, 0) if container else sum(facets.values()),
+            'facets': facets,
+            'took_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            documents = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            synced = self.conn.execute("SELECT MIN(synced_at), COUNT(*) FROM sync_state").fetchone()
+        return {
+            'documents': documents,
+            'containers': synced[1],
+            'ready': synced[1] > 0,
+            'oldest_sync': synced[0]
+        }
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Dashboard Session Chunks
+Resumable chunked uploads of large terminal sessions and ordered streaming reads
+"""
+
+import base64
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from azure.cosmos.exceptions import CosmosResourceExistsError, CosmosResourceNotFoundError
+
+MASTER_TYPE = 'TERMINAL_SESSION_MASTER'
+CHUNK_TYPE = 'TERMINAL_SESSION_CHUNK'
+CHUNK_SIZE = 1000000  # 1MB chunks; base64 keeps a chunk document under the 2MB item limit
+DEFAULT_PARTITION = 'terminal_conversations'
+
+
+def chunk_id(session_id: str, index: int) -> str:
+    return f"{session_id}_chunk_{index}"
+
+
+class SessionChunkStore:
+    """
+    Large sessions of one container, stored as a master document plus chunks
+
+    Each chunk has the deterministic id <session>_chunk_<index> and lives in
+    the master's logical partition. Chunks are upserted, so re-sending an
+    index (a retry, or a resumed upload) overwrites it instead of adding a
+    copy, and chunks can be written in any order and at the same time.
+    complete() checks the indexes are contiguous before the master is
+    marked complete. Reads point-read the chunks back in index order, a few
+    ahead of the one being sent, so a session is never held in memory whole.
+    """
+
+    def __init__(self, container, max_workers: int = 8, prefetch: int = 4):
+        self.container = container
+        self.max_workers = max_workers
+        self.prefetch = prefetch
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="session-chunks")
+        self._partition_path = None
+        self._masters: Dict[str, Dict[str, Any]] = {}
+        self._masters_lock = threading.Lock()
+
+    # === PARTITIONING ===
+
+    @property
+    def partition_path(self) -> List[str]:
+        if self._partition_path is None:
+            path = self.container.read()['partitionKey']['paths'][0]
+            self._partition_path = [segment for segment in path.split('/') if segment]
+        return self._partition_path
+
+    def partition_value(self, document: Dict[str, Any]) -> Any:
+        value = document
+        for segment in self.partition_path:
+            value = value.get(segment) if isinstance(value, dict) else None
+        return value
+
+    def _set_partition_value(self, document: Dict[str, Any], value: Any):
+        target = document
+        for segment in self.partition_path[:-1]:
+            target = target.setdefault(segment, {})
+        target[self.partition_path[-1]] = value
+
+    # === MASTERS ===
+
+    def get_master(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Master document of a session (None if there is none)"""
+        with self._masters_lock:
+            if session_id in self._masters:
+                return self._masters[session_id]
+
+        masters = list(self.container.query_items(
+            query="SELECT * FROM c WHERE c.id = @id AND c.type = @type",
+            parameters=[{"name": "@id", "value": session_id}, {"name": "@type", "value": MASTER_TYPE}],
+            enable_cross_partition_query=True
+        ))
+        if not masters:
+            return None
+        return self._remember(masters[0])
+
+    def _remember(self, master: Dict[str, Any]) -> Dict[str, Any]:
+        with self._masters_lock:
+            # Only uploads in progress are worth keeping; they are looked up once per chunk
+            if master.get('upload_status') == 'uploading':
+                if len(self._masters) >= 1000:
+                    self._masters.pop(next(iter(self._masters)))
+                self._masters[master['id']] = master
+            else:
+                self._masters.pop(master['id'], None)
+        return master
+
+    def begin(self, session_id: str, metadata: Dict[str, Any], chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+        """Create the master of a new upload, or return the existing one to resume it"""
+
+        existing = self.get_master(session_id)
+        if existing:
+            return existing
+
+        master = {
+            **metadata,
+            'id': session_id,
+            'type': MASTER_TYPE,
+            'upload_status': 'uploading',
+            'chunk_size': chunk_size,
+            'chunk_count': 0,
+            'content_size': 0,
+            'chunks': [],
+            'created_at': datetime.now().isoformat() + 'Z'
+        }
+        if self.partition_value(master) is None:
+            self._set_partition_value(master, DEFAULT_PARTITION)
+
+        try:
+            return self._remember(self.container.create_item(body=master))
+        except CosmosResourceExistsError:
+            # Another request started the same upload first
+            return self.get_master(session_id)
+
+    def received(self, master: Dict[str, Any]) -> List[int]:
+        """Chunk indexes stored so far, in order"""
+        return sorted(self.container.query_items(
+            query="SELECT VALUE c.chunk_index FROM c WHERE c.master_id = @id AND c.type = @type",
+            parameters=[{"name": "@id", "value": master['id']}, {"name": "@type", "value": CHUNK_TYPE}],
+            partition_key=self.partition_value(master)
+        ))
+
+    # === WRITES ===
+
+    def put_chunk(self, master: Dict[str, Any], index: int, content: Union[bytes, str]) -> Dict[str, Any]:
+        """Store (or overwrite) one chunk; bytes are kept base64 encoded, text as is"""
+
+        if master.get('upload_status') != 'uploading':
+            raise ValueError(f"Session {master['id']} is not accepting chunks")
+        if index < 0:
+            raise ValueError("Chunk index must not be negative")
+
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        chunk = {
+            'id': chunk_id(master['id'], index),
+            'type': CHUNK_TYPE,
+            'master_id': master['id'],
+            'chunk_index': index,
+            'size': len(data),
+            'md5': hashlib.md5(data).hexdigest()
+        }
+        if isinstance(content, str):
+            chunk['content'] = content
+        else:
+            chunk['content'] = base64.b64encode(content).decode('ascii')
+            chunk['encoding'] = 'base64'
+        self._set_partition_value(chunk, self.partition_value(master))
+
+        self.container.upsert_item(body=chunk)
+        return {'chunk_index': index, 'size': chunk['size'], 'md5': chunk['md5']}
+
+    def put_chunks(self, master: Dict[str, Any], contents: Iterable[Union[bytes, str]],
+                   first_index: int = 0) -> List[Dict[str, Any]]:
+        """
+        Store consecutive chunks concurrently as they are produced
+        At most two writes per worker are pending, so a streamed source is
+        never read far ahead of what has been written.
+        """
+
+        written, pending = [], set()
+        try:
+            for index, content in enumerate(contents, first_index):
+                if len(pending) >= self.max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    written.extend(future.result() for future in done)
+                pending.add(self._executor.submit(self.put_chunk, master, index, content))
+        finally:
+            done, _ = wait(pending)
+        written.extend(future.result() for future in done)
+        return sorted(written, key=lambda chunk: chunk['chunk_index'])
+
+    def put_stream(self, master: Dict[str, Any], stream, first_index: int = 0) -> List[Dict[str, Any]]:
+        """Cut a binary stream into chunk_size chunks and store them concurrently"""
+        chunk_size = master.get('chunk_size', CHUNK_SIZE)
+
+        def read_chunks():
+            while True:
+                # Streams may return short reads; fill each chunk before storing it
+                parts, remaining = [], chunk_size
+                while remaining:
+                    part = stream.read(remaining)
+                    if not part:
+                        break
+                    parts.append(part)
+                    remaining -= len(part)
+                if not parts:
+                    return
+                yield b''.join(parts)
+
+        return self.put_chunks(master, read_chunks(), first_index)
+
+    def complete(self, master: Dict[str, Any], chunk_count: Optional[int] = None) -> Dict[str, Any]:
+        """Check every chunk is present and mark the master complete"""
+
+        chunks = list(self.container.query_items(
+            query="SELECT c.chunk_index, c.size FROM c WHERE c.master_id = @id AND c.type = @type",
+            parameters=[{"name": "@id", "value": master['id']}, {"name": "@type", "value": CHUNK_TYPE}],
+            partition_key=self.partition_value(master)
+        ))
+        received = {chunk['chunk_index']: chunk['size'] for chunk in chunks}
+        expected = len(received) if chunk_count is None else chunk_count
+
+        missing = sorted(set(range(expected)) - set(received))
+        unexpected = sorted(index for index in received if index >= expected)
+        if missing or unexpected:
+            raise ValueError(f"Session {master['id']} is incomplete: "
+                             f"missing chunks {missing[:20]}, unexpected chunks {unexpected[:20]}")
+
+        master.update({
+            'upload_status': 'complete',
+            'chunk_count': expected,
+            'content_size': sum(received.values()),
+            'chunks': [chunk_id(master['id'], index) for index in range(expected)],
+            'completed_at': datetime.now().isoformat() + 'Z'
+        })
+        return self._remember(self.container.replace_item(item=master['id'], body=master))
+
+    # === READS ===
+
+    def _read_chunk(self, master: Dict[str, Any], item_id: str) -> bytes:
+        try:
+            chunk = self.container.read_item(item=item_id, partition_key=self.partition_value(master))
+        except CosmosResourceNotFoundError:
+            # Sessions chunked before chunks shared the master's partition
+            chunks = list(self.container.query_items(
+                query="SELECT * FROM c WHERE c.id = @id",
+                parameters=[{"name": "@id", "value": item_id}],
+                enable_cross_partition_query=True
+            ))
+            if not chunks:
+                raise
+            chunk = chunks[0]
+
+        if chunk.get('encoding') == 'base64':
+            return base64.b64decode(chunk['content'])
+        return chunk['content'].encode('utf-8')
+
+    def iter_content(self, master: Dict[str, Any]) -> Iterator[bytes]:
+        """The session's chunks in order, read up to `prefetch` ahead (checked before streaming starts)"""
+        if master.get('upload_status', 'complete') != 'complete':
+            raise ValueError(f"Session {master['id']} upload is not complete")
+        return self._iter_chunks(master)
+
+    def _iter_chunks(self, master: Dict[str, Any]) -> Iterator[bytes]:
+        item_ids = iter(master.get('chunks') or [])
+        window = deque()
+        for item_id in item_ids:
+            window.append(self._executor.submit(self._read_chunk, master, item_id))
+            if len(window) >= self.prefetch:
+                break
+
+        try:
+            while window:
+                data = window.popleft().result()
+                next_id = next(item_ids, None)
+                if next_id is not None:
+                    window.append(self._executor.submit(self._read_chunk, master, next_id))
+                yield data
+        finally:
+            for future in window:
+                future.cancel()
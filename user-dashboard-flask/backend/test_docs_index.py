@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the documentation index
+Indexes a temporary directory of markdown and Python files
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from docs_index import DocsIndex, index_tokens
+
+
+def _write(root, rel_path, text):
+    path = Path(root) / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def test_index_tokens_split_snake_case():
+    assert list(index_tokens('sync_inbox(Store)')) == ['sync_inbox', 'sync', 'inbox', 'store']
+
+
+def test_search_ranks_and_snippets():
+    with tempfile.TemporaryDirectory() as root:
+        _write(root, 'docs/cosmos_setup.md', '# Setup\n\nCreate the database.\nThen configure the cosmos endpoint.\n')
+        _write(root, 'docs/notes.md', 'cosmos cosmos cosmos\nunrelated\n')
+        _write(root, 'scripts/sync.py', 'def sync_inbox():\n    """Cosmos inbox sync"""\n')
+        _write(root, 'node_modules/pkg/README.md', 'cosmos\n')
+        _write(root, 'docs/image.png', 'cosmos\n')
+        index = DocsIndex(Path(root))
+
+        found = index.search('cosmos')
+        assert found['total'] == 3
+        assert {r['path'] for r in found['results']} == {
+            os.path.join('docs', 'cosmos_setup.md'), os.path.join('docs', 'notes.md'),
+            os.path.join('scripts', 'sync.py')}
+        # A filename hit outweighs repeated body hits
+        assert found['results'][0]['name'] == 'cosmos_setup.md'
+        assert found['results'][0]['matches'] == [{'line': 4, 'text': 'Then configure the cosmos endpoint.'}]
+
+        # Every word must match, each as a prefix; snake_case parts are searchable
+        assert [r['name'] for r in index.search('cosm endpo')['results']] == ['cosmos_setup.md']
+        result = index.search('inbox sync')['results'][0]
+        assert result['name'] == 'sync.py' and [m['line'] for m in result['matches']] == [1, 2]
+        assert index.search('missingword')['total'] == 0
+        assert index.search('  ')['total'] == 0
+
+
+def test_refresh_picks_up_changes():
+    with tempfile.TemporaryDirectory() as root:
+        notes = _write(root, 'notes.md', 'alpha\n')
+        _write(root, 'old.md', 'beta\n')
+        index = DocsIndex(Path(root))
+        index.refresh()
+        assert index.refresh() == {'updated': 0, 'removed': 0}
+
+        notes.write_text('gamma delta\n')
+        os.utime(notes, (notes.stat().st_atime, notes.stat().st_mtime + 5))
+        (Path(root) / 'old.md').unlink()
+        assert index.refresh() == {'updated': 1, 'removed': 1}
+
+        assert index.search('alpha')['total'] == 0
+        assert index.search('beta')['total'] == 0
+        assert [r['name'] for r in index.search('gamma')['results']] == ['notes.md']
+        assert index.status()['files'] == 1
+
+
+if __name__ == "__main__":
+    test_index_tokens_split_snake_case()
+    test_search_ranks_and_snippets()
+    test_refresh_picks_up_changes()
+    print("✅ Docs index finds and refreshes documentation")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test the dashboard search index
+Syncs DocumentSearchIndex from in-memory containers into a temporary SQLite file
+"""
+
+import tempfile
+from pathlib import Path
+
+from search_index import DocumentSearchIndex, build_match_query
+
+
+class FakePages(list):
+    def by_page(self):
+        return [self[i:i + 2] for i in range(0, len(self), 2)]
+
+
+class FakeContainer:
+    """query_items over a list of documents: the watermark scan and the id sweep"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def query_items(self, query, parameters=None, **kwargs):
+        if query.startswith("SELECT VALUE c.id"):
+            return [doc['id'] for doc in self.documents]
+        since = {p['name']: p['value'] for p in parameters or []}.get('@since', 0)
+        return FakePages(sorted((doc for doc in self.documents if doc['_ts'] >= since),
+                                key=lambda doc: doc['_ts']))
+
+
+class FakeDatabase:
+    def __init__(self, containers):
+        self.containers = containers
+
+    def list_containers(self):
+        return [{'id': name} for name in self.containers]
+
+    def get_container_client(self, name):
+        return self.containers[name]
+
+
+def _index(directory):
+    return DocumentSearchIndex(str(Path(directory) / 'search.db'))
+
+
+def test_match_query():
+    assert build_match_query('Cosmos "DB"-sync') == '"cosmos"* "db"* "sync"*'
+    assert build_match_query('  --  ') is None
+
+
+def test_incremental_sync_and_search():
+    messages = FakeContainer([
+        {'id': 'm1', 'subject': 'Cosmos migration plan', 'content': 'move the inbox', '_ts': 10},
+        {'id': 'm2', 'subject': 'Lunch', 'content': 'cosmos themed cafe', '_ts': 11},
+        {'id': 'm3', 'subject': 'Status', 'content': 'nothing to report', '_ts': 12},
+    ])
+    logs = FakeContainer([{'id': 'l1', 'action': 'cosmos sync finished', '_ts': 5}])
+    database = FakeDatabase({'messages': messages, 'logs': logs})
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = _index(directory)
+        assert index.sync(database) == {'messages': 3, 'logs': 1}
+
+        found = index.search('cosmo')
+        assert found['total'] == 3 and found['facets'] == {'messages': 2, 'logs': 1}
+        # Subject hits weigh more than content hits
+        assert found['results'][0]['document']['id'] == 'm1'
+        assert [r['document']['id'] for r in index.search('cosmos', container='logs')['results']] == ['l1']
+        assert len(index.search('cosmos', limit=1, offset=1)['results']) == 1
+
+        # Only documents at or after the watermark are read again, and edits replace the old text
+        messages.documents[2] = {'id': 'm3', 'subject': 'Status', 'content': 'cosmos is down', '_ts': 13}
+        assert index.sync(database)['messages'] == 1
+        assert index.search('report')['total'] == 0
+        assert index.search('cosmos')['facets']['messages'] == 3
+
+
+def test_deleted_documents_and_containers_removed():
+    messages = FakeContainer([
+        {'id': 'm1', 'subject': 'Keep', '_ts': 1},
+        {'id': 'm2', 'subject': 'Remove', '_ts': 2},
+    ])
+    database = FakeDatabase({'messages': messages, 'logs': FakeContainer([{'id': 'l1', 'action': 'keep', '_ts': 1}])})
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = _index(directory)
+        index.sync(database)
+
+        del messages.documents[1]
+        index.sync(database, sweep_seconds=0)
+        assert index.search('remove')['total'] == 0
+        assert index.search('keep')['facets'] == {'messages': 1, 'logs': 1}
+
+        del database.containers['logs']
+        index.sync(database)
+        assert index.search('keep')['facets'] == {'messages': 1}
+        assert index.status()['documents'] == 1
+
+
+if __name__ == "__main__":
+    test_match_query()
+    test_incremental_sync_and_search()
+    test_deleted_documents_and_containers_removed()
+    print("✅ Search index follows container changes")